@@ -0,0 +1,8 @@
+# __main__.py
+"""python -m apkeditor 入口（无界面命令行）"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,524 @@
+# apk_certs.py
+"""证书解析和签名校验（纯Python，不依赖Qt和第三方库）
+
+只实现验证APK签名所需的最小子集：
+    DER 解码、X.509 证书的主题/颁发者/有效期/指纹/公钥、PKCS#7 SignedData（v1签名块），
+    RSA PKCS#1 v1.5 / PSS、ECDSA（P-256/P-384/P-521）和 DSA 的签名校验。
+只做验证，不涉及私钥运算，因此不需要常数时间实现。
+"""
+
+import hashlib
+import datetime
+from dataclasses import dataclass, field
+
+
+class CertError(Exception):
+    """证书或签名数据无法解析"""
+
+
+# ---- DER ----
+
+TAG_INTEGER = 0x02
+TAG_BIT_STRING = 0x03
+TAG_OCTET_STRING = 0x04
+TAG_NULL = 0x05
+TAG_OID = 0x06
+TAG_SEQUENCE = 0x30
+TAG_SET = 0x31
+
+
+@dataclass(frozen=True)
+class Der:
+    """一个DER元素：tag 和在原数据中的位置"""
+    tag: int
+    data: bytes
+    start: int  # 元素（含tag和长度）的起始位置
+    content: int  # 内容起始位置
+    end: int  # 元素结束位置
+
+    @property
+    def value(self):
+        """内容字节"""
+        return self.data[self.content:self.end]
+
+    @property
+    def encoded(self):
+        """完整编码（含tag和长度）"""
+        return self.data[self.start:self.end]
+
+    def children(self):
+        """构造类型的子元素"""
+        return list(iter_der(self.data, self.content, self.end))
+
+    def as_int(self):
+        if self.tag != TAG_INTEGER:
+            raise CertError(f"期望 INTEGER，实际为 0x{self.tag:02x}")
+        return int.from_bytes(self.value, 'big', signed=True)
+
+    def as_oid(self):
+        if self.tag != TAG_OID:
+            raise CertError(f"期望 OID，实际为 0x{self.tag:02x}")
+        return decode_oid(self.value)
+
+
+def read_der(data, pos=0, end=None):
+    """读取 pos 处的一个DER元素"""
+    end = len(data) if end is None else end
+    if pos + 2 > end:
+        raise CertError("DER 数据被截断")
+    tag = data[pos]
+    length = data[pos + 1]
+    content = pos + 2
+    if length & 0x80:
+        count = length & 0x7F
+        if not count or content + count > end:
+            raise CertError("不支持的 DER 长度编码")
+        length = int.from_bytes(data[content:content + count], 'big')
+        content += count
+    if content + length > end:
+        raise CertError("DER 数据被截断")
+    return Der(tag, data, pos, content, content + length)
+
+
+def iter_der(data, pos=0, end=None):
+    """依次产生 [pos, end) 中的DER元素"""
+    end = len(data) if end is None else end
+    while pos < end:
+        element = read_der(data, pos, end)
+        yield element
+        pos = element.end
+
+
+def decode_oid(value):
+    """OID 内容字节转换为点分形式"""
+    if not value:
+        raise CertError("空 OID")
+    parts = [str(min(value[0] // 40, 2)), str(value[0] - 40 * min(value[0] // 40, 2))]
+    number = 0
+    for byte in value[1:]:
+        number = (number << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            parts.append(str(number))
+            number = 0
+    return '.'.join(parts)
+
+
+# ---- OID ----
+
+OID_RSA = '1.2.840.113549.1.1.1'
+OID_EC = '1.2.840.10045.2.1'
+OID_DSA = '1.2.840.10040.4.1'
+OID_PKCS7_SIGNED_DATA = '1.2.840.113549.1.7.2'
+OID_MESSAGE_DIGEST = '1.2.840.113549.1.9.4'
+
+# 摘要算法 OID -> hashlib 名称
+HASH_OIDS = {
+    '1.3.14.3.2.26': 'sha1',
+    '2.16.840.1.101.3.4.2.4': 'sha224',
+    '2.16.840.1.101.3.4.2.1': 'sha256',
+    '2.16.840.1.101.3.4.2.2': 'sha384',
+    '2.16.840.1.101.3.4.2.3': 'sha512',
+}
+
+# 曲线 OID -> (名称, p, a, b, Gx, Gy, n)
+CURVES = {
+    '1.2.840.10045.3.1.7': (
+        'P-256',
+        0xffffffff00000001000000000000000000000000ffffffffffffffffffffffff,
+        -3,
+        0x5ac635d8aa3a93e7b3ebbd55769886bc651d06b0cc53b0f63bce3c3e27d2604b,
+        0x6b17d1f2e12c4247f8bce6e563a440f277037d812deb33a0f4a13945d898c296,
+        0x4fe342e2fe1a7f9b8ee7eb4a7c0f9e162bce33576b315ececbb6406837bf51f5,
+        0xffffffff00000000ffffffffffffffffbce6faada7179e84f3b9cac2fc632551,
+    ),
+    '1.3.132.0.34': (
+        'P-384',
+        0xfffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffeffffffff0000000000000000ffffffff,
+        -3,
+        0xb3312fa7e23ee7e4988e056be3f82d19181d9c6efe8141120314088f5013875ac656398d8a2ed19d2a85c8edd3ec2aef,
+        0xaa87ca22be8b05378eb1c71ef320ad746e1d3b628ba79b9859f741e082542a385502f25dbf55296c3a545e3872760ab7,
+        0x3617de4a96262c6f5d9e98bf9292dc29f8f41dbd289a147ce9da3113b5f0b8c00a60b1ce1d7e819d7a431d7c90ea0e5f,
+        0xffffffffffffffffffffffffffffffffffffffffffffffffc7634d81f4372ddf581a0db248b0a77aecec196accc52973,
+    ),
+    '1.3.132.0.35': (
+        'P-521',
+        (1 << 521) - 1,
+        -3,
+        0x0051953eb9618e1c9a1f929a21a0b68540eea2da725b99b315f3b8b489918ef109e156193951ec7e937b1652c0bd3bb1bf073573df883d2c34f1ef451fd46b503f00,
+        0x00c6858e06b70404e9cd9e3ecb662395b4429c648139053fb521f828af606b4d3dbaa14b5e77efe75928fe1dc127a2ffa8de3348b3c1856a429bf97e7e31c2e5bd66,
+        0x011839296a789a3bc0045c8a5fb42c7d1bd998f54449579b446817afbd17273e662c97ee72995ef42640c550b9013fad0761353c7086a272c24088be94769fd16650,
+        0x01fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffa51868783bf2f966b7fcc0148f709a5d03bb5c9b8899c47aebb6fb71e91386409,
+    ),
+}
+
+_NAME_OIDS = {
+    '2.5.4.3': 'CN', '2.5.4.6': 'C', '2.5.4.7': 'L', '2.5.4.8': 'ST',
+    '2.5.4.10': 'O', '2.5.4.11': 'OU', '1.2.840.113549.1.9.1': 'E',
+}
+
+# PKCS#1 v1.5 中 DigestInfo 的前缀
+_DIGEST_INFO = {
+    'sha1': bytes.fromhex('3021300906052b0e03021a05000414'),
+    'sha224': bytes.fromhex('302d300d06096086480165030402040500041c'),
+    'sha256': bytes.fromhex('3031300d060960864801650304020105000420'),
+    'sha384': bytes.fromhex('3041300d060960864801650304020205000430'),
+    'sha512': bytes.fromhex('3051300d060960864801650304020305000440'),
+}
+
+
+# ---- 公钥 ----
+
+@dataclass(frozen=True)
+class PublicKey:
+    """解析后的公钥"""
+    kind: str  # RSA / EC / DSA
+    params: tuple  # RSA: (n, e)；EC: (曲线OID, x, y)；DSA: (p, q, g, y)
+    encoded: bytes  # SubjectPublicKeyInfo 的DER编码
+
+    @property
+    def bits(self):
+        if self.kind == 'RSA':
+            return self.params[0].bit_length()
+        if self.kind == 'EC':
+            return CURVES[self.params[0]][6].bit_length()
+        return self.params[0].bit_length()
+
+    def describe(self):
+        if self.kind == 'EC':
+            return f"EC {CURVES[self.params[0]][0]}"
+        return f"{self.kind} {self.bits}"
+
+
+def parse_public_key(spki):
+    """解析 SubjectPublicKeyInfo
+
+    Args:
+        spki: DER编码的 SubjectPublicKeyInfo（bytes）或已解析的 Der
+
+    Returns:
+        PublicKey
+    """
+    element = spki if isinstance(spki, Der) else read_der(spki)
+    algorithm, bit_string = element.children()[:2]
+    alg_children = algorithm.children()
+    oid = alg_children[0].as_oid()
+    if bit_string.tag != TAG_BIT_STRING:
+        raise CertError("公钥不是 BIT STRING")
+    key = bit_string.value[1:]
+    if oid == OID_RSA:
+        n, e = read_der(key).children()[:2]
+        return PublicKey('RSA', (n.as_int(), e.as_int()), element.encoded)
+    if oid == OID_EC:
+        curve = alg_children[1].as_oid()
+        if curve not in CURVES:
+            raise CertError(f"不支持的曲线: {curve}")
+        if not key or key[0] != 0x04:
+            raise CertError("不支持压缩格式的EC公钥")
+        size = (len(key) - 1) // 2
+        x = int.from_bytes(key[1:1 + size], 'big')
+        y = int.from_bytes(key[1 + size:], 'big')
+        return PublicKey('EC', (curve, x, y), element.encoded)
+    if oid == OID_DSA:
+        p, q, g = (child.as_int() for child in alg_children[1].children()[:3])
+        return PublicKey('DSA', (p, q, g, read_der(key).as_int()), element.encoded)
+    raise CertError(f"不支持的公钥算法: {oid}")
+
+
+# ---- 签名校验 ----
+
+def _mgf1(seed, length, hash_name):
+    output = b''
+    counter = 0
+    while len(output) < length:
+        output += hashlib.new(hash_name, seed + counter.to_bytes(4, 'big')).digest()
+        counter += 1
+    return output[:length]
+
+
+def _verify_rsa(key, message, signature, hash_name, pss):
+    n, e = key.params
+    size = (n.bit_length() + 7) // 8
+    if len(signature) != size:
+        return False
+    s = int.from_bytes(signature, 'big')
+    if s >= n:
+        return False
+    digest = hashlib.new(hash_name, message).digest()
+    if not pss:
+        em = pow(s, e, n).to_bytes(size, 'big')
+        prefix = _DIGEST_INFO[hash_name] + digest
+        return em == b'\x00\x01' + b'\xff' * (size - len(prefix) - 3) + b'\x00' + prefix
+
+    # EMSA-PSS-VERIFY，盐长度等于摘要长度（APK签名方案的约定）
+    em_bits = n.bit_length() - 1
+    em_len = (em_bits + 7) // 8
+    em = pow(s, e, n).to_bytes(em_len, 'big')
+    h_len = len(digest)
+    if em_len < 2 * h_len + 2 or em[-1] != 0xBC:
+        return False
+    masked, h = em[:em_len - h_len - 1], em[em_len - h_len - 1:-1]
+    unused = 8 * em_len - em_bits
+    if masked[0] & ~(0xFF >> unused) & 0xFF:
+        return False
+    db = bytes(a ^ b for a, b in zip(masked, _mgf1(h, len(masked), hash_name)))
+    db = bytes([db[0] & (0xFF >> unused)]) + db[1:]
+    separator = len(db) - h_len - 1
+    if db[:separator] != bytes(separator) or db[separator] != 0x01:
+        return False
+    salt = db[separator + 1:]
+    return hashlib.new(hash_name, bytes(8) + digest + salt).digest() == h
+
+
+def _ec_add(p1, p2, curve):
+    p = curve[1]
+    if p1 is None:
+        return p2
+    if p2 is None:
+        return p1
+    (x1, y1), (x2, y2) = p1, p2
+    if x1 == x2:
+        if (y1 + y2) % p == 0:
+            return None
+        slope = (3 * x1 * x1 + curve[2]) * pow(2 * y1, -1, p) % p
+    else:
+        slope = (y2 - y1) * pow(x2 - x1, -1, p) % p
+    x3 = (slope * slope - x1 - x2) % p
+    return x3, (slope * (x1 - x3) - y1) % p
+
+
+def _ec_multiply(point, k, curve):
+    result = None
+    while k:
+        if k & 1:
+            result = _ec_add(result, point, curve)
+        point = _ec_add(point, point, curve)
+        k >>= 1
+    return result
+
+
+def _truncate_digest(digest, order):
+    z = int.from_bytes(digest, 'big')
+    excess = len(digest) * 8 - order.bit_length()
+    return z >> excess if excess > 0 else z
+
+
+def _verify_ec(key, message, signature, hash_name):
+    curve_oid, x, y = key.params
+    curve = CURVES[curve_oid]
+    n = curve[6]
+    try:
+        r, s = (child.as_int() for child in read_der(signature).children()[:2])
+    except (CertError, ValueError):
+        return False
+    if not (0 < r < n and 0 < s < n):
+        return False
+    z = _truncate_digest(hashlib.new(hash_name, message).digest(), n)
+    w = pow(s, -1, n)
+    point = _ec_add(_ec_multiply((curve[4], curve[5]), z * w % n, curve),
+                    _ec_multiply((x, y), r * w % n, curve), curve)
+    return point is not None and point[0] % n == r
+
+
+def _verify_dsa(key, message, signature, hash_name):
+    p, q, g, y = key.params
+    try:
+        r, s = (child.as_int() for child in read_der(signature).children()[:2])
+    except (CertError, ValueError):
+        return False
+    if not (0 < r < q and 0 < s < q):
+        return False
+    z = _truncate_digest(hashlib.new(hash_name, message).digest(), q)
+    w = pow(s, -1, q)
+    return pow(g, z * w % q, p) * pow(y, r * w % q, p) % p % q == r
+
+
+def verify_signature(key, message, signature, hash_name, pss=False):
+    """校验签名
+
+    Args:
+        key: PublicKey
+        message: 被签名的数据
+        signature: 签名字节（RSA为原始签名，EC/DSA为DER编码的 (r, s)）
+        hash_name: hashlib 摘要名
+        pss: RSA 是否使用 PSS 填充
+
+    Returns:
+        bool: 签名是否有效
+    """
+    if key.kind == 'RSA':
+        return _verify_rsa(key, message, signature, hash_name, pss)
+    if key.kind == 'EC':
+        return _verify_ec(key, message, signature, hash_name)
+    if key.kind == 'DSA':
+        return _verify_dsa(key, message, signature, hash_name)
+    return False
+
+
+# ---- X.509 ----
+
+def _format_name(element):
+    parts = []
+    for rdn in element.children():
+        for attribute in rdn.children():
+            oid, value = attribute.children()[:2]
+            label = _NAME_OIDS.get(oid.as_oid(), oid.as_oid())
+            text = value.value.decode('utf-16-be' if value.tag == 0x1E else 'utf-8', errors='replace')
+            parts.append(f"{label}={text}")
+    return ", ".join(parts)
+
+
+def _parse_time(element):
+    text = element.value.decode('ascii')
+    if element.tag == 0x17:  # UTCTime
+        year = int(text[:2])
+        text = f"{1900 + year if year >= 50 else 2000 + year}{text[2:]}"
+    return datetime.datetime.strptime(text[:14], "%Y%m%d%H%M%S").replace(tzinfo=datetime.timezone.utc)
+
+
+@dataclass(frozen=True)
+class Certificate:
+    """X.509 证书"""
+    encoded: bytes
+    subject: str
+    issuer: str
+    serial: int
+    not_before: datetime.datetime
+    not_after: datetime.datetime
+    public_key: PublicKey = field(repr=False)
+
+    @property
+    def sha256(self):
+        return hashlib.sha256(self.encoded).hexdigest()
+
+    @property
+    def sha1(self):
+        return hashlib.sha1(self.encoded).hexdigest()
+
+    def describe(self):
+        """多行文本描述"""
+        return [
+            f"主题: {self.subject}",
+            f"颁发者: {self.issuer}",
+            f"序列号: {self.serial:x}",
+            f"有效期: {self.not_before:%Y-%m-%d} ~ {self.not_after:%Y-%m-%d}",
+            f"公钥: {self.public_key.describe()}",
+            f"SHA-256: {format_fingerprint(self.sha256)}",
+            f"SHA-1: {format_fingerprint(self.sha1)}",
+        ]
+
+
+def format_fingerprint(hex_digest):
+    """指纹格式化为 AB:CD:... """
+    return ':'.join(hex_digest[i:i + 2] for i in range(0, len(hex_digest), 2)).upper()
+
+
+def parse_certificate(data):
+    """解析DER编码的X.509证书
+
+    Args:
+        data: 证书DER编码（bytes）或已解析的 Der
+
+    Returns:
+        Certificate
+    """
+    element = data if isinstance(data, Der) else read_der(data)
+    try:
+        tbs = element.children()[0].children()
+        if tbs[0].tag == 0xA0:  # [0] version
+            tbs = tbs[1:]
+        serial, _, issuer, validity, subject, spki = tbs[:6]
+        not_before, not_after = validity.children()[:2]
+        return Certificate(
+            encoded=element.encoded,
+            subject=_format_name(subject),
+            issuer=_format_name(issuer),
+            serial=serial.as_int(),
+            not_before=_parse_time(not_before),
+            not_after=_parse_time(not_after),
+            public_key=parse_public_key(spki),
+        )
+    except (IndexError, ValueError, UnicodeDecodeError) as e:
+        raise CertError(f"证书解析失败: {e}")
+
+
+# ---- PKCS#7 ----
+
+@dataclass(frozen=True)
+class Pkcs7Signer:
+    """SignedData 中的一个签名者"""
+    issuer: str
+    serial: int
+    hash_name: str
+    signed_attrs: bytes  # 已换成 SET 标签的签名属性编码，没有时为 b''
+    message_digest: bytes  # 签名属性中的 messageDigest，没有时为 None
+    signature: bytes
+
+
+def parse_pkcs7(data):
+    """解析 PKCS#7 SignedData（v1签名块 .RSA/.DSA/.EC）
+
+    Returns:
+        tuple: (证书列表, Pkcs7Signer列表)
+    """
+    try:
+        content_info = read_der(data).children()
+        if content_info[0].as_oid() != OID_PKCS7_SIGNED_DATA:
+            raise CertError("不是 PKCS#7 SignedData")
+        signed_data = content_info[1].children()[0].children()
+        certificates = []
+        signers = []
+        for element in signed_data[3:]:
+            if element.tag == 0xA0:  # [0] IMPLICIT certificates
+                certificates = [parse_certificate(child) for child in element.children()]
+            elif element.tag == TAG_SET:
+                for info in element.children():
+                    signers.append(_parse_signer_info(info))
+        return certificates, signers
+    except (IndexError, ValueError) as e:
+        raise CertError(f"PKCS#7 解析失败: {e}")
+
+
+def _parse_signer_info(info):
+    children = info.children()
+    issuer_serial, digest_alg = children[1], children[2]
+    issuer, serial = issuer_serial.children()[:2]
+    hash_oid = digest_alg.children()[0].as_oid()
+    if hash_oid not in HASH_OIDS:
+        raise CertError(f"不支持的摘要算法: {hash_oid}")
+    rest = children[3:]
+    signed_attrs = b''
+    message_digest = None
+    if rest and rest[0].tag == 0xA0:
+        attrs = rest[0]
+        signed_attrs = bytes([TAG_SET]) + attrs.data[attrs.start + 1:attrs.end]
+        for attribute in attrs.children():
+            oid, values = attribute.children()[:2]
+            if oid.as_oid() == OID_MESSAGE_DIGEST:
+                message_digest = values.children()[0].value
+        rest = rest[1:]
+    signature = rest[1].value
+    return Pkcs7Signer(_format_name(issuer), serial.as_int(), HASH_OIDS[hash_oid],
+                       signed_attrs, message_digest, signature)
+
+
+def verify_pkcs7(certificates, signer, content):
+    """校验 PKCS#7 签名者对 content（.SF 文件）的签名
+
+    Returns:
+        tuple: (签名者证书或None, 是否有效)
+    """
+    cert = next((c for c in certificates if c.serial == signer.serial and c.issuer == signer.issuer), None)
+    if cert is None:
+        return None, False
+    if signer.signed_attrs:
+        if signer.message_digest != hashlib.new(signer.hash_name, content).digest():
+            return cert, False
+        message = signer.signed_attrs
+    else:
+        message = content
+    return cert, verify_signature(cert.public_key, message, signer.signature, signer.hash_name)
+
+
+__all__ = ['CertError', 'Der', 'read_der', 'iter_der', 'decode_oid', 'PublicKey', 'parse_public_key',
+           'verify_signature', 'Certificate', 'parse_certificate', 'format_fingerprint',
+           'Pkcs7Signer', 'parse_pkcs7', 'verify_pkcs7', 'HASH_OIDS', 'CURVES']
@@ -0,0 +1,168 @@
+# apk_patch.py
+"""原地补丁：替换APK中的少量条目而不完整重建（不依赖Qt）
+
+只改动一个 classesN.dex、一个资源文件或清单时，不需要 d → 编辑 → b 的完整流程：
+未改动的条目按原始压缩字节复制，只有替换和新增的条目重新压缩，
+写出时重新计算对齐和中央目录。旧的签名文件会被删除，输出可以直接交给 sign 操作签名。
+"""
+
+import os
+import fnmatch
+import logging
+from dataclasses import dataclass
+
+from .zip_rewrite import ZipSource, ZipRewriter, ZipRewriteError, STORED, is_signature_file
+from .zipalign import aligner
+
+logger = logging.getLogger(__name__)
+
+# Android 11 起要求资源表不压缩存储，新增时同样不压缩
+_STORED_NAMES = ("resources.arsc",)
+
+
+class PatchError(Exception):
+    """补丁参数错误或写出失败"""
+
+
+@dataclass(frozen=True)
+class PatchSummary:
+    """一次补丁的结果"""
+    output: str
+    copied: int  # 按原始字节复制的条目数
+    replaced: int  # 重新压缩写入的已有条目数
+    added: int  # 新增的条目数
+    removed: int  # 删除的条目数（含旧签名文件）
+
+
+def default_output(input_path):
+    """默认输出路径 <输入>_patched.apk"""
+    return os.path.splitext(os.path.abspath(input_path))[0] + "_patched.apk"
+
+
+def parse_replacements(specs):
+    """解析 "条目名=本地文件" 形式的替换参数
+
+    Returns:
+        dict: 条目名 -> 本地文件路径
+
+    Raises:
+        PatchError: 格式错误或文件不存在
+    """
+    replacements = {}
+    for spec in specs or ():
+        name, sep, path = spec.partition('=')
+        name = name.strip().replace('\\', '/').lstrip('/')
+        if not sep or not name or not path:
+            raise PatchError(f"替换参数应为 条目名=文件路径: {spec}")
+        if not os.path.isfile(path):
+            raise PatchError(f"替换文件不存在: {path}")
+        replacements[name] = path
+    return replacements
+
+
+def collect_directory(directory):
+    """把目录中的文件按相对路径映射为条目名（目录结构与APK内部一致）
+
+    Returns:
+        dict: 条目名 -> 本地文件路径
+    """
+    if not os.path.isdir(directory):
+        raise PatchError(f"补丁目录不存在: {directory}")
+    replacements = {}
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            replacements[os.path.relpath(full, directory).replace(os.sep, '/')] = full
+    return replacements
+
+
+def _store_new(name):
+    return name in _STORED_NAMES
+
+
+def patch_apk(input_path, replacements=None, remove=(), output_path=None, keep_signature=False,
+              align=None, log=None):
+    """写出替换了部分条目的新APK
+
+    Args:
+        input_path: 原APK
+        replacements: {条目名: 本地文件路径或bytes}，APK中不存在的条目作为新条目追加
+        remove: 要删除的条目名，支持通配符（如 "assets/debug/*"）
+        output_path: 输出路径，默认为 <输入>_patched.apk
+        keep_signature: 保留 META-INF 中的旧签名文件（默认删除，签名在补丁后必然失效）
+        align: 对齐规则，见 ZipRewriter；默认使用 zipalign.aligner()（4字节，.so 按页对齐）
+        log: 输出日志行的回调，默认写入logging
+
+    Returns:
+        PatchSummary: 补丁结果
+
+    Raises:
+        PatchError: 参数错误或读写失败
+    """
+    log = log or logger.info
+    replacements = dict(replacements or {})
+    remove = list(remove)
+    output_path = output_path or default_output(input_path)
+    if os.path.abspath(output_path) == os.path.abspath(input_path):
+        raise PatchError("输出路径不能与输入APK相同")
+    if not replacements and not remove:
+        raise PatchError("没有需要替换或删除的条目")
+    align = align or aligner()
+
+    def should_remove(name):
+        if name in replacements:
+            return False
+        if not keep_signature and is_signature_file(name):
+            return True
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in remove)
+
+    def load(value):
+        if isinstance(value, bytes):
+            return value, None
+        with open(value, 'rb') as f:
+            return f.read(), os.path.getmtime(value)
+
+    copied = replaced = added = removed = 0
+    try:
+        source = ZipSource(input_path)
+    except (OSError, ZipRewriteError) as e:
+        raise PatchError(f"无法读取输入APK: {e}")
+    with source:
+        out = ZipRewriter(output_path, align=align)
+        try:
+            for entry in source:
+                if entry.name in out:
+                    continue
+                if should_remove(entry.name):
+                    removed += 1
+                    continue
+                if entry.name in replacements:
+                    data, mtime = load(replacements.pop(entry.name))
+                    # 沿用原条目的压缩方式（例如 resources.arsc 和未压缩的 .so 保持不压缩）
+                    out.write(entry.name, data, compress=entry.method != STORED, timestamp=mtime)
+                    log(f"替换: {entry.name} ({len(data)} 字节)")
+                    replaced += 1
+                else:
+                    out.copy(source, entry)
+                    copied += 1
+            for name, value in replacements.items():
+                data, mtime = load(value)
+                out.write(name, data, compress=not _store_new(name), timestamp=mtime)
+                log(f"新增: {name} ({len(data)} 字节)")
+                added += 1
+            out.close()
+        except (OSError, ZipRewriteError) as e:
+            out.abort()
+            raise PatchError(str(e))
+        except BaseException:
+            out.abort()
+            raise
+
+    summary = PatchSummary(output_path, copied, replaced, added, removed)
+    log(f"复制 {copied} 个条目，替换 {replaced} 个，新增 {added} 个，删除 {removed} 个")
+    log(f"Saved to: {output_path}")
+    return summary
+
+
+__all__ = ['PatchError', 'PatchSummary', 'patch_apk', 'parse_replacements', 'collect_directory', 'default_output']
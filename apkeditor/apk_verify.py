@@ -0,0 +1,611 @@
+# apk_verify.py
+"""APK签名校验与证书查看（纯Python，不启动JVM）
+
+内存映射APK，定位 APK Signing Block，解析 v2 / v3 / v3.1 签名者和证书，
+用线程池按1MB分块重新计算内容摘要（hashlib 计算时释放GIL，可以并行），
+再校验签名者对签名数据的签名；同时校验 v1（META-INF）签名。
+批量模式用进程池并行处理多个APK。
+"""
+
+import os
+import mmap
+import zlib
+import base64
+import struct
+import hashlib
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .apk_certs import (CertError, parse_certificate, parse_public_key, verify_signature,
+                        parse_pkcs7, verify_pkcs7, format_fingerprint)
+from .zip_rewrite import ZipSource, ZipRewriteError, STORED, DEFLATED
+
+APK_SIG_BLOCK_MAGIC = b"APK Sig Block 42"
+APK_SIG_BLOCK_MIN_SIZE = 32
+
+# 签名分块中的ID
+V2_BLOCK_ID = 0x7109871a
+V3_BLOCK_ID = 0xf05368c0
+V31_BLOCK_ID = 0x1b93ad61
+SCHEME_BLOCKS = (("v2", V2_BLOCK_ID), ("v3", V3_BLOCK_ID), ("v3.1", V31_BLOCK_ID))
+
+CHUNK_SIZE = 1024 * 1024
+
+# 签名算法ID -> (hashlib 摘要名, 是否PSS, 内容摘要算法)
+SIGNATURE_ALGORITHMS = {
+    0x0101: ('sha256', True, 'sha256'),
+    0x0102: ('sha512', True, 'sha512'),
+    0x0103: ('sha256', False, 'sha256'),
+    0x0104: ('sha512', False, 'sha512'),
+    0x0201: ('sha256', False, 'sha256'),
+    0x0202: ('sha512', False, 'sha512'),
+    0x0301: ('sha256', False, 'sha256'),
+}
+# fs-verity 内容摘要的算法（依赖v4/增量安装，只做签名校验，不重新计算内容摘要）
+VERITY_ALGORITHMS = {0x0421: 'sha256', 0x0423: 'sha256', 0x0425: 'sha256'}
+
+# v1签名中 "X-Android-APK-Signed" 声明的方案编号
+_SCHEME_IDS = {"2": "v2", "3": "v3"}
+
+
+class VerifyError(Exception):
+    """APK无法读取或结构损坏"""
+
+
+@dataclass
+class SignerResult:
+    """一个签名者的校验结果"""
+    scheme: str
+    certificates: list = field(default_factory=list)
+    digests_ok: bool = False
+    signature_ok: bool = False
+    min_sdk: int = None
+    max_sdk: int = None
+    errors: list = field(default_factory=list)
+
+    @property
+    def verified(self):
+        return self.digests_ok and self.signature_ok and not self.errors
+
+
+@dataclass
+class VerifyResult:
+    """一个APK的校验结果"""
+    path: str
+    signers: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+    @property
+    def schemes(self):
+        """存在签名的方案（按 v1, v2, v3, v3.1 排序）"""
+        found = {signer.scheme for signer in self.signers}
+        return [scheme for scheme in ("v1", "v2", "v3", "v3.1") if scheme in found]
+
+    @property
+    def verified(self):
+        return bool(self.signers) and not self.errors and all(signer.verified for signer in self.signers)
+
+    def as_dict(self):
+        return {
+            "path": self.path,
+            "verified": self.verified,
+            "schemes": self.schemes,
+            "errors": self.errors,
+            "signers": [{
+                "scheme": signer.scheme,
+                "verified": signer.verified,
+                "digests_ok": signer.digests_ok,
+                "signature_ok": signer.signature_ok,
+                "min_sdk": signer.min_sdk,
+                "max_sdk": signer.max_sdk,
+                "errors": signer.errors,
+                "certificates": [{
+                    "subject": cert.subject,
+                    "issuer": cert.issuer,
+                    "serial": f"{cert.serial:x}",
+                    "not_before": cert.not_before.isoformat(),
+                    "not_after": cert.not_after.isoformat(),
+                    "public_key": cert.public_key.describe(),
+                    "sha256": cert.sha256,
+                } for cert in signer.certificates],
+            } for signer in self.signers],
+        }
+
+
+# ---- 长度前缀结构 ----
+
+def _u32(data, pos):
+    return struct.unpack_from('<I', data, pos)[0]
+
+
+def _prefixed(data, pos=0):
+    """读取 uint32 长度前缀的字段
+
+    Returns:
+        tuple: (字段内容, 下一个字段的位置)
+    """
+    if pos + 4 > len(data):
+        raise VerifyError("签名数据被截断")
+    size = _u32(data, pos)
+    end = pos + 4 + size
+    if end > len(data):
+        raise VerifyError("签名数据被截断")
+    return data[pos + 4:end], end
+
+
+def _prefixed_sequence(data):
+    """长度前缀字段组成的序列"""
+    items = []
+    pos = 0
+    while pos < len(data):
+        item, pos = _prefixed(data, pos)
+        items.append(item)
+    return items
+
+
+# ---- 签名分块 ----
+
+def find_signing_block(mm, cd_offset):
+    """定位 APK Signing Block
+
+    Returns:
+        tuple: (分块起始位置, {ID: 值})；没有签名分块时返回 (cd_offset, {})
+    """
+    if cd_offset < APK_SIG_BLOCK_MIN_SIZE or mm[cd_offset - 16:cd_offset] != APK_SIG_BLOCK_MAGIC:
+        return cd_offset, {}
+    size = struct.unpack_from('<Q', mm, cd_offset - 24)[0]
+    start = cd_offset - size - 8
+    if size < 24 or start < 0 or struct.unpack_from('<Q', mm, start)[0] != size:
+        raise VerifyError("APK Signing Block 损坏")
+    pairs = {}
+    pos = start + 8
+    end = cd_offset - 24
+    while pos < end:
+        length = struct.unpack_from('<Q', mm, pos)[0]
+        if length < 4 or pos + 8 + length > end:
+            raise VerifyError("APK Signing Block 中的条目损坏")
+        block_id = _u32(mm, pos + 8)
+        pairs[block_id] = bytes(mm[pos + 12:pos + 8 + length])
+        pos += 8 + length
+    return start, pairs
+
+
+def _chunk_digest(hash_name, chunk):
+    digest = hashlib.new(hash_name)
+    digest.update(b'\xa5' + struct.pack('<I', len(chunk)))
+    digest.update(chunk)
+    return digest.digest()
+
+
+def content_digest(mm, block_start, cd_offset, eocd_offset, hash_name, pool):
+    """v2/v3 的内容摘要：条目数据、中央目录、EOCD（中央目录偏移改为分块起始位置）按1MB分块
+
+    Args:
+        mm: APK的mmap
+        block_start: 签名分块起始位置（没有分块时为中央目录位置）
+        cd_offset: 中央目录位置
+        eocd_offset: 目录结束记录位置
+        hash_name: 摘要算法
+        pool: 计算分块摘要的线程池
+
+    Returns:
+        bytes: 顶层摘要
+    """
+    eocd = bytearray(mm[eocd_offset:])
+    struct.pack_into('<I', eocd, 16, block_start)
+    with memoryview(mm) as view:
+        chunks = []
+        for start, end in ((0, block_start), (cd_offset, eocd_offset)):
+            chunks.extend(view[pos:min(pos + CHUNK_SIZE, end)] for pos in range(start, end, CHUNK_SIZE))
+        chunks.append(memoryview(bytes(eocd)))
+        try:
+            digests = list(pool.map(lambda chunk: _chunk_digest(hash_name, chunk), chunks))
+        finally:
+            count = len(chunks)
+            for chunk in chunks:
+                chunk.release()
+            del chunks
+    top = hashlib.new(hash_name)
+    top.update(b'\x5a' + struct.pack('<I', count))
+    for digest in digests:
+        top.update(digest)
+    return top.digest()
+
+
+@dataclass(frozen=True)
+class SchemeSigner:
+    """v2/v3 签名块中一个签名者的原始字段"""
+    scheme: str
+    signed_data: bytes
+    digests: dict  # 签名算法ID -> 内容摘要
+    certificates: list  # 证书DER编码
+    signatures: list  # (签名算法ID, 签名)
+    public_key: bytes  # SubjectPublicKeyInfo DER编码
+    min_sdk: int = None
+    max_sdk: int = None
+    signed_sdk: tuple = None  # 签名数据中的 (minSdk, maxSdk)
+
+
+def parse_scheme_signer(scheme, data):
+    """解析 v2/v3 的一个签名者
+
+    Returns:
+        SchemeSigner
+    """
+    signed_data, pos = _prefixed(data)
+    min_sdk = max_sdk = signed_sdk = None
+    if scheme != "v2":
+        min_sdk, max_sdk = struct.unpack_from('<II', data, pos)
+        pos += 8
+    signatures, pos = _prefixed(data, pos)
+    public_key, _ = _prefixed(data, pos)
+
+    digests_data, sd_pos = _prefixed(signed_data)
+    certs_data, sd_pos = _prefixed(signed_data, sd_pos)
+    if scheme != "v2":
+        signed_sdk = struct.unpack_from('<II', signed_data, sd_pos)
+    digests = {}
+    for item in _prefixed_sequence(digests_data):
+        digests[_u32(item, 0)] = _prefixed(item, 4)[0]
+    return SchemeSigner(
+        scheme=scheme,
+        signed_data=signed_data,
+        digests=digests,
+        certificates=_prefixed_sequence(certs_data),
+        signatures=[(_u32(item, 0), _prefixed(item, 4)[0]) for item in _prefixed_sequence(signatures)],
+        public_key=public_key,
+        min_sdk=min_sdk,
+        max_sdk=max_sdk,
+        signed_sdk=signed_sdk,
+    )
+
+
+def iter_scheme_signers(pairs):
+    """签名分块中所有 v2/v3/v3.1 签名者的原始数据
+
+    Yields:
+        tuple: (方案名, 签名者数据)，签名块中没有签名者时数据为None
+    """
+    for scheme, block_id in SCHEME_BLOCKS:
+        if block_id not in pairs:
+            continue
+        signers_data, _ = _prefixed(pairs[block_id])
+        signers = _prefixed_sequence(signers_data)
+        if not signers:
+            yield scheme, None
+        for signer in signers:
+            yield scheme, signer
+
+
+def read_scheme_signers(path):
+    """读取APK中 v2/v3/v3.1 签名者（不校验）
+
+    Returns:
+        list: SchemeSigner 列表，按 v2, v3, v3.1 排序
+    """
+    with ZipSource(path) as source, open(path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        _, pairs = find_signing_block(mm, source.cd_offset)
+    return [parse_scheme_signer(scheme, data) for scheme, data in iter_scheme_signers(pairs) if data is not None]
+
+
+def _verify_scheme_signer(scheme, data, digest_for):
+    """校验 v2/v3 的一个签名者
+
+    Args:
+        scheme: 方案名
+        data: 签名者数据
+        digest_for: 接收内容摘要算法名返回实际内容摘要的函数
+    """
+    result = SignerResult(scheme)
+    signer = parse_scheme_signer(scheme, data)
+    result.min_sdk, result.max_sdk = signer.min_sdk, signer.max_sdk
+    try:
+        result.certificates = [parse_certificate(cert) for cert in signer.certificates]
+        public_key = parse_public_key(signer.public_key)
+    except CertError as e:
+        result.errors.append(str(e))
+        return result
+    if not result.certificates:
+        result.errors.append("签名者没有证书")
+    elif result.certificates[0].public_key.encoded != public_key.encoded:
+        result.errors.append("签名者公钥与证书不一致")
+    if signer.signed_sdk is not None and signer.signed_sdk != (signer.min_sdk, signer.max_sdk):
+        result.errors.append("签名数据中的SDK范围与签名者不一致")
+
+    # 签名：校验所有支持的算法，未知算法跳过
+    signed_algorithms = []
+    signature_errors = []
+    for algorithm, signature in signer.signatures:
+        signed_algorithms.append(algorithm)
+        if algorithm in SIGNATURE_ALGORITHMS:
+            hash_name, pss, _ = SIGNATURE_ALGORITHMS[algorithm]
+        elif algorithm in VERITY_ALGORITHMS:
+            hash_name, pss = VERITY_ALGORITHMS[algorithm], False
+        else:
+            continue
+        if not verify_signature(public_key, signer.signed_data, signature, hash_name, pss):
+            signature_errors.append(f"签名无效 (算法 0x{algorithm:04x})")
+    if not signed_algorithms:
+        signature_errors.append("签名者没有签名")
+    result.errors.extend(signature_errors)
+    result.signature_ok = not signature_errors
+
+    # 内容摘要：签名数据中的摘要必须与签名的算法一一对应，重新计算支持的摘要
+    digests = signer.digests
+    if sorted(digests) != sorted(signed_algorithms):
+        result.errors.append("签名算法与摘要算法列表不一致")
+    digest_errors = []
+    checked = False
+    for algorithm, expected in digests.items():
+        if algorithm in SIGNATURE_ALGORITHMS:
+            checked = True
+            if digest_for(SIGNATURE_ALGORITHMS[algorithm][2]) != expected:
+                digest_errors.append(f"内容摘要不匹配 (算法 0x{algorithm:04x})")
+    if not checked:
+        digest_errors.append("没有可重新计算的内容摘要算法")
+    result.errors.extend(digest_errors)
+    result.digests_ok = not digest_errors
+    return result
+
+
+# ---- v1 ----
+
+def _manifest_sections(data):
+    """MANIFEST.MF / .SF 分节
+
+    Returns:
+        list: (原始字节, {属性名: 值})，第一节为主属性
+    """
+    sections = []
+    for raw in data.replace(b'\r\n', b'\n').split(b'\n\n'):
+        if not raw.strip():
+            continue
+        attrs = {}
+        key = None
+        for line in raw.split(b'\n'):
+            if line.startswith(b' ') and key is not None:
+                attrs[key] += line[1:].decode('utf-8', errors='replace')
+            elif b':' in line:
+                key, _, value = line.partition(b':')
+                key = key.decode('utf-8', errors='replace')
+                attrs[key] = value.strip().decode('utf-8', errors='replace')
+        sections.append(attrs)
+    return sections
+
+
+def _raw_sections(data):
+    """按原始字节切分各节（含节末的空行），用于 .SF 中每节的摘要"""
+    sections = []
+    start = 0
+    newline = b'\r\n' if b'\r\n' in data[:4096] else b'\n'
+    separator = newline * 2
+    while start < len(data):
+        end = data.find(separator, start)
+        end = len(data) if end < 0 else end + len(separator)
+        sections.append(data[start:end])
+        start = end
+    return sections
+
+
+_V1_DIGESTS = (("SHA-512", "sha512"), ("SHA-384", "sha384"), ("SHA-256", "sha256"), ("SHA1", "sha1"), ("SHA-1", "sha1"))
+
+
+def _attr_digest(attrs, suffix):
+    """从属性中取最强的摘要 (hashlib名, 期望值)"""
+    for prefix, hash_name in _V1_DIGESTS:
+        value = attrs.get(f"{prefix}-{suffix}")
+        if value:
+            return hash_name, base64.b64decode(value)
+    return None, None
+
+
+def _read_entry(mm, source, entry):
+    offset = source.data_offset(entry)
+    raw = mm[offset:offset + entry.csize]
+    if entry.method == STORED:
+        return raw
+    if entry.method == DEFLATED:
+        return zlib.decompress(raw, -15)
+    raise VerifyError(f"不支持的压缩方式 {entry.method}: {entry.name}")
+
+
+def verify_v1(mm, source, pool):
+    """校验 v1 (JAR) 签名
+
+    Returns:
+        tuple: (SignerResult列表, X-Android-APK-Signed 声明的方案列表)
+    """
+    names = {entry.name.upper(): entry for entry in source}
+    manifest_entry = names.get("META-INF/MANIFEST.MF")
+    sig_files = [entry for name, entry in names.items()
+                 if name.startswith("META-INF/") and name.count('/') == 1 and name.endswith(".SF")]
+    if manifest_entry is None or not sig_files:
+        return [], []
+
+    manifest = _read_entry(mm, source, manifest_entry)
+    manifest_sections = _manifest_sections(manifest)
+    raw_sections = _raw_sections(manifest)
+    section_by_name = {}
+    for attrs, raw in zip(manifest_sections[1:], raw_sections[1:]):
+        if "Name" in attrs:
+            section_by_name[attrs["Name"]] = (attrs, raw)
+
+    # 每个条目的摘要（解压和摘要在线程池中并行）
+    def check_entry(entry):
+        attrs, _ = section_by_name.get(entry.name, (None, None))
+        if attrs is None:
+            return f"未签名的条目: {entry.name}"
+        hash_name, expected = _attr_digest(attrs, "Digest")
+        if hash_name is None:
+            return f"条目没有摘要: {entry.name}"
+        if hashlib.new(hash_name, _read_entry(mm, source, entry)).digest() != expected:
+            return f"条目摘要不匹配: {entry.name}"
+        return None
+
+    to_check = [entry for entry in source
+                if not entry.is_dir and not entry.name.upper().startswith("META-INF/")]
+    for entry in to_check:
+        source.data_offset(entry)  # 预先读取本地文件头，线程中只读取 mmap
+    entry_errors = [error for error in pool.map(check_entry, to_check) if error]
+
+    results = []
+    declared = []
+    for sf_entry in sig_files:
+        base = sf_entry.name[:-3]
+        result = SignerResult("v1", errors=list(entry_errors))
+        results.append(result)
+        block_entry = next((names[base.upper() + ext] for ext in (".RSA", ".DSA", ".EC")
+                            if base.upper() + ext in names), None)
+        if block_entry is None:
+            result.errors.append(f"缺少签名块: {base}.RSA/.DSA/.EC")
+            continue
+        sf = _read_entry(mm, source, sf_entry)
+        try:
+            certificates, signers = parse_pkcs7(_read_entry(mm, source, block_entry))
+        except CertError as e:
+            result.errors.append(str(e))
+            continue
+        signature_ok = bool(signers)
+        for signer in signers:
+            cert, ok = verify_pkcs7(certificates, signer, sf)
+            if cert is not None:
+                result.certificates.append(cert)
+            if not ok:
+                result.errors.append(f"{block_entry.name} 的签名无效")
+                signature_ok = False
+        result.signature_ok = signature_ok
+
+        sf_sections = _manifest_sections(sf)
+        main = sf_sections[0] if sf_sections else {}
+        declared.extend(_SCHEME_IDS[item.strip()] for item in main.get("X-Android-APK-Signed", "").split(',')
+                        if item.strip() in _SCHEME_IDS)
+        hash_name, expected = _attr_digest(main, "Digest-Manifest")
+        if hash_name and hashlib.new(hash_name, manifest).digest() == expected:
+            result.digests_ok = not entry_errors
+            continue
+        # 整个清单的摘要不匹配时逐节校验
+        digests_ok = not entry_errors
+        for attrs in sf_sections[1:]:
+            name = attrs.get("Name")
+            hash_name, expected = _attr_digest(attrs, "Digest")
+            if name not in section_by_name or hash_name is None:
+                continue
+            if hashlib.new(hash_name, section_by_name[name][1]).digest() != expected:
+                result.errors.append(f".SF 中的摘要不匹配: {name}")
+                digests_ok = False
+        result.digests_ok = digests_ok
+    return results, declared
+
+
+# ---- 入口 ----
+
+def verify_apk(path, threads=None):
+    """校验一个APK的签名
+
+    Args:
+        path: APK路径
+        threads: 计算分块摘要的线程数，默认CPU核心数
+
+    Returns:
+        VerifyResult
+    """
+    result = VerifyResult(path)
+    try:
+        with ZipSource(path) as source, open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise VerifyError("文件为空")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                    ThreadPoolExecutor(max_workers=threads or os.cpu_count() or 1) as pool:
+                _verify_mapped(result, mm, source, pool)
+    except (OSError, ZipRewriteError, VerifyError, CertError, struct.error, ValueError) as e:
+        result.errors.append(f"无法校验: {e}")
+    return result
+
+
+def _verify_mapped(result, mm, source, pool):
+    block_start, pairs = find_signing_block(mm, source.cd_offset)
+    digests = {}
+
+    def digest_for(hash_name):
+        if hash_name not in digests:
+            digests[hash_name] = content_digest(mm, block_start, source.cd_offset, source.eocd_offset,
+                                                hash_name, pool)
+        return digests[hash_name]
+
+    for scheme, data in iter_scheme_signers(pairs):
+        if data is None:
+            result.errors.append(f"{scheme} 签名块中没有签名者")
+        else:
+            result.signers.append(_verify_scheme_signer(scheme, data, digest_for))
+
+    v1_signers, declared = verify_v1(mm, source, pool)
+    result.signers[:0] = v1_signers
+    for scheme in declared:
+        # v1 声明了更高的方案但签名块已被去掉：可能是降级攻击
+        if scheme not in result.schemes:
+            result.errors.append(f"v1 签名声明了 {scheme} 签名，但APK中没有")
+    if not result.signers:
+        result.errors.append("APK没有签名")
+
+
+def _verify_one(path):
+    # 进程池中每个进程一次处理一个APK，分块摘要使用少量线程
+    return verify_apk(path, threads=2)
+
+
+def verify_many(paths, jobs=None):
+    """并行校验多个APK（进程池，使用所有CPU核心）
+
+    Args:
+        paths: APK路径列表
+        jobs: 进程数，默认CPU核心数
+
+    Yields:
+        VerifyResult: 按输入顺序产生
+    """
+    paths = list(paths)
+    if len(paths) <= 1:
+        for path in paths:
+            yield verify_apk(path)
+        return
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        yield from pool.map(_verify_one, paths, chunksize=4)
+
+
+def collect_apks(path):
+    """目录下（递归）的所有APK；path 为文件时原样返回"""
+    if not os.path.isdir(path):
+        return [path]
+    return sorted(os.path.join(root, name) for root, _, files in os.walk(path)
+                  for name in files if name.lower().endswith('.apk'))
+
+
+def format_result(result, show_certs=False):
+    """校验结果格式化为文本行"""
+    status = "通过" if result.verified else "失败"
+    lines = [f"{result.path}: {status} ({', '.join(result.schemes) or '无签名'})"]
+    for error in result.errors:
+        lines.append(f"  错误: {error}")
+    seen = set()
+    for index, signer in enumerate(result.signers, 1):
+        ok = lambda value: "通过" if value else "失败"
+        sdk = ""
+        if signer.min_sdk is not None:
+            sdk = f"  SDK {signer.min_sdk}~{signer.max_sdk if signer.max_sdk < 0x7FFFFFFF else '*'}"
+        lines.append(f"  [{signer.scheme}] 签名者 #{index}: 摘要 {ok(signer.digests_ok)}  "
+                     f"签名 {ok(signer.signature_ok)}{sdk}")
+        for error in signer.errors:
+            lines.append(f"    错误: {error}")
+        for cert in signer.certificates[:1]:
+            if show_certs and cert.sha256 not in seen:
+                seen.add(cert.sha256)
+                lines.extend(f"    {line}" for line in cert.describe())
+            else:
+                lines.append(f"    {cert.subject}  SHA-256: {format_fingerprint(cert.sha256)}")
+    return lines
+
+
+__all__ = ['VerifyError', 'SignerResult', 'VerifyResult', 'SchemeSigner', 'verify_apk', 'verify_many',
+           'collect_apks', 'format_result', 'find_signing_block', 'content_digest', 'parse_scheme_signer',
+           'iter_scheme_signers', 'read_scheme_signers']
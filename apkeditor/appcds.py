@@ -0,0 +1,280 @@
+# appcds.py
+"""APKEditor jar 的 AppCDS（应用类数据共享）归档
+
+JVM 启动时相当一部分时间花在加载和校验 APKEditor 的类上。JDK 13+ 可以在进程退出时
+把已加载的类转储为动态归档（-XX:ArchiveClassesAtExit），之后的启动通过
+-XX:SharedArchiveFile 直接映射该归档。
+
+归档按 jar 内容哈希和 Java 版本命名，保存在 CACHE_DIR/cds：jar 或 JDK 变化后名称随之变化，
+下一次启动自动重新训练。没有归档时，第一次启动会顺便转储归档（训练），成功结束后才启用；
+也可以用 train() 或 `python -m apkeditor cds train` 主动训练。
+"""
+
+import os
+import re
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import itertools
+import threading
+import subprocess
+
+from .constants import CACHE_DIR, APPCDS_ENABLED
+from .jre_registry import probe_java
+
+logger = logging.getLogger(__name__)
+
+CDS_DIR = os.path.join(CACHE_DIR, "cds")
+
+# 动态归档需要 JDK 13+
+MIN_JAVA_VERSION = 13
+# 保留的归档数（旧 jar / JDK 的归档按生成时间淘汰）
+ARCHIVE_KEEP = 8
+# 训练锁超过该时间（秒）视为遗留的锁
+STALE_LOCK_SECONDS = 600
+
+# 隐藏Windows下的命令行窗口
+if os.name == 'nt':
+    PLATFORM_ARGS = {'creationflags': subprocess.CREATE_NO_WINDOW}
+else:
+    PLATFORM_ARGS = {}
+
+_lock = threading.Lock()
+_training = set()    # 本进程中正在训练的归档
+_temp_ids = itertools.count(1)
+
+
+def java_version(java="java"):
+    """java 的主版本号和版本字符串（由 Java 注册表探测并缓存）
+
+    Returns:
+        tuple: (主版本号, 版本字符串)，无法运行时返回 (None, None)
+    """
+    runtime = probe_java(java)
+    return (runtime.major, runtime.version) if runtime else (None, None)
+
+
+def jar_digest(jar):
+    """jar 内容的哈希（由工具注册表按大小和修改时间缓存），文件不存在时返回None"""
+    from .tool_registry import default_registry
+    try:
+        return default_registry().sha256(jar)[:16]
+    except OSError:
+        return None
+
+
+def archive_path(java, jar):
+    """java + jar 对应的归档路径
+
+    Returns:
+        str: 归档路径（可能尚未生成），JDK 不支持动态归档或 jar 不存在时返回None
+    """
+    runtime = probe_java(java)
+    if runtime is None or not runtime.dynamic_cds:
+        return None
+    digest = jar_digest(jar)
+    if digest is None:
+        return None
+    name = os.path.splitext(os.path.basename(jar))[0]
+    java_id = hashlib.sha256(f"{runtime.java}\0{runtime.version}".encode("utf-8")).hexdigest()[:8]
+    safe_version = re.sub(r"[^\w.-]", "_", runtime.version)
+    return os.path.join(CDS_DIR, f"{name}-{digest}-jdk{safe_version}-{java_id}.jsa")
+
+
+def jar_of(args):
+    """java 参数中 -jar 指定的 jar，没有时返回None"""
+    try:
+        return os.path.abspath(args[args.index("-jar") + 1])
+    except (ValueError, IndexError):
+        return None
+
+
+def _claim(path):
+    """占用训练锁（本进程和其他进程中同一归档只训练一次）"""
+    with _lock:
+        if path in _training:
+            return False
+        lock = path + ".lock"
+        try:
+            if time.time() - os.path.getmtime(lock) > STALE_LOCK_SECONDS:
+                os.remove(lock)
+        except OSError:
+            pass
+        try:
+            os.makedirs(CDS_DIR, exist_ok=True)
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except OSError:
+            return False
+        _training.add(path)
+        return True
+
+
+def _release(path):
+    with _lock:
+        _training.discard(path)
+        try:
+            os.remove(path + ".lock")
+        except OSError:
+            pass
+
+
+def _prune():
+    """只保留最近生成的 ARCHIVE_KEEP 个归档"""
+    try:
+        archives = [os.path.join(CDS_DIR, name) for name in os.listdir(CDS_DIR) if name.endswith(".jsa")]
+    except OSError:
+        return
+    archives.sort(key=os.path.getmtime, reverse=True)
+    for path in archives[ARCHIVE_KEEP:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def with_cds(java, args, train=True):
+    """在 java -jar 参数前加上 AppCDS 参数
+
+    已有归档时使用归档；没有归档且 train 为True时，本次启动在退出时转储归档，
+    调用方需要在进程结束后调用 finish_training()。
+
+    Args:
+        java: java可执行文件
+        args: java 参数列表
+        train: 没有归档时是否由本次启动训练
+
+    Returns:
+        tuple: (新的参数列表, 训练信息或None)
+    """
+    if not APPCDS_ENABLED or any(arg.startswith(("-XX:SharedArchiveFile", "-XX:ArchiveClassesAtExit", "-Xshare"))
+                                 for arg in args):
+        return args, None
+    jar = jar_of(args)
+    path = archive_path(java, jar) if jar else None
+    if path is None:
+        return args, None
+    if os.path.exists(path):
+        return [f"-XX:SharedArchiveFile={path}"] + args, None
+    if not train or not _claim(path):
+        return args, None
+    temp_path = f"{path}.{os.getpid()}-{next(_temp_ids)}.tmp"
+    return [f"-XX:ArchiveClassesAtExit={temp_path}"] + args, (temp_path, path)
+
+
+def finish_training(training, exit_code):
+    """训练启动结束后启用归档（只采用成功结束的任务转储的归档）
+
+    Args:
+        training: with_cds() 返回的训练信息，None时不做任何事
+        exit_code: 进程退出码
+
+    Returns:
+        bool: 是否生成了归档
+    """
+    if training is None:
+        return False
+    temp_path, path = training
+    try:
+        if exit_code == 0 and os.path.exists(temp_path) and os.path.getsize(temp_path) > 0:
+            os.replace(temp_path, path)
+            logger.info(f"已生成 AppCDS 归档: {path}")
+            _prune()
+            return True
+        return False
+    except OSError as e:
+        logger.warning(f"无法保存 AppCDS 归档: {e}")
+        return False
+    finally:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        _release(path)
+
+
+def representative_args(jar, sample=None, output_dir=None):
+    """训练用的代表性操作：有样本APK时反编译它，否则只加载 jar 的命令行入口"""
+    if sample:
+        return ["-jar", jar, "d", "-i", sample, "-o", output_dir, "-f"]
+    return ["-jar", jar, "-h"]
+
+
+def train(java, jar, sample=None, log=None):
+    """运行一次代表性操作并生成（覆盖）归档
+
+    Args:
+        java: java可执行文件
+        jar: APKEditor jar
+        sample: 用于训练的样本APK，None时只训练启动路径
+        log: 输出进度的回调
+
+    Returns:
+        str: 归档路径
+
+    Raises:
+        RuntimeError: JDK 不支持动态归档，或没有生成归档
+    """
+    log = log or logger.info
+    path = archive_path(java, jar)
+    if path is None:
+        major, _ = java_version(java)
+        raise RuntimeError(f"需要 JDK {MIN_JAVA_VERSION}+ 和存在的 jar（当前 java 主版本: {major}）")
+    if not _claim(path):
+        raise RuntimeError("该归档正在训练中")
+    temp_path = f"{path}.{os.getpid()}-{next(_temp_ids)}.tmp"
+    output_dir = tempfile.mkdtemp(prefix="apkeditor-cds-")
+    try:
+        args = [f"-XX:ArchiveClassesAtExit={temp_path}"] + representative_args(
+            os.path.abspath(jar), sample, os.path.join(output_dir, "out"))
+        log(f"> {java} {' '.join(args)}")
+        started = time.monotonic()
+        result = subprocess.run([java] + args, capture_output=True, text=True, errors="replace", **PLATFORM_ARGS)
+        if not os.path.exists(temp_path):
+            raise RuntimeError(f"没有生成归档（退出码 {result.returncode}）: {result.stdout.strip()[-500:]}")
+        os.replace(temp_path, path)
+        log(f"已生成 {path}（{os.path.getsize(path) / 1024 / 1024:.1f} MB，{time.monotonic() - started:.1f} 秒）")
+        _prune()
+        return path
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        _release(path)
+
+
+def archives():
+    """已有的归档
+
+    Returns:
+        list: (路径, 字节数) 列表，最近生成的在前
+    """
+    try:
+        paths = [os.path.join(CDS_DIR, name) for name in os.listdir(CDS_DIR) if name.endswith(".jsa")]
+    except OSError:
+        return []
+    paths.sort(key=os.path.getmtime, reverse=True)
+    return [(path, os.path.getsize(path)) for path in paths]
+
+
+def clear():
+    """删除全部归档
+
+    Returns:
+        int: 删除的归档数
+    """
+    removed = 0
+    for path, _ in archives():
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+__all__ = ['CDS_DIR', 'MIN_JAVA_VERSION', 'java_version', 'jar_digest', 'archive_path',
+           'jar_of', 'with_cds', 'finish_training', 'representative_args', 'train', 'archives', 'clear']
@@ -0,0 +1,402 @@
+# artifact_cache.py
+"""按内容寻址的构件缓存（不依赖Qt）
+
+对同一个输入、同一个 APKEditor jar、同样的参数再次执行 d / m / info 时，
+直接恢复上次的输出目录/文件和控制台输出，不再启动JVM。
+
+缓存键 = 输入内容 SHA-256 + jar SHA-256 + 规范化后的参数（输入、输出和jar路径替换为占位符）。
+缓存目录结构（CACHE_DIR/artifacts）：
+    index.json          每个条目的大小和最近使用时间（LRU淘汰）
+    stats.json          命中、未命中、节省的字节数和耗时
+    <key>/meta.json     条目信息及输出文件清单
+    <key>/stdout.txt    任务输出
+    <key>/output        输出目录或文件
+
+写入和恢复时优先使用硬链接，不额外占用磁盘空间；跨磁盘等无法链接时复制。
+清单中记录了每个文件的大小和修改时间，恢复出的文件被原地修改后（与缓存共享同一文件），
+条目会在下次查找时被识别为失效并删除。
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+
+from .constants import CACHE_DIR, ARTIFACT_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = os.path.join(CACHE_DIR, "artifacts")
+# 可缓存的操作：结果只由输入、jar和参数决定
+CACHEABLE_OPS = ("d", "m", "info")
+# 缓存格式版本，格式变化时旧条目自动失效
+CACHE_VERSION = 1
+
+_HASH_CHUNK = 1024 * 1024
+
+
+class HashCancelled(Exception):
+    """计算哈希时被取消"""
+
+
+def _file_sha256(path, is_cancelled=None):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(_HASH_CHUNK):
+            if is_cancelled is not None and is_cancelled():
+                raise HashCancelled(path)
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 按 (路径, 大小, 修改时间) 记住文件哈希，同一进程内重复运行不重新计算
+_hash_memo = {}
+# 正在计算的哈希：其他线程请求同一文件时等待其结果，不重复读取（例如预热尚未算完时点击运行）
+_hash_inflight = {}
+_hash_lock = threading.Lock()
+
+
+def content_hash(path, is_cancelled=None):
+    """计算文件或目录内容的SHA-256
+
+    目录按相对路径排序，依次计入路径和各文件的哈希。
+
+    Args:
+        path: 文件或目录
+        is_cancelled: 返回True时停止计算的回调
+
+    Raises:
+        HashCancelled: is_cancelled 返回True
+    """
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                digest.update(os.path.relpath(full, path).replace(os.sep, '/').encode('utf-8'))
+                digest.update(content_hash(full, is_cancelled).encode('ascii'))
+        return digest.hexdigest()
+
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    while True:
+        with _hash_lock:
+            if memo_key in _hash_memo:
+                return _hash_memo[memo_key]
+            pending = _hash_inflight.get(memo_key)
+            if pending is None:
+                done = _hash_inflight[memo_key] = threading.Event()
+                break
+        # 另一线程正在计算；它被取消或失败时由本线程重新计算
+        while not pending.wait(0.1):
+            if is_cancelled is not None and is_cancelled():
+                raise HashCancelled(path)
+    try:
+        result = _file_sha256(path, is_cancelled)
+        with _hash_lock:
+            _hash_memo[memo_key] = result
+        return result
+    finally:
+        with _hash_lock:
+            del _hash_inflight[memo_key]
+        done.set()
+
+
+def _option_value(args, flag):
+    """参数列表中某个选项的值"""
+    if flag in args:
+        index = args.index(flag)
+        if index + 1 < len(args):
+            return args[index + 1]
+    return None
+
+
+def output_path_for(op, args):
+    """任务的输出路径：-o 指定的路径，否则按 APKEditor 的默认命名规则推算
+
+    Returns:
+        str: 输出路径，info 等只有控制台输出的操作返回None
+    """
+    output = _option_value(args, '-o')
+    if output:
+        return os.path.abspath(output)
+    inp = _option_value(args, '-i')
+    if not inp:
+        return None
+    base = os.path.splitext(os.path.abspath(inp.rstrip('/\\')))[0]
+    if op == 'd':
+        kind = 'xml' if _option_value(args, '-t') == 'xml' else 'json'
+        return f"{base}_decompile_{kind}"
+    if op == 'm':
+        return f"{base}_merged.apk"
+    return None
+
+
+def normalize_args(args):
+    """把jar、输入和输出路径替换为占位符，使相同参数在不同路径下得到相同的键"""
+    normalized = list(args)
+    if len(normalized) >= 2 and normalized[0] == '-jar':
+        normalized[1] = '<jar>'
+    for flag, placeholder in (('-i', '<input>'), ('-o', '<output>')):
+        if flag in normalized:
+            index = normalized.index(flag)
+            if index + 1 < len(normalized):
+                normalized[index + 1] = placeholder
+    return normalized
+
+
+def _tree_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(path) for name in files)
+
+
+def _manifest(path):
+    """输出文件清单：相对路径 -> [大小, 修改时间]"""
+    if os.path.isfile(path):
+        st = os.stat(path)
+        return {'': [st.st_size, st.st_mtime_ns]}
+    result = {}
+    for root, _, files in os.walk(path):
+        for name in files:
+            full = os.path.join(root, name)
+            st = os.stat(full)
+            result[os.path.relpath(full, path).replace(os.sep, '/')] = [st.st_size, st.st_mtime_ns]
+    return result
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _link_tree(src, dst):
+    """用硬链接复制文件或目录，无法链接时复制"""
+    if os.path.isfile(src):
+        _link_or_copy(src, dst)
+    else:
+        shutil.copytree(src, dst, copy_function=_link_or_copy)
+
+
+class ArtifactCache:
+    """构件缓存
+
+    Args:
+        root: 缓存目录
+        max_bytes: 缓存总大小上限，超出时按最近使用时间淘汰
+    """
+
+    def __init__(self, root=ARTIFACT_DIR, max_bytes=ARTIFACT_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    # ---- 键 ----
+
+    def make_key(self, op, args, input_path, jar_path, is_cancelled=None):
+        """计算缓存键
+
+        Args:
+            is_cancelled: 返回True时停止计算哈希的回调
+
+        Returns:
+            str: 缓存键；操作不可缓存或输入不存在时返回None
+
+        Raises:
+            HashCancelled: is_cancelled 返回True
+        """
+        if op not in CACHEABLE_OPS or not input_path or not os.path.exists(input_path):
+            return None
+        try:
+            parts = {
+                'version': CACHE_VERSION,
+                'op': op,
+                'input': content_hash(input_path, is_cancelled),
+                'jar': content_hash(jar_path, is_cancelled) if jar_path and os.path.isfile(jar_path) else '',
+                'args': normalize_args(args),
+            }
+        except OSError:
+            return None
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+    # ---- 索引与统计 ----
+
+    def _read_json(self, name, default):
+        try:
+            with open(os.path.join(self.root, name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def _write_json(self, name, data):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, name)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+    def _record(self, **deltas):
+        stats = self._read_json('stats.json', {})
+        for name, value in deltas.items():
+            stats[name] = stats.get(name, 0) + value
+        self._write_json('stats.json', stats)
+
+    def stats(self):
+        """缓存统计
+
+        Returns:
+            dict: hits、misses、bytes_saved、seconds_saved、entries、total_bytes、max_bytes
+        """
+        with self._lock:
+            stats = self._read_json('stats.json', {})
+            index = self._read_json('index.json', {})
+        result = {name: stats.get(name, 0) for name in ('hits', 'misses', 'bytes_saved', 'seconds_saved')}
+        result['entries'] = len(index)
+        result['total_bytes'] = sum(entry['size'] for entry in index.values())
+        result['max_bytes'] = self.max_bytes
+        return result
+
+    def _remove_entry(self, index, key):
+        index.pop(key, None)
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+
+    def _evict(self, index):
+        """按最近使用时间淘汰条目，直到总大小不超过上限"""
+        total = sum(entry['size'] for entry in index.values())
+        for key in sorted(index, key=lambda k: index[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= index[key]['size']
+            self._remove_entry(index, key)
+
+    def clear(self):
+        """删除所有条目和统计"""
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    # ---- 查找与写入 ----
+
+    def _valid_entry(self, key):
+        """读取条目信息，输出文件缺失或被修改时返回None"""
+        entry_dir = os.path.join(self.root, key)
+        meta = self._read_json(os.path.join(key, 'meta.json'), None)
+        if meta is None:
+            return None
+        if meta['output_kind'] is not None:
+            output = os.path.join(entry_dir, 'output')
+            try:
+                if _manifest(output) != meta['manifest']:
+                    return None
+            except OSError:
+                return None
+        return meta
+
+    def lookup(self, key, output_path, force=False):
+        """查找缓存并恢复输出
+
+        Args:
+            key: 缓存键
+            output_path: 恢复到的输出路径（None表示只有控制台输出）
+            force: 输出路径已存在时是否覆盖（对应 APKEditor 的 -f）
+
+        Returns:
+            list: 命中时返回缓存的输出行，未命中返回None
+        """
+        # 与 jar 的行为保持一致：未指定 -f 时不覆盖已有输出，交给 jar 处理
+        if output_path and os.path.exists(output_path) and not force:
+            return None
+        with self._lock:
+            index = self._read_json('index.json', {})
+            meta = self._valid_entry(key) if key in index else None
+            if meta is None:
+                if key in index:
+                    self._remove_entry(index, key)
+                    self._write_json('index.json', index)
+                self._record(misses=1)
+                return None
+            entry_dir = os.path.join(self.root, key)
+            try:
+                # 确认命中后才删除已有输出；无法删除（例如文件被占用）时按未命中处理
+                if output_path and os.path.exists(output_path):
+                    if os.path.isdir(output_path):
+                        shutil.rmtree(output_path)
+                    else:
+                        os.remove(output_path)
+                if meta['output_kind'] is not None and output_path:
+                    _link_tree(os.path.join(entry_dir, 'output'), output_path)
+                with open(os.path.join(entry_dir, 'stdout.txt'), 'r', encoding='utf-8') as f:
+                    lines = f.read().splitlines()
+            except OSError as e:
+                logger.warning(f"无法从构件缓存恢复输出: {e}")
+                self._record(misses=1)
+                return None
+            index[key]['last_used'] = time.time()
+            self._write_json('index.json', index)
+            self._record(hits=1, bytes_saved=meta['size'], seconds_saved=meta.get('duration', 0))
+            return lines
+
+    def store(self, key, lines, output_path, duration=0.0):
+        """写入一次成功任务的结果
+
+        Args:
+            key: 缓存键
+            lines: 任务输出行
+            output_path: 任务的输出路径（None或不存在时只缓存控制台输出）
+            duration: 任务耗时（秒），用于统计节省的时间
+        """
+        with self._lock:
+            entry_dir = os.path.join(self.root, key)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.makedirs(entry_dir)
+                output_kind = None
+                manifest = {}
+                size = 0
+                if output_path and os.path.exists(output_path):
+                    output = os.path.join(entry_dir, 'output')
+                    _link_tree(output_path, output)
+                    output_kind = 'file' if os.path.isfile(output) else 'dir'
+                    manifest = _manifest(output)
+                    size = _tree_size(output)
+                with open(os.path.join(entry_dir, 'stdout.txt'), 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(lines))
+                meta = {
+                    'output_kind': output_kind,
+                    'output_name': os.path.basename(output_path) if output_path else None,
+                    'manifest': manifest,
+                    'size': size,
+                    'duration': duration,
+                    'created': time.time(),
+                }
+                self._write_json(os.path.join(key, 'meta.json'), meta)
+            except OSError as e:
+                logger.warning(f"写入构件缓存失败: {e}")
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                return
+            index = self._read_json('index.json', {})
+            index[key] = {'size': size, 'last_used': time.time()}
+            self._evict(index)
+            self._write_json('index.json', index)
+
+
+def format_stats(stats):
+    """缓存统计格式化为文本行"""
+    mb = 1024 * 1024
+    total = stats['hits'] + stats['misses']
+    rate = f"{stats['hits'] * 100 // total}%" if total else "-"
+    return [
+        f"命中: {stats['hits']}  未命中: {stats['misses']}  命中率: {rate}",
+        f"节省: {stats['bytes_saved'] / mb:.1f} MB 输出, {stats['seconds_saved']:.1f} 秒",
+        f"条目: {stats['entries']}  占用: {stats['total_bytes'] / mb:.1f} / {stats['max_bytes'] / mb:.0f} MB",
+    ]
+
+
+__all__ = ['ArtifactCache', 'CACHEABLE_OPS', 'HashCancelled', 'content_hash', 'normalize_args', 'output_path_for', 'format_stats']
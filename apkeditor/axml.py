@@ -0,0 +1,366 @@
+# axml.py
+"""二进制 AndroidManifest.xml (AXML) 解析
+
+不启动Java即可读取包名、版本、SDK版本和权限等常用 info 字段。
+zip 中的 AndroidManifest.xml 解压后（单独的清单文件则通过 mmap）直接在缓冲区上按块解析
+（字符串池、资源ID映射、开始/结束元素），不构建完整的XML树。
+遇到无法在这里解析的内容（例如引用 resources.arsc 的值）时，由调用方回退到 jar。
+"""
+
+import io
+import os
+import mmap
+import struct
+import zipfile
+from dataclasses import dataclass, field
+
+# 块类型
+RES_STRING_POOL_TYPE = 0x0001
+RES_XML_TYPE = 0x0003
+RES_XML_START_NAMESPACE_TYPE = 0x0100
+RES_XML_END_NAMESPACE_TYPE = 0x0101
+RES_XML_START_ELEMENT_TYPE = 0x0102
+RES_XML_END_ELEMENT_TYPE = 0x0103
+RES_XML_RESOURCE_MAP_TYPE = 0x0180
+
+# 字符串池标志
+UTF8_FLAG = 0x100
+
+# Res_value 数据类型
+TYPE_NULL = 0x00
+TYPE_REFERENCE = 0x01
+TYPE_ATTRIBUTE = 0x02
+TYPE_STRING = 0x03
+TYPE_FLOAT = 0x04
+TYPE_INT_DEC = 0x10
+TYPE_INT_HEX = 0x11
+TYPE_INT_BOOLEAN = 0x12
+
+ANDROID_NS = "http://schemas.android.com/apk/res/android"
+
+# 属性名被混淆或清空时，通过资源ID识别 android: 属性
+ANDROID_ATTR_IDS = {
+    0x01010001: "label",
+    0x01010003: "name",
+    0x0101020c: "minSdkVersion",
+    0x0101021b: "versionCode",
+    0x0101021c: "versionName",
+    0x01010270: "targetSdkVersion",
+    0x01010271: "maxSdkVersion",
+    0x01010572: "compileSdkVersion",
+    0x01010573: "compileSdkVersionCodename",
+}
+
+MANIFEST_NAME = "AndroidManifest.xml"
+# 拆分包（apks/xapk/apkm）中基础APK的常见名称
+BASE_APK_NAMES = ("base.apk",)
+# 启动 activity 的 intent-filter 中的 action 和 category
+LAUNCHER_FILTER = frozenset(("android.intent.action.MAIN", "android.intent.category.LAUNCHER"))
+
+_CHUNK_HEADER = struct.Struct('<HHI')
+_STRING_POOL_HEADER = struct.Struct('<IIIII')
+_START_ELEMENT = struct.Struct('<IIIIHHHHHH')  # lineNumber, comment, ns, name, attrStart, attrSize, attrCount, id, class, style
+_ATTRIBUTE = struct.Struct('<IIIHBBI')  # ns, name, rawValue, size, res0, dataType, data
+_NO_INDEX = 0xFFFFFFFF
+
+
+class AxmlError(Exception):
+    """AXML 数据无法解析"""
+
+
+class Reference:
+    """未解析的资源引用（需要 resources.arsc 才能得到实际值）"""
+
+    __slots__ = ("res_id",)
+
+    def __init__(self, res_id):
+        self.res_id = res_id
+
+    def __repr__(self):
+        return f"@0x{self.res_id:08x}"
+
+    def __eq__(self, other):
+        return isinstance(other, Reference) and other.res_id == self.res_id
+
+    def __hash__(self):
+        return hash(self.res_id)
+
+
+@dataclass
+class XmlElement:
+    """一个开始元素"""
+    tag: str
+    attrs: dict  # 属性名（android命名空间的属性带 "android:" 前缀） -> 值
+    depth: int
+
+
+class AxmlParser:
+    """按块解析AXML
+
+    Args:
+        data: AXML 字节数据（bytes、bytearray、mmap 或 memoryview）
+    """
+
+    def __init__(self, data):
+        self.buf = memoryview(data)
+        self.strings = []
+        self.resource_ids = []
+        if len(self.buf) < 8:
+            raise AxmlError("数据过短")
+        chunk_type, header_size, size = _CHUNK_HEADER.unpack_from(self.buf, 0)
+        if chunk_type != RES_XML_TYPE:
+            raise AxmlError(f"不是二进制XML (类型 0x{chunk_type:04x})")
+        self._start = header_size
+        self._end = min(size, len(self.buf))
+
+    def _chunks(self):
+        """依次产生 (类型, 块偏移, 头大小, 块大小)"""
+        offset = self._start
+        while offset + 8 <= self._end:
+            chunk_type, header_size, size = _CHUNK_HEADER.unpack_from(self.buf, offset)
+            if size < 8 or offset + size > self._end:
+                raise AxmlError(f"块大小无效: 偏移 {offset}")
+            yield chunk_type, offset, header_size, size
+            offset += size
+
+    def _read_string_pool(self, offset, header_size):
+        count, _, flags, strings_start, _ = _STRING_POOL_HEADER.unpack_from(self.buf, offset + 8)
+        offsets = struct.unpack_from(f'<{count}I', self.buf, offset + header_size)
+        base = offset + strings_start
+        decode = self._utf8_string if flags & UTF8_FLAG else self._utf16_string
+        self.strings = [decode(base + off) for off in offsets]
+
+    def _utf8_string(self, pos):
+        buf = self.buf
+        # 先是字符数，再是字节数，各占1或2字节
+        pos += 2 if buf[pos] & 0x80 else 1
+        length = buf[pos]
+        if length & 0x80:
+            length = ((length & 0x7F) << 8) | buf[pos + 1]
+            pos += 2
+        else:
+            pos += 1
+        return bytes(buf[pos:pos + length]).decode('utf-8', errors='replace')
+
+    def _utf16_string(self, pos):
+        length = struct.unpack_from('<H', self.buf, pos)[0]
+        if length & 0x8000:
+            length = ((length & 0x7FFF) << 16) | struct.unpack_from('<H', self.buf, pos + 2)[0]
+            pos += 4
+        else:
+            pos += 2
+        return bytes(self.buf[pos:pos + length * 2]).decode('utf-16-le', errors='replace')
+
+    def string(self, index):
+        """字符串池中的字符串，索引无效时返回空字符串"""
+        if index == _NO_INDEX or index >= len(self.strings):
+            return ""
+        return self.strings[index]
+
+    def _attr_name(self, ns_index, name_index):
+        ns = self.string(ns_index)
+        name = self.string(name_index)
+        if has_res_id := name_index < len(self.resource_ids):
+            name = ANDROID_ATTR_IDS.get(self.resource_ids[name_index], name)
+        if ns == ANDROID_NS or (not ns and has_res_id and name in ANDROID_ATTR_IDS.values()):
+            return f"android:{name}"
+        return name
+
+    def _attr_value(self, raw_index, data_type, data):
+        if data_type == TYPE_STRING:
+            return self.string(data)
+        if raw_index != _NO_INDEX and data_type not in (TYPE_REFERENCE, TYPE_ATTRIBUTE):
+            return self.string(raw_index)
+        if data_type in (TYPE_INT_DEC, TYPE_INT_HEX):
+            return data - 0x100000000 if data & 0x80000000 else data
+        if data_type == TYPE_INT_BOOLEAN:
+            return data != 0
+        if data_type == TYPE_FLOAT:
+            return struct.unpack('<f', struct.pack('<I', data))[0]
+        if data_type in (TYPE_REFERENCE, TYPE_ATTRIBUTE):
+            return Reference(data)
+        if data_type == TYPE_NULL:
+            return None
+        return data
+
+    def iter_elements(self):
+        """依次产生开始元素
+
+        Yields:
+            XmlElement: 元素标签、属性和深度
+        """
+        depth = 0
+        for chunk_type, offset, header_size, size in self._chunks():
+            if chunk_type == RES_STRING_POOL_TYPE:
+                self._read_string_pool(offset, header_size)
+            elif chunk_type == RES_XML_RESOURCE_MAP_TYPE:
+                count = (size - header_size) // 4
+                self.resource_ids = list(struct.unpack_from(f'<{count}I', self.buf, offset + header_size))
+            elif chunk_type == RES_XML_START_ELEMENT_TYPE:
+                (_, _, ns, name, attr_start, attr_size, attr_count,
+                 _, _, _) = _START_ELEMENT.unpack_from(self.buf, offset + 8)
+                attrs = {}
+                pos = offset + header_size + attr_start
+                for _ in range(attr_count):
+                    a_ns, a_name, raw, _, _, data_type, data = _ATTRIBUTE.unpack_from(self.buf, pos)
+                    attrs[self._attr_name(a_ns, a_name)] = self._attr_value(raw, data_type, data)
+                    pos += attr_size
+                yield XmlElement(self.string(name), attrs, depth)
+                depth += 1
+            elif chunk_type == RES_XML_END_ELEMENT_TYPE:
+                depth -= 1
+
+
+@dataclass
+class ManifestInfo:
+    """从清单文件读取的常用 info 字段"""
+    package: str = ""
+    version_code: object = None
+    version_name: object = None
+    min_sdk: object = None
+    target_sdk: object = None
+    compile_sdk: object = None
+    permissions: list = field(default_factory=list)
+    application_label: object = None
+    main_activity: str = ""
+
+    FIELDS = ("package", "version_code", "version_name", "min_sdk", "target_sdk", "compile_sdk",
+              "application_label", "main_activity")
+
+    @property
+    def unresolved(self):
+        """值为资源引用、需要 resources.arsc 才能解析的字段"""
+        return [name for name in self.FIELDS if isinstance(getattr(self, name), Reference)]
+
+    def as_dict(self):
+        """转为可序列化为JSON的字典"""
+        result = {name: getattr(self, name) for name in self.FIELDS}
+        result = {k: (repr(v) if isinstance(v, Reference) else v) for k, v in result.items()}
+        result["permissions"] = list(self.permissions)
+        return result
+
+
+def parse_manifest(data):
+    """解析AXML格式的清单
+
+    Args:
+        data: AndroidManifest.xml 的字节数据
+
+    Returns:
+        ManifestInfo: 读取到的字段
+    """
+    info = ManifestInfo()
+    # iter_elements 只产出开始标签：出现深度不大于记录深度的元素时，记录的 activity / intent-filter 已结束
+    activity = activity_depth = filter_depth = None
+    filter_names = set()
+    for element in AxmlParser(data).iter_elements():
+        tag, attrs = element.tag, element.attrs
+        if activity_depth is not None and element.depth <= activity_depth:
+            activity = activity_depth = None
+        if filter_depth is not None and element.depth <= filter_depth:
+            filter_depth = None
+        if tag == "manifest" and element.depth == 0:
+            info.package = attrs.get("package", "")
+            info.version_code = attrs.get("android:versionCode")
+            info.version_name = attrs.get("android:versionName")
+            info.compile_sdk = attrs.get("android:compileSdkVersion")
+        elif tag == "uses-sdk":
+            info.min_sdk = attrs.get("android:minSdkVersion")
+            info.target_sdk = attrs.get("android:targetSdkVersion")
+        elif tag in ("uses-permission", "uses-permission-sdk-23"):
+            name = attrs.get("android:name")
+            if name and name not in info.permissions:
+                info.permissions.append(name)
+        elif tag == "application":
+            info.application_label = attrs.get("android:label")
+        elif tag in ("activity", "activity-alias"):
+            activity, activity_depth = attrs.get("android:name", ""), element.depth
+        elif tag == "intent-filter" and activity_depth is not None:
+            filter_depth, filter_names = element.depth, set()
+        elif tag in ("action", "category") and filter_depth is not None and element.depth == filter_depth + 1:
+            # 同一个 intent-filter 中同时有 MAIN 和 LAUNCHER 才是启动 activity
+            filter_names.add(attrs.get("android:name"))
+            if activity and not info.main_activity and LAUNCHER_FILTER <= filter_names:
+                info.main_activity = activity
+    return info
+
+
+def _read_manifest_from_zip(zf):
+    """从zip中读取清单数据，拆分包则读取其中的基础APK"""
+    names = zf.namelist()
+    if MANIFEST_NAME in names:
+        return zf.read(MANIFEST_NAME)
+    for name in names:
+        if os.path.basename(name) in BASE_APK_NAMES:
+            with zipfile.ZipFile(io.BytesIO(zf.read(name))) as inner:
+                if MANIFEST_NAME in inner.namelist():
+                    return inner.read(MANIFEST_NAME)
+    raise AxmlError(f"未找到 {MANIFEST_NAME}")
+
+
+def read_manifest(path):
+    """从APK/拆分包或单独的 AndroidManifest.xml 读取清单信息
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        ManifestInfo: 读取到的字段
+
+    Raises:
+        AxmlError: 文件不是zip或AXML，或解析失败
+    """
+    try:
+        with open(path, 'rb') as f:
+            if zipfile.is_zipfile(f):
+                # zipfile 只读取中央目录和清单条目，不会读入整个APK
+                with zipfile.ZipFile(f) as zf:
+                    return parse_manifest(_read_manifest_from_zip(zf))
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return parse_manifest(mm)
+    except (OSError, ValueError, zipfile.BadZipFile, struct.error, IndexError) as e:
+        raise AxmlError(str(e)) from e
+
+
+# info 快速路径必须直接解析出的字段；应用名称通常引用 resources.arsc 中的字符串，不在此列
+REQUIRED_FIELDS = ("package", "version_code", "version_name", "min_sdk", "target_sdk")
+
+
+def format_info(info):
+    """将清单信息格式化为文本行
+
+    Returns:
+        list: 文本行
+    """
+    lines = [f"package={info.package}"]
+    labels = [("VersionCode", info.version_code), ("VersionName", info.version_name),
+              ("MinSdkVersion", info.min_sdk), ("TargetSdkVersion", info.target_sdk),
+              ("CompileSdkVersion", info.compile_sdk), ("AppName", info.application_label),
+              ("MainActivity", info.main_activity)]
+    lines.extend(f"{label}={value}" for label, value in labels
+                 if value not in (None, "") and not isinstance(value, Reference))
+    lines.extend(f"uses-permission={name}" for name in info.permissions)
+    return lines
+
+
+def fast_info(path, required=REQUIRED_FIELDS):
+    """不启动Java读取 info 字段
+
+    Args:
+        path: 文件路径
+        required: 必须能直接解析的字段（不能是资源引用）
+
+    Returns:
+        ManifestInfo: 必需字段都已解析时返回结果；否则返回None，由调用方回退到jar
+    """
+    try:
+        info = read_manifest(path)
+    except AxmlError:
+        return None
+    if not info.package or set(required) & set(info.unresolved):
+        return None
+    return info
+
+
+__all__ = ['AxmlError', 'AxmlParser', 'XmlElement', 'Reference', 'ManifestInfo',
+           'REQUIRED_FIELDS', 'parse_manifest', 'read_manifest', 'format_info', 'fast_info']
@@ -0,0 +1,85 @@
+# cds_bench.py
+"""JVM 启动基准测试（python -m apkeditor.cds_bench）
+
+用同一个代表性操作（默认 `-h`，指定 --sample 时反编译该APK）比较三种启动方式：
+    off       -Xshare:off，不使用任何类数据共享
+    default   JDK 自带的基础 CDS 归档（不加参数时的默认行为）
+    appcds    再加上 APKEditor jar 的动态归档（没有时先训练一次）
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import statistics
+import tempfile
+import subprocess
+
+from .constants import default_jar
+from .jre_registry import select_java
+from .appcds import PLATFORM_ARGS, archive_path, java_version, representative_args, train
+
+
+def _time_once(java, args):
+    start = time.perf_counter()
+    subprocess.run([java] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **PLATFORM_ARGS)
+    return time.perf_counter() - start
+
+
+def bench(java, jar, sample=None, repeat=10, log=print):
+    """各启动方式的耗时
+
+    Returns:
+        dict: 方式 -> (最短秒数, 中位数秒数)
+    """
+    path = archive_path(java, jar)
+    if path is None:
+        raise RuntimeError("当前 java 不支持动态 AppCDS 归档（需要 JDK 13+）")
+    if not os.path.exists(path):
+        log("训练 AppCDS 归档 ...")
+        train(java, jar, sample, log=log)
+
+    output_dir = tempfile.mkdtemp(prefix="apkeditor-cds-bench-")
+    try:
+        args = representative_args(os.path.abspath(jar), sample, os.path.join(output_dir, "out"))
+        modes = {
+            "off": ["-Xshare:off"] + args,
+            "default": args,
+            "appcds": [f"-XX:SharedArchiveFile={path}"] + args,
+        }
+        timings = {mode: [] for mode in modes}
+        # 交替运行，减少系统负载变化对某一种方式的影响
+        for _ in range(repeat):
+            for mode, mode_args in modes.items():
+                timings[mode].append(_time_once(java, mode_args))
+        return {mode: (min(values), statistics.median(values)) for mode, values in timings.items()}
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m apkeditor.cds_bench", description="AppCDS 启动基准测试")
+    parser.add_argument("--jar", help="APKEditor jar，默认自动查找")
+    parser.add_argument("--java", help="java可执行文件，默认由 Java 注册表选择")
+    parser.add_argument("--sample", help="反编译该APK作为代表性操作，默认只运行 -h")
+    parser.add_argument("--repeat", type=int, default=10, help="每种方式的运行次数，默认10")
+    args = parser.parse_args(argv)
+
+    jar = args.jar or default_jar()
+    java = args.java or select_java()
+    _, version = java_version(java)
+    print(f"java: {version}  jar: {jar}")
+    try:
+        results = bench(java, jar, args.sample, max(1, args.repeat))
+    except RuntimeError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    base = results["default"][1]
+    for mode, (fastest, median) in results.items():
+        print(f"  {mode:<8} 最短 {fastest * 1000:8.1f} ms  中位数 {median * 1000:8.1f} ms  {base / median:5.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,745 @@
+# cli.py
+"""无界面批量命令行
+
+不导入PyQt5，可在CI和无显示器的服务器上运行。用法示例：
+    python -m apkeditor run d -i "apks/*.apk" --jobs 8
+    python -m apkeditor run sign -i out/*.apk --ks release.jks --ks-alias key --ks-pass 123456
+    python -m apkeditor sign-batch -i "release/*.apk" --ks release.jks --ks-alias key
+    python -m apkeditor patch -i app.apk -r classes2.dex=build/classes2.dex -o app_patched.apk
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import functools
+import threading
+import subprocess
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import OP_MAP, find_apksigner_jar
+from .command_model import (CommandOptions, op_key_for, build_args, validate, validate_signing, uses_fast_info,
+                            uses_fast_merge, uses_builtin_v4, signed_apk_path, with_signing_input)
+from .progress_parser import ProgressParser
+from .jre_registry import select_java
+
+# 隐藏Windows下的命令行窗口
+if os.name == 'nt':
+    PLATFORM_ARGS = {'creationflags': subprocess.CREATE_NO_WINDOW}
+else:
+    PLATFORM_ARGS = {}
+
+_print_lock = threading.Lock()
+
+
+def _emit(text, stream=None):
+    """线程安全地输出一行"""
+    with _print_lock:
+        print(text, file=stream or sys.stdout, flush=True)
+
+
+def expand_inputs(patterns):
+    """展开输入路径中的通配符（Windows的shell不会展开）
+
+    Returns:
+        list: 去重后的输入路径
+    """
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            paths.append(pattern)
+    return list(dict.fromkeys(paths))
+
+
+def _emit_progress(label, event, mode):
+    """输出一条进度（text为可读文本，json为每行一个JSON对象），写到stderr"""
+    if mode == "json":
+        _emit(json.dumps({
+            "input": label, "stage": event.stage, "fraction": round(event.fraction, 4),
+            "throughput": None if event.throughput is None else round(event.throughput, 2),
+            "eta": None if event.eta is None else round(event.eta, 1),
+        }, ensure_ascii=False), sys.stderr)
+    else:
+        _emit(f"[{label}] [进度] {event.describe()}", sys.stderr)
+
+
+class _LineSink:
+    """任务输出行的去向：控制台、进度和构件缓存"""
+
+    def __init__(self, label, quiet=False, progress=None, collect=None):
+        self.label = label
+        self.quiet = quiet
+        self.progress = progress
+        self.collect = collect
+        self._parser = ProgressParser() if progress else None
+        self._last = None
+
+    def __call__(self, line):
+        line = line.rstrip('\r\n')
+        if self.collect is not None:
+            self.collect.append(line)
+        if not self.quiet:
+            _emit(f"[{self.label}] {line.rstrip()}")
+        if self._parser is not None:
+            event = self._parser.feed(line)
+            # 只在阶段或百分比变化时输出
+            last = self._last
+            if event is not None and (last is None or (event.stage, event.percent) != (last.stage, last.percent)):
+                _emit_progress(self.label, event, self.progress)
+                self._last = event
+
+
+def run_job(java, args, label, quiet=False, progress=None, collect=None):
+    """执行一个 java 任务并逐行输出
+
+    Args:
+        progress: 进度输出方式，"text"/"json"，None表示不输出
+        collect: 传入列表时收集输出行（用于写入构件缓存）
+
+    Returns:
+        int: 退出码
+    """
+    from .appcds import with_cds, finish_training
+    args, training = with_cds(java, args)
+    try:
+        process = subprocess.Popen(
+            [java] + args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, encoding='utf-8', errors='replace', **PLATFORM_ARGS
+        )
+    except OSError as e:
+        finish_training(training, -1)
+        _emit(f"[{label}] [错误] 无法启动 java 进程: {e}", sys.stderr)
+        return -1
+    sink = _LineSink(label, quiet, progress, collect)
+    for line in process.stdout:
+        sink(line)
+    code = process.wait()
+    if finish_training(training, code) and not quiet:
+        _emit(f"[{label}] [已生成 AppCDS 归档，之后的启动将直接加载其中的类]")
+    return code
+
+
+def run_merge(java, args, label, quiet=False, progress=None, collect=None, options=None):
+    """合并任务：基础APK+配置拆分时使用流式合并，其他情况回退到 jar
+
+    Returns:
+        int: 退出码
+    """
+    from .artifact_cache import output_path_for
+    from .split_merge import merge_bundle, SplitMergeError
+
+    output = output_path_for('m', args)
+    if os.path.exists(output) and '-f' not in args:
+        # 已有输出时的处理交给 jar
+        return run_job(java, args, label, quiet, progress, collect)
+    sink = _LineSink(label, quiet, progress, collect)
+    try:
+        merge_bundle(options.input_path, output, java, options.jar, log=sink)
+    except SplitMergeError as e:
+        sink(f"[快速合并不可用，使用 APKEditor 合并] {e}")
+        return run_job(java, args, label, quiet, progress, collect)
+    return 0
+
+
+def run_scheduled(scheduler, runner, options, java, args, label, quiet=False, progress=None, collect=None):
+    """在内存调度器分配的堆（-Xmx）下执行任务，内存不足失败时加大堆重试
+
+    Returns:
+        int: 最后一次执行的退出码
+    """
+    from .scheduler import with_heap
+
+    def attempt(heap_mb):
+        lines = []
+        code = runner(java, with_heap(args, heap_mb), label, quiet, progress, collect=lines)
+        return code, lines
+
+    code, lines = scheduler.run(options.op, options.input_path, attempt,
+                                log=None if quiet else (lambda line: _emit(f"[{label}] {line}")))
+    if collect is not None:
+        collect.extend(lines)
+    return code
+
+
+def run_profiled(gc_log, runner, options, java, args, label, quiet=False, progress=None, collect=None):
+    """按堆配置档案设置 -Xmx（调度器未设置时），可选采集GC日志，结束后更新档案
+
+    Args:
+        gc_log: 是否采集GC日志并输出汇总
+
+    Returns:
+        int: 退出码
+    """
+    from .gc_telemetry import launch_options, finish_run, gc_log_supported
+    if gc_log and not gc_log_supported(java):
+        _emit(f"[{label}] GC日志需要 JDK 9+，本次不采集", sys.stderr)
+        gc_log = False
+    jvm_args, log_path = launch_options(options, gc_log)
+    if any(arg.startswith("-Xmx") for arg in args):
+        jvm_args = [arg for arg in jvm_args if not arg.startswith("-Xmx")]
+    args = jvm_args + args
+    lines = []
+    started = time.monotonic()
+    code = runner(java, args, label, quiet, progress, collect=lines)
+    summary = finish_run(options, args, log_path, code, lines, time.monotonic() - started)
+    if summary is not None and not quiet:
+        _emit(f"[{label}] {summary.describe()}")
+    if collect is not None:
+        collect.extend(lines)
+    return code
+
+
+def _emit_fast_info(inp, label, quiet=False):
+    """直接解析清单输出 info 字段
+
+    Returns:
+        bool: 是否已输出；无法解析时返回False
+    """
+    from .axml import fast_info, format_info
+    info = fast_info(inp)
+    if info is None:
+        return False
+    if not quiet:
+        for line in format_info(info):
+            _emit(f"[{label}] {line}")
+    return True
+
+
+def _run_cached(cache, runner, java, args, options, label, quiet=False, progress=None):
+    """先查构件缓存，未命中时执行任务并写入缓存
+
+    Returns:
+        int: 退出码
+    """
+    from .artifact_cache import output_path_for
+    key = cache.make_key(options.op, args, options.input_path, options.jar)
+    output = output_path_for(options.op, args)
+    lines = cache.lookup(key, output, force='-f' in args) if key else None
+    if lines is not None:
+        if not quiet:
+            _emit(f"[{label}] [缓存命中] {output or ''}".rstrip())
+            for line in lines:
+                _emit(f"[{label}] {line}")
+        return 0
+
+    started = time.monotonic()
+    collected = []
+    code = runner(java, args, label, quiet, progress, collect=collected)
+    if code == 0 and key:
+        cache.store(key, collected, output, time.monotonic() - started)
+    return code
+
+
+def align_before_sign(path, label, quiet=False, page_size=None, output_path=None):
+    """签名前的对齐阶段：已对齐时只读取目录，未对齐时重写一次
+
+    签名输出是另一个文件时，对齐结果写到输出路径再原地签名，不修改输入。
+
+    Returns:
+        str: 应交给签名的APK；失败时返回None（不应继续签名）
+    """
+    from .zipalign import ZipAlignError, align_for_signing, DEFAULT_PAGE_SIZE
+    try:
+        return align_for_signing(path, output_path, page_size or DEFAULT_PAGE_SIZE,
+                                 log=(lambda line: None) if quiet else (lambda line: _emit(f"[{label}] {line}")))
+    except ZipAlignError as e:
+        _emit(f"[{label}] [错误] 对齐失败: {e}", sys.stderr)
+        return None
+
+
+def write_builtin_v4(java, options, label, quiet=False, threads=None):
+    """签名完成后用内置后端生成 .idsig
+
+    Returns:
+        bool: 是否成功
+    """
+    from .v4_signer import V4SignError, java_signer, write_idsig
+    try:
+        write_idsig(signed_apk_path(options), java_signer(options, java), threads=threads,
+                    log=(lambda line: None) if quiet else (lambda line: _emit(f"[{label}] {line}")))
+    except (OSError, V4SignError) as e:
+        _emit(f"[{label}] [错误] V4签名失败: {e}", sys.stderr)
+        return False
+    return True
+
+
+def run_input(java, args, options, label, quiet=False, progress=None, fast_info=False, cache=None,
+              fast_merge=False, align_page_size=None, v4_threads=None, scheduler=None, gc_log=False):
+    """执行一个输入的任务：info 快速路径 -> 构件缓存 -> 流式合并 / 签名前对齐 -> 内存调度 -> 堆配置档案 -> java -> 内置V4签名
+
+    Args:
+        fast_info: 是否先尝试直接解析清单（info 操作）
+        cache: ArtifactCache实例，None表示不使用缓存
+        fast_merge: 是否尝试流式合并（m 操作）
+        align_page_size: sign 操作签名前按该页大小对齐，None表示不对齐
+        v4_threads: 内置V4签名构建Merkle树的线程数，默认CPU核心数
+        scheduler: MemoryScheduler实例，None表示不限制内存（有堆配置档案时仍使用档案推荐的堆）
+        gc_log: 是否采集GC日志并输出汇总
+
+    Returns:
+        int: 退出码
+    """
+    if fast_info and _emit_fast_info(options.input_path, label, quiet):
+        return 0
+    if align_page_size and options.op == "sign":
+        path = align_before_sign(options.input_path, label, quiet, align_page_size, signed_apk_path(options))
+        if path is None:
+            return 1
+        signing = with_signing_input(options, path)
+        if signing is not options:
+            options, args = signing, build_args(signing, args[1])
+    runner = functools.partial(run_merge, options=options) if fast_merge else run_job
+    runner = functools.partial(run_profiled, gc_log, runner, options)
+    if scheduler is not None:
+        runner = functools.partial(run_scheduled, scheduler, runner, options)
+    if cache is not None:
+        return _run_cached(cache, runner, java, args, options, label, quiet, progress)
+    code = runner(java, args, label, quiet, progress)
+    if code == 0 and uses_builtin_v4(options) and not write_builtin_v4(java, options, label, quiet, v4_threads):
+        return 1
+    return code
+
+
+def _options_from_args(ns, op_key):
+    """命令行参数转换为CommandOptions"""
+    return CommandOptions(
+        op=op_key,
+        jar_path=ns.jar or "",
+        flag_xml=ns.xml,
+        verbose=ns.verbose,
+        resources=ns.resources,
+        v1=not ns.no_v1,
+        v2=not ns.no_v2,
+        v3=ns.v3,
+        v4=ns.v4,
+        v4_backend=ns.v4_backend,
+        use_keystore=not ns.key,
+        keystore_path=ns.ks or "",
+        keystore_alias=ns.ks_alias or "",
+        keystore_password=ns.ks_pass or os.environ.get("APKEDITOR_KS_PASS", ""),
+        private_key_path=ns.key or "",
+        private_key_password=ns.key_pass or "",
+        public_key_path=ns.cert or "",
+        custom_args=ns.extra or "",
+    )
+
+
+def cmd_run(ns):
+    """run 子命令：对多个输入并发执行同一操作"""
+    op_key = op_key_for(ns.op)
+    if not op_key:
+        _emit(f"未知操作: {ns.op}，可用操作: {', '.join(OP_MAP.values())}", sys.stderr)
+        return 2
+    if op_key == "pairip":
+        _emit("Pairip处理依赖图形界面，无界面模式不支持", sys.stderr)
+        return 2
+
+    inputs = expand_inputs(ns.input)
+    if not inputs:
+        _emit("没有匹配的输入文件", sys.stderr)
+        return 2
+
+    base = _options_from_args(ns, op_key)
+    apksigner_jar = find_apksigner_jar() if op_key == "sign" else None
+
+    jobs = []
+    for inp in inputs:
+        options = base.with_input(inp)
+        ok, message = validate(options, apksigner_jar, batch=len(inputs) > 1)
+        if not ok:
+            _emit(f"[{os.path.basename(inp)}] [错误] {message}", sys.stderr)
+            jobs.append((options, None))
+        else:
+            jobs.append((options, build_args(options, apksigner_jar)))
+
+    results = {options.input_path: -1 for options, args in jobs if args is None}
+    fast_info = uses_fast_info(base) and not ns.no_fast
+    fast_merge = uses_fast_merge(base) and not ns.no_fast
+    align_page_size = None if ns.no_align else ns.page_size * 1024
+    scheduler = None
+    if not ns.no_mem_limit:
+        from .scheduler import MemoryScheduler
+        from .gc_telemetry import default_profile
+        scheduler = MemoryScheduler(ns.mem_budget, profile=default_profile())
+    cache = None
+    if not ns.no_cache:
+        from .artifact_cache import ArtifactCache, CACHEABLE_OPS
+        cache = ArtifactCache() if op_key in CACHEABLE_OPS else None
+    java = ns.java or select_java(op_key)
+    with ThreadPoolExecutor(max_workers=max(1, ns.jobs)) as pool:
+        futures = {
+            pool.submit(run_input, java, args, options, os.path.basename(options.input_path),
+                        ns.quiet, ns.progress, fast_info, cache, fast_merge, align_page_size,
+                        ns.v4_threads, scheduler, ns.gc_log): options.input_path
+            for options, args in jobs if args is not None
+        }
+        for future, inp in futures.items():
+            results[inp] = future.result()
+
+    failed = [inp for inp, code in results.items() if code != 0]
+    _emit(f"完成: 成功 {len(results) - len(failed)}/{len(results)}")
+    for inp in failed:
+        _emit(f"  失败 (退出码 {results[inp]}): {inp}", sys.stderr)
+    return 1 if failed else 0
+
+
+def _session_password(ns):
+    """签名会话的密码：环境变量，否则在终端中输入一次（不回显、不保存）"""
+    import getpass
+    if ns.key:
+        return os.environ.get("APKEDITOR_KEY_PASS", "")
+    password = os.environ.get("APKEDITOR_KS_PASS", "")
+    if not password and sys.stdin.isatty():
+        password = getpass.getpass("密钥库密码: ")
+    return password
+
+
+def cmd_sign_batch(ns):
+    """sign-batch 子命令：一个签名会话解锁一次密钥，并发签名所有输入"""
+    from .sign_session import SignSession, SignSessionError
+
+    inputs = expand_inputs(ns.input)
+    if not inputs:
+        _emit("没有匹配的输入文件", sys.stderr)
+        return 2
+    options = CommandOptions(
+        op="sign",
+        v1=not ns.no_v1,
+        v2=not ns.no_v2,
+        v3=ns.v3,
+        v4=ns.v4,
+        v4_backend=ns.v4_backend,
+        use_keystore=not ns.key,
+        keystore_path=ns.ks or "",
+        keystore_alias=ns.ks_alias or "",
+        private_key_path=ns.key or "",
+        public_key_path=ns.cert or "",
+    )
+    password = _session_password(ns)
+    if options.use_keystore:
+        options = replace(options, keystore_password=password)
+    else:
+        options = replace(options, private_key_password=password)
+    apksigner_jar = find_apksigner_jar()
+    ok, message = validate_signing(options, apksigner_jar)
+    if not ok:
+        _emit(f"[错误] {message}", sys.stderr)
+        return 2
+    if ns.out_dir:
+        os.makedirs(ns.out_dir, exist_ok=True)
+    aligned = inputs
+    if not ns.no_align:
+        # 指定输出目录时对齐结果直接写到输出目录（签名会话随后原地签名该文件），输入保持不变；
+        # 各输入按签名的并发数并行对齐
+        def align(inp):
+            return align_before_sign(inp, os.path.basename(inp), ns.quiet, ns.page_size * 1024,
+                                     os.path.join(ns.out_dir, os.path.basename(inp)) if ns.out_dir else None)
+
+        with ThreadPoolExecutor(max_workers=max(1, ns.jobs)) as pool:
+            aligned = [path for path in pool.map(align, inputs) if path is not None]
+
+    started = time.monotonic()
+
+    def on_result(result):
+        label = os.path.basename(result.input_path)
+        if not result.ok:
+            _emit(f"[{label}] [错误] {result.message}", sys.stderr)
+        elif not ns.quiet:
+            _emit(f"[{label}] 已签名 {result.output_path} ({result.seconds:.2f} 秒)")
+
+    try:
+        with SignSession(options, ns.java or select_java("sign-session"), apksigner_jar, ns.jobs) as session:
+            if not ns.quiet:
+                _emit(f"签名会话已启动: {session.signer}，并发 {session.threads}")
+            results = session.sign_all(aligned, ns.out_dir, on_result)
+    except SignSessionError as e:
+        _emit(f"[错误] 无法启动签名会话: {e}", sys.stderr)
+        return 1
+
+    succeeded = sum(result.ok for result in results)
+    _emit(f"完成: 成功 {succeeded}/{len(inputs)}，耗时 {time.monotonic() - started:.2f} 秒")
+    return 0 if succeeded == len(inputs) else 1
+
+
+def cmd_cache(ns):
+    """cache 子命令：查看统计或清空构件缓存"""
+    from .artifact_cache import ArtifactCache, format_stats
+    cache = ArtifactCache()
+    if ns.action == "clear":
+        cache.clear()
+        _emit(f"已清空构件缓存: {cache.root}")
+        return 0
+    for line in format_stats(cache.stats()):
+        _emit(line)
+    return 0
+
+
+def cmd_cds(ns):
+    """cds 子命令：训练、查看或清空 AppCDS 归档"""
+    from . import appcds
+    from .constants import default_jar
+    if ns.action == "clear":
+        _emit(f"已删除 {appcds.clear()} 个归档: {appcds.CDS_DIR}")
+        return 0
+    jar = ns.jar or default_jar()
+    java = ns.java or select_java()
+    if ns.action == "train":
+        try:
+            appcds.train(java, jar, ns.sample, log=_emit)
+        except RuntimeError as e:
+            _emit(f"[错误] {e}", sys.stderr)
+            return 1
+        return 0
+    _, version = appcds.java_version(java)
+    path = appcds.archive_path(java, jar)
+    _emit(f"java: {version or '不可用'}")
+    _emit(f"jar: {jar}")
+    if path is None:
+        _emit(f"当前 java/jar 不支持 AppCDS（需要 JDK {appcds.MIN_JAVA_VERSION}+）")
+    else:
+        _emit(f"归档: {path}（{'已生成' if os.path.exists(path) else '未生成，下次启动时训练'}）")
+    for archive, size in appcds.archives():
+        _emit(f"  {size / 1024 / 1024:8.1f} MB  {os.path.basename(archive)}")
+    return 0
+
+
+def cmd_jre(ns):
+    """jre 子命令：列出已安装的 java，按操作固定或取消固定"""
+    from .jre_registry import ALL_OPS, default_registry
+    registry = default_registry()
+    if ns.action == "pin":
+        if not ns.java:
+            _emit("用法: jre pin <java路径> [--op 操作]", sys.stderr)
+            return 2
+        try:
+            runtime = registry.pin(ns.op or ALL_OPS, ns.java)
+        except ValueError as e:
+            _emit(f"[错误] {e}", sys.stderr)
+            return 1
+        _emit(f"{ns.op or '所有操作'} -> {runtime.describe()}")
+        return 0
+    if ns.action == "unpin":
+        found = registry.unpin(ns.op or ALL_OPS)
+        _emit(f"已取消固定: {ns.op or '所有操作'}" if found else "没有固定的 java")
+        return 0
+    runtimes = registry.discover(refresh=True)
+    if not runtimes:
+        _emit("没有找到 java", sys.stderr)
+        return 1
+    selected = registry.select(ns.op)
+    for runtime in runtimes:
+        _emit(f"{'*' if runtime.java == selected else ' '} {runtime.describe()}")
+    for op, java in sorted(registry.pins().items()):
+        _emit(f"固定: {'所有操作' if op == ALL_OPS else op} -> {java}")
+    return 0
+
+
+def cmd_tools(ns):
+    """tools 子命令：列出工具注册表中的 jar（* 为使用中的）"""
+    from .tool_registry import default_registry
+    registry = default_registry()
+    registry.refresh(force=ns.rescan)
+    jars = registry.tools()
+    if not jars:
+        _emit("没有找到 APKEditor 或 apksigner jar", sys.stderr)
+        return 1
+    for jar in jars:
+        _emit(f"{'*' if registry.find(jar.name) == jar else ' '} {jar.describe()}")
+    return 0
+
+
+def cmd_patch(ns):
+    """patch 子命令：替换/删除APK中的条目，未改动的条目按原始字节复制"""
+    from .apk_patch import PatchError, patch_apk, parse_replacements, collect_directory
+    try:
+        replacements = collect_directory(ns.dir) if ns.dir else {}
+        replacements.update(parse_replacements(ns.replace))
+        start = time.monotonic()
+        patch_apk(ns.input, replacements, ns.remove or (), ns.output, keep_signature=ns.keep_signature,
+                  log=None if ns.quiet else _emit)
+    except PatchError as e:
+        _emit(f"补丁失败: {e}", sys.stderr)
+        return 1
+    if not ns.quiet:
+        _emit(f"耗时 {time.monotonic() - start:.2f} 秒")
+    return 0
+
+
+def cmd_zipalign(ns):
+    """zipalign 子命令：对齐APK，或用 --check 只检查"""
+    from .zipalign import ZipAlignError, check_alignment, align_apk
+    page_size = ns.page_size * 1024
+    try:
+        if ns.check:
+            problems = check_alignment(ns.input, page_size)
+            for name, offset, alignment in problems:
+                _emit(f"未对齐: {name} (偏移 {offset}，需要 {alignment} 字节对齐)")
+            _emit("对齐检查失败" if problems else "对齐检查通过")
+            return 1 if problems else 0
+        output = ns.output or os.path.splitext(os.path.abspath(ns.input))[0] + "_aligned.apk"
+        count = align_apk(ns.input, output, page_size)
+    except ZipAlignError as e:
+        _emit(f"对齐失败: {e}", sys.stderr)
+        return 1
+    _emit(f"已对齐 {count} 个条目: {output}")
+    return 0
+
+
+def cmd_verify(ns):
+    """verify 子命令：校验签名并显示证书，不启动JVM"""
+    from .apk_verify import verify_many, collect_apks, format_result
+    paths = [apk for inp in expand_inputs(ns.input) for apk in collect_apks(inp)]
+    if not paths:
+        _emit("没有匹配的输入文件", sys.stderr)
+        return 2
+    failed = 0
+    for result in verify_many(paths, ns.jobs):
+        failed += not result.verified
+        if ns.json:
+            _emit(json.dumps(result.as_dict(), ensure_ascii=False))
+        elif not ns.quiet or not result.verified:
+            for line in format_result(result, ns.certs):
+                _emit(line)
+    if not ns.json:
+        _emit(f"完成: 通过 {len(paths) - failed}/{len(paths)}")
+    return 1 if failed else 0
+
+
+def build_parser():
+    """构建命令行解析器"""
+    parser = argparse.ArgumentParser(prog="python -m apkeditor", description="APKEditor 无界面批量命令行")
+    sub = parser.add_subparsers(dest="command")
+
+    run = sub.add_parser("run", help="对多个输入并发执行同一操作")
+    run.add_argument("op", help=f"操作: {', '.join(OP_MAP.values())}")
+    run.add_argument("-i", "--input", action="append", required=True,
+                     help="输入文件/目录，支持通配符，可重复指定")
+    run.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="最大并发数，默认CPU核心数")
+    run.add_argument("--jar", help="APKEditor jar路径")
+    run.add_argument("--java", help="java可执行文件，默认由 Java 注册表选择（见 jre 子命令）")
+    run.add_argument("--xml", action="store_true", help="XML 反编译 (-t xml)")
+    run.add_argument("-v", "--verbose", action="store_true", help="Verbose (-v)")
+    run.add_argument("--resources", action="store_true", help="Resources (-resources)")
+    run.add_argument("--quiet", "-q", action="store_true", help="不输出任务日志，只输出汇总")
+    run.add_argument("--progress", nargs="?", const="text", choices=["text", "json"],
+                     help="在stderr输出解析出的进度（阶段、百分比、吞吐量、剩余时间），--progress=json 输出JSON行")
+    run.add_argument("--no-fast", action="store_true",
+                     help="始终调用 jar：info 默认直接解析 AndroidManifest.xml，"
+                          "m 对基础APK+配置拆分默认使用流式合并，无法处理时才调用 jar")
+    run.add_argument("--no-cache", action="store_true",
+                     help="不使用构件缓存（d/m/info 默认复用相同输入、jar和参数的上次结果）")
+    run.add_argument("--mem-budget", type=int, metavar="MB",
+                     help="并发JVM可用的内存（MB），默认为可用内存减去 APKEDITOR_MEMORY_RESERVE_MB（1024）")
+    run.add_argument("--no-mem-limit", action="store_true",
+                     help="不按内存调度：默认按输入大小估算每个任务的堆（-Xmx），内存不足时排队，内存不足失败时加大堆重试")
+    run.add_argument("--gc-log", action="store_true",
+                     help="采集GC日志（-Xlog:gc，写入 ~/.apkeditor/gc），输出暂停时间、峰值堆和GC开销，"
+                          "并记入堆配置档案供之后的同类任务设置 -Xmx")
+    run.add_argument("--extra", help="追加给jar的自定义参数，以-开头时写成 --extra=\"-f\"")
+
+    sign = run.add_argument_group("签名参数 (sign)")
+    sign.add_argument("--no-v1", action="store_true", help="禁用V1签名")
+    sign.add_argument("--no-v2", action="store_true", help="禁用V2签名")
+    sign.add_argument("--v3", action="store_true", help="启用V3签名")
+    sign.add_argument("--v4", action="store_true", help="启用V4签名")
+    sign.add_argument("--v4-backend", choices=["apksigner", "builtin"], default="apksigner",
+                      help="V4签名后端：apksigner，或 builtin（签名后多线程构建Merkle树生成 .idsig，需启用V2或V3）")
+    sign.add_argument("--v4-threads", type=int, help="builtin 后端构建Merkle树的线程数，默认CPU核心数")
+    sign.add_argument("--ks", help="密钥库文件")
+    sign.add_argument("--ks-alias", help="密钥别名")
+    sign.add_argument("--ks-pass", help="密钥密码（也可通过环境变量 APKEDITOR_KS_PASS 提供）")
+    sign.add_argument("--key", help="私钥文件 (PKCS#8)，指定后使用公钥私钥方式")
+    sign.add_argument("--key-pass", help="私钥密码")
+    sign.add_argument("--cert", help="公钥证书 (X.509)")
+    sign.add_argument("--no-align", action="store_true", help="签名前不检查对齐（默认未对齐时先原地对齐）")
+    sign.add_argument("--page-size", type=int, choices=[4, 16], default=16,
+                      help="未压缩 .so 的页对齐大小（KB），默认16")
+    run.set_defaults(func=cmd_run)
+
+    batch = sub.add_parser("sign-batch", help="签名会话：密钥只解锁一次，在一个JVM中并发签名多个APK")
+    batch.add_argument("-i", "--input", action="append", required=True, help="输入APK，支持通配符，可重复指定")
+    batch.add_argument("-o", "--out-dir", help="输出目录，默认原地签名")
+    batch.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="并发签名数，默认CPU核心数")
+    batch.add_argument("--java", help="java可执行文件，默认由 Java 注册表选择（见 jre 子命令）")
+    batch.add_argument("--quiet", "-q", action="store_true", help="只输出错误和汇总")
+    batch.add_argument("--no-v1", action="store_true", help="禁用V1签名")
+    batch.add_argument("--no-v2", action="store_true", help="禁用V2签名")
+    batch.add_argument("--v3", action="store_true", help="启用V3签名")
+    batch.add_argument("--v4", action="store_true", help="启用V4签名")
+    batch.add_argument("--v4-backend", choices=["apksigner", "builtin"], default="apksigner",
+                       help="V4签名后端，builtin 由会话中的密钥签名内置生成的 .idsig")
+    batch.add_argument("--ks", help="密钥库文件；密码从环境变量 APKEDITOR_KS_PASS 读取，未设置时在终端中输入")
+    batch.add_argument("--ks-alias", help="密钥别名")
+    batch.add_argument("--key", help="私钥文件 (PKCS#8)；加密私钥的密码从环境变量 APKEDITOR_KEY_PASS 读取")
+    batch.add_argument("--cert", help="公钥证书 (X.509)")
+    batch.add_argument("--no-align", action="store_true", help="签名前不检查对齐")
+    batch.add_argument("--page-size", type=int, choices=[4, 16], default=16, help="未压缩 .so 的页对齐大小（KB），默认16")
+    batch.set_defaults(func=cmd_sign_batch)
+
+    patch = sub.add_parser("patch", help="替换APK中的少量条目（dex、资源、清单），不完整重建")
+    patch.add_argument("-i", "--input", required=True, help="原APK")
+    patch.add_argument("-o", "--output", help="输出APK，默认 <输入>_patched.apk")
+    patch.add_argument("--replace", "-r", action="append", metavar="NAME=PATH",
+                       help="用本地文件替换条目，条目不存在时新增，可重复指定，例如 classes2.dex=build/classes2.dex")
+    patch.add_argument("--dir", help="补丁目录：其中的文件按相对路径替换或新增同名条目")
+    patch.add_argument("--remove", action="append", metavar="NAME", help="删除条目，支持通配符，可重复指定")
+    patch.add_argument("--keep-signature", action="store_true", help="保留 META-INF 中的旧签名文件")
+    patch.add_argument("--quiet", "-q", action="store_true", help="只输出错误")
+    patch.set_defaults(func=cmd_patch)
+
+    verify = sub.add_parser("verify", help="校验APK签名（v1/v2/v3）并显示签名证书，不启动JVM")
+    verify.add_argument("-i", "--input", action="append", required=True,
+                        help="APK文件或目录（递归查找 .apk），支持通配符，可重复指定")
+    verify.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="并行进程数，默认CPU核心数")
+    verify.add_argument("--certs", action="store_true", help="显示证书详情（颁发者、有效期、公钥、指纹）")
+    verify.add_argument("--json", action="store_true", help="每个APK输出一行JSON")
+    verify.add_argument("--quiet", "-q", action="store_true", help="只输出校验失败的APK")
+    verify.set_defaults(func=cmd_verify)
+
+    align = sub.add_parser("zipalign", help="对齐APK（未压缩条目4字节，未压缩 .so 按页对齐）")
+    align.add_argument("-i", "--input", required=True, help="输入APK")
+    align.add_argument("-o", "--output", help="输出APK，默认 <输入>_aligned.apk")
+    align.add_argument("--check", action="store_true", help="只检查对齐，不写出；未对齐时退出码为1")
+    align.add_argument("--page-size", type=int, choices=[4, 16], default=16, help="原生库页大小（KB），默认16")
+    align.set_defaults(func=cmd_zipalign)
+
+    cache = sub.add_parser("cache", help="构件缓存统计与清理")
+    cache.add_argument("action", nargs="?", choices=["stats", "clear"], default="stats")
+    cache.set_defaults(func=cmd_cache)
+
+    cds = sub.add_parser("cds", help="AppCDS 类数据共享归档：训练、查看与清理（需要 JDK 13+）")
+    cds.add_argument("action", nargs="?", choices=["status", "train", "clear"], default="status")
+    cds.add_argument("--jar", help="APKEditor jar，默认自动查找")
+    cds.add_argument("--java", help="java可执行文件，默认由 Java 注册表选择（见 jre 子命令）")
+    cds.add_argument("--sample", help="训练时反编译该APK（加载更多类），默认只训练启动路径")
+    cds.set_defaults(func=cmd_cds)
+
+    jre = sub.add_parser("jre", help="已安装的 java：列出（* 为选中的）、按操作固定或取消固定")
+    jre.add_argument("action", nargs="?", choices=["list", "pin", "unpin"], default="list")
+    jre.add_argument("java", nargs="?", help="pin 时固定的 java 可执行文件")
+    jre.add_argument("--op", help="操作键（d/b/m/x/p/info/sign/pairip/sign-session），默认所有操作")
+    jre.set_defaults(func=cmd_jre)
+
+    tools = sub.add_parser("tools", help="列出找到的 APKEditor / apksigner jar（版本和 SHA-256）")
+    tools.add_argument("--rescan", action="store_true", help="忽略目录修改时间，重新扫描")
+    tools.set_defaults(func=cmd_tools)
+    return parser
+
+
+def main(argv=None):
+    """命令行入口
+
+    Returns:
+        int: 进程退出码
+    """
+    parser = build_parser()
+    ns = parser.parse_args(argv)
+    if not getattr(ns, "func", None):
+        parser.print_help()
+        return 2
+    return ns.func(ns)
@@ -0,0 +1,276 @@
+# command_model.py
+"""与界面无关的命令模型
+
+CommandOptions 保存一次操作所需的全部参数（不依赖Qt控件），
+GUI、批量队列和无界面命令行都由它构建 java 参数，保证三者行为一致。
+"""
+
+import os
+import shlex
+from dataclasses import dataclass, replace
+
+from .constants import OP_MAP, default_jar
+
+
+@dataclass(frozen=True)
+class CommandOptions:
+    """一次操作的参数快照"""
+    op: str = "d"  # 操作键（OP_MAP中的值）
+    input_path: str = ""
+    jar_path: str = ""
+    flag_xml: bool = False
+    verbose: bool = False
+    resources: bool = False
+    v1: bool = True
+    v2: bool = True
+    v3: bool = False
+    v4: bool = False
+    v4_backend: str = "apksigner"  # V4签名后端：apksigner 或 builtin（内置多线程）
+    use_keystore: bool = True
+    keystore_path: str = ""
+    keystore_alias: str = ""
+    keystore_password: str = ""
+    private_key_path: str = ""
+    private_key_password: str = ""
+    public_key_path: str = ""
+    custom_args: str = ""
+    corex: bool = False
+
+    def with_input(self, input_path):
+        """返回替换了输入路径的新快照"""
+        return replace(self, input_path=input_path)
+
+    @property
+    def jar(self):
+        """实际使用的APKEditor jar"""
+        return self.jar_path or default_jar()
+
+
+def op_key_for(name):
+    """将操作名（界面名称或操作键）转换为操作键
+
+    Returns:
+        str: 操作键，未知操作返回None
+    """
+    if name in OP_MAP:
+        return OP_MAP[name]
+    return name if name in OP_MAP.values() else None
+
+
+def op_name_for(op_key):
+    """操作键对应的界面名称"""
+    return next((name for name, key in OP_MAP.items() if key == op_key), op_key)
+
+
+def split_custom_args(custom_args):
+    """解析自定义参数
+
+    Returns:
+        tuple: (参数列表, 错误信息)；解析失败时原样作为一个参数并返回错误信息
+    """
+    custom = custom_args.strip()
+    if not custom:
+        return [], ""
+    try:
+        return shlex.split(custom), ""
+    except ValueError as e:
+        return [custom], str(e)
+
+
+def build_args(options, apksigner_jar=None):
+    """构建 java 参数列表
+
+    Args:
+        options: CommandOptions实例
+        apksigner_jar: apksigner.jar路径（仅签名操作使用）
+
+    Returns:
+        list: 形如 ['-jar', jar, ...] 的参数列表
+    """
+    inp = options.input_path.strip()
+    if options.op == 'sign':
+        # 构建apksigner命令
+        args = ['-jar', apksigner_jar, 'sign']
+
+        # 添加签名版本标志
+        for version, enabled in [(1, options.v1), (2, options.v2), (3, options.v3), (4, options.v4)]:
+            if enabled:
+                args.append(f'--v{version}-signing-enabled')
+        # 内置V4后端：apksigner 只做 v1-v3，签名完成后再生成 .idsig
+        if uses_builtin_v4(options):
+            args.remove('--v4-signing-enabled')
+            args.extend(['--v4-signing-enabled', 'false'])
+
+        # 添加密钥信息
+        if options.use_keystore:
+            if keystore := options.keystore_path.strip():
+                args.extend(['--ks', keystore])
+                if alias := options.keystore_alias.strip():
+                    args.extend(['--ks-key-alias', alias])
+                if password := options.keystore_password.strip():
+                    args.extend(['--ks-pass', f'pass:{password}'])
+        else:
+            if private_key := options.private_key_path.strip():
+                args.extend(['--key', private_key])
+            if private_key_pass := options.private_key_password.strip():
+                args.extend(['--key-pass', f'pass:{private_key_pass}'])
+            if public_key := options.public_key_path.strip():
+                args.extend(['--cert', public_key])
+
+        # 添加输入APK文件
+        if inp:
+            args.append(inp)
+    else:
+        args = ['-jar', os.path.abspath(options.jar), options.op]
+
+        if inp:
+            args.extend(['-i', inp])
+
+        # 添加通用标志
+        if options.flag_xml:
+            args.extend(['-t', 'xml'])
+        if options.resources:
+            args.append('-resources')
+
+    # 添加Verbose标志（适用于所有操作）
+    if options.verbose:
+        args.append('-v')
+
+    return args + split_custom_args(options.custom_args)[0]
+
+
+def uses_builtin_v4(options):
+    """签名操作是否由内置后端生成V4签名（.idsig）"""
+    return options.op == 'sign' and options.v4 and options.v4_backend == 'builtin'
+
+
+def signed_apk_path(options):
+    """签名操作输出的APK：自定义参数中的 --out，未指定时 apksigner 原地签名"""
+    custom, _ = split_custom_args(options.custom_args)
+    if '--out' in custom[:-1]:
+        return custom[custom.index('--out') + 1]
+    return options.input_path.strip()
+
+
+def with_signing_input(options, path):
+    """签名操作改为原地签名 path（签名前对齐已把输入写到 --out 指定的输出时使用）
+
+    Returns:
+        CommandOptions: path 与原输入相同时返回原快照，否则返回去掉 --out 的新快照
+    """
+    if os.path.abspath(path) == os.path.abspath(options.input_path.strip()):
+        return options
+    custom, _ = split_custom_args(options.custom_args)
+    if '--out' in custom[:-1]:
+        index = custom.index('--out')
+        custom = custom[:index] + custom[index + 2:]
+    return replace(options, input_path=path, custom_args=shlex.join(custom))
+
+
+def sign_session_compatible(options):
+    """签名会话能否执行这次签名：会话只接收密钥和签名版本，自定义参数中除 --out 外不能有其他选项"""
+    custom, _ = split_custom_args(options.custom_args)
+    if '--out' in custom[:-1]:
+        index = custom.index('--out')
+        custom = custom[:index] + custom[index + 2:]
+    return not custom
+
+
+def uses_fast_info(options):
+    """info 操作是否可以不启动Java，直接解析清单得到结果
+
+    -v、-resources 和自定义参数需要 jar 输出完整信息，这些情况仍交给 jar。
+    """
+    return (options.op == 'info' and not options.verbose and not options.resources
+            and not options.custom_args.strip())
+
+
+def uses_fast_merge(options):
+    """合并操作是否可以先尝试流式合并（仅复制条目，清单和资源表仍由 jar 合并）
+
+    自定义参数中只允许 -f，其他合并选项需要 jar 处理整个拆分包。
+    """
+    custom, _ = split_custom_args(options.custom_args)
+    return options.op == 'm' and not options.resources and set(custom) <= {'-f'}
+
+
+def validate(options, apksigner_jar=None, batch=False):
+    """运行前验证参数
+
+    Args:
+        batch: 是否为多个输入的批量任务之一
+
+    Returns:
+        tuple: (是否通过, 错误信息)
+    """
+    # 验证APKEditor jar
+    jar = options.jar
+    if not jar or not os.path.exists(jar):
+        return False, f"找不到 APKEditor jar: {jar}\n请点击上方按钮选择正确的 jar 文件。"
+
+    # 验证输入
+    inp = options.input_path.strip()
+    if not inp:
+        return False, "请输入或选择输入文件/目录（-i）。"
+    if not os.path.exists(inp):
+        return False, f"指定的输入路径不存在: {inp}"
+
+    # 签名操作的额外验证
+    if options.op == 'sign':
+        if batch:
+            ok, message = validate_batch_signing(options)
+            if not ok:
+                return ok, message
+        return validate_signing(options, apksigner_jar)
+
+    return True, ""
+
+
+def validate_batch_signing(options):
+    """多个输入的批量签名不能使用 --out：所有输入会同时写到同一个文件
+
+    Returns:
+        tuple: (是否通过, 错误信息)
+    """
+    custom, _ = split_custom_args(options.custom_args)
+    if '--out' in custom:
+        return False, "批量签名不能使用 --out（所有输入会写到同一个文件），请去掉 --out 或使用 sign-batch --out-dir。"
+    return True, ""
+
+
+def validate_signing(options, apksigner_jar=None):
+    """验证签名参数（apksigner、密钥和签名版本）
+
+    Returns:
+        tuple: (是否通过, 错误信息)
+    """
+    if not apksigner_jar:
+        return False, "找不到 apksigner.jar: 请确保 lib 目录下存在以 apksigner 开头的 jar 文件"
+
+    # 根据密钥类型进行不同的验证
+    if options.use_keystore:
+        if not options.keystore_path.strip():
+            return False, "请选择签名密钥文件。"
+        if not os.path.exists(options.keystore_path.strip()):
+            return False, f"指定的签名密钥文件不存在: {options.keystore_path.strip()}"
+        if not options.keystore_alias.strip():
+            return False, "请输入密钥别名。"
+        if not options.keystore_password.strip():
+            return False, "请输入密钥密码。"
+    else:
+        if not options.private_key_path.strip():
+            return False, "请选择私钥文件。"
+        if not os.path.exists(options.private_key_path.strip()):
+            return False, f"指定的私钥文件不存在: {options.private_key_path.strip()}"
+        if not options.public_key_path.strip():
+            return False, "请选择公钥文件。"
+        if not os.path.exists(options.public_key_path.strip()):
+            return False, f"指定的公钥文件不存在: {options.public_key_path.strip()}"
+
+    # 验证至少选择一个签名版本
+    if not any([options.v1, options.v2, options.v3, options.v4]):
+        return False, "请至少选择一个签名版本（V1-V4）。"
+    # 内置V4签名从APK的 v2/v3 签名块读取证书和摘要
+    if uses_builtin_v4(options) and not (options.v2 or options.v3):
+        return False, "内置V4签名需要同时启用 V2 或 V3 签名。"
+    return True, ""
@@ -2,21 +2,30 @@
 """常量定义模块"""
 
 import os
-import glob
 
 def find_apkeditor_jar():
-    """查找APKEditor jar文件"""
-    # 按优先级查找：当前目录 -> lib目录 -> 默认路径
-    for directory in [".", os.path.join(".", "lib")]:
-        if os.path.isdir(directory):
-            matches = glob.glob(os.path.join(directory, "APKEditor*.jar"))
-            if matches:
-                return os.path.abspath(matches[0])
-    # 默认路径
-    return os.path.abspath(os.path.join(".", "lib", "APKEditor.jar"))
-
-# 默认JAR路径
-DEFAULT_JAR = find_apkeditor_jar()
+    """查找APKEditor jar文件（由工具注册表扫描并缓存，找不到时返回 ./lib/APKEditor.jar）"""
+    from .tool_registry import default_registry
+    return default_registry().apkeditor_jar()
+
+def find_apksigner_jar():
+    """查找apksigner.jar文件
+    
+    Returns:
+        str: apksigner.jar文件路径，如果未找到则返回None
+    """
+    from .tool_registry import default_registry
+    return default_registry().apksigner_jar()
+
+def default_jar():
+    """返回默认APKEditor jar路径（工具注册表只在目录变化时重新扫描）"""
+    return find_apkeditor_jar()
+
+def __getattr__(name):
+    # 兼容旧代码中的 DEFAULT_JAR 常量
+    if name == "DEFAULT_JAR":
+        return default_jar()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 配置选项
 PAIRIP_OPTIONS = {}
@@ -56,4 +65,22 @@ FILE_FILTERS = {
     "信息 (info)": "APK Files (*.apk *.apks *.xapk *.zip);;All Files (*)",
     "签名 (sign)": "APK Files (*.apk);;All Files (*)",
     "Pairip处理 (pairip)": "APKS Files (*.apks);;All Files (*)"
-}
\ No newline at end of file
+}
+
+# 本地缓存目录（常驻JVM编译产物等）
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".apkeditor")
+
+# 控制台最多保留的行数，更早的输出转存到 CACHE_DIR/console
+CONSOLE_MAX_LINES = int(os.environ.get("APKEDITOR_CONSOLE_MAX_LINES", "20000"))
+
+# 常驻JVM工作进程：执行多少个任务后重启，限制堆增长
+JVM_WORKER_MAX_JOBS = 50
+
+# 构件缓存（CACHE_DIR/artifacts）的大小上限，超出时按最近使用时间淘汰
+ARTIFACT_CACHE_MAX_BYTES = int(os.environ.get("APKEDITOR_CACHE_MAX_MB", "4096")) * 1024 * 1024
+
+# 内存调度：给系统和其他程序保留的内存（MB），并发JVM任务只使用其余的可用内存
+MEMORY_RESERVE_MB = int(os.environ.get("APKEDITOR_MEMORY_RESERVE_MB", "1024"))
+
+# AppCDS：为 APKEditor 等 jar 生成类数据共享归档（CACHE_DIR/cds）并在启动时使用，APKEDITOR_APPCDS=0 关闭
+APPCDS_ENABLED = os.environ.get("APKEDITOR_APPCDS", "1") != "0"
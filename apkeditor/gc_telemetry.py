@@ -0,0 +1,328 @@
+# gc_telemetry.py
+"""JVM GC 日志采集与堆配置档案
+
+开启后每次启动 APKEditor / apksigner 时加上 -Xlog:gc，把GC日志写到
+CACHE_DIR/gc 下的单独文件（不混入控制台输出）。任务结束后汇总暂停时间、
+峰值堆和GC开销，并按 操作 + 输入大小档位 记入堆配置档案
+（CACHE_DIR/heap_profile.json）；之后同类任务启动时自动使用档案推荐的 -Xmx。
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import itertools
+import threading
+from dataclasses import dataclass
+
+from .constants import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+GC_LOG_DIR = os.path.join(CACHE_DIR, "gc")
+PROFILE_PATH = os.path.join(CACHE_DIR, "heap_profile.json")
+PROFILE_VERSION = 1
+
+# 保留的GC日志文件数
+GC_LOG_KEEP = 50
+# -Xlog 统一日志需要 JDK 9+（Java 8 不认识该参数，JVM 无法启动）
+GC_LOG_MIN_MAJOR = 9
+# 每个档位保留的最近记录数
+PROFILE_RUNS = 10
+# 推荐堆 = 峰值堆 * HEADROOM + HEADROOM_MB
+HEADROOM = 1.5
+HEADROOM_MB = 64
+# GC开销超过该比例时认为堆偏小
+HIGH_OVERHEAD = 0.10
+MIN_HEAP_MB = 256
+HEAP_STEP_MB = 64
+
+_UNITS = {"K": 1 / 1024, "M": 1, "G": 1024}
+_UPTIME = re.compile(r"^\[([\d.]+)s\]")
+_PAUSE = re.compile(r"GC\(\d+\) (Pause [^()]*?)(?: \(.*?\))* (\d+)([KMG])->(\d+)([KMG])\((\d+)([KMG])\) ([\d.]+)ms")
+_HEAP = re.compile(r"GC\((\d+)\) .*?(\d+)([KMG])(?:\(\d+%\))?->(\d+)([KMG])(?:\(\d+%\))?(?:\((\d+)([KMG])\))?")
+
+_log_ids = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class GcSummary:
+    """一次运行的GC汇总"""
+    collections: int
+    pauses: int
+    full_gcs: int
+    pause_total_ms: float
+    pause_max_ms: float
+    peak_heap_mb: float
+    committed_mb: float
+    runtime_s: float
+
+    @property
+    def overhead(self):
+        """GC暂停时间占运行时间的比例"""
+        return self.pause_total_ms / 1000 / self.runtime_s if self.runtime_s > 0 else 0.0
+
+    def describe(self):
+        """一行可读的汇总"""
+        text = (f"GC: {self.collections} 次回收，暂停 {self.pauses} 次共 {self.pause_total_ms:.0f} ms"
+                f"（最长 {self.pause_max_ms:.0f} ms），峰值堆 {self.peak_heap_mb:.0f} MB / "
+                f"已提交 {self.committed_mb:.0f} MB，GC开销 {self.overhead * 100:.1f}%")
+        if self.full_gcs:
+            text += f"，Full GC {self.full_gcs} 次"
+        return text
+
+
+def _mb(value, unit):
+    return int(value) * _UNITS[unit]
+
+
+def new_log_path(op):
+    """为一次运行分配GC日志路径，并清理过旧的日志"""
+    os.makedirs(GC_LOG_DIR, exist_ok=True)
+    logs = sorted((os.path.join(GC_LOG_DIR, name) for name in os.listdir(GC_LOG_DIR)), key=os.path.getmtime)
+    for path in logs[:max(0, len(logs) - GC_LOG_KEEP + 1)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(GC_LOG_DIR, f"{op}-{stamp}-{os.getpid()}-{next(_log_ids)}.log")
+
+
+def gc_log_args(log_path):
+    """输出GC日志到文件的JVM参数（JDK 9+ 统一日志）
+
+    文件名加引号，Windows 路径中的盘符冒号不会被当作 -Xlog 的分隔符。
+    """
+    return [f'-Xlog:gc:file="{log_path}":uptime']
+
+
+def gc_log_supported(java):
+    """java 是否支持 -Xlog:gc（JDK 9+）；无法探测版本时按不支持处理"""
+    from .jre_registry import probe_java
+    runtime = probe_java(java)
+    return runtime is not None and runtime.major >= GC_LOG_MIN_MAJOR
+
+
+def heap_from_args(args):
+    """参数中的 -Xmx（MB），没有时返回None"""
+    for arg in args:
+        match = re.fullmatch(r"-Xmx(\d+)([kKmMgG])", arg)
+        if match:
+            return _mb(match.group(1), match.group(2).upper())
+    return None
+
+
+def summarize_gc_log(path, runtime_s=None):
+    """汇总GC日志
+
+    Args:
+        path: -Xlog:gc 输出的日志文件
+        runtime_s: 任务运行时间（秒），默认取日志中最后的JVM运行时间
+
+    Returns:
+        GcSummary: 汇总结果，日志不存在或为空时返回None
+    """
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    collections = set()
+    pauses = full_gcs = 0
+    pause_total = pause_max = peak = committed = uptime = 0.0
+    for line in lines:
+        match = _UPTIME.match(line)
+        if match:
+            uptime = max(uptime, float(match.group(1)))
+        match = _PAUSE.search(line)
+        if match:
+            pause = float(match.group(8))
+            pauses += 1
+            full_gcs += match.group(1).startswith("Pause Full")
+            pause_total += pause
+            pause_max = max(pause_max, pause)
+        match = _HEAP.search(line)
+        if match:
+            collections.add(match.group(1))
+            peak = max(peak, _mb(match.group(2), match.group(3)))
+            if match.group(6):
+                committed = max(committed, _mb(match.group(6), match.group(7)))
+    if not lines:
+        return None
+    return GcSummary(len(collections), pauses, full_gcs, pause_total, pause_max, peak, committed,
+                     runtime_s if runtime_s else uptime)
+
+
+def size_bucket(input_mb):
+    """输入大小档位：不小于输入大小的2的幂（MB）"""
+    bucket = 1
+    while bucket < input_mb:
+        bucket *= 2
+    return bucket
+
+
+def _round_heap(heap_mb):
+    return max(MIN_HEAP_MB, -(-int(heap_mb) // HEAP_STEP_MB) * HEAP_STEP_MB)
+
+
+class HeapProfile:
+    """按 操作 + 输入大小档位 记录的堆使用情况
+
+    Args:
+        path: 档案文件，默认 CACHE_DIR/heap_profile.json
+    """
+
+    def __init__(self, path=PROFILE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                self._entries = data.get("entries", {}) if data.get("version") == PROFILE_VERSION else {}
+            except (OSError, ValueError, AttributeError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": PROFILE_VERSION, "entries": self._entries}, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.path)
+
+    @staticmethod
+    def _input_mb(input_path):
+        from .scheduler import input_stats
+        return input_stats(input_path)[0] / 1024 / 1024
+
+    def record(self, op, input_path, summary=None, heap_mb=None, out_of_memory=False):
+        """记录一次运行
+
+        Args:
+            op: 操作键
+            input_path: 输入路径
+            summary: GcSummary，None表示没有GC日志（只记录内存不足）
+            heap_mb: 本次运行的 -Xmx（MB），使用JVM默认值时为None
+            out_of_memory: 是否因内存不足失败
+        """
+        if summary is None and not out_of_memory:
+            return
+        input_mb = self._input_mb(input_path)
+        run = {"input_mb": round(input_mb, 1), "heap_mb": heap_mb, "oom": out_of_memory, "time": int(time.time())}
+        if summary is not None:
+            run.update(peak_mb=round(summary.peak_heap_mb), overhead=round(summary.overhead, 4),
+                       pause_ms=round(summary.pause_total_ms, 1))
+        key = f"{op}:{size_bucket(input_mb)}"
+        with self._lock:
+            entries = self._load()
+            runs = entries.setdefault(key, [])
+            runs.append(run)
+            del runs[:-PROFILE_RUNS]
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"无法保存堆配置档案: {e}")
+
+    def recommend(self, op, input_path):
+        """根据档案推荐 -Xmx（MB）
+
+        峰值堆按输入大小比例放大后留出余量；曾经内存不足的堆翻倍，GC开销过高的堆放大1.5倍。
+
+        Returns:
+            int: 推荐的堆大小，档案中没有同类任务时返回None
+        """
+        input_mb = self._input_mb(input_path)
+        with self._lock:
+            runs = list(self._load().get(f"{op}:{size_bucket(input_mb)}", ()))
+        if not runs:
+            return None
+        heap = 0
+        for run in runs:
+            if run.get("peak_mb"):
+                scale = max(1.0, input_mb / run["input_mb"]) if run.get("input_mb") else 1.0
+                heap = max(heap, run["peak_mb"] * scale * HEADROOM + HEADROOM_MB)
+            if run.get("heap_mb"):
+                if run.get("oom"):
+                    heap = max(heap, run["heap_mb"] * 2)
+                elif run.get("overhead", 0) > HIGH_OVERHEAD:
+                    heap = max(heap, run["heap_mb"] * 1.5)
+        return _round_heap(heap) if heap else None
+
+    def clear(self):
+        """清空档案"""
+        with self._lock:
+            self._entries = {}
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+_default_profile = None
+
+
+def default_profile():
+    """进程内共用的堆配置档案"""
+    global _default_profile
+    if _default_profile is None:
+        _default_profile = HeapProfile()
+    return _default_profile
+
+
+def launch_options(options, gc_log=False, profile=None):
+    """一次 java 启动的JVM参数：档案推荐的 -Xmx，以及可选的GC日志
+
+    Args:
+        options: CommandOptions
+        gc_log: 是否采集GC日志
+        profile: HeapProfile，默认使用 default_profile()
+
+    Returns:
+        tuple: (JVM参数列表, GC日志路径或None)
+    """
+    profile = profile or default_profile()
+    jvm_args = []
+    heap_mb = profile.recommend(options.op, options.input_path.strip())
+    if heap_mb:
+        jvm_args.append(f"-Xmx{heap_mb}m")
+    log_path = None
+    if gc_log:
+        log_path = new_log_path(options.op)
+        jvm_args.extend(gc_log_args(log_path))
+    return jvm_args, log_path
+
+
+def finish_run(options, args, log_path, exit_code, lines=(), runtime_s=None, profile=None, killed=False):
+    """任务结束后汇总GC日志并写入档案
+
+    Args:
+        options: CommandOptions
+        args: 本次启动的 java 参数（用于读取 -Xmx）
+        log_path: GC日志路径，None表示未采集
+        exit_code: 退出码
+        lines: 任务输出行（用于判断内存不足）
+        runtime_s: 运行时间（秒）
+        profile: HeapProfile，默认使用 default_profile()
+        killed: 进程是否被信号结束
+
+    Returns:
+        GcSummary: 汇总结果，没有日志时返回None
+    """
+    from .scheduler import is_out_of_memory
+    profile = profile or default_profile()
+    summary = summarize_gc_log(log_path, runtime_s) if log_path else None
+    out_of_memory = is_out_of_memory(exit_code, lines, killed)
+    if summary is not None or out_of_memory:
+        profile.record(options.op, options.input_path.strip(), summary, heap_from_args(args), out_of_memory)
+    return summary
+
+
+__all__ = ['GcSummary', 'HeapProfile', 'GC_LOG_DIR', 'PROFILE_PATH', 'GC_LOG_MIN_MAJOR', 'new_log_path',
+           'gc_log_args', 'gc_log_supported',
+           'heap_from_args', 'summarize_gc_log', 'size_bucket', 'default_profile', 'launch_options', 'finish_run']
@@ -3,8 +3,9 @@
 
 import os
 import sys
+import time
 import configparser
-from PyQt5.QtWidgets import QApplication, QMainWindow, QMessageBox, QLabel, QPushButton
+from PyQt5.QtWidgets import QApplication, QMainWindow, QMessageBox, QTableWidgetItem
 from PyQt5.QtCore import QProcess, Qt, QThread
 from PyQt5.QtGui import QIcon
 
@@ -13,21 +14,18 @@ from .command_handler import CommandHandler
 
 # 导入功能模块
 from .gui_ui import setup_ui
-from .gui_events import on_run
-from .gui_console import setup_context_menu, append_to_console, on_stdout, on_stderr, on_pairip_progress
+from .gui_console import (
+    setup_context_menu, append_to_console, append_lines_to_console, console_message,
+    on_stdout, on_stderr, on_pairip_progress
+)
+from .process_stream import ProcessStreamReader
+from .progress_parser import ProgressParser
 from .gui_file_operations import (
     setup_drag_drop, choose_file, choose_input, choose_jar,
     choose_keystore, choose_private_key, choose_public_key,
-    on_key_type_changed, update_key_type_visibility
+    on_key_type_changed, update_key_type_visibility, set_inputs
 )
 
-# 尝试导入PairipHandler
-try:
-    from .pairip_handler import PairipHandler
-except ImportError as e:
-    print(f"导入PairipHandler失败: {str(e)}")
-    PairipHandler = None
-
 # 获取应用根目录，支持PyInstaller打包
 def get_app_root():
     # PyInstaller打包后会设置_MEIPASS属性
@@ -61,8 +59,9 @@ class APKEditorGUI(QMainWindow):
                 break
         
         self.process = QProcess(self)
-        self.process.readyReadStandardOutput.connect(self._on_stdout)
-        self.process.readyReadStandardError.connect(self._on_stderr)
+        # 增量解码进程输出，按批交给控制台（需在finished连接之前创建，保证最后一行先输出）
+        self.stream_reader = ProcessStreamReader(self.process, parent=self)
+        self.stream_reader.lines_ready.connect(self._on_output_lines)
         self.process.finished.connect(self.on_finished)
         
         # 初始化可能在其他方法中使用的属性
@@ -70,6 +69,28 @@ class APKEditorGUI(QMainWindow):
         self.context_menu = None
         self.copy_action = None
         
+        # 常驻JVM工作进程（首次使用时创建）
+        self.jvm_worker = None
+        self.worker_thread = None
+        # 内置V4签名：签名成功后待执行的参数快照（流式合并和V4签名作为 "run" 组任务执行）
+        self.pending_v4 = None
+        
+        # 构件缓存（首次使用时创建）；未命中的任务结束后写入缓存
+        self.artifact_cache = None
+        self.pending_cache = None
+        self.run_output = []
+        # GC日志 / 堆配置档案：(参数快照, java参数, GC日志路径, 启动时间)，任务结束后汇总
+        self.pending_gc = None
+        # 一次性进程转储中的AppCDS归档，成功结束后启用
+        self.pending_cds = None
+        
+        # 从进程输出解析进度
+        self.progress_parser = ProgressParser()
+        
+        # 批量任务：多个输入路径及当前队列
+        self.batch_inputs = []
+        self.job_queue = None
+        
         # 密钥配置文件路径
         self.key_config_path = os.path.join(get_app_root(), 'lib', 'key.ini')
         
@@ -138,6 +159,8 @@ class APKEditorGUI(QMainWindow):
     
     # 核心方法
     def on_run(self):
+        # 运行相关模块（常驻JVM、批量队列、Pairip等）在首次运行时才加载
+        from .gui_events import on_run
         return on_run(self)
     
     def _append_to_console(self, text):
@@ -149,6 +172,25 @@ class APKEditorGUI(QMainWindow):
     def _on_stderr(self):
         return on_stderr(self)
     
+    def _on_output_lines(self, lines):
+        append_lines_to_console(self, lines)
+        if self.pending_cache is not None or self.pending_gc is not None:
+            self.run_output.extend(lines)
+        event = None
+        for line in lines:
+            event = self.progress_parser.feed(line) or event
+        if event is not None:
+            self.show_progress(event.fraction, event.describe())
+    
+    def show_progress(self, fraction, text):
+        """显示确定的进度；fraction为None时切换为不确定进度"""
+        if fraction is None:
+            self.progress.setRange(0, 0)
+            return
+        self.progress.setRange(0, 100)
+        self.progress.setValue(int(fraction * 100))
+        self.progress.setFormat(text)
+    
     def on_pairip_progress(self, message):
         return on_pairip_progress(self, message)
     
@@ -179,9 +221,9 @@ class APKEditorGUI(QMainWindow):
             self.radio_keystore.blockSignals(False)
             self.radio_key_pair.blockSignals(False)
             
-            # 更新可见性
+            # 更新参数模型和可见性
+            self.ui_state.set_key_type(self.radio_keystore.isChecked())
             self._update_key_type_visibility()
-            self.update_preview()
         except Exception as e:
             import traceback
             print(f"处理密钥类型变更出错: {str(e)}")
@@ -189,25 +231,7 @@ class APKEditorGUI(QMainWindow):
     
     def _update_key_type_visibility(self):
         """更新密钥类型相关元素的可见性"""
-        keystore_visible = self.radio_keystore.isChecked()
-        key_pair_visible = self.radio_key_pair.isChecked()
-        
-        # 密钥库方式元素可见性
-        keystore_widgets = [self.keystore_path, self.keystore_alias, self.keystore_password, self.keystore_btn]
-        for widget in keystore_widgets:
-            widget.setVisible(keystore_visible)
-        
-        # 公钥私钥方式元素可见性
-        key_pair_widgets = [self.private_key_path, self.private_key_password, self.public_key_path, self.private_key_btn, self.public_key_btn]
-        for widget in key_pair_widgets:
-            widget.setVisible(key_pair_visible)
-        
-        # 更新相关标签的可见性
-        for label in self.findChildren(QLabel):
-            if label.text().startswith("签名密钥") or label.text().startswith("密钥别名") or label.text().startswith("密钥密码:"):
-                label.setVisible(keystore_visible)
-            elif label.text().startswith("私钥文件") or label.text().startswith("私钥密码") or label.text().startswith("公钥文件"):
-                label.setVisible(key_pair_visible)
+        self.ui_state.apply_visibility()
     
     def choose_private_key(self):
         """选择私钥文件"""
@@ -227,18 +251,19 @@ class APKEditorGUI(QMainWindow):
         if path:
             self.keystore_path.setText(path)
 
+    def snapshot_options(self):
+        """读取当前界面参数，返回与控件无关的CommandOptions快照"""
+        return self.ui_state.snapshot(self.jar_path)
+
     def update_preview(self):
-        """更新命令预览"""
-        self.cmd_preview.setText(CommandHandler.build_command(
-            self.current_op, self.flag_xml, self.flag_verbose, self.flag_resources,
-            self.flag_v1, self.flag_v2, self.flag_v3, self.flag_v4,
-            self.radio_keystore, self.radio_key_pair,
-            self.keystore_path, self.keystore_alias, self.keystore_password,
-            self.private_key_path, self.private_key_password, self.public_key_path,
-            self.input_line, self.custom_args, self.jar_path
-        ))
-            
+        """安排刷新命令预览（短时间内的多次请求合并为一次）"""
+        self.ui_state.schedule_preview()
 
+    def refresh_preview(self):
+        """立即生成命令预览"""
+        text = CommandHandler.preview(self.snapshot_options())
+        if text != self.cmd_preview.text():
+            self.cmd_preview.setText(text)
 
     def _reset_ui_state(self):
         """重置UI状态"""
@@ -250,25 +275,73 @@ class APKEditorGUI(QMainWindow):
         """停止进程"""
         if self.process.state() != QProcess.NotRunning:
             self.process.kill()
-            self.output_console.append("[已停止]")
+            console_message(self, "[已停止]")
+        if self.worker_thread is not None and self.worker_thread.isRunning():
+            # 结束常驻JVM使当前任务返回，下次运行时会自动重启
+            self.jvm_worker.kill()
+            console_message(self, "[已停止]")
+        # 已停止的任务不写入缓存，已停止的签名不再生成内置V4签名，被结束的进程也不计入堆配置档案
+        self.pending_cache = None
+        self.pending_v4 = None
+        self.pending_gc = None
+        if self.job_queue is not None and self.job_queue.is_running():
+            self.job_queue.stop()
+            console_message(self, "[批量任务已停止]")
+        # 线程池中的运行任务（准备、对齐、流式合并、内置V4签名、Pairip处理）在下一个检查点停止，并结束其子进程
+        if self.tasks.cancel("run"):
+            console_message(self, "[已停止]")
         self._reset_ui_state()
         
     def closeEvent(self, event):
         """窗口关闭事件，保存密钥信息"""
         # 保存密钥信息
         self.save_key_info()
+        # 取消预热和后台任务，停止常驻JVM（先停止JVM，正在预热启动的工作进程随之结束）
+        self.prewarmer.cancel()
+        if self.jvm_worker is not None:
+            self.jvm_worker.stop()
+        self.tasks.shutdown()
         event.accept()
     
     def on_finished(self, exitCode, exitStatus):
         """处理进程完成"""
-        self.output_console.append(f"\n[进程结束 - 退出码: {exitCode}]")
+        if self.pending_cds is not None:
+            from .appcds import finish_training
+            training, self.pending_cds = self.pending_cds, None
+            if finish_training(training, exitCode if exitStatus == QProcess.NormalExit else -1):
+                console_message(self, "\n[已生成 AppCDS 归档，之后的启动将直接加载其中的类]")
+        if self.pending_gc is not None:
+            # 汇总GC日志并更新堆配置档案（签名后的内置V4步骤不再计入）
+            from .gc_telemetry import finish_run
+            options, args, log_path, started = self.pending_gc
+            self.pending_gc = None
+            summary = finish_run(options, args, log_path, exitCode, self.run_output, time.monotonic() - started,
+                                 killed=exitStatus == QProcess.CrashExit)
+            if summary is not None:
+                console_message(self, f"\n[{summary.describe()}]")
+            if self.pending_cache is None:
+                self.run_output = []
+        if self.pending_v4 is not None:
+            # apksigner 成功后生成内置V4签名，结束时再次进入这里
+            options, self.pending_v4 = self.pending_v4, None
+            if exitCode == 0 and exitStatus == QProcess.NormalExit:
+                from .gui_events import start_builtin_v4
+                console_message(self, "\n[apksigner 完成，生成内置V4签名]")
+                start_builtin_v4(self, options)
+                return
+        if self.pending_cache is not None:
+            # 成功的结果写入构件缓存
+            key, output, started = self.pending_cache
+            self.pending_cache = None
+            if exitCode == 0 and exitStatus == QProcess.NormalExit:
+                self.artifact_cache.store(key, self.run_output, output, time.monotonic() - started)
+            self.run_output = []
+        console_message(self, f"\n[进程结束 - 退出码: {exitCode}]")
         self._reset_ui_state()
     
     def on_pairip_finished(self, success, message):
         """处理Pairip完成"""
-        self.output_console.append(f"处理{'成功' if success else '失败'}: {message}")
-        if hasattr(self, 'pairip_thread'):
-            self.pairip_thread.wait()
+        console_message(self, f"处理{'成功' if success else '失败'}: {message}")
         self._reset_ui_state()
     
     def dragEnterEvent(self, event):
@@ -280,10 +353,71 @@ class APKEditorGUI(QMainWindow):
     def dropEvent(self, event, target_line_edit):
         """处理拖放事件"""
         if event.mimeData().hasUrls():
-            path = event.mimeData().urls()[0].toLocalFile()
-            target_line_edit.setText(path)
+            paths = [url.toLocalFile() for url in event.mimeData().urls()]
+            if target_line_edit is self.input_line:
+                # 输入框支持一次拖入多个文件作为批量任务
+                set_inputs(self, paths)
+            else:
+                target_line_edit.setText(paths[0])
             self.update_preview()
     
+    def on_input_edited(self, text):
+        """手动修改输入路径时退出批量模式"""
+        if self.batch_inputs and text.strip() != self.batch_inputs[0]:
+            self.batch_inputs = []
+            self.update_mode_label()
+        # 输入改变后丢弃旧的预热，停顿后按新输入重新预热
+        self.prewarmer.schedule()
+    
+    def setup_job_table(self, jobs):
+        """为批量任务创建状态行"""
+        self.job_table.setRowCount(len(jobs))
+        for job in jobs:
+            self.job_table.setItem(job.index, 0, QTableWidgetItem(job.input_path))
+            self.job_table.setItem(job.index, 1, QTableWidgetItem(job.status))
+            self.job_table.setItem(job.index, 2, QTableWidgetItem(""))
+        self.job_table.setVisible(True)
+    
+    def on_batch_job_changed(self, index):
+        """刷新批量任务状态行"""
+        job = self.job_queue.jobs[index]
+        self.job_table.item(index, 1).setText(job.status)
+        self.job_table.item(index, 2).setText("" if job.exit_code is None else str(job.exit_code))
+        if job.exit_code is not None:
+            console_message(self, f"[任务 {index + 1} {job.status} - 退出码: {job.exit_code}] {job.input_path}")
+    
+    def on_batch_job_selected(self, row, column):
+        """在控制台显示选中任务的输出"""
+        if self.job_queue is None or row >= len(self.job_queue.jobs):
+            return
+        job = self.job_queue.jobs[row]
+        self.console_buffer.clear()
+        console_message(self, f"> {job.program} {' '.join(job.args)}\n")
+        append_lines_to_console(self, job.output)
+    
+    def on_batch_progress(self, index):
+        """根据各任务的进度更新整体进度"""
+        job = self.job_queue.jobs[index]
+        if job.status == job.RUNNING and job.progress is not None:
+            self.job_table.item(index, 1).setText(f"{job.status} {job.progress.percent}%")
+        jobs = self.job_queue.jobs
+        done = sum(job.fraction for job in jobs)
+        self.show_progress(done / len(jobs), f"{int(done)}/{len(jobs)} %p%")
+    
+    def on_batch_finished(self):
+        """批量任务全部结束"""
+        jobs = self.job_queue.jobs
+        succeeded = sum(1 for job in jobs if job.exit_code == 0)
+        console_message(self, f"\n[批量任务结束 - 成功: {succeeded}/{len(jobs)}]")
+        self._reset_ui_state()
+    
+    def show_cache_stats(self):
+        """在控制台显示构件缓存统计"""
+        from .artifact_cache import ArtifactCache, format_stats
+        if self.artifact_cache is None:
+            self.artifact_cache = ArtifactCache()
+        console_message(self, "\n[构件缓存统计]\n" + "\n".join(format_stats(self.artifact_cache.stats())))
+    
     def _show_context_menu(self, position):
         """显示右键菜单"""
         # 更新复制操作的可用性
@@ -300,7 +434,7 @@ class APKEditorGUI(QMainWindow):
     
     def _clear_console(self):
         """清屏控制台内容"""
-        self.output_console.clear()
+        self.console_buffer.clear()
     
     def _copy_selected_text(self):
         """复制选中的文本"""
@@ -321,47 +455,10 @@ class APKEditorGUI(QMainWindow):
     
     def on_op_change(self):
         """处理操作变更逻辑"""
-        op_text = self.current_op
-        is_signing = op_text.startswith("签名")
-        is_pairip = op_text.startswith("Pairip")
-        
-        # 设置通用标志的可见性和可用性
-        self.flag_xml.setVisible(not is_signing and not is_pairip)
-        self.flag_xml.setEnabled(op_text.startswith("反编译"))
-        self.flag_resources.setVisible(not is_signing and not is_pairip)
-        self.flag_resources.setEnabled(True)
-        self.flag_corex.setVisible(is_pairip)
-        self.flag_corex.setEnabled(is_pairip)
-        
-        # 设置签名相关标志的可见性
-        for flag in [self.flag_v1, self.flag_v2, self.flag_v3, self.flag_v4]:
-            flag.setVisible(is_signing)
-        
-        # 设置签名相关UI元素的可见性
-        signing_widgets = [
-            self.keystore_path, self.keystore_alias, self.keystore_password,
-            self.private_key_path, self.private_key_password, self.public_key_path,
-            self.radio_keystore, self.radio_key_pair
-        ]
-        for widget in signing_widgets:
-            widget.setVisible(is_signing)
-        
-        # 设置签名相关标签的可见性
-        signing_labels = ["签名密钥", "密钥别名", "密钥密码", "私钥文件", "私钥密码", "公钥文件", "密钥类型:"]
-        for label in self.findChildren(QLabel):
-            if any(label.text().startswith(prefix) for prefix in signing_labels):
-                label.setVisible(is_signing)
-        
-        # 设置签名相关选择按钮的可见性
-        for btn in self.findChildren(QPushButton):
-            if btn.text() == "选择":
-                parent = btn.parent()
-                if parent in [self.keystore_path.parent(), self.private_key_path.parent(), self.public_key_path.parent()]:
-                    btn.setVisible(is_signing)
-        
-        # 初始设置公钥私钥相关元素的可见性
-        if is_signing:
-            self._update_key_type_visibility()
+        # 可见性由参数模型按预先计算的表切换，不再遍历控件树
+        self.ui_state.set_op(self.current_op)
+        self.ui_state.apply_visibility()
+        self.prewarmer.schedule()
         
         # 更新模式标签
         self.update_mode_label()
@@ -373,6 +470,8 @@ class APKEditorGUI(QMainWindow):
         if hasattr(self, 'mode_label'):
             # 从current_op中提取模式名称（去掉括号内容）
             mode_name = self.current_op.split('(')[0].strip()
+            if self.batch_inputs:
+                mode_name += f" [批量 {len(self.batch_inputs)} 个]"
             self.mode_label.setText(f"当前模式: {mode_name}")
     
     def load_key_info(self):
@@ -467,6 +566,6 @@ class APKEditorGUI(QMainWindow):
         if os.path.exists(self.key_config_path):
             try:
                 os.remove(self.key_config_path)
-                self.output_console.append("[已清空密钥记录]")
+                console_message(self, "[已清空密钥记录]")
             except Exception as e:
                 print(f"删除密钥配置文件出错: {str(e)}")
\ No newline at end of file
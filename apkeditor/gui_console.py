@@ -1,8 +1,15 @@
 # gui_console.py
 """APKEditor GUI控制台处理模块"""
 
+import os
 import re
+import html
+import time
+from collections import deque
 from PyQt5.QtWidgets import QAction, QMenu
+from PyQt5.QtCore import QTimer, QProcess
+
+from .constants import CACHE_DIR, CONSOLE_MAX_LINES
 
 
 def setup_context_menu(main_window):
@@ -22,12 +29,150 @@ def setup_context_menu(main_window):
     main_window.clear_action = QAction("清空")
     main_window.clear_action.triggered.connect(main_window._clear_console)
     
-    main_window.context_menu.addActions([main_window.copy_action, main_window.select_all_action, main_window.clear_action])
+    main_window.cache_stats_action = QAction("构件缓存统计")
+    main_window.cache_stats_action.triggered.connect(main_window.show_cache_stats)
+    
+    main_window.context_menu.addActions([main_window.copy_action, main_window.select_all_action, main_window.clear_action,
+                                         main_window.cache_stats_action])
     
     main_window.output_console.setContextMenuPolicy(Qt.CustomContextMenu)
     main_window.output_console.customContextMenuRequested.connect(main_window._show_context_menu)
 
 
+# 预编译的消息分类规则
+_ERROR_RE = re.compile(r'^ERROR:|^Error:|^错误:|^Exception:|\bfailed\b|\bfailure\b|\b失败\b|^✘', re.IGNORECASE)
+_LOG_LEVEL_RE = re.compile(r'^\d+\.\d+\s+I:|^\[MERGE\]|^\d+\.\d+\s+D:|^\[DEBUG\]')
+_SUCCESS_RE = re.compile(r'^SUCCESS:|^成功:|^完成:|\bsuccess\b|\b成功\b|\b完成\b|^✓|^✔', re.IGNORECASE)
+_SUCCESS_CASE_RE = re.compile(_SUCCESS_RE.pattern)
+_WARNING_RE = re.compile(r'WARNING|警告')
+_WARNING_ANY_CASE_RE = re.compile(_WARNING_RE.pattern, re.IGNORECASE)
+_COREX_RE = re.compile(r'corex|hook|lib_pairip_corex', re.IGNORECASE)
+
+
+def classify_line(line):
+    """根据内容返回行的显示颜色
+    
+    Returns:
+        str: 颜色值，普通行返回None
+    """
+    # 包含日志级别前缀的行不是错误
+    if _ERROR_RE.search(line) and not _LOG_LEVEL_RE.match(line):
+        return '#FF5555'
+    # 先用区分大小写的成功规则和不区分大小写的警告规则粗筛，再决定颜色
+    if not (_SUCCESS_CASE_RE.search(line) or _WARNING_ANY_CASE_RE.search(line) or _COREX_RE.search(line)):
+        return None
+    if _SUCCESS_RE.search(line):
+        return '#50fa7b'
+    if _WARNING_RE.search(line):
+        return '#FFA500'
+    if _COREX_RE.search(line):
+        return '#BD93F9'
+    return None
+
+
+def _line_html(line, color=None):
+    """将一行文本转为HTML块（保留空格）"""
+    text = html.escape(line).replace(' ', '&nbsp;')
+    if color:
+        text = f"<font color='{color}'>{text}</font>"
+    return f"<div>{text or '&nbsp;'}</div>"
+
+
+class ConsoleBuffer:
+    """控制台批量渲染缓冲
+    
+    输出先进入待渲染队列，由定时器每帧合并为一次 append；控制台最多保留
+    max_lines 行，更早的行转存到磁盘文件，长时间运行时内存保持平稳。
+    
+    Args:
+        console: 输出控制台QTextEdit
+        max_lines: 控制台最多保留的行数
+        interval: 合并渲染的间隔（毫秒）
+    """
+    
+    def __init__(self, console, max_lines=CONSOLE_MAX_LINES, interval=16):
+        self.console = console
+        self.max_lines = max_lines
+        self.spill_path = None
+        self._spill_file = None
+        self._pending = []  # (行文本, 是否需要分类着色)
+        self._lines = deque()
+        self._timer = QTimer(console)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+        console.document().setMaximumBlockCount(max_lines)
+    
+    def set_max_lines(self, max_lines):
+        """修改控制台最多保留的行数"""
+        self.max_lines = max_lines
+        self.console.document().setMaximumBlockCount(max_lines)
+    
+    def write(self, text):
+        """写入进程输出（按内容着色，忽略空行）"""
+        self._pending.extend((line, True) for line in text.split('\n') if line.strip())
+        self._schedule()
+    
+    def write_lines(self, lines):
+        """写入已按行拆分的进程输出"""
+        self._pending.extend((line, True) for line in lines if line.strip())
+        self._schedule()
+    
+    def message(self, text):
+        """写入状态消息（不着色，保留空行）"""
+        self._pending.extend((line, False) for line in text.split('\n'))
+        self._schedule()
+    
+    def _schedule(self):
+        if not self._timer.isActive():
+            self._timer.start()
+    
+    def _spill(self, lines):
+        """将移出控制台的行写入磁盘"""
+        if self._spill_file is None:
+            spill_dir = os.path.join(CACHE_DIR, 'console')
+            os.makedirs(spill_dir, exist_ok=True)
+            self.spill_path = os.path.join(spill_dir, time.strftime('console-%Y%m%d-%H%M%S.log'))
+            self._spill_file = open(self.spill_path, 'a', encoding='utf-8')
+            self._pending.append((f"[较早的输出已转存到: {self.spill_path}]", False))
+        self._spill_file.write('\n'.join(lines) + '\n')
+        self._spill_file.flush()
+    
+    def flush(self):
+        """把待渲染的行一次性追加到控制台"""
+        self._timer.stop()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        
+        # 超过上限的部分不会显示，直接转存
+        if len(pending) > self.max_lines:
+            overflow = len(pending) - self.max_lines
+            self._spill([line for line, _ in pending[:overflow]])
+            pending = pending[overflow:]
+        
+        self._lines.extend(line for line, _ in pending)
+        if len(self._lines) > self.max_lines:
+            evicted = [self._lines.popleft() for _ in range(len(self._lines) - self.max_lines)]
+            self._spill(evicted)
+        
+        # 转存时产生的提示消息一并渲染
+        pending.extend(self._pending)
+        self._pending = []
+        chunk = ''.join(_line_html(line, classify_line(line) if colored else None) for line, colored in pending)
+        self.console.append(chunk)
+    
+    def clear(self):
+        """清空控制台和待渲染队列，结束当前转存文件"""
+        self._timer.stop()
+        self._pending = []
+        self._lines.clear()
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self.console.clear()
+
+
 def append_to_console(main_window, text):
     """在控制台添加文本（确保在主线程执行）
     
@@ -35,89 +180,64 @@ def append_to_console(main_window, text):
         main_window: APKEditorUI主窗口实例
         text: 要添加的文本内容
     """
-    # 分割文本为多行，便于处理和显示
-    lines = text.split('\n')
-    for line in lines:
-        if line.strip():
-            # 文本已经在on_pairip_progress中清理过ANSI颜色代码
-            clean_line = line
-            
-            # 使用模式匹配字典简化消息类型识别
-            message_types = [
-                ('error', [
-                    r'^ERROR:', r'^Error:', r'^错误:', r'^Exception:',
-                    r'\bfailed\b', r'\bfailure\b', r'\b失败\b', r'^✘'
-                ], False),
-                ('success', [
-                    r'^SUCCESS:', r'^成功:', r'^完成:', r'\bsuccess\b',
-                    r'\b成功\b', r'\b完成\b', r'^✓', r'^✔'
-                ], False),
-                ('warning', ['WARNING', '警告'], True),
-                ('corex', ['corex', 'hook', 'lib_pairip_corex'], True)
-            ]
-            
-            # 检查是否为错误消息
-            is_error = any(re.search(pattern, clean_line, re.IGNORECASE) 
-                          for pattern in message_types[0][1])
-            
-            # 检查是否包含日志级别前缀，如果是则不是错误
-            log_level_patterns = [
-                r'^\d+\.\d+\s+I:', r'^\[MERGE\]',
-                r'^\d+\.\d+\s+D:', r'^\[DEBUG\]'
-            ]
-            
-            has_log_level_prefix = any(re.match(pattern, clean_line) for pattern in log_level_patterns)
-            
-            # 根据消息类型设置不同的颜色
-            if is_error and not has_log_level_prefix:
-                clean_line = f"<font color='#FF5555'>{clean_line}</font>"
-            elif any(re.search(pattern, clean_line, re.IGNORECASE if case_insensitive else 0)
-                    for msg_type, patterns, case_insensitive in message_types[1:] for pattern in patterns):
-                if 'success' in str(message_types) and any(re.search(pattern, clean_line, re.IGNORECASE) for pattern in message_types[1][1]):
-                    clean_line = f"<font color='#50fa7b'>{clean_line}</font>"
-                elif 'warning' in str(message_types) and any(re.search(pattern, clean_line) for pattern in message_types[2][1]):
-                    clean_line = f"<font color='#FFA500'>{clean_line}</font>"
-                elif 'corex' in str(message_types) and any(re.search(pattern, clean_line, re.IGNORECASE) for pattern in message_types[3][1]):
-                    clean_line = f"<font color='#BD93F9'>{clean_line}</font>"
-            
-            # 添加到控制台
-            main_window.output_console.append(clean_line)
+    # 文本已经在on_pairip_progress中清理过ANSI颜色代码
+    main_window.console_buffer.write(text)
+
+
+def append_lines_to_console(main_window, lines):
+    """在控制台添加已按行拆分的进程输出
+    
+    Args:
+        main_window: APKEditorUI主窗口实例
+        lines: 输出行列表
+    """
+    main_window.console_buffer.write_lines(lines)
+
+
+def console_message(main_window, text):
+    """在控制台添加状态消息，与进程输出保持先后顺序
+    
+    Args:
+        main_window: APKEditorUI主窗口实例
+        text: 消息内容
+    """
+    main_window.console_buffer.message(text)
 
 
 def on_stdout(main_window):
-    """处理标准输出
+    """读取标准输出（由ProcessStreamReader增量解码并按批输出）
     
     Args:
         main_window: APKEditorUI主窗口实例
     """
     try:
-        text = main_window.process.readAllStandardOutput().data().decode('utf-8', errors='replace')
-        append_to_console(main_window, text)
+        main_window.stream_reader.read_channel(QProcess.StandardOutput)
     except Exception as e:
-        main_window.output_console.append(f"[错误] 处理输出时发生异常: {str(e)}")
+        console_message(main_window, f"[错误] 处理输出时发生异常: {str(e)}")
 
 
 def on_stderr(main_window):
-    """处理标准错误
+    """读取标准错误（由ProcessStreamReader增量解码并按批输出）
     
     Args:
         main_window: APKEditorUI主窗口实例
     """
     try:
-        text = main_window.process.readAllStandardError().data().decode('utf-8', errors='replace')
-        append_to_console(main_window, text)
+        main_window.stream_reader.read_channel(QProcess.StandardError)
     except Exception as e:
-        main_window.output_console.append(f"[错误] 处理错误输出时发生异常: {str(e)}")
+        console_message(main_window, f"[错误] 处理错误输出时发生异常: {str(e)}")
 
 # 导入Qt模块
 from PyQt5.QtCore import Qt
 
+_ANSI_ESCAPE_RE = re.compile(r'\x1B(?:[@-Z\-_]|\[[0-?]*[ -/]*[@-~])')
+
 def on_pairip_progress(self, message):
     """处理Pairip进度更新"""
     # 移除ANSI颜色代码
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\-_]|\[[0-?]*[ -/]*[@-~])')
-    clean_message = ansi_escape.sub('', message)
+    clean_message = _ANSI_ESCAPE_RE.sub('', message)
     append_to_console(self, clean_message)
 
 # 导出的函数列表
-__all__ = ['setup_context_menu', 'append_to_console', 'on_stdout', 'on_stderr', 'on_pairip_progress']
\ No newline at end of file
+__all__ = ['setup_context_menu', 'append_to_console', 'append_lines_to_console', 'console_message', 'ConsoleBuffer',
+           'on_stdout', 'on_stderr', 'on_pairip_progress']
\ No newline at end of file
@@ -2,12 +2,18 @@
 """APKEditor GUI事件处理模块"""
 
 import os
+import time
 import shlex
-from PyQt5.QtWidgets import QMessageBox, QApplication
-from PyQt5.QtCore import QProcess
+from dataclasses import dataclass, replace
+from PyQt5.QtWidgets import QMessageBox
+from PyQt5.QtCore import QProcess, QThread, pyqtSignal
 
-from .command_handler import CommandHandler
-from .constants import OP_MAP
+from .command_model import (build_args, split_custom_args, uses_fast_info, uses_fast_merge,
+                            uses_builtin_v4, signed_apk_path, with_signing_input, sign_session_compatible,
+                            validate_batch_signing)
+from .gui_console import console_message
+from .gui_tasks import TaskCancelled
+from .constants import OP_MAP, find_apksigner_jar as _find_apksigner_jar
 
 
 def on_run(main_window):
@@ -27,7 +33,7 @@ def on_run(main_window):
         return
     
     # 重置控制台
-    main_window.output_console.clear()
+    main_window.console_buffer.clear()
     
     # 验证操作
     op_key = OP_MAP.get(main_window.current_op)
@@ -36,7 +42,8 @@ def on_run(main_window):
         return
     
     # 检查是否需要Pairip处理
-    if PairipHandler and main_window.current_op and 'Pairip' in main_window.current_op:
+    PairipHandler = _load_pairip_handler() if 'Pairip' in main_window.current_op else None
+    if PairipHandler:
         # Pairip处理逻辑 - 仅当选择的操作是'pairip'时才执行
         try:
             # 创建PairipHandler实例，添加base_dir参数
@@ -50,30 +57,11 @@ def on_run(main_window):
             main_window.run_btn.setEnabled(False)
             main_window.stop_btn.setEnabled(True)
             
-            # 使用内部类在单独的线程中运行处理
-            from PyQt5.QtCore import QThread
-            
-            class PairipThread(QThread):
-                def __init__(self, handler, input_path, output_path=None):
-                    super().__init__()
-                    self.handler = handler
-                    self.input_path = input_path
-                    self.output_path = output_path
-                
-                def run(self):
-                    # 获取主窗口引用并传递参数
-                    # 假设主窗口有flag_corex和flag_verbose属性
-                    main_window = QApplication.activeWindow()
-                    use_corex = hasattr(main_window, 'flag_corex') and main_window.flag_corex.isChecked()
-                    verbose = hasattr(main_window, 'flag_verbose') and main_window.flag_verbose.isChecked()
-                    
-                    # 使用process_apk方法并传递所有必要参数
-                    self.handler.process_apk(self.input_path, use_corex_hook=use_corex, verbose=verbose)
-            
-            # 创建并启动线程
-            input_path = main_window.input_line.text().strip()
-            main_window.pairip_thread = PairipThread(main_window.pairip_handler, input_path)
-            main_window.pairip_thread.start()
+            # 在线程池中处理，只传入参数快照，不在工作线程中读取控件
+            options = main_window.snapshot_options()
+            main_window.tasks.submit(
+                _process_pairip, main_window.pairip_handler, options.input_path, options.corex, options.verbose,
+                name="pairip", group="run")
             
         except Exception as e:
             QMessageBox.critical(main_window, "错误", f"启动Pairip处理失败: {str(e)}")
@@ -83,136 +71,541 @@ def on_run(main_window):
     # 对于非pairip操作，忽略corex标志，正常执行常规命令
     
     # 常规命令执行逻辑
-    main_window.run_btn.setEnabled(False)
-    main_window.stop_btn.setEnabled(True)
-    main_window.progress.setVisible(True)
-    
-    # 构建命令参数
-    args = []
-    
-    # 处理签名操作
-    is_sign_operation = False
+    # 签名操作需要apksigner.jar
+    apksigner_jar = None
     if op_key == 'sign':
-        is_sign_operation = True
-        # 查找apksigner.jar
         apksigner_jar = _find_apksigner_jar()
         if not apksigner_jar:
             QMessageBox.critical(main_window, "错误", "找不到apksigner.jar文件")
-            main_window._reset_ui_state()
             return
-        
-        # 构建apksigner命令
-        args = ['java', '-jar', apksigner_jar, 'sign']
-        
-        # 添加签名版本标志
-        if main_window.flag_v1.isChecked():
-            args.append('--v1-signing-enabled')
-        if main_window.flag_v2.isChecked():
-            args.append('--v2-signing-enabled')
-        if main_window.flag_v3.isChecked():
-            args.append('--v3-signing-enabled')
-        if main_window.flag_v4.isChecked():
-            args.append('--v4-signing-enabled')
-        
-        # 添加密钥信息
-        if main_window.radio_keystore.isChecked():
-            # 使用密钥库
-            if keystore := main_window.keystore_path.text().strip():
-                args.extend(['--ks', keystore])
-                if alias := main_window.keystore_alias.text().strip():
-                    args.extend(['--ks-key-alias', alias])
-                if password := main_window.keystore_password.text().strip():
-                    args.extend(['--ks-pass', f'pass:{password}'])
+
+    # 处理自定义参数
+    options = main_window.snapshot_options()
+    _, custom_error = split_custom_args(options.custom_args)
+    if custom_error:
+        QMessageBox.warning(main_window, "自定义参数解析失败", f"无法解析自定义参数: {custom_error}\n将原样追加。")
+    if uses_builtin_v4(options) and not (options.v2 or options.v3):
+        QMessageBox.warning(main_window, "错误", "内置V4签名需要同时启用 V2 或 V3 签名")
+        return
+    if op_key == 'sign' and len(main_window.batch_inputs) > 1:
+        ok, message = validate_batch_signing(options)
+        if not ok:
+            QMessageBox.warning(main_window, "错误", message)
+            return
+    
+    main_window.run_btn.setEnabled(False)
+    main_window.stop_btn.setEnabled(True)
+    main_window.progress.setVisible(True)
+    main_window.show_progress(None, "")
+    main_window.progress_parser.reset()
+    
+    # 多个输入时交给批量任务队列
+    batch = len(main_window.batch_inputs) > 1
+    if not batch:
+        main_window.job_table.setVisible(False)
+    cache = None
+    if not batch and main_window.flag_cache.isVisible() and main_window.flag_cache.isChecked():
+        if main_window.artifact_cache is None:
+            from .artifact_cache import ArtifactCache
+            main_window.artifact_cache = ArtifactCache()
+        cache = main_window.artifact_cache
+    
+    # 批量签名共用的签名会话有自己的 java 版本要求
+    java_op = "sign-session" if batch and _uses_sign_session(main_window, options) else op_key
+    
+    def on_prepared(plan):
+        if batch:
+            _run_batch(main_window, plan.program, plan.options, apksigner_jar)
         else:
-            # 使用公钥私钥
-            if private_key := main_window.private_key_path.text().strip():
-                args.extend(['--key', private_key])
-            if private_key_pass := main_window.private_key_password.text().strip():
-                args.extend(['--key-pass', f'pass:{private_key_pass}'])
-            if public_key := main_window.public_key_path.text().strip():
-                args.extend(['--cert', public_key])
-        
-        # 添加输入APK文件
-        if inp := main_window.input_line.text().strip():
-            args.append(inp)
-    else:
-        # 构建APKEditor命令参数
-        jar = os.path.abspath(main_window.jar_path)
-        args = ['-jar', jar, 'info' if op_key == 'info' else op_key]
-        
-        # 添加输入参数
-        if inp := main_window.input_line.text().strip():
-            args.extend(['-i', inp])
+            _start_plan(main_window, plan)
+    
+    # 选择 java、解析清单、计算缓存键和签名前对齐都在线程池中进行，界面线程只处理结果
+    _submit_run(main_window, _prepare_run, options, apksigner_jar, batch, cache, java_op, name="prepare",
+                on_result=on_prepared)
+
+
+@dataclass(frozen=True)
+class RunPlan:
+    """运行前准备的结果"""
+    options: object  # 实际使用的参数快照（签名前对齐可能改为签名输出路径）
+    program: str  # 选中的 java
+    args: tuple = ()  # java 参数，info 快速路径和批量任务为空
+    lines: tuple = None  # 无需启动 java 时直接输出的结果行（info 快速路径或缓存命中）
+    header: str = ""  # 输出结果前的说明
+    pending_cache: tuple = None  # 缓存未命中时的 (缓存键, 输出路径, 开始时间)，任务成功后写入
+
+
+def _prepare_run(task, options, apksigner_jar, batch, cache, java_op):
+    """运行前的准备（在线程池中执行）：选择 java -> info 快速路径 -> 签名前对齐 -> 构件缓存
+    
+    Args:
+        task: 当前任务
+        options: 当前参数快照
+        apksigner_jar: apksigner.jar路径（仅签名操作使用）
+        batch: 是否为批量任务（只选择 java）
+        cache: ArtifactCache实例，None表示不使用缓存
+        java_op: 选择 java 时使用的操作键
         
-        # 添加通用标志
-        if main_window.flag_xml.isChecked():
-            args.extend(['-t', 'xml'])
-        if main_window.flag_resources.isChecked():
-            args.append('-resources')
+    Returns:
+        RunPlan: 准备结果
+    """
+    # 使用注册表中最适合该操作的 java（可按操作固定）
+    from .jre_registry import select_java
+    program = select_java(java_op)
+    if batch:
+        return RunPlan(options, program)
+    task.check()
+    
+    # info 先直接解析清单，无需启动Java
+    input_path = options.input_path.strip()
+    if uses_fast_info(options):
+        from .axml import fast_info, format_info
+        info = fast_info(input_path)
+        if info is not None:
+            return RunPlan(options, program, lines=tuple(format_info(info)),
+                           header=f"> 直接解析 AndroidManifest.xml: {input_path}\n")
     
-    # 添加Verbose标志（适用于所有操作）
-    if main_window.flag_verbose.isChecked():
-        args.append('-v')
+    if options.op == 'sign':
+        options = _align_task(task, options)
+    args = build_args(options, apksigner_jar)
+    if cache is None:
+        return RunPlan(options, program, tuple(args))
+    
+    # 相同输入、jar和参数的结果直接从构件缓存恢复；未命中时记录缓存键，任务成功结束后写入
+    from .artifact_cache import HashCancelled, output_path_for
+    try:
+        key = cache.make_key(options.op, args, input_path, options.jar, is_cancelled=lambda: task.is_cancelled)
+    except HashCancelled:
+        raise TaskCancelled()
+    if key is None:
+        return RunPlan(options, program, tuple(args))
+    output = output_path_for(options.op, args)
+    lines = cache.lookup(key, output, force='-f' in args)
+    if lines is None:
+        return RunPlan(options, program, tuple(args), pending_cache=(key, output, time.monotonic()))
+    return RunPlan(options, program, tuple(args), lines=tuple(lines), header=f"[缓存命中] {output or ''}".rstrip())
 
-    # 处理自定义参数
-    custom = main_window.custom_args.text().strip()
-    if custom:
-        try:
-            args.extend(shlex.split(custom))
-        except Exception as e:
-            QMessageBox.warning(main_window, "自定义参数解析失败", f"无法解析自定义参数: {e}\n将原样追加。")
-            args.append(custom)
 
-    # 设置进程通道模式并启动进程
-    main_window.process.setProcessChannelMode(QProcess.MergedChannels)
+def _start_plan(main_window, plan):
+    """准备完成后输出直接得到的结果，或启动任务
+    
+    Args:
+        main_window: APKEditorUI主窗口实例
+        plan: RunPlan
+    """
+    options, program, args = plan.options, plan.program, list(plan.args)
+    if args:
+        console_message(main_window, f"> {program} {' '.join(shlex.quote(str(a)) for a in args)}\n")
+    if plan.lines is not None:
+        console_message(main_window, plan.header)
+        main_window._on_output_lines(list(plan.lines))
+        main_window.on_finished(0, QProcess.NormalExit)
+        return
+    if plan.pending_cache is not None:
+        main_window.pending_cache = plan.pending_cache
+        main_window.run_output = []
+    
+    # 基础APK+配置拆分的合并先尝试流式合并
+    if uses_fast_merge(options) and _run_fast_merge(main_window, program, options, args):
+        return
+    if options.op == 'sign':
+        # 签名成功后由 on_finished 启动内置V4签名
+        main_window.pending_v4 = options if uses_builtin_v4(options) else None
+    start_java(main_window, program, _with_jvm_options(main_window, program, options, args))
+
+
+def _submit_run(main_window, fn, *args, name, on_result, on_message=None):
+    """把运行中的一步提交到 "run" 任务组，点击停止时随组取消
+    
+    结果在停止之后才到达界面线程时直接丢弃；任务出错时按失败结束本次运行。
+    
+    Args:
+        main_window: APKEditorUI主窗口实例
+        fn: 任务函数
+        name: 任务名称
+        on_result: 成功时在界面线程调用的回调
+        on_message: 输出一行的回调，默认写入控制台
         
-    # 输出命令并启动进程
-    java_exec = "java"
-    if is_sign_operation:
-        command_text = f"> {' '.join(shlex.quote(str(a)) for a in args)}\n"
-        main_window.process.start(args[0], args[1:])
+    Returns:
+        Task: 已提交的任务
+    """
+    def on_task_result(result):
+        if not task.is_cancelled:
+            on_result(result)
+    
+    def on_error(error):
+        if not task.is_cancelled:
+            console_message(main_window, f"[错误] {error}")
+            main_window.on_finished(1, QProcess.NormalExit)
+    
+    task = main_window.tasks.submit(
+        fn, *args, name=name, group="run", on_result=on_task_result, on_error=on_error,
+        on_message=on_message or (lambda line: console_message(main_window, line + "\n")))
+    return task
+
+
+def _with_jvm_options(main_window, program, options, args):
+    """一次性进程按堆配置档案加上 -Xmx，勾选GC日志时加上 -Xlog:gc
+
+    常驻JVM使用自己的堆，勾选GC日志时任务改用一次性进程运行。结束后由 on_finished 汇总GC日志并更新档案。
+
+    Args:
+        main_window: APKEditorUI主窗口实例
+        program: java可执行文件
+        options: 当前参数快照
+        args: java 参数列表
+
+    Returns:
+        list: 加上JVM参数后的参数列表
+    """
+    from .gc_telemetry import launch_options
+    gc_log = main_window.flag_gc.isChecked() and _gc_log_supported(main_window, program)
+    if main_window.flag_worker.isChecked() and not gc_log:
+        return args
+    jvm_args, log_path = launch_options(options, gc_log)
+    if not jvm_args:
+        return args
+    console_message(main_window, f"[JVM参数] {' '.join(jvm_args)}\n")
+    args = jvm_args + args
+    main_window.pending_gc = (options, args, log_path, time.monotonic())
+    if main_window.pending_cache is None:
+        main_window.run_output = []
+    return args
+
+
+def _gc_log_supported(main_window, program):
+    """所选 java 能否采集GC日志，不能时在控制台说明"""
+    from .gc_telemetry import gc_log_supported
+    if gc_log_supported(program):
+        return True
+    console_message(main_window, "[GC日志需要 JDK 9+，本次不采集]\n")
+    return False
+
+
+def start_java(main_window, program, args):
+    """启动 java 任务：优先交给常驻JVM执行，不可用时回退到一次性进程
+    
+    Args:
+        main_window: APKEditorUI主窗口实例
+        program: 可执行程序
+        args: 参数列表
+    """
+    if main_window.flag_worker.isChecked() and _run_in_worker(main_window, program, args):
+        return
+    start_one_shot(main_window, program, args)
+
+
+def _align_task(task, options):
+    """签名前的对齐阶段（在线程池中执行）：已对齐时只读取目录，未对齐时重写一次
+
+    签名输出由 --out 指定为另一个文件时，对齐结果写到输出路径并改为原地签名该文件，不修改输入。
+    对齐失败（例如输入不是有效的zip）时只输出提示，仍交给 apksigner 处理并报告错误。
+
+    Returns:
+        CommandOptions: 签名实际使用的参数快照
+    """
+    from .zipalign import ZipAlignError, align_for_signing
+    try:
+        path = align_for_signing(options.input_path.strip(), signed_apk_path(options), log=task.log)
+    except ZipAlignError as e:
+        task.log(f"签名前对齐失败: {str(e)}")
+        return options
+    return with_signing_input(options, path)
+
+
+def _run_batch(main_window, program, options, apksigner_jar):
+    """将所有输入加入批量任务队列并发执行
+    
+    Args:
+        main_window: APKEditorUI主窗口实例
+        program: 可执行程序
+        options: 当前参数快照
+        apksigner_jar: apksigner.jar路径（仅签名操作使用）
+    """
+    session = _uses_sign_session(main_window, options)
+    if options.op == 'sign' and main_window.flag_worker.isChecked() and not session:
+        console_message(main_window, "[签名会话不支持 --out 以外的自定义参数，使用一次性进程批量签名]\n")
+    if not session and uses_builtin_v4(options):
+        # 一次性进程的批量任务只跟踪 java 进程，V4签名仍交给 apksigner
+        console_message(main_window, "[批量任务不支持内置V4签名，使用 apksigner 生成V4签名]\n")
+        options = replace(options, v4_backend="apksigner")
+    jobs = [options.with_input(inp) for inp in main_window.batch_inputs]
+    if options.op != 'sign':
+        _start_batch(main_window, program, options, apksigner_jar, jobs)
+        return
+    
+    # 签名前在线程池中并行对齐全部输入，都完成后再加入队列
+    aligned = [None] * len(jobs)
+    remaining = [len(jobs)]
+    
+    def on_aligned(index, signing):
+        aligned[index] = signing
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            _start_batch(main_window, program, options, apksigner_jar, aligned)
+    
+    for index, job_options in enumerate(jobs):
+        _submit_run(main_window, _align_task, job_options, name="align",
+                    on_result=lambda signing, index=index: on_aligned(index, signing))
+
+
+def _uses_sign_session(main_window, options):
+    """批量签名是否共用签名会话：勾选了常驻JVM，且自定义参数中只有 --out"""
+    return options.op == 'sign' and main_window.flag_worker.isChecked() and sign_session_compatible(options)
+
+
+def _start_batch(main_window, program, options, apksigner_jar, jobs):
+    """创建批量任务队列并开始执行
+    
+    Args:
+        main_window: APKEditorUI主窗口实例
+        program: 可执行程序
+        options: 当前参数快照
+        apksigner_jar: apksigner.jar路径（仅签名操作使用）
+        jobs: 每个任务的参数快照
+    """
+    from .job_queue import JobQueue, SignSessionQueue
+    
+    if _uses_sign_session(main_window, options):
+        # 批量签名共用一个签名会话：密钥只解锁一次，在同一个JVM中并发签名
+        queue = SignSessionQueue(options, program, apksigner_jar,
+                                 main_window.concurrency_spin.value(), main_window)
     else:
-        command_text = f"> {java_exec} {' '.join(shlex.quote(a) for a in args)}\n"
-        main_window.process.start(java_exec, args)
+        from .scheduler import MemoryScheduler
+        from .gc_telemetry import default_profile
+        # 按内存放行并发的JVM，每个任务的堆优先取堆配置档案的推荐值，否则按输入大小估算
+        queue = JobQueue(main_window.concurrency_spin.value(), main_window,
+                         scheduler=MemoryScheduler(profile=default_profile()))
+    gc_log = (main_window.flag_gc.isChecked() and isinstance(queue, JobQueue)
+              and _gc_log_supported(main_window, program))
+    gc_logs = {}
+    for job_options in jobs:
+        args = build_args(job_options, apksigner_jar)
+        log_path = None
+        if gc_log:
+            from .gc_telemetry import new_log_path, gc_log_args
+            log_path = new_log_path(options.op)
+            args = gc_log_args(log_path) + args
+        if isinstance(queue, SignSessionQueue):
+            job = queue.add_job(job_options.input_path, program, args, op=options.op,
+                                output_path=signed_apk_path(job_options))
+        else:
+            job = queue.add_job(job_options.input_path, program, args, op=options.op)
+        gc_logs[job.index] = log_path
+    
+    main_window.job_queue = queue
+    main_window.setup_job_table(queue.jobs)
+    queue.job_started.connect(main_window.on_batch_job_changed)
+    queue.job_progress.connect(main_window.on_batch_progress)
+    queue.job_finished.connect(lambda index, code: main_window.on_batch_job_changed(index))
+    queue.job_finished.connect(lambda index, code: main_window.on_batch_progress(index))
+    if isinstance(queue, JobQueue):
+        queue.job_finished.connect(
+            lambda index, code: _finish_batch_gc(main_window, queue, options, gc_logs, index, code))
+    queue.queue_finished.connect(main_window.on_batch_finished)
+    console_message(
+        main_window, f"> 批量执行 {len(queue.jobs)} 个任务，最大并发 {queue.max_concurrent}\n")
+    queue.start()
+
+
+def _finish_batch_gc(main_window, queue, options, gc_logs, index, exit_code):
+    """批量任务结束后汇总GC日志并更新堆配置档案"""
+    from .gc_telemetry import finish_run
+    job = queue.jobs[index]
+    if job.status == job.STOPPED:
+        return
+    heap_args = [f"-Xmx{job.heap_mb}m"] if job.heap_mb is not None else []
+    runtime = time.monotonic() - job.started if job.started is not None else None
+    summary = finish_run(options.with_input(job.input_path), heap_args, gc_logs.get(index), exit_code, job.output,
+                         runtime)
+    if summary is not None:
+        console_message(main_window, f"[{os.path.basename(job.input_path)}] {summary.describe()}\n")
+
+
+def start_one_shot(main_window, program, args):
+    """以一次性QProcess启动java进程
+    
+    Args:
+        main_window: APKEditorUI主窗口实例
+        program: 可执行程序
+        args: 参数列表
+    """
+    from .appcds import with_cds, finish_training
+    # 有AppCDS归档时直接加载其中的类；没有时本次启动顺便生成，由 on_finished 启用
+    args, main_window.pending_cds = with_cds(program, args)
     
-    main_window.output_console.append(command_text)
+    # 设置进程通道模式并启动进程
+    main_window.process.setProcessChannelMode(QProcess.MergedChannels)
+    main_window.process.start(program, args)
     
     # 检查进程是否成功启动
     if not main_window.process.waitForStarted(3000):
-        main_window.output_console.append("[错误] 无法启动 java 进程，请确保已安装 Java 并加入 PATH。")
+        finish_training(main_window.pending_cds, -1)
+        main_window.pending_cds = None
+        console_message(main_window, "[错误] 无法启动 java 进程，请确保已安装 Java 并加入 PATH。")
         main_window._reset_ui_state()
 
 
-def _find_apksigner_jar():
-    """查找apksigner.jar文件
+class WorkerJobThread(QThread):
+    """在常驻JVM中执行任务的线程"""
+    line_ready = pyqtSignal(str)
+    job_done = pyqtSignal(int)
+    worker_unavailable = pyqtSignal()
+    
+    def __init__(self, worker, jar, argv):
+        super().__init__()
+        self.worker = worker
+        self.jar = jar
+        self.argv = argv
+    
+    def run(self):
+        code = self.worker.run_job(self.jar, self.argv, on_line=self.line_ready.emit)
+        if code is None:
+            self.worker_unavailable.emit()
+        else:
+            self.job_done.emit(code)
+
+
+def _merge_task(task, input_path, output_path, java, jar):
+    """流式合并（在线程池中执行）
+    
+    Returns:
+        tuple: (退出码, 无法处理的原因)；原因不为None时应回退到 jar
+    """
+    from .split_merge import merge_bundle, SplitMergeError, SplitMergeCancelled
+    try:
+        merge_bundle(input_path, output_path, java, jar, log=task.log, is_cancelled=lambda: task.is_cancelled)
+    except SplitMergeCancelled:
+        raise TaskCancelled()
+    except SplitMergeError as e:
+        return None, str(e)
+    except Exception as e:
+        task.log(f"[错误] 合并失败: {str(e)}")
+        return 1, None
+    return 0, None
+
+
+def _v4_task(task, options, java):
+    """签名成功后生成内置V4签名（.idsig）（在线程池中执行）
+    
+    Returns:
+        int: 退出码
+    """
+    from .v4_signer import java_signer, write_idsig
+    if java is None:
+        from .jre_registry import select_java
+        java = select_java("sign")
+    java_sign = java_signer(options, java)
+    
+    def sign(data, algorithm):
+        # 停止后不再启动签名进程
+        task.check()
+        return java_sign(data, algorithm)
+    
+    try:
+        write_idsig(signed_apk_path(options), sign, log=task.log)
+    except TaskCancelled:
+        raise
+    except Exception as e:
+        task.log(f"[错误] V4签名失败: {str(e)}")
+        return 1
+    return 0
+
+
+def start_builtin_v4(main_window, options, program=None):
+    """启动内置V4签名，结束时以其退出码再次调用 on_finished
+    
+    Args:
+        main_window: APKEditorUI主窗口实例
+        options: 签名操作的参数快照
+        program: java可执行文件（签名数据时使用），默认由 Java 注册表选择
+    """
+    _submit_run(main_window, _v4_task, options, program, name="v4",
+                on_message=lambda line: main_window._on_output_lines([line]),
+                on_result=lambda code: main_window.on_finished(code, QProcess.NormalExit))
+
+
+def _run_fast_merge(main_window, program, options, args):
+    """尝试流式合并，无法处理时回退到 jar
     
+    Args:
+        main_window: APKEditorUI主窗口实例
+        program: 可执行程序
+        options: 当前参数快照
+        args: java 参数列表
+        
     Returns:
-        str: apksigner.jar文件路径，如果未找到则返回None
+        bool: 是否已启动流式合并
     """
-    import glob
+    from .artifact_cache import output_path_for
     
-    # 优先在lib目录下查找
-    lib_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib')
-    if os.path.exists(lib_dir):
-        # 查找lib目录下所有apksigner开头的jar文件
-        matches = glob.glob(os.path.join(lib_dir, 'apksigner*.jar'))
-        if matches:
-            return matches[0]
+    output = output_path_for('m', args)
+    if os.path.exists(output) and '-f' not in args:
+        # 已有输出时的处理交给 jar
+        return False
+    
+    def on_merged(result):
+        code, reason = result
+        if reason is None:
+            main_window.on_finished(code, QProcess.NormalExit)
+            return
+        console_message(main_window, f"[快速合并不可用，使用 APKEditor 合并] {reason}")
+        start_java(main_window, program, _with_jvm_options(main_window, program, options, args))
+    
+    _submit_run(main_window, _merge_task, options.input_path.strip(), output, program, options.jar, name="merge",
+                on_message=lambda line: main_window._on_output_lines([line]), on_result=on_merged)
+    return True
+
+
+def _run_in_worker(main_window, program, args):
+    """尝试在常驻JVM中执行 java -jar 命令
+    
+    Args:
+        main_window: APKEditorUI主窗口实例
+        program: 可执行程序
+        args: 参数列表，形如 ['-jar', jar, ...]
         
-        # 查找子目录中的apksigner.jar
-        matches = glob.glob(os.path.join(lib_dir, '**', 'apksigner.jar'), recursive=True)
-        if matches:
-            return matches[0]
-    
-    # 默认路径
-    default_path = os.path.join(lib_dir, 'build-tools', '36.0.0', 'lib', 'apksigner.jar')
-    if os.path.exists(default_path):
-        return default_path
-    
-    return None
-
-# 尝试导入PairipHandler
-try:
-    from .pairip_handler import PairipHandler
-except ImportError:
-    PairipHandler = None
\ No newline at end of file
+    Returns:
+        bool: 是否已交给常驻JVM执行
+    """
+    if len(args) < 2 or args[0] != '-jar':
+        return False
+    
+    if main_window.jvm_worker is not None and main_window.jvm_worker.java != program:
+        # 操作固定了不同的 java，重启常驻JVM
+        main_window.jvm_worker.stop()
+        main_window.jvm_worker = None
+    if main_window.jvm_worker is None:
+        from .jvm_worker import JvmWorker
+        main_window.jvm_worker = JvmWorker(java=program, preload_jars=[main_window.jar_path, _find_apksigner_jar()])
+    
+    def on_unavailable():
+        console_message(main_window, "[常驻JVM不可用，回退到一次性进程]")
+        start_one_shot(main_window, program, args)
+    
+    thread = WorkerJobThread(main_window.jvm_worker, args[1], args[2:])
+    thread.line_ready.connect(lambda line: main_window._on_output_lines([line]))
+    thread.job_done.connect(lambda code: main_window.on_finished(code, QProcess.NormalExit))
+    thread.worker_unavailable.connect(on_unavailable)
+    main_window.worker_thread = thread
+    thread.start()
+    return True
+
+
+def _process_pairip(task, handler, input_path, use_corex, verbose):
+    """Pairip处理任务：输出和结果由 handler 的信号报告"""
+    handler.process_apk(input_path, use_corex_hook=use_corex, verbose=verbose, token=task.token)
+
+
+def _load_pairip_handler():
+    """按需导入PairipHandler
+    
+    Returns:
+        PairipHandler类，导入失败时返回None
+    """
+    try:
+        from .pairip_handler import PairipHandler
+    except ImportError as e:
+        print(f"导入PairipHandler失败: {str(e)}")
+        return None
+    return PairipHandler
\ No newline at end of file
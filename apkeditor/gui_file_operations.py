@@ -56,13 +56,25 @@ def choose_input(main_window):
         # 获取选择的文件/目录
         selected_paths = file_dialog.selectedFiles()
         if selected_paths:
-            # 如果选择了多个文件，只使用第一个
-            main_window.input_line.setText(selected_paths[0])
+            # 选择了多个文件时作为批量任务执行
+            set_inputs(main_window, selected_paths)
     else:
         # 如果用户取消，尝试获取目录选择
         dir_path = QFileDialog.getExistingDirectory(main_window, "选择输入目录")
         if dir_path:
-            main_window.input_line.setText(dir_path)
+            set_inputs(main_window, [dir_path])
+
+
+def set_inputs(main_window, paths):
+    """设置输入路径，多个路径时作为批量任务
+    
+    Args:
+        main_window: APKEditorUI主窗口实例
+        paths: 输入路径列表
+    """
+    main_window.batch_inputs = list(paths) if len(paths) > 1 else []
+    main_window.input_line.setText(paths[0])
+    main_window.update_mode_label()
 
 
 def choose_jar(main_window):
@@ -117,10 +129,10 @@ def on_key_type_changed(main_window):
     Args:
         main_window: APKEditorUI主窗口实例
     """
+    # 更新参数模型（值变化时会安排刷新命令预览）
+    main_window.ui_state.set_key_type(main_window.radio_keystore.isChecked())
     # 更新UI元素的可见性
     main_window._update_key_type_visibility()
-    # 更新命令预览
-    main_window.update_preview()
 
 
 def update_key_type_visibility(main_window):
@@ -129,22 +141,5 @@ def update_key_type_visibility(main_window):
     Args:
         main_window: APKEditorUI主窗口实例
     """
-    keystore_visible = main_window.radio_keystore.isChecked()
-    key_pair_visible = main_window.radio_key_pair.isChecked()
-    
-    # 密钥库方式元素可见性
-    keystore_widgets = [main_window.keystore_path, main_window.keystore_alias, main_window.keystore_password, main_window.keystore_btn]
-    for widget in keystore_widgets:
-        widget.setVisible(keystore_visible)
-    
-    # 公钥私钥方式元素可见性
-    key_pair_widgets = [main_window.private_key_path, main_window.private_key_password, main_window.public_key_path, main_window.private_key_btn, main_window.public_key_btn]
-    for widget in key_pair_widgets:
-        widget.setVisible(key_pair_visible)
-    
-    # 更新相关标签的可见性
-    for label in main_window.findChildren(QLabel):
-        if label.text().startswith("签名密钥") or label.text().startswith("密钥别名") or label.text().startswith("密钥密码:"):
-            label.setVisible(keystore_visible)
-        elif label.text().startswith("私钥文件") or label.text().startswith("私钥密码") or label.text().startswith("公钥文件"):
-            label.setVisible(key_pair_visible)
\ No newline at end of file
+    # 按预先计算的 (操作, 密钥类型) 状态表切换，只改变需要变化的控件
+    main_window.ui_state.apply_visibility()
\ No newline at end of file
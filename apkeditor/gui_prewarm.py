@@ -0,0 +1,183 @@
+# gui_prewarm.py
+"""选择输入后的推测性预热
+
+拖入或选择输入后到点击运行之前通常有一段空闲。预热在这段时间里向后台任务线程池（gui_tasks）提交：
+    - 计算输入和 jar 的内容哈希（构件缓存键，结果由 artifact_cache 按文件记住）；
+    - 读取 zip 中央目录，统计未压缩大小和 dex 数量并估算任务的堆（scheduler 按文件记住）；
+    - 为所选操作选择 java（首次会查找并探测已安装的 java，结果由 jre_registry 记住），
+      任务将在常驻JVM中运行时提前启动工作进程。
+点击运行时这些结果直接命中；预热仍在计算同一文件的哈希时，运行会等待其结果而不是重新读取。
+
+每个输入一个任务并行执行。输入或操作改变时取消当前预热，停顿 PREWARM_DELAY 毫秒后按新的输入重新开始。
+工作进程与输入无关，启动后保留，只在所选 java 改变时更换。
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+
+from PyQt5.QtCore import QTimer
+
+from .gui_tasks import TaskCancelled
+
+# 输入停止变化多久后开始预热（毫秒）
+PREWARM_DELAY = 300
+# 预热任务所在的任务组
+PREWARM_GROUP = "prewarm"
+
+
+@dataclass(frozen=True)
+class PrewarmResult:
+    """一次预热的结果"""
+    op: str
+    inputs: tuple
+    hashed: int = 0        # 已计算内容哈希的输入数
+    uncompressed: int = 0  # 未压缩总字节数
+    dex: int = 0
+    heap_mb: int = 0       # 各输入估算堆的最大值
+
+    def describe(self):
+        text = (f"预热: {len(self.inputs)} 个输入，未压缩 {self.uncompressed / 1024 / 1024:.1f} MB，"
+                f"{self.dex} 个dex，预计堆 {self.heap_mb} MB")
+        if self.hashed:
+            text += f"，已计算 {self.hashed} 个缓存键"
+        return text
+
+
+def _hash(task, path):
+    """计算文件内容哈希（结果由 artifact_cache 记住）"""
+    from .artifact_cache import HashCancelled, content_hash
+    try:
+        return content_hash(path, lambda: task.is_cancelled)
+    except HashCancelled:
+        raise TaskCancelled()
+
+
+def _scan_input(task, op, path, use_cache):
+    """读取一个输入的 zip 中央目录、估算堆，需要时计算缓存键用的哈希
+
+    Returns:
+        tuple: (未压缩字节数, dex数量, 估算堆MB, 是否计算了哈希)
+    """
+    from .scheduler import estimate_heap_mb, input_stats
+    from .gc_telemetry import default_profile
+    total, dex = input_stats(path)
+    heap_mb = estimate_heap_mb(op, path, default_profile())
+    task.check()
+    if use_cache:
+        _hash(task, path)
+    return total, dex, heap_mb, use_cache
+
+
+def _select_java(task, op):
+    """为操作选择 java（发现结果由 jre_registry 记住，运行时直接命中）"""
+    from .jre_registry import select_java
+    return select_java(op)
+
+
+def _warm_worker(task, op, jar, worker):
+    """为操作选择 java 并启动常驻JVM（阻塞到工作进程就绪）"""
+    from .jre_registry import select_java
+    from .jvm_worker import JvmWorker
+    from .constants import find_apksigner_jar
+    java = select_java(op)
+    if worker is None or worker.java != java:
+        worker = JvmWorker(java=java, preload_jars=[jar, find_apksigner_jar()])
+    # 先交给界面线程登记，运行时提交的任务会等待这个进程就绪，不会再启动一个
+    task.emit("worker", worker)
+    return worker.warm()
+
+
+class Prewarmer:
+    """管理主窗口的预热：输入或操作变化时取消旧的预热并在停顿后重新开始
+
+    Args:
+        main_window: APKEditorUI主窗口实例（需要已创建 tasks）
+        delay: 输入停止变化多久后开始预热（毫秒）
+    """
+
+    def __init__(self, main_window, delay=PREWARM_DELAY):
+        self.main_window = main_window
+        self.result = None
+        self._generation = 0
+        self._pending = 0
+        self._partial = None
+        self._timer = QTimer(main_window)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay)
+        self._timer.timeout.connect(self.start)
+
+    def schedule(self):
+        """丢弃当前预热，停顿后按新的参数重新开始"""
+        self.cancel()
+        self._timer.start()
+
+    def cancel(self):
+        """取消尚未开始和正在进行的预热（已启动的工作进程保留）"""
+        self._timer.stop()
+        self._generation += 1
+        self.main_window.tasks.cancel(PREWARM_GROUP)
+        self.result = None
+        self.main_window.input_line.setToolTip("")
+
+    def start(self):
+        """按当前参数开始预热"""
+        self.cancel()
+        w = self.main_window
+        options = w.snapshot_options()
+        inputs = tuple(path for path in (w.batch_inputs or [options.input_path]) if path and os.path.exists(path))
+        if not inputs or options.op == "pairip":
+            return
+        from .artifact_cache import CACHEABLE_OPS
+        use_cache = options.op in CACHEABLE_OPS and w.flag_cache.isChecked()
+        # 与运行时一致：批量任务和GC日志使用一次性进程，不需要常驻JVM
+        use_worker = w.flag_worker.isChecked() and not w.flag_gc.isChecked() and not w.batch_inputs
+
+        generation = self._generation
+        tasks = w.tasks
+        if use_worker:
+            tasks.submit(_warm_worker, options.op, options.jar, w.jvm_worker, name="prewarm-jvm", group=PREWARM_GROUP,
+                         on_event=lambda name, worker: self._install_worker(worker))
+        else:
+            tasks.submit(_select_java, options.op, name="prewarm-jre", group=PREWARM_GROUP)
+        if use_cache and os.path.isfile(options.jar):
+            tasks.submit(_hash, options.jar, name="prewarm-jar", group=PREWARM_GROUP)
+        self._partial = PrewarmResult(options.op, inputs)
+        self._pending = len(inputs)
+        for path in inputs:
+            tasks.submit(_scan_input, options.op, path, use_cache, name="prewarm-scan", group=PREWARM_GROUP,
+                         on_result=lambda stats, generation=generation: self._on_scanned(generation, stats),
+                         on_error=lambda error, generation=generation: self._on_scanned(generation, None))
+
+    def _install_worker(self, worker):
+        """登记预热任务启动的工作进程；运行中的任务使用其他 java 时放弃它"""
+        w = self.main_window
+        current = w.jvm_worker
+        if current is worker:
+            return
+        busy = w.worker_thread is not None and w.worker_thread.isRunning()
+        if current is None or (current.java != worker.java and not busy):
+            if current is not None:
+                current.stop()
+            w.jvm_worker = worker
+        else:
+            # 工作进程可能仍在启动，在后台结束，不阻塞界面
+            threading.Thread(target=worker.stop, daemon=True).start()
+
+    def _on_scanned(self, generation, stats):
+        """一个输入扫描结束；输入在预热期间无法读取时 stats 为None，运行时再报告"""
+        if generation != self._generation:
+            return
+        if stats is not None:
+            total, dex, heap_mb, hashed = stats
+            partial = self._partial
+            self._partial = PrewarmResult(partial.op, partial.inputs, partial.hashed + hashed,
+                                          partial.uncompressed + total, partial.dex + dex,
+                                          max(partial.heap_mb, heap_mb))
+        self._pending -= 1
+        if self._pending == 0:
+            self.result = self._partial
+            self.main_window.input_line.setToolTip(self.result.describe())
+
+
+__all__ = ['Prewarmer', 'PrewarmResult', 'PREWARM_DELAY', 'PREWARM_GROUP']
@@ -0,0 +1,191 @@
+# gui_state.py
+"""界面状态模型
+
+过去每次切换操作或密钥类型都要用 findChildren 遍历整个控件树、按标签文字前缀匹配来
+设置可见性，每次按键还会同步地从全部控件重新读取参数并重建整条命令预览。现在：
+    - UiState 以 CommandOptions 保存操作、标志、密钥信息和输入路径，控件信号只更新对应字段；
+    - 每种 (操作, 密钥类型) 组合下各控件的可见/可用状态在界面创建后预先计算，两种组合之间
+      需要改变的控件也只计算一次，切换时只对这些控件调用 setVisible/setEnabled；
+    - 命令预览的刷新经过防抖合并：连续输入只在停顿后生成一次预览，但最长不超过 PREVIEW_MAX_DELAY。
+"""
+
+import time
+from dataclasses import replace
+
+from PyQt5.QtCore import QTimer
+
+from .constants import OP_MAP
+from .command_model import CommandOptions, op_key_for
+
+# 预览防抖间隔和最长延迟（毫秒）
+PREVIEW_DELAY = 80
+PREVIEW_MAX_DELAY = 300
+
+# 控件属性名 -> CommandOptions 字段
+TEXT_FIELDS = {
+    "input_line": "input_path",
+    "keystore_path": "keystore_path",
+    "keystore_alias": "keystore_alias",
+    "keystore_password": "keystore_password",
+    "private_key_path": "private_key_path",
+    "private_key_password": "private_key_password",
+    "public_key_path": "public_key_path",
+    "custom_args": "custom_args",
+}
+CHECK_FIELDS = {
+    "flag_xml": "flag_xml",
+    "flag_verbose": "verbose",
+    "flag_resources": "resources",
+    "flag_v1": "v1",
+    "flag_v2": "v2",
+    "flag_v3": "v3",
+    "flag_v4": "v4",
+    "flag_corex": "corex",
+}
+
+
+def visibility_table(main_window):
+    """预先计算每种 (操作键, 是否使用密钥库) 组合下各控件的状态
+
+    Args:
+        main_window: APKEditorUI主窗口实例（setup_ui 之后）
+
+    Returns:
+        dict: (操作键, 是否使用密钥库) -> {控件: (是否可见, 是否可用或None表示不改变)}
+    """
+    w = main_window
+    signing = [w.flag_v1, w.flag_v2, w.flag_v3, w.flag_v4, w.flag_v4_builtin,
+               w.key_type_label, w.radio_keystore, w.radio_key_pair]
+    keystore = [w.keystore_label, w.keystore_path, w.keystore_btn, w.keystore_alias_label, w.keystore_alias,
+                w.keystore_password_label, w.keystore_password]
+    key_pair = [w.private_key_label, w.private_key_path, w.private_key_btn, w.private_key_password_label,
+                w.private_key_password, w.public_key_label, w.public_key_path, w.public_key_btn]
+
+    table = {}
+    for op in OP_MAP.values():
+        is_signing = op == "sign"
+        is_pairip = op == "pairip"
+        for use_keystore in (True, False):
+            states = {
+                w.flag_xml: (not is_signing and not is_pairip, op == "d"),
+                w.flag_resources: (not is_signing and not is_pairip, True),
+                w.flag_corex: (is_pairip, is_pairip),
+                w.flag_worker: (not is_pairip, None),
+                w.flag_cache: (op in ("d", "m", "info"), None),
+                w.flag_gc: (not is_pairip, None),
+            }
+            states.update((widget, (is_signing, None)) for widget in signing)
+            states.update((widget, (is_signing and use_keystore, None)) for widget in keystore)
+            states.update((widget, (is_signing and not use_keystore, None)) for widget in key_pair)
+            table[(op, use_keystore)] = states
+    return table
+
+
+class UiState:
+    """主窗口的参数模型
+
+    控件通过 bind() 绑定到 CommandOptions 的字段；可见性和命令预览都由模型驱动。
+
+    Args:
+        main_window: APKEditorUI主窗口实例（setup_ui 创建控件之后）
+        refresh: 生成并显示命令预览的回调
+        delay: 预览防抖间隔（毫秒）
+    """
+
+    def __init__(self, main_window, refresh, delay=PREVIEW_DELAY):
+        self.main_window = main_window
+        self.options = CommandOptions()
+        self._refresh = refresh
+        self._table = visibility_table(main_window)
+        self._transitions = {}  # (原组合, 新组合) -> [(控件, 可见, 可用)]
+        self._applied = None    # 当前已应用的组合
+        self._first_request = None
+        self._timer = QTimer(main_window)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay)
+        self._timer.timeout.connect(self.flush_preview)
+
+    def bind(self):
+        """连接控件信号，并从控件读取一次初始值"""
+        w = self.main_window
+        for name, field in TEXT_FIELDS.items():
+            widget = getattr(w, name)
+            widget.textChanged.connect(lambda text, field=field: self.set(field, text.strip()))
+        for name, field in CHECK_FIELDS.items():
+            widget = getattr(w, name)
+            widget.toggled.connect(lambda checked, field=field: self.set(field, checked))
+        w.flag_v4_builtin.toggled.connect(
+            lambda checked: self.set("v4_backend", "builtin" if checked else "apksigner"))
+        self.sync()
+
+    def sync(self):
+        """从控件重新读取全部字段（用于初始化）"""
+        w = self.main_window
+        values = {field: getattr(w, name).text().strip() for name, field in TEXT_FIELDS.items()}
+        values.update({field: getattr(w, name).isChecked() for name, field in CHECK_FIELDS.items()})
+        values["v4_backend"] = "builtin" if w.flag_v4_builtin.isChecked() else "apksigner"
+        values["use_keystore"] = w.radio_keystore.isChecked()
+        values["op"] = op_key_for(w.current_op) or "d"
+        self.options = replace(self.options, **values)
+        self.schedule_preview()
+
+    def set(self, field, value):
+        """更新一个字段，值有变化时安排刷新预览"""
+        if getattr(self.options, field) == value:
+            return
+        self.options = replace(self.options, **{field: value})
+        self.schedule_preview()
+
+    def set_op(self, op_name):
+        """切换操作（界面名称或操作键）"""
+        self.set("op", op_key_for(op_name) or "d")
+
+    def set_key_type(self, use_keystore):
+        """切换密钥类型"""
+        self.set("use_keystore", bool(use_keystore))
+
+    def snapshot(self, jar_path=None):
+        """当前参数快照
+
+        Args:
+            jar_path: 手动选择的 APKEditor jar
+
+        Returns:
+            CommandOptions: 参数快照
+        """
+        return replace(self.options, jar_path=jar_path or "")
+
+    def apply_visibility(self):
+        """按当前操作和密钥类型设置控件的可见/可用状态，只改变与上次不同的控件"""
+        key = (self.options.op, self.options.use_keystore)
+        if key == self._applied:
+            return
+        changes = self._transitions.get((self._applied, key))
+        if changes is None:
+            states = self._table[key]
+            previous = self._table.get(self._applied, {})
+            changes = [(widget, visible, enabled) for widget, (visible, enabled) in states.items()
+                       if previous.get(widget) != (visible, enabled)]
+            self._transitions[(self._applied, key)] = changes
+        for widget, visible, enabled in changes:
+            widget.setVisible(visible)
+            if enabled is not None:
+                widget.setEnabled(enabled)
+        self._applied = key
+
+    def schedule_preview(self):
+        """安排刷新命令预览：间隔内的多次请求合并为一次，持续输入时最长延迟 PREVIEW_MAX_DELAY"""
+        now = time.monotonic()
+        if self._first_request is None:
+            self._first_request = now
+        if not self._timer.isActive() or (now - self._first_request) * 1000 < PREVIEW_MAX_DELAY:
+            self._timer.start()
+
+    def flush_preview(self):
+        """立即刷新命令预览（取消尚未到期的刷新）"""
+        self._timer.stop()
+        self._first_request = None
+        self._refresh()
+
+
+__all__ = ['UiState', 'visibility_table', 'PREVIEW_DELAY', 'PREVIEW_MAX_DELAY']
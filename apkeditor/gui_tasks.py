@@ -0,0 +1,218 @@
+# gui_tasks.py
+"""界面后台任务框架
+
+耗时的 Python 工作（哈希、扫描 zip、Pairip 处理等）统一交给 QThreadPool 执行：
+    - 任务只接收创建时传入的不可变参数快照（如 CommandOptions），不在工作线程中读取控件；
+    - 每个任务带一个 CancellationToken，任务在适当的位置调用 task.check() 协作式地停止，
+      也可以注册取消回调（例如结束正在运行的子进程）；
+    - 输出、进度和结果通过信号回到界面线程。
+任务按组管理，停止运行时只取消 "run" 组，切换输入时只取消 "prewarm" 组。
+"""
+
+import os
+import logging
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class TaskCancelled(Exception):
+    """任务被取消"""
+
+
+class CancellationToken:
+    """协作式取消标记（线程安全）"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """请求取消，并调用已注册的取消回调（只调用一次）"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"取消回调出错: {e}")
+
+    def add_callback(self, callback):
+        """注册取消时调用的回调；已取消时立即调用"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self):
+        """已取消时抛出 TaskCancelled"""
+        if self._event.is_set():
+            raise TaskCancelled()
+
+    def wait(self, timeout=None):
+        """等待取消（可用作可中断的 sleep）
+
+        Returns:
+            bool: 是否已取消
+        """
+        return self._event.wait(timeout)
+
+
+class TaskSignals(QObject):
+    """任务信号（QRunnable 不是 QObject，信号放在单独的对象中）"""
+    message = pyqtSignal(str)            # 输出一行文本
+    progress = pyqtSignal(object, str)   # (0~1 的进度或None, 说明)
+    event = pyqtSignal(str, object)      # 任务自定义的中间结果 (名称, 值)
+    result = pyqtSignal(object)          # 成功结束时的返回值
+    error = pyqtSignal(str)              # 失败时的错误信息
+    cancelled = pyqtSignal()
+    finished = pyqtSignal()              # 无论结果如何最后发出
+
+
+class Task(QRunnable):
+    """在线程池中执行 fn(task, *args, **kwargs)
+
+    fn 通过 task.log / task.report / task.emit 报告进度，通过 task.check() 或
+    task.token 响应取消；返回值经 result 信号交给界面线程。
+
+    Args:
+        fn: 任务函数
+        name: 任务名称（用于日志）
+        group: 任务组
+    """
+
+    def __init__(self, fn, *args, name=None, group=None, **kwargs):
+        super().__init__()
+        # 由 TaskManager 保留引用直到 finished，不交给线程池删除
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.name = name or getattr(fn, "__name__", "task")
+        self.group = group
+        self.token = CancellationToken()
+        self.signals = TaskSignals()
+
+    @property
+    def is_cancelled(self):
+        return self.token.cancelled
+
+    def cancel(self):
+        self.token.cancel()
+
+    def check(self):
+        """取消检查点：已取消时抛出 TaskCancelled"""
+        self.token.raise_if_cancelled()
+
+    def log(self, text):
+        self.signals.message.emit(text)
+
+    def report(self, fraction, text=""):
+        self.signals.progress.emit(fraction, text)
+
+    def emit(self, name, value):
+        self.signals.event.emit(name, value)
+
+    def run(self):
+        try:
+            if self.token.cancelled:
+                raise TaskCancelled()
+            result = self.fn(self, *self.args, **self.kwargs)
+            if self.token.cancelled:
+                raise TaskCancelled()
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            logger.error(f"任务 {self.name} 出错: {e}\n{traceback.format_exc()}")
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+class TaskManager(QObject):
+    """主窗口的后台任务：提交到线程池并按组跟踪、取消
+
+    Args:
+        parent: 父对象（主窗口）
+        max_threads: 线程池大小，默认CPU核心数
+    """
+
+    def __init__(self, parent=None, max_threads=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads or os.cpu_count() or 2)
+        self._tasks = {}  # 任务信号对象 -> 任务，结束后移除
+
+    def submit(self, fn, *args, name=None, group=None, on_result=None, on_message=None, on_progress=None,
+               on_event=None, on_error=None, on_finished=None, **kwargs):
+        """提交任务
+
+        Args:
+            fn: 任务函数，以 fn(task, *args, **kwargs) 调用；参数应为不可变的快照
+            name: 任务名称
+            group: 任务组，用于 cancel(group)
+            on_result / on_message / on_progress / on_event / on_error / on_finished: 对应信号的回调
+
+        Returns:
+            Task: 已提交的任务
+        """
+        task = Task(fn, *args, name=name, group=group, **kwargs)
+        signals = task.signals
+        for signal, slot in ((signals.result, on_result), (signals.message, on_message),
+                             (signals.progress, on_progress), (signals.event, on_event),
+                             (signals.error, on_error), (signals.finished, on_finished)):
+            if slot is not None:
+                signal.connect(slot)
+        signals.finished.connect(self._on_finished)
+        self._tasks[signals] = task
+        self.pool.start(task)
+        return task
+
+    def tasks(self, group=None):
+        """尚未结束的任务"""
+        return [task for task in self._tasks.values() if group is None or task.group == group]
+
+    def _on_finished(self):
+        self._tasks.pop(self.sender(), None)
+
+    def cancel(self, group=None):
+        """取消任务
+
+        Args:
+            group: 任务组，None表示全部
+
+        Returns:
+            int: 取消的任务数
+        """
+        tasks = [task for task in self.tasks(group) if not task.is_cancelled]
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    def shutdown(self, timeout_ms=3000):
+        """取消全部任务并等待线程池结束（关闭窗口时调用）"""
+        self.cancel()
+        self.pool.clear()
+        return self.pool.waitForDone(timeout_ms)
+
+
+__all__ = ['TaskCancelled', 'CancellationToken', 'Task', 'TaskSignals', 'TaskManager']
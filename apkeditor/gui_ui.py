@@ -1,10 +1,11 @@
 # gui_ui.py
 """APKEditor GUI界面初始化和布局模块"""
 
+import os
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QLineEdit, QTextEdit, QPushButton, 
     QHBoxLayout, QVBoxLayout, QGridLayout, QCheckBox, 
-    QProgressBar
+    QProgressBar, QSpinBox, QTableWidget, QHeaderView
 )
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
@@ -71,12 +72,22 @@ def setup_ui(main_window):
     main_window.flag_verbose = QCheckBox("Verbose (-v)")
     main_window.flag_resources = QCheckBox("Resources (-resources)")
     main_window.flag_corex = QCheckBox("使用CoreX Hook (-x)")
+    main_window.flag_worker = QCheckBox("常驻JVM (加速)")
+    main_window.flag_worker.setChecked(True)
+    main_window.flag_cache = QCheckBox("缓存结果")
+    main_window.flag_cache.setChecked(True)
+    main_window.flag_cache.setToolTip("反编译/合并/信息：相同输入、jar和参数时直接复用上次的输出")
+    main_window.flag_gc = QCheckBox("GC日志")
+    main_window.flag_gc.setToolTip("用一次性进程运行并采集GC日志（-Xlog:gc），结束后输出暂停时间、峰值堆和GC开销，"
+                                   "并记入堆配置档案供之后的同类任务设置 -Xmx")
     
     # 签名相关标志
     main_window.flag_v1 = QCheckBox("V1 签名 (-v1)")
     main_window.flag_v2 = QCheckBox("V2 签名 (-v2)")
     main_window.flag_v3 = QCheckBox("V3 签名 (-v3)")
     main_window.flag_v4 = QCheckBox("V4 签名 (-v4)")
+    main_window.flag_v4_builtin = QCheckBox("内置V4 (多线程)")
+    main_window.flag_v4_builtin.setToolTip("apksigner 只做 V1-V3 签名，完成后多线程构建Merkle树生成 .idsig（需启用V2或V3）")
     
     # 默认勾选V1和V2签名
     main_window.flag_v1.setChecked(True)
@@ -86,14 +97,16 @@ def setup_ui(main_window):
     flags_layout = QHBoxLayout()
     for flag in [main_window.flag_xml, main_window.flag_verbose, main_window.flag_resources,
                  main_window.flag_v1, main_window.flag_v2, main_window.flag_v3, main_window.flag_v4,
-                 main_window.flag_corex]:
+                 main_window.flag_v4_builtin, main_window.flag_corex, main_window.flag_worker, main_window.flag_cache,
+                 main_window.flag_gc]:
         flags_layout.addWidget(flag)
     grid.addLayout(flags_layout, row, 0, 1, 4)
     row += 1
 
     # 签名相关参数 - 添加公钥私钥支持
     # 密钥类型选择
-    grid.addWidget(QLabel("密钥类型:"), row, 0)
+    main_window.key_type_label = QLabel("密钥类型:")
+    grid.addWidget(main_window.key_type_label, row, 0)
     main_window.key_type_layout = QHBoxLayout()
     main_window.radio_keystore = QCheckBox("密钥库文件")
     main_window.radio_keystore.setChecked(True)
@@ -107,7 +120,8 @@ def setup_ui(main_window):
     
     # 密钥库文件方式
     # Keystore path - 添加拖拽支持
-    grid.addWidget(QLabel("签名密钥文件 (.jks/.keystore):"), row, 0)
+    main_window.keystore_label = QLabel("签名密钥文件 (.jks/.keystore):")
+    grid.addWidget(main_window.keystore_label, row, 0)
     main_window.keystore_path = QLineEdit()
     main_window._setup_drag_drop(main_window.keystore_path)
     main_window.keystore_btn = QPushButton("选择")
@@ -119,12 +133,14 @@ def setup_ui(main_window):
     row += 1
     
     # Keystore alias
-    grid.addWidget(QLabel("密钥别名:"), row, 0)
+    main_window.keystore_alias_label = QLabel("密钥别名:")
+    grid.addWidget(main_window.keystore_alias_label, row, 0)
     main_window.keystore_alias = QLineEdit()
     grid.addWidget(main_window.keystore_alias, row, 1)
     
     # Keystore password
-    grid.addWidget(QLabel("密钥密码:"), row, 2)
+    main_window.keystore_password_label = QLabel("密钥密码:")
+    grid.addWidget(main_window.keystore_password_label, row, 2)
     main_window.keystore_password = QLineEdit()
     main_window.keystore_password.setEchoMode(QLineEdit.Password)
     grid.addWidget(main_window.keystore_password, row, 3)
@@ -132,7 +148,8 @@ def setup_ui(main_window):
     
     # 公钥私钥方式
     # Private key path - 添加拖拽支持
-    grid.addWidget(QLabel("私钥文件 (PKCS#8格式):"), row, 0)
+    main_window.private_key_label = QLabel("私钥文件 (PKCS#8格式):")
+    grid.addWidget(main_window.private_key_label, row, 0)
     main_window.private_key_path = QLineEdit()
     main_window._setup_drag_drop(main_window.private_key_path)
     main_window.private_key_btn = QPushButton("选择")
@@ -144,14 +161,16 @@ def setup_ui(main_window):
     row += 1
     
     # Private key password
-    grid.addWidget(QLabel("私钥密码 (可选):"), row, 0)
+    main_window.private_key_password_label = QLabel("私钥密码 (可选):")
+    grid.addWidget(main_window.private_key_password_label, row, 0)
     main_window.private_key_password = QLineEdit()
     main_window.private_key_password.setEchoMode(QLineEdit.Password)
     grid.addWidget(main_window.private_key_password, row, 1, 1, 3)
     row += 1
     
     # Public key path - 添加拖拽支持
-    grid.addWidget(QLabel("公钥文件 (X.509格式):"), row, 0)
+    main_window.public_key_label = QLabel("公钥文件 (X.509格式):")
+    grid.addWidget(main_window.public_key_label, row, 0)
     main_window.public_key_path = QLineEdit()
     main_window._setup_drag_drop(main_window.public_key_path)
     main_window.public_key_btn = QPushButton("选择")
@@ -181,9 +200,15 @@ def setup_ui(main_window):
     main_window.stop_btn = QPushButton("停止")
     main_window.stop_btn.clicked.connect(main_window.on_stop)
     main_window.stop_btn.setEnabled(False)
+    # 批量任务并发数，默认等于CPU核心数
+    main_window.concurrency_spin = QSpinBox()
+    main_window.concurrency_spin.setRange(1, 64)
+    main_window.concurrency_spin.setValue(min(os.cpu_count() or 1, 64))
     btn_layout = QHBoxLayout()
     btn_layout.addWidget(main_window.run_btn)
     btn_layout.addWidget(main_window.stop_btn)
+    btn_layout.addWidget(QLabel("并发数:"))
+    btn_layout.addWidget(main_window.concurrency_spin)
     grid.addLayout(btn_layout, row, 0, 1, 4)
     row += 1
 
@@ -196,6 +221,16 @@ def setup_ui(main_window):
 
     layout.addLayout(grid)
 
+    # 批量任务列表（多个输入时显示），点击某行在控制台查看该任务输出
+    main_window.job_table = QTableWidget(0, 3)
+    main_window.job_table.setHorizontalHeaderLabels(["输入", "状态", "退出码"])
+    main_window.job_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+    main_window.job_table.setEditTriggers(QTableWidget.NoEditTriggers)
+    main_window.job_table.setSelectionBehavior(QTableWidget.SelectRows)
+    main_window.job_table.cellClicked.connect(main_window.on_batch_job_selected)
+    main_window.job_table.setVisible(False)
+    layout.addWidget(main_window.job_table, 1)
+
     # Output console - 增强中文支持
     layout.addWidget(QLabel("输出控制台:"))
     main_window.output_console = QTextEdit()
@@ -211,6 +246,11 @@ def setup_ui(main_window):
     # 设置语法高亮
     from .syntax_highlighter import ConsoleHighlighter
     main_window.highlighter = ConsoleHighlighter(main_window.output_console.document())
+    main_window.highlighter.attach_view(main_window.output_console)
+    
+    # 控制台批量渲染缓冲（限制最大行数）
+    from .gui_console import ConsoleBuffer
+    main_window.console_buffer = ConsoleBuffer(main_window.output_console)
     
     # 添加右键菜单
     main_window._setup_context_menu()
@@ -222,19 +262,14 @@ def setup_ui(main_window):
     tips.setStyleSheet("color: gray;")
     layout.addWidget(tips)
 
-    # Update preview when inputs change - 使用列表遍历简化信号连接
-    widgets = [
-        main_window.input_line, main_window.flag_xml, main_window.flag_verbose, main_window.flag_resources,
-        main_window.flag_v1, main_window.flag_v2, main_window.flag_v3, main_window.flag_v4,
-        main_window.flag_corex,
-        main_window.keystore_path, main_window.keystore_alias, main_window.keystore_password,
-        main_window.private_key_path, main_window.private_key_password, main_window.public_key_path,
-        main_window.custom_args
-    ]
-    for widget in widgets:
-        if isinstance(widget, QLineEdit):
-            widget.textChanged.connect(main_window.update_preview)
-        elif isinstance(widget, QCheckBox):
-            widget.stateChanged.connect(main_window.update_preview)
-    main_window.radio_keystore.stateChanged.connect(main_window.update_preview)
-    main_window.radio_key_pair.stateChanged.connect(main_window.update_preview)
\ No newline at end of file
+    # 参数模型：控件变化只更新对应字段，可见性按预先计算的表切换，命令预览防抖刷新
+    from .gui_state import UiState
+    main_window.ui_state = UiState(main_window, main_window.refresh_preview)
+    main_window.ui_state.bind()
+    # 后台任务线程池（哈希、扫描、Pairip处理等），按组取消
+    from .gui_tasks import TaskManager
+    main_window.tasks = TaskManager(main_window)
+    # 输入或操作变化后在后台预先计算缓存键、估算任务大小并启动常驻JVM
+    from .gui_prewarm import Prewarmer
+    main_window.prewarmer = Prewarmer(main_window)
+    main_window.input_line.textChanged.connect(main_window.on_input_edited)
@@ -0,0 +1,348 @@
+# job_queue.py
+"""批量任务队列模块 - 多个输入并发执行，限制同时运行的JVM数量；批量签名可共用一个签名会话"""
+
+import os
+import time
+from PyQt5.QtCore import QObject, QProcess, QThread, QTimer, pyqtSignal
+
+from .process_stream import ProcessStreamReader
+from .progress_parser import ProgressParser
+
+
+class BatchJob:
+    """单个批量任务的状态"""
+
+    PENDING = "等待中"
+    RUNNING = "运行中"
+    SUCCESS = "成功"
+    FAILED = "失败"
+    STOPPED = "已停止"
+
+    def __init__(self, index, input_path, program, args):
+        self.index = index
+        self.input_path = input_path
+        self.program = program
+        self.args = args
+        self.status = BatchJob.PENDING
+        self.exit_code = None
+        self.output = []  # 输出行
+        self.process = None
+        self.reader = None
+        self.parser = ProgressParser()
+        self.progress = None  # 最近一次ProgressEvent
+        self.heap_mb = None  # 内存调度分配的最大堆（MB），None表示不限制
+        self.priority = 0  # 调度优先级，数值越小越先运行
+        self.attempts = 0
+        self.started = None  # 最近一次启动的时间（time.monotonic）
+        self.cds_training = None  # 本次启动转储的AppCDS归档（appcds.with_cds）
+        self.output_path = None  # 签名会话的输出APK，None表示原地签名
+
+    @property
+    def fraction(self):
+        """任务进度 0~1，已结束的任务视为完成"""
+        if self.exit_code is not None or self.status == BatchJob.STOPPED:
+            return 1.0
+        return self.progress.fraction if self.progress is not None else 0.0
+
+
+class JobQueue(QObject):
+    """批量任务队列
+
+    每个任务使用独立的QProcess，同时最多运行 max_concurrent 个，
+    单个任务失败不会影响队列中的其他任务。指定内存调度器时，每个任务按估算的堆
+    启动（-Xmx），可用内存不足时排队，内存不足失败的任务加大堆后重试。
+
+    Args:
+        max_concurrent: 最大并发数，默认等于CPU核心数
+        parent: 父对象
+        scheduler: MemoryScheduler实例，None表示不限制内存
+    """
+    job_started = pyqtSignal(int)  # 任务开始 (index)
+    job_output = pyqtSignal(int, list)  # 任务输出 (index, lines)
+    job_progress = pyqtSignal(int)  # 任务进度变化 (index)
+    job_finished = pyqtSignal(int, int)  # 任务结束 (index, exit_code)
+    queue_finished = pyqtSignal()  # 队列中所有任务结束
+
+    def __init__(self, max_concurrent=None, parent=None, scheduler=None):
+        super().__init__(parent)
+        self.max_concurrent = max_concurrent or os.cpu_count() or 1
+        self.scheduler = scheduler
+        self.jobs = []
+        self._pending = []
+        self._running = set()
+        # 内存不足排队时定时重新检查
+        self._memory_timer = QTimer(self)
+        self._memory_timer.setSingleShot(True)
+        self._memory_timer.setInterval(2000)
+        self._memory_timer.timeout.connect(self._schedule)
+
+    def add_job(self, input_path, program, args, op=None, priority=0):
+        """添加任务
+
+        Args:
+            op: 操作键，指定且有内存调度器时按输入估算堆大小
+            priority: 优先级，数值越小越先运行
+
+        Returns:
+            BatchJob: 新建的任务
+        """
+        job = BatchJob(len(self.jobs), input_path, program, args)
+        job.priority = priority
+        if self.scheduler is not None and op:
+            job.heap_mb = self.scheduler.estimate_heap_mb(op, input_path)
+        self.jobs.append(job)
+        self._pending.append(job)
+        return job
+
+    def start(self):
+        """开始调度任务"""
+        self._schedule()
+
+    def is_running(self):
+        """队列中是否还有未结束的任务"""
+        return bool(self._pending or self._running)
+
+    def stop(self):
+        """停止队列：取消等待中的任务并结束运行中的进程"""
+        for job in self._pending:
+            job.status = BatchJob.STOPPED
+        self._pending = []
+        for job in list(self._running):
+            job.status = BatchJob.STOPPED
+            job.process.kill()
+
+    def _schedule(self):
+        """在并发限制内按优先级启动等待中的任务（同优先级先到先运行）"""
+        self._pending.sort(key=lambda job: job.priority)
+        while self._pending and len(self._running) < self.max_concurrent:
+            job = self._pending[0]
+            if job.heap_mb is not None and not self.scheduler.try_acquire(self._memory_of(job), job.priority):
+                # 内存不足：等运行中的任务结束，或定时重新检查
+                self._memory_timer.start()
+                break
+            self._start_job(self._pending.pop(0))
+        if not self._pending and not self._running:
+            self.queue_finished.emit()
+
+    def _start_job(self, job):
+        """启动单个任务"""
+        process = QProcess(self)
+        process.setProcessChannelMode(QProcess.MergedChannels)
+        job.reader = ProcessStreamReader(process, parent=process)
+        job.reader.lines_ready.connect(lambda lines: self._on_output(job, lines))
+        process.finished.connect(lambda code, status: self._on_finished(job, code, status))
+        process.errorOccurred.connect(lambda error: self._on_error(job, error))
+        job.process = process
+        job.status = BatchJob.RUNNING
+        job.started = time.monotonic()
+        self._running.add(job)
+        self.job_started.emit(job.index)
+        args = job.args
+        if job.heap_mb is not None:
+            from .scheduler import with_heap
+            args = with_heap(args, job.heap_mb)
+        from .appcds import with_cds
+        args, job.cds_training = with_cds(job.program, args)
+        process.start(job.program, args)
+
+    @staticmethod
+    def _memory_of(job):
+        from .scheduler import process_memory_mb
+        return process_memory_mb(job.heap_mb)
+
+    def _on_output(self, job, lines):
+        """收集任务输出"""
+        job.output.extend(lines)
+        self.job_output.emit(job.index, lines)
+        event = None
+        for line in lines:
+            event = job.parser.feed(line) or event
+        if event is not None:
+            job.progress = event
+            self.job_progress.emit(job.index)
+
+    def _on_error(self, job, error):
+        """进程无法启动时按失败处理，继续后续任务"""
+        if error == QProcess.FailedToStart and job in self._running:
+            job.output.append(f"[错误] 无法启动进程: {job.program}")
+            if job.cds_training is not None:
+                from .appcds import finish_training
+                finish_training(job.cds_training, -1)
+                job.cds_training = None
+            self._complete(job, -1)
+
+    def _on_finished(self, job, exit_code, exit_status):
+        """任务结束"""
+        if job.cds_training is not None:
+            from .appcds import finish_training
+            finish_training(job.cds_training, exit_code if exit_status == QProcess.NormalExit else -1)
+            job.cds_training = None
+        if job in self._running:
+            if self._retry_with_more_memory(job, exit_code, exit_status):
+                return
+            self._complete(job, exit_code if exit_status == QProcess.NormalExit else -1)
+
+    def _retry_with_more_memory(self, job, exit_code, exit_status):
+        """内存不足失败的任务加大堆、提高优先级后放回队首
+
+        Returns:
+            bool: 是否已重新排队
+        """
+        from .scheduler import MAX_ATTEMPTS, is_out_of_memory
+        if job.heap_mb is None or job.status == BatchJob.STOPPED:
+            return False
+        job.attempts += 1
+        next_heap = self.scheduler.next_heap_mb(job.heap_mb)
+        killed = exit_status != QProcess.NormalExit
+        if next_heap is None or job.attempts >= MAX_ATTEMPTS or not is_out_of_memory(exit_code, job.output, killed):
+            return False
+        message = f"[内存] 堆 {job.heap_mb} MB 内存不足，使用 {next_heap} MB 重试"
+        job.output.append(message)
+        self.job_output.emit(job.index, [message])
+        self._running.discard(job)
+        self.scheduler.release(self._memory_of(job))
+        job.heap_mb = next_heap
+        # 与 MemoryScheduler.run 相同：重试的任务排在新任务之前
+        job.priority = min(job.priority, 0) - 1
+        job.status = BatchJob.PENDING
+        job.progress = None
+        self._pending.insert(0, job)
+        self._schedule()
+        return True
+
+    def _complete(self, job, exit_code):
+        """记录任务结果并调度下一个任务"""
+        self._running.discard(job)
+        if job.heap_mb is not None:
+            self.scheduler.release(self._memory_of(job))
+        job.exit_code = exit_code
+        if job.status != BatchJob.STOPPED:
+            job.status = BatchJob.SUCCESS if exit_code == 0 else BatchJob.FAILED
+        self.job_finished.emit(job.index, exit_code)
+        self._schedule()
+
+
+class _SignSessionThread(QThread):
+    """在后台线程中运行签名会话"""
+    job_started = pyqtSignal(int)
+    job_done = pyqtSignal(int, int, str)
+    session_failed = pyqtSignal(str)
+
+    def __init__(self, session, jobs):
+        super().__init__()
+        self.session = session
+        self.jobs = jobs
+        self.cancelled = False
+
+    def cancel(self):
+        """不再下发新任务，并结束签名进程"""
+        self.cancelled = True
+        self.session.kill()
+
+    def run(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from .sign_session import SignSessionError
+        try:
+            self.session.start()
+        except SignSessionError as e:
+            self.session_failed.emit(str(e))
+            return
+
+        def sign(job):
+            if self.cancelled:
+                return
+            self.job_started.emit(job.index)
+            result = self.session.sign(job.input_path, job.output_path)
+            self.job_done.emit(job.index, result.exit_code, result.message)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.session.threads) as pool:
+                list(pool.map(sign, self.jobs))
+        finally:
+            self.session.close()
+
+
+class SignSessionQueue(QObject):
+    """批量签名队列：整个批次共用一个签名会话，密钥只解锁一次
+
+    与JobQueue接口相同，所有APK在同一个JVM中并发签名。
+
+    Args:
+        options: 签名操作的CommandOptions
+        java: java可执行文件
+        apksigner_jar: apksigner.jar路径
+        max_concurrent: 并发签名数，默认等于CPU核心数
+        parent: 父对象
+    """
+    job_started = pyqtSignal(int)
+    job_output = pyqtSignal(int, list)
+    job_progress = pyqtSignal(int)
+    job_finished = pyqtSignal(int, int)
+    queue_finished = pyqtSignal()
+
+    def __init__(self, options, java, apksigner_jar, max_concurrent=None, parent=None):
+        super().__init__(parent)
+        from .sign_session import SignSession
+        self.max_concurrent = max_concurrent or os.cpu_count() or 1
+        self.session = SignSession(options, java, apksigner_jar, self.max_concurrent)
+        self.jobs = []
+        self._thread = None
+
+    def add_job(self, input_path, program, args, op=None, output_path=None):
+        """添加任务（op 只为与JobQueue接口一致，签名不需要估算内存）
+
+        Args:
+            output_path: 签名输出的APK，默认原地签名
+
+        Returns:
+            BatchJob: 新建的任务
+        """
+        job = BatchJob(len(self.jobs), input_path, program, args)
+        job.output_path = output_path
+        self.jobs.append(job)
+        return job
+
+    def start(self):
+        """启动签名会话并下发全部任务"""
+        self._thread = _SignSessionThread(self.session, list(self.jobs))
+        self._thread.job_started.connect(self._on_started)
+        self._thread.job_done.connect(self._on_done)
+        self._thread.session_failed.connect(self._on_session_failed)
+        self._thread.finished.connect(self._on_thread_finished)
+        self._thread.start()
+
+    def is_running(self):
+        """签名会话是否还在运行"""
+        return self._thread is not None and self._thread.isRunning()
+
+    def stop(self):
+        """停止：未开始的任务标记为已停止，正在签名的任务随签名进程结束"""
+        for job in self.jobs:
+            if job.exit_code is None:
+                job.status = BatchJob.STOPPED
+        if self._thread is not None:
+            self._thread.cancel()
+
+    def _on_started(self, index):
+        job = self.jobs[index]
+        if job.status != BatchJob.STOPPED:
+            job.status = BatchJob.RUNNING
+        self.job_started.emit(index)
+
+    def _on_done(self, index, exit_code, message):
+        job = self.jobs[index]
+        if message:
+            job.output.append(message)
+            self.job_output.emit(index, [message])
+        job.exit_code = exit_code
+        if job.status != BatchJob.STOPPED:
+            job.status = BatchJob.SUCCESS if exit_code == 0 else BatchJob.FAILED
+        self.job_finished.emit(index, exit_code)
+
+    def _on_session_failed(self, message):
+        """密钥无法解锁时所有任务失败"""
+        for job in self.jobs:
+            self._on_done(job.index, -1, f"[错误] 无法启动签名会话: {message}")
+
+    def _on_thread_finished(self):
+        self.queue_finished.emit()
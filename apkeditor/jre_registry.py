@@ -0,0 +1,455 @@
+# jre_registry.py
+"""已安装 Java 运行时的发现与选择
+
+PATH 中的 java 常常是旧的 JRE 8（没有动态 CDS、GC 较慢、不识别容器内存限制）。
+注册表从 JAVA_HOME、常见安装目录和 PATH 中查找 java，对每个可执行文件只探测一次
+版本和特性，结果保存在 CACHE_DIR/jre_registry.json；可执行文件的修改时间或大小变化
+（JDK 升级）后重新探测。发现结果还保存在内存中，只有安装目录、PATH 或已发现的 java
+发生变化（或 jre 子命令要求刷新）时才重新查找。
+
+选择顺序：环境变量 APKEDITOR_JAVA -> 该操作固定的 java -> 所有操作固定的 java（"*"）
+-> 满足版本要求的最快运行时（64位优先，其次主版本号高，其次带 javac 的 JDK）-> PATH 中的 java。
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import shutil
+import logging
+import threading
+import subprocess
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_PATH = os.path.join(CACHE_DIR, "jre_registry.json")
+REGISTRY_VERSION = 1
+
+# APKEditor 和 apksigner 需要 Java 8+；签名会话（lib/SignService.java）使用 Java 9+ 的 API，
+# 没有 javac 时还要以源码模式启动，因此需要 Java 11+
+MIN_JAVA_MAJOR = 8
+OP_MIN_MAJOR = {"sign-session": 11}
+# 固定到所有操作的键
+ALL_OPS = "*"
+
+PROBE_TIMEOUT = 30
+
+# 隐藏Windows下的命令行窗口
+if os.name == 'nt':
+    PLATFORM_ARGS = {'creationflags': subprocess.CREATE_NO_WINDOW}
+else:
+    PLATFORM_ARGS = {}
+
+_JAVA_EXE = "java.exe" if os.name == "nt" else "java"
+_VERSION_RE = re.compile(r'version "([^"]+)"')
+_PROPERTY_RE = re.compile(r"^\s+([\w.]+) = (.*)$")
+
+
+def parse_java_version(text):
+    """从 java -version 的输出解析版本
+
+    Returns:
+        tuple: (主版本号, 版本字符串)，无法解析时返回 (None, None)
+    """
+    match = _VERSION_RE.search(text)
+    if not match:
+        return None, None
+    version = match.group(1)
+    parts = re.findall(r"\d+", version)
+    if not parts:
+        return None, version
+    # 1.8.0_292 -> 8，17.0.2 -> 17
+    major = int(parts[1]) if parts[0] == "1" and len(parts) > 1 else int(parts[0])
+    return major, version
+
+
+@dataclass(frozen=True)
+class JavaRuntime:
+    """一个已探测的 java 可执行文件"""
+    java: str  # 可执行文件的真实路径
+    home: str
+    version: str
+    major: int
+    vendor: str = ""
+    arch: str = ""
+    has_javac: bool = False
+    mtime: float = 0.0
+    size: int = 0
+
+    @property
+    def update(self):
+        """Java 8 的更新号（1.8.0_292 -> 292），其他版本为0"""
+        match = re.search(r"_(\d+)", self.version)
+        return int(match.group(1)) if self.major == 8 and match else 0
+
+    @property
+    def javac(self):
+        """同一JDK中的 javac，只有JRE时返回None"""
+        return _javac_for(self.java, self.home)
+
+    @property
+    def is_64bit(self):
+        return self.arch in ("amd64", "x86_64", "aarch64", "arm64", "ppc64le", "s390x")
+
+    @property
+    def dynamic_cds(self):
+        """支持动态 AppCDS 归档（JDK 13+）"""
+        return self.major >= 13
+
+    @property
+    def container_aware(self):
+        """识别容器内存/CPU限制（JDK 10+，8u191+）"""
+        return self.major >= 10 or self.update >= 191
+
+    @property
+    def source_launch(self):
+        """支持直接运行 .java 源文件（JDK 11+）"""
+        return self.major >= 11
+
+    def features(self):
+        """特性名称列表"""
+        names = [("64位", self.is_64bit), ("javac", self.has_javac), ("AppCDS", self.dynamic_cds),
+                 ("容器感知", self.container_aware), ("源码启动", self.source_launch)]
+        return [name for name, enabled in names if enabled]
+
+    def rank(self):
+        """选择时的排序键（越大越好）"""
+        return self.is_64bit, self.major, self.has_javac
+
+    def describe(self):
+        """一行可读的描述"""
+        vendor = f" {self.vendor}" if self.vendor else ""
+        return f"Java {self.version}{vendor} ({self.arch or '?'}) [{', '.join(self.features())}] {self.java}"
+
+
+def _resolve(java):
+    """java 可执行文件（命令名或路径）的真实路径，找不到时返回None"""
+    path = shutil.which(java) if not os.path.isfile(java) else java
+    return os.path.realpath(path) if path else None
+
+
+def _java_in(home):
+    return os.path.join(home, "bin", _JAVA_EXE)
+
+
+def _javac_for(java, home):
+    """与 java 同一JDK中的 javac，没有时返回None"""
+    name = "javac.exe" if os.name == "nt" else "javac"
+    # JDK 8 的 java.home 指向 jdk/jre，javac 在上一级的 bin 中
+    for directory in (os.path.dirname(java), os.path.join(os.path.dirname(home), "bin")):
+        if os.path.isfile(os.path.join(directory, name)):
+            return os.path.join(directory, name)
+    return None
+
+
+def _home_patterns():
+    """可能安装了JDK/JRE的目录的 glob 模式"""
+    patterns = [os.path.join(os.path.expanduser("~"), ".jdks", "*"),
+                os.path.join(os.path.expanduser("~"), ".sdkman", "candidates", "java", "*"),
+                os.path.join(os.path.expanduser("~"), ".asdf", "installs", "java", "*"),
+                os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lib", "j*")]
+    if os.name == "nt":
+        for base in {os.environ.get(name) for name in ("ProgramFiles", "ProgramFiles(x86)", "ProgramW6432")}:
+            if base:
+                for vendor in ("Java", "Eclipse Adoptium", "Eclipse Foundation", "AdoptOpenJDK", "Zulu",
+                               "BellSoft", "Amazon Corretto", "Semeru"):
+                    patterns.append(os.path.join(base, vendor, "*"))
+                patterns.append(os.path.join(base, "Microsoft", "jdk*"))
+    elif sys.platform == "darwin":
+        for root in ("/Library/Java/JavaVirtualMachines", os.path.expanduser("~/Library/Java/JavaVirtualMachines")):
+            patterns.append(os.path.join(root, "*", "Contents", "Home"))
+        patterns.append("/opt/homebrew/opt/openjdk*/libexec/openjdk.jdk/Contents/Home")
+        patterns.append("/usr/local/opt/openjdk*/libexec/openjdk.jdk/Contents/Home")
+    else:
+        patterns.extend(["/usr/lib/jvm/*", "/usr/java/*", "/usr/local/java/*", "/opt/java/*", "/opt/jdk*",
+                         "/opt/*/jdk*"])
+    return patterns
+
+
+def _candidate_homes():
+    """可能安装了JDK/JRE的目录"""
+    homes = [os.environ.get(name) for name in ("JAVA_HOME", "JDK_HOME")]
+    for pattern in _home_patterns():
+        homes.extend(sorted(glob.glob(pattern)))
+    return [home for home in homes if home]
+
+
+def candidate_javas():
+    """所有候选 java 可执行文件的真实路径（去重）"""
+    paths = [_java_in(home) for home in _candidate_homes()]
+    paths += [os.path.join(directory, _JAVA_EXE) for directory in os.environ.get("PATH", "").split(os.pathsep)
+              if directory]
+    seen, result = set(), []
+    for path in paths:
+        if not os.path.isfile(path):
+            continue
+        real = os.path.realpath(path)
+        if real not in seen:
+            seen.add(real)
+            result.append(real)
+    return result
+
+
+def _pattern_root(pattern):
+    """glob 模式中第一个通配符之前的目录"""
+    index = min([pattern.find(char) for char in "*?[" if char in pattern] or [len(pattern)])
+    return os.path.dirname(pattern[:index])
+
+
+def _discovery_key():
+    """发现结果的有效性键：环境变量和各查找目录的修改时间（安装或卸载 java 时改变）"""
+    paths = [directory for directory in os.environ.get("PATH", "").split(os.pathsep) if directory]
+    homes = [os.environ.get(name) for name in ("JAVA_HOME", "JDK_HOME")]
+    directories = {_pattern_root(pattern) for pattern in _home_patterns()}
+    directories.update(paths)
+    directories.update(os.path.join(home, "bin") for home in homes if home)
+    key = [os.environ.get("PATH", "")] + homes
+    for directory in sorted(directories):
+        try:
+            key.append((directory, os.stat(directory).st_mtime))
+        except OSError:
+            key.append((directory, None))
+    return tuple(key)
+
+
+def _unchanged(runtime):
+    """探测后 java 可执行文件没有变化"""
+    try:
+        stat = os.stat(runtime.java)
+    except OSError:
+        return False
+    return stat.st_mtime == runtime.mtime and stat.st_size == runtime.size
+
+
+def _probe(java):
+    """运行 java -XshowSettings:properties -version 读取版本和属性
+
+    Returns:
+        JavaRuntime: 探测结果，无法运行或无法解析时返回None
+    """
+    try:
+        result = subprocess.run([java, "-XshowSettings:properties", "-version"], capture_output=True, text=True,
+                                errors="replace", timeout=PROBE_TIMEOUT, **PLATFORM_ARGS)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.debug(f"无法运行 {java}: {e}")
+        return None
+    output = result.stderr + result.stdout
+    major, version = parse_java_version(output)
+    if major is None:
+        return None
+    properties = {}
+    for line in output.splitlines():
+        match = _PROPERTY_RE.match(line)
+        if match:
+            properties.setdefault(match.group(1), match.group(2).strip())
+    home = properties.get("java.home") or os.path.dirname(os.path.dirname(java))
+    has_javac = _javac_for(java, home) is not None
+    stat = os.stat(java)
+    return JavaRuntime(java=java, home=home, version=version, major=major,
+                       vendor=properties.get("java.vendor", ""), arch=properties.get("os.arch", ""),
+                       has_javac=has_javac, mtime=stat.st_mtime, size=stat.st_size)
+
+
+class JreRegistry:
+    """已探测的 java 运行时和按操作固定的选择
+
+    Args:
+        path: 注册表文件，默认 CACHE_DIR/jre_registry.json
+    """
+
+    def __init__(self, path=REGISTRY_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._runtimes = None  # 真实路径 -> dict（JavaRuntime字段，或探测失败时的 {"error", "mtime", "size"}）
+        self._pins = None
+        self._dirty = False
+        self._discovered = None  # (发现时的有效性键, 排好序的 JavaRuntime 元组)
+
+    def _load(self):
+        if self._runtimes is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") != REGISTRY_VERSION:
+                    raise ValueError("registry version")
+                self._runtimes = dict(data.get("runtimes", {}))
+                self._pins = dict(data.get("pins", {}))
+            except (OSError, ValueError, AttributeError):
+                self._runtimes, self._pins = {}, {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": REGISTRY_VERSION, "runtimes": self._runtimes, "pins": self._pins},
+                          f, ensure_ascii=False, indent=1)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"无法保存 Java 注册表: {e}")
+
+    def _cached(self, real):
+        """缓存中仍然有效的记录（可执行文件未变化），没有时返回None"""
+        entry = self._runtimes.get(real)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(real)
+        except OSError:
+            return None
+        if entry.get("mtime") != stat.st_mtime or entry.get("size") != stat.st_size:
+            return None
+        return entry
+
+    @staticmethod
+    def _runtime(entry):
+        return None if "error" in entry else JavaRuntime(**entry)
+
+    def probe(self, java, save=True):
+        """探测一个 java（已探测且未变化时直接返回缓存）
+
+        Args:
+            java: 命令名或可执行文件路径
+
+        Returns:
+            JavaRuntime: 探测结果，不存在或无法运行时返回None
+        """
+        real = _resolve(java)
+        if real is None:
+            return None
+        with self._lock:
+            self._load()
+            entry = self._cached(real)
+        if entry is not None:
+            return self._runtime(entry)
+        runtime = _probe(real)
+        with self._lock:
+            self._dirty = True
+            if runtime is not None:
+                self._runtimes[real] = asdict(runtime)
+            else:
+                try:
+                    stat = os.stat(real)
+                    self._runtimes[real] = {"error": "probe failed", "mtime": stat.st_mtime, "size": stat.st_size}
+                except OSError:
+                    self._runtimes.pop(real, None)
+            if save:
+                self._save()
+                self._dirty = False
+        return runtime
+
+    def discover(self, refresh=False):
+        """查找并探测所有已安装的 java（首次探测并行进行）
+
+        结果保存在内存中，查找目录、PATH 和已发现的 java 都没有变化时直接返回。
+
+        Args:
+            refresh: 忽略内存中的结果重新查找
+
+        Returns:
+            list: JavaRuntime 列表，最适合的在前
+        """
+        key = _discovery_key()
+        with self._lock:
+            discovered = self._discovered
+        if (not refresh and discovered is not None and discovered[0] == key
+                and all(_unchanged(runtime) for runtime in discovered[1])):
+            return list(discovered[1])
+        candidates = candidate_javas()
+        with ThreadPoolExecutor(max_workers=min(8, max(1, len(candidates)))) as pool:
+            runtimes = [runtime for runtime in pool.map(lambda java: self.probe(java, save=False), candidates)
+                        if runtime is not None]
+        with self._lock:
+            self._load()
+            # 已卸载的运行时不再保留
+            for real in [real for real in self._runtimes if not os.path.exists(real)]:
+                del self._runtimes[real]
+                self._dirty = True
+            if self._dirty:
+                self._save()
+                self._dirty = False
+            runtimes = sorted(runtimes, key=JavaRuntime.rank, reverse=True)
+            self._discovered = (key, tuple(runtimes))
+        return runtimes
+
+    def pins(self):
+        """按操作固定的 java（操作键 -> 路径）"""
+        with self._lock:
+            self._load()
+            return dict(self._pins)
+
+    def pin(self, op, java):
+        """把操作固定到某个 java（ALL_OPS 表示所有操作）
+
+        Raises:
+            ValueError: java 不存在或无法运行
+        """
+        runtime = self.probe(java)
+        if runtime is None:
+            raise ValueError(f"无法运行 {java}")
+        with self._lock:
+            self._pins[op] = runtime.java
+            self._save()
+        return runtime
+
+    def unpin(self, op):
+        """取消固定，返回是否存在"""
+        with self._lock:
+            self._load()
+            found = self._pins.pop(op, None) is not None
+            if found:
+                self._save()
+            return found
+
+    def select(self, op=None):
+        """选择用于该操作的 java
+
+        Args:
+            op: 操作键（OP_MAP 中的值，或 "sign-session"）
+
+        Returns:
+            str: java 可执行文件，没有找到任何运行时时返回 "java"
+        """
+        override = os.environ.get("APKEDITOR_JAVA")
+        if override:
+            return override
+        pins = self.pins()
+        for key in (op, ALL_OPS):
+            pinned = pins.get(key) if key else None
+            if pinned and self.probe(pinned) is not None:
+                return pinned
+        need = OP_MIN_MAJOR.get(op, MIN_JAVA_MAJOR)
+        for runtime in self.discover():
+            if runtime.major >= need:
+                return runtime.java
+        return "java"
+
+
+_default_registry = None
+
+
+def default_registry():
+    """进程内共用的注册表"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = JreRegistry()
+    return _default_registry
+
+
+def select_java(op=None):
+    """用默认注册表为操作选择 java"""
+    return default_registry().select(op)
+
+
+def probe_java(java):
+    """用默认注册表探测一个 java（有缓存）"""
+    return default_registry().probe(java)
+
+
+__all__ = ['JavaRuntime', 'JreRegistry', 'REGISTRY_PATH', 'MIN_JAVA_MAJOR', 'ALL_OPS', 'parse_java_version',
+           'candidate_javas', 'default_registry', 'select_java', 'probe_java']
@@ -0,0 +1,254 @@
+# jvm_worker.py
+"""常驻JVM工作进程模块
+
+只启动一次JVM并加载 APKEditor / apksigner jar，之后的任务通过标准输入下发，
+输出逐行流回调用方，省去每次点击的JVM启动和类加载开销。工作进程不可用时
+run_job 返回 None，由调用方回退到一次性的 java -jar 方式。
+"""
+
+import os
+import base64
+import queue
+import shutil
+import subprocess
+import threading
+import itertools
+import logging
+
+from .constants import CACHE_DIR, JVM_WORKER_MAX_JOBS
+
+logger = logging.getLogger(__name__)
+
+# 工作进程Java源码位置（与lib目录中的其他资源一起打包）
+WORKER_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'JvmWorker.java')
+
+READY_MARK = "\0APKEDITOR-WORKER-READY"
+END_MARK = "\0APKEDITOR-WORKER-END"
+
+# 启动超时（源码模式首次启动需要编译）
+START_TIMEOUT = 60
+
+# 隐藏Windows下的命令行窗口
+if os.name == 'nt':
+    PLATFORM_ARGS = {'creationflags': subprocess.CREATE_NO_WINDOW}
+else:
+    PLATFORM_ARGS = {}
+
+
+def _encode(value):
+    """参数编码为base64，避免制表符和换行破坏协议"""
+    return base64.b64encode(str(value).encode('utf-8')).decode('ascii')
+
+
+def java_source_command(java, source, cache_name):
+    """运行 lib 目录中单文件Java程序的命令
+
+    优先用所选 java 同一JDK中的 javac 编译，否则用 PATH 中的 javac 按该 java 的主版本号
+    （--release）编译；class文件缓存在 CACHE_DIR/<cache_name>-java<主版本号> 并复用（源码更新后
+    重新编译），不同版本的 java 不会加载彼此编译的class。无法编译时使用源码启动模式（需要JDK 11+）。
+
+    Args:
+        java: java可执行文件
+        source: .java 源文件（类名与文件名相同）
+        cache_name: 编译输出目录名
+
+    Returns:
+        list: 启动命令，源文件不存在时返回None
+    """
+    if not os.path.exists(source):
+        return None
+    from .jre_registry import probe_java
+    runtime = probe_java(java)
+    major = runtime.major if runtime is not None else None
+    class_name = os.path.splitext(os.path.basename(source))[0]
+    class_dir = os.path.join(CACHE_DIR, f'{cache_name}-java{major or "unknown"}')
+    class_file = os.path.join(class_dir, f'{class_name}.class')
+
+    stale = (not os.path.exists(class_file)
+             or os.path.getmtime(class_file) < os.path.getmtime(source))
+    javac_cmd = None
+    if runtime is not None and runtime.javac:
+        javac_cmd = [runtime.javac]
+    elif major is not None and major >= 9 and shutil.which("javac"):
+        # 其他JDK的 javac 按所选 java 的版本编译，避免 UnsupportedClassVersionError
+        javac_cmd = [shutil.which("javac"), '--release', str(major)]
+    if stale and javac_cmd:
+        os.makedirs(class_dir, exist_ok=True)
+        result = subprocess.run(javac_cmd + ['-d', class_dir, source],
+                                capture_output=True, text=True, **PLATFORM_ARGS)
+        stale = result.returncode != 0
+        if stale:
+            logger.warning(f"编译{class_name}失败: {result.stderr.strip()}")
+
+    if not stale:
+        return [java, '-cp', class_dir, class_name]
+    return [java, source]
+
+
+class JvmWorker:
+    """常驻JVM工作进程
+
+    Args:
+        java: java可执行文件
+        preload_jars: 启动时预加载的jar列表
+        max_jobs: 执行多少个任务后重启工作进程
+        cwd: 工作进程的工作目录，与此不同的任务会回退到一次性进程
+    """
+
+    def __init__(self, java="java", preload_jars=(), max_jobs=JVM_WORKER_MAX_JOBS, cwd=None):
+        self.java = java
+        self.preload_jars = [os.path.abspath(jar) for jar in preload_jars if jar and os.path.exists(jar)]
+        self.max_jobs = max_jobs
+        self.cwd = os.path.abspath(cwd or os.getcwd())
+        self._proc = None
+        self._lines = None
+        self._jobs_done = 0
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._starting = None  # 正在启动（尚未就绪）的进程，kill() 时一并结束
+
+    def _launch_command(self):
+        """构建工作进程启动命令，优先使用已编译的class文件"""
+        command = java_source_command(self.java, WORKER_SOURCE, 'worker')
+        return command + self.preload_jars if command else None
+
+    def _read_loop(self, proc, lines):
+        """读取工作进程输出的后台线程"""
+        for line in proc.stdout:
+            lines.put(line.rstrip('\r\n'))
+        lines.put(None)
+
+    def start(self):
+        """启动工作进程
+
+        Returns:
+            bool: 是否启动成功
+        """
+        if self.is_alive():
+            return True
+        cmd = self._launch_command()
+        if not cmd:
+            return False
+        try:
+            proc = subprocess.Popen(
+                cmd, cwd=self.cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT, text=True, encoding='utf-8', errors='replace',
+                bufsize=1, **PLATFORM_ARGS
+            )
+        except OSError as e:
+            logger.warning(f"启动常驻JVM失败: {e}")
+            return False
+
+        self._starting = proc
+        lines = queue.Queue()
+        threading.Thread(target=self._read_loop, args=(proc, lines), daemon=True).start()
+        try:
+            while True:
+                line = lines.get(timeout=START_TIMEOUT)
+                if line is None:
+                    logger.warning("常驻JVM启动后立即退出")
+                    return False
+                if line == READY_MARK:
+                    break
+                logger.info(f"[worker] {line}")
+            self._proc = proc
+            self._lines = lines
+            self._jobs_done = 0
+            return True
+        except queue.Empty:
+            logger.warning("常驻JVM启动超时")
+            proc.kill()
+            return False
+        finally:
+            self._starting = None
+
+    def warm(self):
+        """预先启动工作进程（用于预热，阻塞直到就绪）
+
+        已有任务在执行时直接返回；预热期间提交的任务会等待启动完成，不会再启动一个进程。
+
+        Returns:
+            bool: 工作进程是否在运行
+        """
+        if not self._lock.acquire(blocking=False):
+            return self.is_alive()
+        try:
+            return self.start()
+        finally:
+            self._lock.release()
+
+    def is_alive(self):
+        """工作进程是否在运行"""
+        return self._proc is not None and self._proc.poll() is None
+
+    def run_job(self, jar, argv, cwd=None, on_line=None):
+        """在工作进程中执行一个任务（阻塞直到任务结束）
+
+        Args:
+            jar: 要执行的jar路径
+            argv: 传给jar主类的参数列表
+            cwd: 任务工作目录
+            on_line: 每行输出的回调
+
+        Returns:
+            int: 任务退出码；工作进程不可用时返回None，调用方应回退到一次性进程
+        """
+        if cwd and os.path.abspath(cwd) != self.cwd:
+            return None
+        with self._lock:
+            if self._jobs_done >= self.max_jobs:
+                self._shutdown()
+            if not self.start():
+                return None
+
+            job_id = next(self._job_ids)
+            fields = ["RUN", str(job_id), _encode(os.path.abspath(jar))] + [_encode(a) for a in argv]
+            try:
+                self._proc.stdin.write("\t".join(fields) + "\n")
+                self._proc.stdin.flush()
+            except OSError:
+                self._shutdown()
+                return None
+
+            while True:
+                line = self._lines.get()
+                if line is None:
+                    # 任务中调用了System.exit或进程崩溃，以进程退出码作为任务结果
+                    code = self._proc.wait()
+                    self._proc = None
+                    return code
+                if line.startswith(END_MARK):
+                    parts = line.split("\t")
+                    self._jobs_done += 1
+                    return int(parts[2]) if len(parts) > 2 else 0
+                if on_line:
+                    on_line(line)
+
+    def kill(self):
+        """强制结束工作进程（用于停止正在运行的任务或取消预热）"""
+        for proc in (self._proc, self._starting):
+            if proc is not None and proc.poll() is None:
+                proc.kill()
+
+    def _shutdown(self):
+        """结束工作进程"""
+        proc, self._proc = self._proc, None
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            proc.stdin.write("EXIT\n")
+            proc.stdin.flush()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+    def stop(self):
+        """停止工作进程"""
+        if not self._lock.acquire(blocking=False):
+            # 有任务正在执行，直接结束进程让任务返回
+            self.kill()
+            self._lock.acquire()
+        try:
+            self._shutdown()
+        finally:
+            self._lock.release()
@@ -72,32 +72,11 @@ class FileCheck:
         self._detect_apkeditor_version()
     
     def _detect_apkeditor_version(self):
-        """自动检测并使用最新版本的APKEditor"""
-        # 定义可能包含APKEditor的目录
-        potential_dirs = [
-            self.run_dir,
-            os.path.join(self.run_dir, "lib"),
-            os.getcwd()  # 当前工作目录
-        ]
-        
-        # 查找所有可能的APKEditor jar文件
-        found_apkeditor_jars = []
-        for directory in potential_dirs:
-            if not os.path.isdir(directory):
-                continue
-            try:
-                for file in os.listdir(directory):
-                    if file.lower().startswith("apkeditor") and file.lower().endswith(".jar"):
-                        full_path = os.path.join(directory, file)
-                        found_apkeditor_jars.append((full_path, file))
-            except Exception:
-                continue
-        
-        # 如果找到多个APKEditor jar文件，选择版本号最高的一个
-        if found_apkeditor_jars:
-            # 按文件名排序（带版本号的通常排在后面）
-            found_apkeditor_jars.sort(key=lambda x: x[1].lower(), reverse=True)
-            self.APKEditor_Path = found_apkeditor_jars[0][0]
+        """使用工具注册表中版本最新的APKEditor"""
+        from .tool_registry import default_registry
+        jar = default_registry().find("apkeditor")
+        if jar is not None:
+            self.APKEditor_Path = jar.path
     
     def Check_Files(self):
         """检查必要文件是否存在"""
@@ -175,8 +154,15 @@ class PairipHandler(QObject):
         self.C = ANSI()
         self.F = FileCheck(base_dir)
         
-    def process_apk(self, apk_path, use_corex_hook=False, verbose=False):
-        """处理APK文件的主函数"""
+    def process_apk(self, apk_path, use_corex_hook=False, verbose=False, token=None):
+        """处理APK文件的主函数
+
+        Args:
+            apk_path: 输入的 .apks 文件
+            use_corex_hook: 是否应用 CoreX Hook
+            verbose: 是否输出详细信息
+            token: 取消标记（gui_tasks.CancellationToken），取消时在步骤之间停止并结束正在运行的 java
+        """
         try:
             # 检查必要文件
             success, message = self.F.Check_Files()
@@ -188,12 +174,14 @@ class PairipHandler(QObject):
             self.progress_updated.emit(f"{self.C.G} ✔ {message}")
             
             # 创建处理器实例
-            processor = SimpleRKPairip(apk_path, use_corex_hook, self.F, self.C, self.progress_updated)
+            processor = SimpleRKPairip(apk_path, use_corex_hook, self.F, self.C, self.progress_updated, token)
             
             # 运行处理流程
             success = processor.run()
             
-            if success:
+            if token is not None and token.cancelled:
+                self.process_finished.emit(False, "已取消")
+            elif success:
                 self.process_finished.emit(True, f"处理成功！输出文件: {processor.build_dir}")
             else:
                 self.process_finished.emit(False, "处理失败，请查看日志获取详细信息")
@@ -207,8 +195,9 @@ class PairipHandler(QObject):
 
 class SimpleRKPairip:
     """简化版RKPairip实现"""
-    def __init__(self, apk_path, use_corex_hook, file_checker, color_manager, progress_signal):
+    def __init__(self, apk_path, use_corex_hook, file_checker, color_manager, progress_signal, token=None):
         self.apk_path = apk_path
+        self.token = token  # 取消标记
         self.use_corex_hook = use_corex_hook
         self.F = file_checker  # 文件检查器实例
         self.C = color_manager  # 颜色管理器实例
@@ -220,27 +209,40 @@ class SimpleRKPairip:
         self.package_name = ""
         self.is_flutter = False
         self.is_corex = False
+        from .jre_registry import select_java
+        self.java = select_java("pairip")
     
     def log(self, message):
         """输出日志信息"""
         self.progress_signal.emit(message)
     
+    def cancelled(self):
+        """是否已请求取消"""
+        return self.token is not None and self.token.cancelled
+    
+    def _popen(self, cmd):
+        """启动子进程，取消时结束该进程"""
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **PLATFORM_ARGS)
+        if self.token is not None:
+            self.token.add_callback(process.kill)
+        return process
+    
     def check_dependencies(self):
         """检查系统依赖"""
-        try:
-            result = subprocess.run(['java', '-version'], check=True, capture_output=True, text=True, **PLATFORM_ARGS)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # 版本探测结果由 Java 注册表缓存，不必每个任务都启动一次 java -version
+        from .jre_registry import probe_java
+        if probe_java(self.java) is None:
             self.log(f'{self.C.ERROR} Java 未安装。')
             self.log(f'{self.C.INFO} 请安装Java并在新的命令行中再次运行脚本。')
             return False
+        return True
     
     def anti_split(self):
         """合并.apks文件"""
         self.log(f"{self.C.CC}{'_' * 61}")
         self.log(f"{self.C.X} 开始合并拆分APK...")
         
-        cmd = ["java", "-jar", self.F.APKEditor_Path, "m", "-i", self.apk_path, "-f", "-o", self.output_path]
+        cmd = [self.java, "-jar", self.F.APKEditor_Path, "m", "-i", self.apk_path, "-f", "-o", self.output_path]
         
         if self.use_corex_hook:
             cmd += ["-extractNativeLibs", "true"]
@@ -251,7 +253,7 @@ class SimpleRKPairip:
         
         try:
             # 使用subprocess.run并实时输出
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **PLATFORM_ARGS)
+            process = self._popen(cmd)
             
             # 实时读取和输出
             for line in process.stdout:
@@ -280,7 +282,7 @@ class SimpleRKPairip:
         # 提取包名
         try:
             result = subprocess.run(
-                ["java", "-jar", self.F.APKEditor_Path, "info", "-package", "-i", self.output_path],
+                [self.java, "-jar", self.F.APKEditor_Path, "info", "-package", "-i", self.output_path],
                 capture_output=True, text=True, **PLATFORM_ARGS
             )
             self.package_name = result.stdout.strip().split('"')[1]
@@ -304,7 +306,7 @@ class SimpleRKPairip:
         """反编译APK"""
         self.log(f"{self.C.X} 使用APKEditor反编译APK...")
         
-        cmd = ["java", "-jar", self.F.APKEditor_Path, "d", "-i", self.output_path, "-o", self.decompile_dir, "-f", "-no-dex-debug", "-dex-lib", "jf"]
+        cmd = [self.java, "-jar", self.F.APKEditor_Path, "d", "-i", self.output_path, "-o", self.decompile_dir, "-f", "-no-dex-debug", "-dex-lib", "jf"]
         
         self.log(f"{self.C.G}  |")
         self.log(f"  └──── {self.C.CC}反编译命令 ~{self.C.G}$ java -jar {os.path.basename(self.F.APKEditor_Path)} d -i {self.output_path} -o {os.path.basename(self.decompile_dir)} -f -no-dex-debug -dex-lib jf")
@@ -312,7 +314,7 @@ class SimpleRKPairip:
         
         try:
             # 使用subprocess.run并实时输出
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **PLATFORM_ARGS)
+            process = self._popen(cmd)
             
             # 实时读取和输出
             for line in process.stdout:
@@ -594,7 +596,7 @@ class SimpleRKPairip:
         """重新编译APK"""
         self.log(f"{self.C.X} 使用APKEditor重新编译APK...")
         
-        cmd = ["java", "-jar", self.F.APKEditor_Path, "b", "-i", self.decompile_dir, "-o", self.build_dir, "-f", "-dex-lib", "jf"]
+        cmd = [self.java, "-jar", self.F.APKEditor_Path, "b", "-i", self.decompile_dir, "-o", self.build_dir, "-f", "-dex-lib", "jf"]
         
         if self.is_flutter:
             cmd += ["-extractNativeLibs", "true"]
@@ -605,7 +607,7 @@ class SimpleRKPairip:
         
         try:
             # 使用subprocess.run并实时输出
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **PLATFORM_ARGS)
+            process = self._popen(cmd)
             
             # 实时读取和输出
             for line in process.stdout:
@@ -660,6 +662,13 @@ class SimpleRKPairip:
             except:
                 pass
     
+    def _stop_if_cancelled(self):
+        """步骤失败或被取消时结束流程；被取消时清理临时文件"""
+        if self.cancelled():
+            self.log(f"{self.C.WARN} 用户取消操作")
+            self.clean_up()
+        return False
+    
     def run(self):
         """运行主流程"""
         self.log(f"{self.C.X} 简化版RKPairip - 处理.apks文件并应用CoreX Hook {self.C.X}")
@@ -672,16 +681,16 @@ class SimpleRKPairip:
                 return False
             
             # 合并.apks文件
-            if not self.anti_split():
-                return False
+            if self.cancelled() or not self.anti_split():
+                return self._stop_if_cancelled()
             
             # 扫描APK
-            if not self.scan_apk():
-                return False
+            if self.cancelled() or not self.scan_apk():
+                return self._stop_if_cancelled()
             
             # 反编译APK
-            if not self.decompile_apk():
-                return False
+            if self.cancelled() or not self.decompile_apk():
+                return self._stop_if_cancelled()
             
             # 如果使用CoreX Hook
             if self.use_corex_hook:
@@ -692,16 +701,19 @@ class SimpleRKPairip:
                         self.log(f"{self.C.WARN} CoreX Hook失败，继续...")
             
             # 修复AndroidManifest.xml
-            if not self.patch_manifest():
-                return False
+            if self.cancelled() or not self.patch_manifest():
+                return self._stop_if_cancelled()
             
             # 应用Smali补丁
             if not self.smali_patch():
                 self.log(f"{self.C.WARN} Smali补丁应用失败，继续...")
             
             # 重新编译APK
-            if not self.recompile_apk():
-                return False
+            if self.cancelled() or not self.recompile_apk():
+                return self._stop_if_cancelled()
+            
+            if self.cancelled():
+                return self._stop_if_cancelled()
             
             # CRC修复
             self.crc_fix()
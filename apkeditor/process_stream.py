@@ -0,0 +1,63 @@
+# process_stream.py
+"""QProcess输出读取模块
+
+ProcessStreamReader 为一个QProcess的stdout/stderr各维护一个增量解码器，
+把高频的 readyRead 合并起来，按固定间隔一次性发出已组装好的行。
+on_run 启动的进程和批量任务队列中的进程都通过它读取输出。
+"""
+
+from PyQt5.QtCore import QObject, QProcess, QTimer, pyqtSignal
+
+from .stream_decoder import LineAssembler
+
+
+class ProcessStreamReader(QObject):
+    """QProcess输出读取器
+
+    Args:
+        process: 要读取的QProcess
+        interval: 合并发送的间隔（毫秒）
+        parent: 父对象
+    """
+    lines_ready = pyqtSignal(list)  # 一批完整的输出行
+
+    def __init__(self, process, interval=50, parent=None):
+        super().__init__(parent)
+        self.process = process
+        self._assemblers = {
+            QProcess.StandardOutput: LineAssembler(),
+            QProcess.StandardError: LineAssembler(),
+        }
+        self._lines = []
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+        process.readyReadStandardOutput.connect(lambda: self.read_channel(QProcess.StandardOutput))
+        process.readyReadStandardError.connect(lambda: self.read_channel(QProcess.StandardError))
+        process.started.connect(self.reset)
+        process.finished.connect(lambda *args: self.flush(final=True))
+
+    def reset(self):
+        """新进程启动时重置解码状态"""
+        self._assemblers = {channel: LineAssembler() for channel in self._assemblers}
+        self._lines = []
+
+    def read_channel(self, channel):
+        """读取指定通道的可用数据"""
+        if channel == QProcess.StandardOutput:
+            data = self.process.readAllStandardOutput().data()
+        else:
+            data = self.process.readAllStandardError().data()
+        self._lines.extend(self._assemblers[channel].feed(data))
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self, final=False):
+        """发出已组装的行；final为True时同时输出不完整的最后一行"""
+        for assembler in self._assemblers.values():
+            self._lines.extend(assembler.flush(final))
+        if final or not any(a.has_partial for a in self._assemblers.values()):
+            self._timer.stop()
+        if self._lines:
+            lines, self._lines = self._lines, []
+            self.lines_ready.emit(lines)
@@ -0,0 +1,149 @@
+# progress_parser.py
+"""APKEditor 输出进度解析（不依赖Qt）
+
+APKEditor 只输出阶段日志（加载、解码资源、处理dex、写出文件），没有百分比。
+ProgressParser 逐行识别这些阶段，换算为整体进度，并估算吞吐量和剩余时间。
+GUI的进度条和无界面命令行的 --progress 都使用它。
+"""
+
+import re
+import time
+from dataclasses import dataclass
+
+_ANSI_RE = re.compile(r'\033\[[0-9;]*[mK]')
+# 行首的日志标签，例如 "[DECOMPILE] "、"I: "
+_PREFIX_RE = re.compile(r'^(?:\[[A-Z_]+\]\s*|[IWE]:\s*)+')
+# "3/10"、"3 of 10"
+_COUNT_RE = re.compile(r'(\d+)\s*(?:/|of)\s*(\d+)')
+
+# 阶段: (名称, 匹配规则, 整体进度中的起点, 终点)，按匹配优先级排列
+STAGES = [
+    ('done', re.compile(r'Saved to|^Done\b|^Completed\b', re.I), 1.0, 1.0),
+    ('writing', re.compile(r'Writing|Extracting|Saving|Zipping|Building apk|Merging', re.I), 0.90, 0.99),
+    ('dex', re.compile(r'\bdex\b|\.dex|Baksmali|\bSmali', re.I), 0.45, 0.90),
+    ('resources', re.compile(r'Decoding|Encoding|resource|\.arsc|\bres/', re.I), 0.10, 0.45),
+    ('loading', re.compile(r'Loading|Scanning|Initializing|Reading|Decompiling|Building|Searching', re.I), 0.0, 0.10),
+]
+
+# 没有计数的阶段每识别一行前进剩余区间的比例，接近但不会到达阶段终点
+_UNCOUNTED_STEP = 0.08
+# 进度低于该值时不估算剩余时间（样本太少，误差很大）
+_MIN_FRACTION_FOR_ETA = 0.02
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """一次进度更新"""
+    stage: str  # 阶段名，见 STAGES
+    fraction: float  # 整体进度 0~1
+    throughput: float = None  # 当前阶段每秒处理的条目数
+    eta: float = None  # 预计剩余秒数
+    message: str = ""  # 触发本次更新的行
+
+    @property
+    def percent(self):
+        """整数百分比"""
+        return int(self.fraction * 100)
+
+    def describe(self):
+        """简短的进度描述，例如 "dex 45% 12.0/s 剩余 1分05秒" """
+        parts = [self.stage, f"{self.percent}%"]
+        if self.throughput:
+            parts.append(f"{self.throughput:.1f}/s")
+        if self.eta is not None:
+            parts.append(f"剩余 {format_seconds(self.eta)}")
+        return " ".join(parts)
+
+
+def format_seconds(seconds):
+    """秒数格式化为 "1分05秒" / "8秒" """
+    seconds = int(round(seconds))
+    if seconds >= 60:
+        return f"{seconds // 60}分{seconds % 60:02d}秒"
+    return f"{seconds}秒"
+
+
+class ProgressParser:
+    """逐行解析APKEditor输出并产生进度事件
+
+    Args:
+        clock: 时间函数，默认 time.monotonic
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """开始新任务时重置状态"""
+        self.stage = None
+        self.fraction = 0.0
+        self._started = None
+        self._stage_started = None
+        self._stage_items = 0
+        self._stage_fraction = 0.0
+        self.last_event = None
+
+    def feed(self, line):
+        """输入一行输出
+
+        Returns:
+            ProgressEvent: 识别到阶段时返回进度事件，否则返回None
+        """
+        if '\033' in line:
+            line = _ANSI_RE.sub('', line)
+        text = _PREFIX_RE.sub('', line.strip())
+        if not text:
+            return None
+        for name, pattern, start, end in STAGES:
+            if pattern.search(text):
+                break
+        else:
+            return None
+
+        now = self.clock()
+        if self._started is None:
+            self._started = now
+        if name != self.stage:
+            # 阶段只前进不后退，后面阶段的日志中偶尔出现前面阶段的关键字
+            if self.stage is not None and start < self._stage_start():
+                name, start, end = self.stage, self._stage_start(), self._stage_end()
+            else:
+                self.stage = name
+                self._stage_started = now
+                self._stage_items = 0
+                self._stage_fraction = 0.0
+
+        # 阶段内进度：有 N/M 计数时按计数，否则逐行逼近
+        count = _COUNT_RE.search(text)
+        if count and int(count.group(2)) > 0:
+            done, total = int(count.group(1)), int(count.group(2))
+            self._stage_items = done
+            self._stage_fraction = max(self._stage_fraction, min(done / total, 1.0))
+        else:
+            self._stage_items += 1
+            self._stage_fraction += (1.0 - self._stage_fraction) * _UNCOUNTED_STEP
+        self.fraction = max(self.fraction, start + (end - start) * self._stage_fraction)
+        if name == 'done':
+            self.fraction = 1.0
+
+        elapsed = now - self._started
+        stage_elapsed = now - self._stage_started
+        throughput = self._stage_items / stage_elapsed if stage_elapsed > 0 else None
+        eta = None
+        if self.fraction >= 1.0:
+            eta = 0.0
+        elif self.fraction >= _MIN_FRACTION_FOR_ETA and elapsed > 0:
+            eta = elapsed * (1.0 - self.fraction) / self.fraction
+
+        self.last_event = ProgressEvent(name, self.fraction, throughput, eta, text)
+        return self.last_event
+
+    def _stage_start(self):
+        return next(start for name, _, start, _ in STAGES if name == self.stage)
+
+    def _stage_end(self):
+        return next(end for name, _, _, end in STAGES if name == self.stage)
+
+
+__all__ = ['ProgressEvent', 'ProgressParser', 'STAGES', 'format_seconds']
@@ -0,0 +1,328 @@
+# scheduler.py
+"""按内存调度并发的 JVM 任务
+
+每个JVM默认按物理内存的1/4取最大堆，同时运行多个反编译/构建时，进程的堆加起来
+远超物理内存，任务会被系统结束。调度器按输入大小（zip未压缩总大小、dex数量）和
+操作类型估算每个任务需要的堆，用 -Xmx 固定下来，只在可用内存足够时放行任务，
+其余任务按优先级排队；因内存不足失败的任务加大堆后重试。
+有同类任务的堆配置档案（gc_telemetry）时，优先使用档案中按实测峰值推荐的堆。
+"""
+
+import os
+import sys
+import heapq
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+
+from .constants import MEMORY_RESERVE_MB
+from .zip_rewrite import ZipSource, ZipRewriteError
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# 最小堆和堆大小的取整单位（MB）
+MIN_HEAP_MB = 256
+HEAP_STEP_MB = 64
+
+# 堆之外的JVM开销：元空间、代码缓存、线程栈等（MB，另加堆的10%）
+JVM_OVERHEAD_MB = 128
+
+# 内存不足时最多尝试的次数（含第一次）
+MAX_ATTEMPTS = 3
+
+# 操作 -> (基础堆MB, 每MB未压缩数据需要的堆MB, 每个dex需要的堆MB)
+OP_MEMORY = {
+    "d": (384, 1.5, 48),
+    "b": (384, 1.2, 64),
+    "m": (256, 1.0, 0),
+    "x": (256, 1.0, 16),
+    "p": (256, 1.0, 16),
+    "info": (192, 0.25, 0),
+    "sign": (192, 0.05, 0),
+}
+
+OOM_MARKERS = ("java.lang.OutOfMemoryError", "GC overhead limit exceeded")
+# 被 SIGKILL 结束（Linux 的 OOM killer）
+OOM_EXIT_CODES = (137, -9)
+
+
+def _meminfo():
+    """Linux：读取 /proc/meminfo（MB）"""
+    values = {}
+    with open("/proc/meminfo") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            values[name] = int(rest.split()[0]) // 1024
+    return values
+
+
+def _windows_memory():
+    """Windows：GlobalMemoryStatusEx，返回 (总内存MB, 可用内存MB)"""
+    import ctypes
+
+    class MemoryStatus(ctypes.Structure):
+        _fields_ = [("length", ctypes.c_ulong), ("load", ctypes.c_ulong),
+                    ("total_phys", ctypes.c_ulonglong), ("avail_phys", ctypes.c_ulonglong),
+                    ("total_page", ctypes.c_ulonglong), ("avail_page", ctypes.c_ulonglong),
+                    ("total_virtual", ctypes.c_ulonglong), ("avail_virtual", ctypes.c_ulonglong),
+                    ("avail_extended", ctypes.c_ulonglong)]
+
+    status = MemoryStatus()
+    status.length = ctypes.sizeof(MemoryStatus)
+    if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+        raise OSError("GlobalMemoryStatusEx 失败")
+    return status.total_phys // MB, status.avail_phys // MB
+
+
+def memory_status():
+    """物理内存状态
+
+    Returns:
+        tuple: (总内存MB, 可用内存MB)，无法获取时为 (None, None)
+    """
+    try:
+        if sys.platform.startswith("linux"):
+            info = _meminfo()
+            return info["MemTotal"], info.get("MemAvailable", info["MemFree"])
+        if os.name == "nt":
+            return _windows_memory()
+        page = os.sysconf("SC_PAGE_SIZE")
+        total = os.sysconf("SC_PHYS_PAGES") * page // MB
+        # macOS 没有 SC_AVPHYS_PAGES，按总内存的一半估计
+        if "SC_AVPHYS_PAGES" not in os.sysconf_names:
+            return total, total // 2
+        return total, os.sysconf("SC_AVPHYS_PAGES") * page // MB
+    except (OSError, ValueError, KeyError, AttributeError) as e:
+        logger.debug(f"无法获取内存状态: {e}")
+        return None, None
+
+
+# zip 输入的统计按 (路径, 大小, 修改时间) 缓存，预热时读取的中央目录在运行时直接复用
+_stats_memo = {}
+_stats_lock = threading.Lock()
+
+
+def input_stats(path):
+    """输入的未压缩总大小和dex数量
+
+    zip类输入（apk/apks/xapk）只读取中央目录（按文件大小和修改时间缓存）；目录输入（构建操作）统计其中的文件。
+
+    Returns:
+        tuple: (未压缩字节数, dex数量)
+    """
+    if os.path.isdir(path):
+        total = dex = 0
+        for root, dirs, files in os.walk(path):
+            # 反编译目录中每个 smali/classesN 对应一个dex
+            if os.path.basename(root) == "smali":
+                dex += sum(1 for name in dirs if name.startswith("classes"))
+            for name in files:
+                dex += name.endswith(".dex")
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total, dex
+    try:
+        st = os.stat(path)
+        memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        with _stats_lock:
+            if memo_key in _stats_memo:
+                return _stats_memo[memo_key]
+        with ZipSource(path) as source:
+            total = sum(entry.usize for entry in source)
+            dex = sum(1 for entry in source if entry.name.endswith(".dex"))
+        with _stats_lock:
+            _stats_memo[memo_key] = (total, dex)
+        return total, dex
+    except (OSError, ValueError, ZipRewriteError):
+        try:
+            return os.path.getsize(path), 0
+        except OSError:
+            return 0, 0
+
+
+def _round_heap(heap_mb):
+    return -(-int(heap_mb) // HEAP_STEP_MB) * HEAP_STEP_MB
+
+
+def estimate_heap_mb(op, input_path, profile=None):
+    """估算任务需要的最大堆（MB）
+
+    Args:
+        op: 操作键
+        input_path: 输入路径
+        profile: HeapProfile，档案中有同类任务时使用其推荐值
+    """
+    if profile is not None:
+        recommended = profile.recommend(op, input_path)
+        if recommended:
+            return recommended
+    base, per_mb, per_dex = OP_MEMORY.get(op, OP_MEMORY["d"])
+    total, dex = input_stats(input_path)
+    return max(MIN_HEAP_MB, _round_heap(base + per_mb * total / MB + per_dex * dex))
+
+
+def process_memory_mb(heap_mb):
+    """堆为 heap_mb 的JVM进程最多占用的内存（MB）"""
+    return int(heap_mb * 1.1) + JVM_OVERHEAD_MB
+
+
+def with_heap(args, heap_mb):
+    """在 java 参数前加上 -Xmx（替换已有的 -Xmx）"""
+    return [f"-Xmx{heap_mb}m"] + [arg for arg in args if not arg.startswith("-Xmx")]
+
+
+def is_out_of_memory(exit_code, lines=(), killed=False):
+    """任务是否因内存不足失败
+
+    Args:
+        exit_code: 退出码
+        lines: 任务输出行
+        killed: 进程是否被信号结束（QProcess.CrashExit，此时 exit_code 是结束进程的信号）
+    """
+    if exit_code == 0:
+        return False
+    if killed:
+        # 只有 SIGKILL（OOM killer）算内存不足，其他崩溃按普通失败处理
+        exit_code = -exit_code
+    if exit_code in OOM_EXIT_CODES:
+        return True
+    return any(marker in line for line in lines for marker in OOM_MARKERS)
+
+
+class MemoryScheduler:
+    """按内存预算放行JVM任务
+
+    预算为创建时的可用内存减去保留内存。任务按 (优先级, 提交顺序) 排队，只有队首任务
+    能被放行，避免小任务不断插队使大任务饿死；没有任务运行时队首任务总会被放行，
+    即使估算超过预算（此时堆被限制为 max_heap_mb）。
+
+    Args:
+        budget_mb: 内存预算（MB），默认按可用内存计算
+        reserve_mb: 给系统和其他程序保留的内存（MB）
+        profile: HeapProfile，用于估算堆，None表示只按输入大小估算
+    """
+
+    # 排队任务每隔多久重新检查一次系统内存（秒）
+    POLL_INTERVAL = 2.0
+
+    def __init__(self, budget_mb=None, reserve_mb=MEMORY_RESERVE_MB, profile=None):
+        _, available = memory_status()
+        self.reserve_mb = reserve_mb
+        self.profile = profile
+        if budget_mb is None:
+            if available is None:
+                budget_mb = 4096
+            else:
+                budget_mb = max(process_memory_mb(MIN_HEAP_MB), available - reserve_mb)
+        self.budget_mb = budget_mb
+        # 单个任务最多可用整个预算
+        self.max_heap_mb = max(MIN_HEAP_MB, (int((budget_mb - JVM_OVERHEAD_MB) / 1.1) // HEAP_STEP_MB)
+                               * HEAP_STEP_MB)
+        self.used_mb = 0
+        self.running = 0
+        self._waiting = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def clamp_heap(self, heap_mb):
+        """限制在 [MIN_HEAP_MB, max_heap_mb] 内"""
+        return max(MIN_HEAP_MB, min(heap_mb, self.max_heap_mb))
+
+    def estimate_heap_mb(self, op, input_path):
+        """估算任务的堆并限制在可分配范围内"""
+        return self.clamp_heap(estimate_heap_mb(op, input_path, self.profile))
+
+    def next_heap_mb(self, heap_mb):
+        """内存不足重试时的堆大小，已达上限时返回None"""
+        if heap_mb >= self.max_heap_mb:
+            return None
+        return self.clamp_heap(_round_heap(heap_mb * 2))
+
+    def _fits(self, need_mb):
+        """need_mb 能否在当前预算和系统可用内存内运行"""
+        if self.running == 0:
+            return True
+        if self.used_mb + need_mb > self.budget_mb:
+            return False
+        # 其他程序占用了内存时暂停放行
+        _, available = memory_status()
+        return available is None or available >= self.reserve_mb
+
+    def try_acquire(self, need_mb, priority=0):
+        """不阻塞地尝试放行（用于事件驱动的调用方）
+
+        Returns:
+            bool: 是否已占用 need_mb
+        """
+        with self._cond:
+            if (self._waiting and self._waiting[0][0] < priority) or not self._fits(need_mb):
+                return False
+            self.used_mb += need_mb
+            self.running += 1
+            return True
+
+    def acquire(self, need_mb, priority=0):
+        """排队直到放行（数值越小优先级越高）"""
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            while self._waiting[0] != ticket or not self._fits(need_mb):
+                self._cond.wait(self.POLL_INTERVAL)
+            heapq.heappop(self._waiting)
+            self.used_mb += need_mb
+            self.running += 1
+            self._cond.notify_all()
+
+    def release(self, need_mb):
+        """任务结束，归还占用的内存"""
+        with self._cond:
+            self.used_mb -= need_mb
+            self.running -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, need_mb, priority=0):
+        """在 with 块内占用 need_mb"""
+        self.acquire(need_mb, priority)
+        try:
+            yield
+        finally:
+            self.release(need_mb)
+
+    def run(self, op, input_path, attempt, priority=0, log=None):
+        """按估算的堆运行任务，因内存不足失败时加大堆重试
+
+        Args:
+            op: 操作键
+            input_path: 输入路径
+            attempt: 以堆大小（MB）调用，返回 (退出码, 输出行)
+            priority: 优先级，数值越小越先运行
+            log: 输出调度信息的回调
+
+        Returns:
+            tuple: 最后一次的 (退出码, 输出行)
+        """
+        log = log or logger.info
+        heap_mb = self.estimate_heap_mb(op, input_path)
+        for number in range(1, MAX_ATTEMPTS + 1):
+            with self.slot(process_memory_mb(heap_mb), priority):
+                code, lines = attempt(heap_mb)
+            if not is_out_of_memory(code, lines):
+                return code, lines
+            next_heap = self.next_heap_mb(heap_mb)
+            if next_heap is None or number == MAX_ATTEMPTS:
+                log(f"[内存] 堆 {heap_mb} MB 仍内存不足，放弃重试")
+                return code, lines
+            log(f"[内存] 堆 {heap_mb} MB 内存不足，使用 {next_heap} MB 重试")
+            heap_mb = next_heap
+            # 重试的任务优先于排队中的新任务
+            priority = min(priority, 0) - 1
+
+
+__all__ = ['MemoryScheduler', 'memory_status', 'input_stats', 'estimate_heap_mb', 'process_memory_mb',
+           'with_heap', 'is_out_of_memory', 'MIN_HEAP_MB', 'MAX_ATTEMPTS']
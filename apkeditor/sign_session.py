@@ -0,0 +1,298 @@
+# sign_session.py
+"""批量签名会话
+
+每次调用 apksigner 都要启动JVM并重新读取、解密密钥库。签名会话只启动一个
+lib/SignService.java 进程：密钥在启动时解锁一次并保存在该进程内存中，之后的APK
+通过标准输入下发、在JVM内并发签名，每个文件完成时立即返回结果。
+
+密码只通过标准输入传给签名进程一次，不写入 key.ini，也不出现在命令行中。
+"""
+
+import os
+import time
+import base64
+import queue
+import logging
+import itertools
+import threading
+import subprocess
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from .command_model import uses_builtin_v4
+from .jvm_worker import java_source_command
+
+logger = logging.getLogger(__name__)
+
+SIGN_SERVICE_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib',
+                                   'SignService.java')
+
+READY_MARK = "\0APKEDITOR-SIGN-READY"
+FAILED_MARK = "\0APKEDITOR-SIGN-FAILED"
+END_MARK = "\0APKEDITOR-SIGN-END"
+
+# 启动超时（源码模式首次启动需要编译）
+START_TIMEOUT = 60
+
+# 隐藏Windows下的命令行窗口
+if os.name == 'nt':
+    PLATFORM_ARGS = {'creationflags': subprocess.CREATE_NO_WINDOW}
+else:
+    PLATFORM_ARGS = {}
+
+
+class SignSessionError(Exception):
+    """签名会话无法启动或已结束"""
+
+
+@dataclass(frozen=True)
+class SignResult:
+    """单个APK的签名结果"""
+    input_path: str
+    output_path: str
+    exit_code: int
+    message: str = ""
+    seconds: float = 0.0
+
+    @property
+    def ok(self):
+        return self.exit_code == 0
+
+
+def _encode(value):
+    """编码为base64，避免制表符和换行破坏协议"""
+    return base64.b64encode(value if isinstance(value, bytes) else str(value).encode('utf-8')).decode('ascii')
+
+
+def _decode(value):
+    return base64.b64decode(value).decode('utf-8', errors='replace')
+
+
+def _pump(stream, lines):
+    """把进程输出逐行放入队列，结束时放入None"""
+    for line in stream:
+        lines.put(line.rstrip('\r\n'))
+    lines.put(None)
+
+
+def key_params(options):
+    """签名进程的密钥参数块（每行 名称=base64值，以空行结束）
+
+    Args:
+        options: CommandOptions（密钥库或私钥参数）
+
+    Returns:
+        str: 写入签名进程标准输入的文本
+    """
+    if options.use_keystore:
+        params = {"keystore": options.keystore_path.strip(), "alias": options.keystore_alias.strip(),
+                  "ks_pass": options.keystore_password.strip()}
+    else:
+        params = {"key": options.private_key_path.strip(), "key_pass": options.private_key_password.strip(),
+                  "cert": options.public_key_path.strip()}
+    return ''.join(f"{name}={_encode(value)}\n" for name, value in params.items() if value) + "\n"
+
+
+def signing_schemes(options):
+    """会话中由 apksig 完成的签名版本（内置V4后端时 v4 另外生成）"""
+    versions = [(1, options.v1), (2, options.v2), (3, options.v3), (4, options.v4 and not uses_builtin_v4(options))]
+    return ",".join(f"v{version}" for version, enabled in versions if enabled)
+
+
+class SignSession:
+    """签名会话：一个常驻签名进程，密钥只解锁一次
+
+    Args:
+        options: CommandOptions（密钥、签名版本和V4后端）
+        java: java可执行文件
+        apksigner_jar: apksigner.jar路径（提供 apksig 签名库）
+        threads: 签名进程中的并发数，默认CPU核心数
+    """
+
+    def __init__(self, options, java="java", apksigner_jar=None, threads=None):
+        self.options = options
+        self.java = java
+        self.apksigner_jar = apksigner_jar
+        self.threads = threads or os.cpu_count() or 1
+        self.signer = ""  # 证书主题，启动后可用
+        self._proc = None
+        self._pending = {}
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        """启动签名进程并解锁密钥
+
+        Raises:
+            SignSessionError: 无法启动，或密钥/密码错误
+        """
+        if self._proc is not None:
+            return
+        if not self.apksigner_jar or not os.path.exists(self.apksigner_jar):
+            raise SignSessionError("找不到 apksigner.jar")
+        command = java_source_command(self.java, SIGN_SERVICE_SOURCE, 'signservice')
+        if command is None:
+            raise SignSessionError(f"找不到 {SIGN_SERVICE_SOURCE}")
+        try:
+            proc = subprocess.Popen(
+                command + [os.path.abspath(self.apksigner_jar), str(self.threads)],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, encoding='utf-8', errors='replace', bufsize=1, **PLATFORM_ARGS
+            )
+            proc.stdin.write(key_params(self.options))
+            proc.stdin.flush()
+        except OSError as e:
+            raise SignSessionError(f"无法启动 java 进程: {e}")
+
+        lines = queue.Queue()
+        threading.Thread(target=_pump, args=(proc.stdout, lines), daemon=True).start()
+        try:
+            while True:
+                line = lines.get(timeout=START_TIMEOUT)
+                if line is None:
+                    raise SignSessionError(f"签名进程启动后立即退出（退出码 {proc.wait()}）")
+                if line.startswith(FAILED_MARK):
+                    proc.wait()
+                    raise SignSessionError(_decode(line.split("\t")[1]))
+                if line.startswith(READY_MARK):
+                    self.signer = _decode(line.split("\t")[1])
+                    break
+                logger.info(f"[sign] {line}")
+        except queue.Empty:
+            proc.kill()
+            raise SignSessionError("签名进程启动超时")
+
+        self._proc = proc
+        threading.Thread(target=self._read_loop, args=(proc, lines), daemon=True).start()
+
+    def _read_loop(self, proc, lines):
+        """分发签名进程的结果行"""
+        while (line := lines.get()) is not None:
+            if not line.startswith(END_MARK):
+                logger.info(f"[sign] {line}")
+                continue
+            _, job_id, code, payload = line.split("\t")
+            with self._lock:
+                future = self._pending.pop(job_id, None)
+            if future is not None:
+                future.set_result((int(code), payload))
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(SignSessionError(f"签名进程已退出（退出码 {proc.wait()}）"))
+
+    def _request(self, command, *fields):
+        """下发一条命令并等待结果
+
+        Returns:
+            tuple: (退出码, base64结果)
+        """
+        future = Future()
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                raise SignSessionError("签名会话未启动或已结束")
+            job_id = str(next(self._job_ids))
+            self._pending[job_id] = future
+            try:
+                self._proc.stdin.write("\t".join([command, job_id] + [_encode(f) for f in fields]) + "\n")
+                self._proc.stdin.flush()
+            except OSError as e:
+                self._pending.pop(job_id, None)
+                raise SignSessionError(f"签名进程已退出: {e}")
+        return future.result()
+
+    def sign_data(self, data, algorithm):
+        """用会话中的密钥签名一段数据（供内置V4签名使用）
+
+        Args:
+            data: 待签名数据
+            algorithm: 签名算法ID（v2/v3 签名块中的ID）
+
+        Returns:
+            bytes: 签名
+        """
+        from .v4_signer import V4SignError, JAVA_ALGORITHMS
+        try:
+            code, payload = self._request("DATA", JAVA_ALGORITHMS[algorithm], data)
+        except SignSessionError as e:
+            raise V4SignError(str(e))
+        if code != 0:
+            raise V4SignError(_decode(payload))
+        return base64.b64decode(base64.b64decode(payload))
+
+    def sign(self, input_path, output_path=None):
+        """签名一个APK（可在多个线程中同时调用）
+
+        Args:
+            input_path: 输入APK
+            output_path: 输出APK，默认原地签名
+
+        Returns:
+            SignResult: 签名结果
+        """
+        output_path = output_path or input_path
+        started = time.monotonic()
+        try:
+            code, payload = self._request("SIGN", os.path.abspath(input_path), os.path.abspath(output_path),
+                                          signing_schemes(self.options))
+            message = _decode(payload)
+            if code == 0 and uses_builtin_v4(self.options):
+                from .v4_signer import V4SignError, write_idsig
+                try:
+                    write_idsig(output_path, self.sign_data)
+                except (OSError, V4SignError) as e:
+                    code, message = 1, f"V4签名失败: {e}"
+        except SignSessionError as e:
+            code, message = 1, str(e)
+        return SignResult(input_path, output_path, code, message, time.monotonic() - started)
+
+    def sign_all(self, inputs, output_dir=None, on_result=None):
+        """并发签名多个APK，每个文件完成时回调
+
+        Args:
+            inputs: 输入APK列表
+            output_dir: 输出目录，默认原地签名
+            on_result: 每个文件完成时以 SignResult 调用
+
+        Returns:
+            list: 与 inputs 顺序相同的 SignResult 列表
+        """
+        def output_for(path):
+            return os.path.join(output_dir, os.path.basename(path)) if output_dir else None
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            futures = {pool.submit(self.sign, path, output_for(path)): path for path in inputs}
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                if on_result:
+                    on_result(result)
+        return [results[path] for path in inputs]
+
+    def kill(self):
+        """强制结束签名进程（正在签名的文件返回失败）"""
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.kill()
+
+    def close(self):
+        """结束签名进程，等待已下发的任务完成"""
+        proc, self._proc = self._proc, None
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            proc.stdin.write("EXIT\n")
+            proc.stdin.flush()
+            proc.wait(timeout=60)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+
+__all__ = ['SignSessionError', 'SignResult', 'SignSession', 'SIGN_SERVICE_SOURCE', 'key_params', 'signing_schemes']
@@ -0,0 +1,231 @@
+# split_merge.py
+"""拆分包（.apks/.xapk/.apkm/目录）的流式合并
+
+常见的拆分包只有一个基础APK和若干配置拆分（config.arm64_v8a、config.xxhdpi、config.zh 等）。
+这些拆分除清单和资源表外只包含 lib/、res/、assets/ 下的文件，直接拼到一个zip里即可。
+这里按原始压缩字节复制各拆分中的条目（不解压、不重新压缩），只把由清单和资源表组成的
+“骨架”拆分包交给 APKEditor 合并，再把合并出的清单和资源表写入输出。
+含功能拆分（带dex）等其他情况抛出 SplitMergeUnsupported，由调用方回退到完整的 APKEditor 合并。
+"""
+
+import os
+import shutil
+import struct
+import zipfile
+import tempfile
+import subprocess
+import logging
+
+from .axml import AxmlParser, AxmlError
+from .zip_rewrite import ZipSource, ZipRewriter, ZipRewriteError, STORED, is_signature_file
+from .zipalign import aligner
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "AndroidManifest.xml"
+RESOURCES_NAME = "resources.arsc"
+
+# 隐藏Windows下的命令行窗口
+if os.name == 'nt':
+    PLATFORM_ARGS = {'creationflags': subprocess.CREATE_NO_WINDOW}
+else:
+    PLATFORM_ARGS = {}
+
+_COPY_CHUNK = 1024 * 1024
+# 骨架合并进程运行期间检查取消的间隔（秒）
+_CANCEL_POLL = 0.2
+
+
+class SplitMergeError(Exception):
+    """合并失败"""
+
+
+class SplitMergeUnsupported(SplitMergeError):
+    """不是基础APK+配置拆分的简单情况，需要完整的 APKEditor 合并"""
+
+
+class SplitMergeCancelled(Exception):
+    """合并被用户取消"""
+
+
+class _Split:
+    """拆分包中的一个APK"""
+
+    def __init__(self, name, f):
+        self.name = name
+        self.source = ZipSource(f)
+        self.split_name = self._read_split_name()
+
+    def _read_split_name(self):
+        if MANIFEST_NAME not in self.source:
+            raise SplitMergeUnsupported(f"{self.name} 中没有 {MANIFEST_NAME}")
+        try:
+            element = next(AxmlParser(self.source.read(MANIFEST_NAME)).iter_elements())
+        except (AxmlError, ZipRewriteError, StopIteration, struct.error, IndexError) as e:
+            raise SplitMergeUnsupported(f"无法解析 {self.name} 的清单: {e}")
+        return element.attrs.get("split", "") or ""
+
+    @property
+    def is_config(self):
+        return self.split_name.startswith("config.")
+
+
+def _open_splits(path, stack, temp_dir):
+    """打开输入中的所有APK
+
+    外层zip中未压缩存储的APK直接按区域读取，压缩存储的先流式解压到临时目录。
+
+    Returns:
+        list: _Split 列表
+    """
+    if os.path.isdir(path):
+        names = sorted(name for name in os.listdir(path) if name.lower().endswith('.apk'))
+        return [_Split(name, stack.enter_context(open(os.path.join(path, name), 'rb'))) for name in names]
+
+    outer = stack.enter_context(ZipSource(path))
+    splits = []
+    for entry in outer:
+        if not entry.name.lower().endswith('.apk') or entry.is_dir:
+            continue
+        if entry.method == STORED:
+            f = outer.window(entry)
+        else:
+            extracted = os.path.join(temp_dir, f"{len(splits)}.apk")
+            with zipfile.ZipFile(path) as zf, zf.open(entry.name) as src, open(extracted, 'wb') as dst:
+                shutil.copyfileobj(src, dst, _COPY_CHUNK)
+            f = stack.enter_context(open(extracted, 'rb'))
+        splits.append(_Split(os.path.basename(entry.name), f))
+    return splits
+
+
+def _merge_skeleton(splits, temp_dir, java, jar, log, is_cancelled=None):
+    """把只含清单和资源表的骨架拆分包交给 APKEditor 合并
+
+    取消时结束 java 进程并抛出 SplitMergeCancelled。
+
+    Returns:
+        tuple: (清单数据, 资源表数据或None)
+    """
+    skeleton_dir = os.path.join(temp_dir, "skeleton")
+    os.makedirs(skeleton_dir)
+    for split in splits:
+        with ZipRewriter(os.path.join(skeleton_dir, split.name)) as out:
+            for name in (MANIFEST_NAME, RESOURCES_NAME):
+                if name in split.source:
+                    out.copy(split.source, split.source.get(name))
+
+    merged = os.path.join(temp_dir, "skeleton_merged.apk")
+    cmd = [java, '-jar', jar, 'm', '-i', skeleton_dir, '-o', merged]
+    log(f"合并清单和资源表: {' '.join(cmd)}")
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   text=True, encoding='utf-8', errors='replace', **PLATFORM_ARGS)
+    except OSError as e:
+        raise SplitMergeError(f"无法启动 java 进程: {e}")
+    while True:
+        try:
+            output, _ = process.communicate(timeout=_CANCEL_POLL)
+            break
+        except subprocess.TimeoutExpired:
+            if is_cancelled is not None and is_cancelled():
+                process.kill()
+                process.wait()
+                process.stdout.close()
+                raise SplitMergeCancelled()
+    if process.returncode != 0 or not os.path.exists(merged):
+        # 只在失败时输出 jar 的日志（成功时其中的 "Saved to" 会被误认为整个合并已完成）
+        for line in output.splitlines():
+            log(line)
+        raise SplitMergeError(f"APKEditor 合并骨架失败，退出码 {process.returncode}")
+
+    with ZipSource(merged) as zf:
+        manifest = zf.read(MANIFEST_NAME)
+        resources = zf.read(RESOURCES_NAME) if RESOURCES_NAME in zf else None
+    return manifest, resources
+
+
+def default_output(input_path):
+    """与 APKEditor 相同的默认输出路径"""
+    return os.path.splitext(os.path.abspath(input_path.rstrip('/\\')))[0] + "_merged.apk"
+
+
+def merge_bundle(input_path, output_path=None, java="java", jar=None, log=None, is_cancelled=None):
+    """合并基础APK和配置拆分
+
+    Args:
+        input_path: .apks/.xapk/.apkm 文件或包含拆分APK的目录
+        output_path: 输出APK路径，默认为 <输入>_merged.apk
+        java: java可执行文件
+        jar: APKEditor jar路径
+        log: 输出日志行的回调，默认写入logging
+        is_cancelled: 返回True时中止合并的回调
+
+    Returns:
+        str: 输出APK路径
+
+    Raises:
+        SplitMergeUnsupported: 需要完整的 APKEditor 合并
+        SplitMergeError: 合并失败
+        SplitMergeCancelled: 合并被取消
+    """
+    from contextlib import ExitStack
+
+    log = log or logger.info
+    output_path = output_path or default_output(input_path)
+    with ExitStack() as stack:
+        temp_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="apkeditor-merge-"))
+        try:
+            splits = _open_splits(input_path, stack, temp_dir)
+        except (OSError, zipfile.BadZipFile, ZipRewriteError) as e:
+            raise SplitMergeUnsupported(f"无法读取输入: {e}")
+
+        base = [split for split in splits if not split.split_name]
+        others = [split for split in splits if split.split_name]
+        if len(base) != 1:
+            raise SplitMergeUnsupported(f"需要恰好一个基础APK，找到 {len(base)} 个")
+        if not others:
+            raise SplitMergeUnsupported("没有拆分APK")
+        features = [split.name for split in others if not split.is_config]
+        if features:
+            raise SplitMergeUnsupported(f"包含功能拆分: {', '.join(features)}")
+        splits = base + others
+        log(f"基础APK: {base[0].name}，配置拆分: {', '.join(split.name for split in others)}")
+
+        try:
+            manifest, resources = _merge_skeleton(splits, temp_dir, java, jar, log, is_cancelled)
+        except (OSError, ZipRewriteError) as e:
+            raise SplitMergeError(f"读取合并后的清单失败: {e}")
+
+        total = sum(len(split.source.entries) for split in splits)
+        done = 0
+        # 写出时直接对齐，签名前不需要再重写一遍
+        try:
+            out = ZipRewriter(output_path, align=aligner())
+        except (OSError, ZipRewriteError) as e:
+            raise SplitMergeError(f"无法创建输出文件: {e}")
+        try:
+            out.write(MANIFEST_NAME, manifest)
+            if resources is not None:
+                # Android 11 起要求资源表不压缩存储
+                out.write(RESOURCES_NAME, resources, compress=False)
+            for split in splits:
+                log(f"Writing {done}/{total} {split.name}")
+                for entry in split.source:
+                    if is_cancelled is not None and is_cancelled():
+                        raise SplitMergeCancelled()
+                    done += 1
+                    if entry.name in out or entry.is_dir or is_signature_file(entry.name):
+                        continue
+                    out.copy(split.source, entry)
+            out.close()
+        except (OSError, ZipRewriteError) as e:
+            out.abort()
+            raise SplitMergeError(str(e))
+        except BaseException:
+            out.abort()
+            raise
+    log(f"Saved to: {output_path}")
+    return output_path
+
+
+__all__ = ['SplitMergeError', 'SplitMergeUnsupported', 'SplitMergeCancelled', 'merge_bundle', 'default_output']
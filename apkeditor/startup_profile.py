@@ -0,0 +1,151 @@
+# startup_profile.py
+"""启动耗时分析（--profile-startup）
+
+记录每个模块的导入耗时（含子模块的累计耗时和扣除子模块后的自身耗时），
+以及创建应用、创建主窗口、首次绘制等关键节点的时间，便于跟踪冷启动开销。
+"""
+
+import sys
+import json
+import time
+import logging
+import importlib.abc
+
+logger = logging.getLogger(__name__)
+
+# 计时起点：apkeditor_main 在导入PyQt5之前导入本模块
+_T0 = time.perf_counter()
+
+
+class _TimedLoader:
+    """包装原始加载器，统计 exec_module 耗时"""
+
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        profiler = self._profiler
+        profiler._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = profiler._stack.pop()
+            if profiler._stack:
+                profiler._stack[-1] += elapsed
+            profiler.imports.append((self._name, elapsed, elapsed - children))
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _TimedFinder(importlib.abc.MetaPathFinder):
+    """查找模块时替换为计时加载器"""
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self._profiler, fullname)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    """启动耗时分析器"""
+
+    def __init__(self):
+        self.imports = []  # (模块名, 累计耗时, 自身耗时)
+        self.marks = []  # (节点名, 距开始分析的时间)
+        self._stack = []
+        self._finder = None
+
+    def install(self):
+        """开始记录模块导入耗时"""
+        self._finder = _TimedFinder(self)
+        sys.meta_path.insert(0, self._finder)
+        self.mark("profiler_installed")
+
+    def uninstall(self):
+        """停止记录"""
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    def mark(self, name):
+        """记录一个启动节点"""
+        self.marks.append((name, time.perf_counter() - _T0))
+
+    def watch_first_paint(self, widget, on_painted=None):
+        """监听窗口首次绘制，记录 first_paint 节点
+
+        Args:
+            widget: 主窗口
+            on_painted: 首次绘制后的回调
+        """
+        from PyQt5.QtCore import QObject, QEvent
+
+        profiler = self
+
+        class FirstPaintFilter(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Paint and not getattr(self, 'done', False):
+                    self.done = True
+                    profiler.mark("first_paint")
+                    obj.removeEventFilter(self)
+                    if on_painted:
+                        on_painted()
+                return False
+
+        self._paint_filter = FirstPaintFilter()
+        widget.installEventFilter(self._paint_filter)
+
+    def summary(self):
+        """汇总结果
+
+        Returns:
+            dict: 各节点时间(ms)和导入耗时
+        """
+        return {
+            "marks_ms": {name: round(t * 1000, 1) for name, t in self.marks},
+            "import_total_ms": round(sum(s for _, _, s in self.imports) * 1000, 1),
+            "imports": [
+                {"module": name, "cumulative_ms": round(c * 1000, 2), "self_ms": round(s * 1000, 2)}
+                for name, c, s in sorted(self.imports, key=lambda item: item[2], reverse=True)
+            ],
+        }
+
+    def report(self, top=25, json_path=None):
+        """输出分析报告到控制台和日志
+
+        Args:
+            top: 显示自身耗时最多的模块数量
+            json_path: 可选，完整结果写入的JSON文件
+        """
+        data = self.summary()
+        lines = ["启动耗时分析:"]
+        for name, ms in data["marks_ms"].items():
+            lines.append(f"  {name:<24} {ms:>9.1f} ms")
+        lines.append(f"  模块导入合计 {data['import_total_ms']:.1f} ms ({len(self.imports)} 个模块)")
+        lines.append(f"  {'模块':<40} {'自身(ms)':>10} {'累计(ms)':>10}")
+        for item in data["imports"][:top]:
+            lines.append(f"  {item['module']:<40} {item['self_ms']:>10.2f} {item['cumulative_ms']:>10.2f}")
+        text = "\n".join(lines)
+        print(text)
+        logger.info(text)
+
+        if json_path:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        return data
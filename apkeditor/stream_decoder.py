@@ -0,0 +1,68 @@
+# stream_decoder.py
+"""进程输出的增量解码与按行组装（不依赖Qt）
+
+进程输出按任意边界分块到达，直接对每块 decode 会破坏跨块的多字节字符，
+也会把一行拆成两半。LineAssembler 使用增量解码器并缓存不完整的行。
+"""
+
+import time
+import codecs
+
+
+class LineAssembler:
+    """增量解码字节流并按行输出
+
+    Args:
+        encoding: 字符编码
+        partial_timeout: 不完整的行超过该时间（秒）仍未收到换行时，flush 时也会输出
+    """
+
+    def __init__(self, encoding='utf-8', partial_timeout=0.5):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._partial = ''
+        self._partial_since = None
+        self.partial_timeout = partial_timeout
+
+    def feed(self, data):
+        """输入一块字节数据
+
+        Returns:
+            list: 本次新组装出的完整行（不含换行符）
+        """
+        text = self._decoder.decode(data)
+        if not text:
+            return []
+        text = self._partial + text
+        lines = text.split('\n')
+        self._partial = lines.pop()
+        if not self._partial:
+            self._partial_since = None
+        elif lines or self._partial_since is None:
+            # 新的不完整行从现在开始计时
+            self._partial_since = time.monotonic()
+        return [line.rstrip('\r') for line in lines]
+
+    @property
+    def has_partial(self):
+        """是否缓存着不完整的行"""
+        return bool(self._partial)
+
+    def flush(self, final=False):
+        """取出缓存的不完整行
+
+        Args:
+            final: 流已结束，输出解码器和行缓存中剩余的全部内容
+
+        Returns:
+            list: 输出的行
+        """
+        if final:
+            rest = self._partial + self._decoder.decode(b'', final=True)
+            self._partial = ''
+            self._partial_since = None
+            return [line.rstrip('\r') for line in rest.split('\n') if line] if rest else []
+        # 长时间没有换行的内容（例如进度提示）也要显示出来
+        if self._partial and time.monotonic() - self._partial_since >= self.partial_timeout:
+            line, self._partial, self._partial_since = self._partial, '', None
+            return [line.rstrip('\r')]
+        return []
@@ -2,72 +2,140 @@
 """语法高亮模块"""
 
 import re
-from PyQt5.QtGui import QFont, QColor, QSyntaxHighlighter, QTextCharFormat
+from PyQt5.QtCore import QPoint
+from PyQt5.QtGui import QFont, QColor, QSyntaxHighlighter, QTextCharFormat, QTextBlockUserData
+
+_ANSI_RE = re.compile(r'\033\[[0-9;]*[mK]')
+
+# 高亮规则预编译一次；按原有顺序依次应用，后应用的规则覆盖先应用的规则的格式
+_TOKEN_RULES = [
+    ('error', re.compile(r'ERROR|错误|失败|Exception|✘|无法|未找到|不存在')),
+    ('success', re.compile(r'SUCCESS|成功|完成|已找到|已添加|已修复|已清理|[✓✔]|提取.*成功|合并成功|反编译成功|重新编译成功')),
+    ('warning', re.compile(r'WARNING|警告|跳过')),
+    ('corex', re.compile(r'CoreX|Hook|lib_Pairip_CoreX|arm64-v8a')),
+    ('info', re.compile(r'\[.*?\]|开始合并拆分APK|使用APKEditor反编译APK|开始应用Smali补丁|处理完成|输出文件:|包名|Flutter应用|耗时|架构')),
+]
+
+# 视口外额外高亮的行数，滚动时减少闪烁
+_VIEWPORT_MARGIN = 50
+
+
+class _BlockSpans(QTextBlockUserData):
+    """缓存某个文本块的分类结果"""
+
+    def __init__(self, text, spans):
+        super().__init__()
+        self.text = text
+        self.spans = spans
+        self.pending = False
 
 
 class ConsoleHighlighter(QSyntaxHighlighter):
     """控制台输出语法高亮器"""
-    
+
+    # 使用字典定义格式化规则
+    FORMAT_RULES = {
+        'error': {'color': '#FF6B6B', 'weight': QFont.Bold},
+        'success': {'color': '#4ECDC4', 'weight': QFont.Bold},
+        'warning': {'color': '#FFD166', 'weight': QFont.Normal},
+        'command': {'color': '#118AB2', 'weight': QFont.Bold},
+        'info': {'color': '#073B4C', 'weight': QFont.Normal},
+        'corex': {'color': '#9C27B0', 'weight': QFont.Bold},
+        'progress': {'color': '#2196F3', 'weight': QFont.Normal}
+    }
+
     def __init__(self, parent=None):
-        try:
-            super().__init__(parent)
-            
-            # 使用字典定义格式化规则
-            format_rules = {
-                'error': {'color': '#FF6B6B', 'weight': QFont.Bold},
-                'success': {'color': '#4ECDC4', 'weight': QFont.Bold},
-                'warning': {'color': '#FFD166', 'weight': QFont.Normal},
-                'command': {'color': '#118AB2', 'weight': QFont.Bold},
-                'info': {'color': '#073B4C', 'weight': QFont.Normal},
-                'corex': {'color': '#9C27B0', 'weight': QFont.Bold},
-                'progress': {'color': '#2196F3', 'weight': QFont.Normal}
-            }
-            
-            # 批量设置格式化对象
-            for format_name, rules in format_rules.items():
-                format_obj = QTextCharFormat()
-                format_obj.setForeground(QColor(rules['color']))
-                format_obj.setFontWeight(rules['weight'])
-                setattr(self, f'{format_name}_format', format_obj)
-        except Exception as e:
-            print(f"初始化ConsoleHighlighter时出错: {str(e)}")
-    
+        super().__init__(parent)
+        self.view = None
+        self._visible = None  # (首个可见块号, 最后可见块号)
+
+        # 批量设置格式化对象
+        self.formats = {}
+        for format_name, rules in self.FORMAT_RULES.items():
+            format_obj = QTextCharFormat()
+            format_obj.setForeground(QColor(rules['color']))
+            format_obj.setFontWeight(rules['weight'])
+            self.formats[format_name] = format_obj
+
+    def attach_view(self, view):
+        """关联显示文档的QTextEdit，只高亮视口附近的文本块
+
+        Args:
+            view: 显示该文档的QTextEdit
+        """
+        self.view = view
+        view.verticalScrollBar().valueChanged.connect(self._on_viewport_changed)
+        view.verticalScrollBar().rangeChanged.connect(self._on_viewport_changed)
+        self._update_visible_range()
+
+    def _update_visible_range(self):
+        """记录当前视口中的块号范围"""
+        viewport = self.view.viewport()
+        first = self.view.cursorForPosition(QPoint(0, 0)).block().blockNumber()
+        last = self.view.cursorForPosition(QPoint(0, max(viewport.height() - 1, 0))).block().blockNumber()
+        self._visible = (first, last)
+
+    def _is_near_viewport(self, block_number):
+        """块是否在视口附近（文档末尾的一屏也视为可见，追加输出时自动滚动到底部）"""
+        if self._visible is None:
+            return True
+        first, last = self._visible
+        page = last - first + 1
+        if first - _VIEWPORT_MARGIN <= block_number <= last + _VIEWPORT_MARGIN:
+            return True
+        return block_number >= self.document().blockCount() - page - _VIEWPORT_MARGIN
+
+    def _on_viewport_changed(self, *args):
+        """滚动后补高亮进入视口的块"""
+        self._update_visible_range()
+        first, last = self._visible
+        block = self.document().findBlockByNumber(max(first - _VIEWPORT_MARGIN, 0))
+        end = last + _VIEWPORT_MARGIN
+        while block.isValid() and block.blockNumber() <= end:
+            data = block.userData()
+            if isinstance(data, _BlockSpans) and data.pending:
+                self.rehighlightBlock(block)
+            block = block.next()
+
+    @staticmethod
+    def classify(text):
+        """得到文本的高亮区间
+
+        Returns:
+            list: (起始位置, 长度, 格式名) 列表，按应用顺序排列（后面的区间覆盖前面的）
+        """
+        if '\033' in text:
+            text = _ANSI_RE.sub('', text)
+        spans = [(m.start(), m.end() - m.start(), name) for name, pattern in _TOKEN_RULES
+                 for m in pattern.finditer(text)]
+
+        # 特殊规则：命令高亮
+        if text.strip().startswith('$') or 'java -jar' in text:
+            spans = [(0, len(text), 'command')]
+
+        # 特殊规则：进度条或分隔线高亮
+        if '=' * 10 in text or '_' * 10 in text:
+            spans = [(0, len(text), 'progress')]
+        return spans
+
     def highlightBlock(self, text):
         """处理文本块的语法高亮"""
         try:
-            # 确保text是字符串类型
-            if not isinstance(text, str):
-                text = str(text)
-            
-            # 首先移除所有ANSI颜色代码，避免干扰匹配
-            text_clean = re.sub(r'\033\[[0-9;]*[mK]', '', text)
-            
-            # 定义高亮规则 - (格式对象, 正则表达式模式列表)
-            highlight_rules = [
-                (getattr(self, 'error_format', None), [r'ERROR|错误|失败|Exception|✘|无法|未找到|不存在']),
-                (getattr(self, 'success_format', None), [r'SUCCESS|成功|完成|已找到|已添加|已修复|已清理|[✓✔]|提取.*成功|合并成功|反编译成功|重新编译成功']),
-                (getattr(self, 'warning_format', None), [r'WARNING|警告|跳过']),
-                (getattr(self, 'corex_format', None), [r'CoreX|Hook|lib_Pairip_CoreX|arm64-v8a']),
-                (getattr(self, 'info_format', None), [r'\[.*?\]|开始合并拆分APK|使用APKEditor反编译APK|开始应用Smali补丁|处理完成|输出文件:|包名|Flutter应用|耗时|架构'])
-            ]
-            
-            # 应用正则表达式高亮规则
-            for format_obj, patterns in highlight_rules:
-                if format_obj:  # 确保格式对象存在
-                    for pattern in patterns:
-                        try:
-                            for match in re.finditer(pattern, text_clean):
-                                start, end = match.span()
-                                self.setFormat(start, end - start, format_obj)
-                        except re.error:
-                            pass  # 跳过无效的正则表达式
-            
-            # 特殊规则：命令高亮
-            if hasattr(self, 'command_format') and (text_clean.strip().startswith('$') or 'java -jar' in text_clean):
-                self.setFormat(0, len(text), self.command_format)
-            
-            # 特殊规则：进度条或分隔线高亮
-            if hasattr(self, 'progress_format') and ('=' * 10 in text_clean or '_' * 10 in text_clean):
-                self.setFormat(0, len(text), self.progress_format)
+            block = self.currentBlock()
+            data = block.userData()
+            if not isinstance(data, _BlockSpans) or data.text != text:
+                data = _BlockSpans(text, None)
+                self.setCurrentBlockUserData(data)
+
+            # 视口外的块先跳过，滚动到附近时再高亮
+            if self.view is not None and not self._is_near_viewport(block.blockNumber()):
+                data.pending = True
+                return
+
+            data.pending = False
+            if data.spans is None:
+                data.spans = self.classify(text)
+            for start, length, name in data.spans:
+                self.setFormat(start, length, self.formats[name])
         except Exception as e:
-            print(f"应用语法高亮时出错: {str(e)}")
\ No newline at end of file
+            print(f"应用语法高亮时出错: {str(e)}")
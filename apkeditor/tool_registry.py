@@ -0,0 +1,289 @@
+# tool_registry.py
+"""APKEditor / apksigner jar 的注册表
+
+过去各模块分别用 glob 查找 jar（命令预览每次刷新都要扫描一次），查找目录和同名时的
+取舍规则也各不相同。注册表统一扫描一次，记录每个 jar 的路径、版本和 SHA-256，
+之后只在被扫描的目录发生变化（目录修改时间改变）时重新扫描。
+
+查找目录按优先级为：当前目录、当前目录/lib、程序目录、程序目录/lib；apksigner 还会
+查找 lib/build-tools/<版本>/lib。同一工具有多个 jar 时取版本号最高的，版本相同时取
+优先级高的目录。哈希按 (路径, 大小, 修改时间) 缓存在 CACHE_DIR/tool_registry.json 中。
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import zipfile
+import threading
+from dataclasses import dataclass
+
+from .constants import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_PATH = os.path.join(CACHE_DIR, "tool_registry.json")
+REGISTRY_VERSION = 1
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 工具名 -> 文件名模式（不区分大小写）
+TOOL_PATTERNS = {
+    "apkeditor": re.compile(r"^apkeditor.*\.jar$", re.IGNORECASE),
+    "apksigner": re.compile(r"^apksigner.*\.jar$", re.IGNORECASE),
+}
+
+_FILE_VERSION = re.compile(r"(\d+(?:\.\d+)+)")
+_MANIFEST_VERSION = re.compile(r"^(?:Implementation-Version|Bundle-Version):\s*(\S+)", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class ToolJar:
+    """注册表中的一个 jar"""
+    name: str  # 工具名（TOOL_PATTERNS 的键）
+    path: str
+    version: str
+    sha256: str
+    size: int
+    mtime: float
+
+    def version_key(self):
+        """版本比较键，无法解析版本时最小"""
+        return tuple(int(part) for part in re.findall(r"\d+", self.version))
+
+    def describe(self):
+        return f"{self.name} {self.version or '未知版本'} sha256:{self.sha256[:16]} {self.path}"
+
+
+def _manifest_version(path):
+    """jar 清单中的版本（只读取中央目录和一个条目）"""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            manifest = zf.read("META-INF/MANIFEST.MF").decode("utf-8", errors="replace")
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return ""
+    match = _MANIFEST_VERSION.search(manifest)
+    return match.group(1) if match else ""
+
+
+def parse_version(path):
+    """jar 的版本：文件名中的版本号，其次 build-tools/<版本> 目录名，其次清单中的版本"""
+    for text in (os.path.basename(path), os.path.basename(os.path.dirname(os.path.dirname(path)))):
+        match = _FILE_VERSION.search(text)
+        if match:
+            return match.group(1)
+    return _manifest_version(path)
+
+
+def file_sha256(path):
+    """文件的 SHA-256（十六进制）"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _dedupe(paths):
+    seen, result = set(), []
+    for path in paths:
+        path = os.path.abspath(path)
+        key = os.path.normcase(path)
+        if key not in seen:
+            seen.add(key)
+            result.append(path)
+    return result
+
+
+class ToolRegistry:
+    """扫描并缓存工具 jar
+
+    Args:
+        search_dirs: 查找目录（按优先级），默认当前目录、当前目录/lib、程序目录、程序目录/lib
+        path: 哈希缓存文件，默认 CACHE_DIR/tool_registry.json
+    """
+
+    def __init__(self, search_dirs=None, path=REGISTRY_PATH):
+        self._fixed_dirs = search_dirs
+        self.path = path
+        self._lock = threading.RLock()
+        self._snapshot = None  # 被扫描目录 -> 修改时间
+        self._tools = {}       # 工具名 -> [ToolJar]，最适合的在前
+        self._hashes = None    # 路径 -> {"size", "mtime", "sha256", "version"}
+
+    @property
+    def search_dirs(self):
+        if self._fixed_dirs is not None:
+            return _dedupe(self._fixed_dirs)
+        # 当前目录可能在运行中改变，每次重新计算
+        cwd = os.getcwd()
+        return _dedupe([cwd, os.path.join(cwd, "lib"), APP_ROOT, os.path.join(APP_ROOT, "lib")])
+
+    def _watched_dirs(self):
+        """需要检查修改时间的目录：查找目录和 build-tools 下的各版本目录"""
+        dirs = []
+        for directory in self.search_dirs:
+            dirs.append(directory)
+            build_tools = os.path.join(directory, "build-tools")
+            if os.path.isdir(build_tools):
+                dirs.append(build_tools)
+                for version in sorted(os.listdir(build_tools)):
+                    dirs.append(os.path.join(build_tools, version, "lib"))
+        return dirs
+
+    @staticmethod
+    def _stat_dirs(dirs):
+        snapshot = {}
+        for directory in dirs:
+            try:
+                snapshot[directory] = os.stat(directory).st_mtime
+            except OSError:
+                snapshot[directory] = None
+        return snapshot
+
+    def _load_hashes(self):
+        if self._hashes is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                self._hashes = dict(data.get("jars", {})) if data.get("version") == REGISTRY_VERSION else {}
+            except (OSError, ValueError, AttributeError):
+                self._hashes = {}
+        return self._hashes
+
+    def _save_hashes(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": REGISTRY_VERSION, "jars": self._hashes}, f, ensure_ascii=False, indent=1)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"无法保存工具注册表: {e}")
+
+    def _describe_file(self, path):
+        """文件的版本和哈希（大小和修改时间未变化时使用缓存）
+
+        Returns:
+            tuple: (版本, 哈希, 大小, 修改时间, 是否新计算)
+        """
+        stat = os.stat(path)
+        hashes = self._load_hashes()
+        entry = hashes.get(path)
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+            return entry["version"], entry["sha256"], stat.st_size, stat.st_mtime, False
+        version, sha256 = parse_version(path), file_sha256(path)
+        hashes[path] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha256, "version": version}
+        return version, sha256, stat.st_size, stat.st_mtime, True
+
+    def _candidates(self):
+        """(工具名, 路径, 目录优先级) 列表"""
+        found = []
+        for priority, directory in enumerate(self.search_dirs):
+            dirs = [directory]
+            build_tools = os.path.join(directory, "build-tools")
+            if os.path.isdir(build_tools):
+                dirs += [os.path.join(build_tools, version, "lib") for version in sorted(os.listdir(build_tools))]
+            for scan_dir in dirs:
+                try:
+                    names = os.listdir(scan_dir)
+                except OSError:
+                    continue
+                for name in names:
+                    path = os.path.join(scan_dir, name)
+                    for tool, pattern in TOOL_PATTERNS.items():
+                        # build-tools 中只有 apksigner
+                        if pattern.match(name) and (scan_dir == directory or tool == "apksigner") \
+                                and os.path.isfile(path):
+                            found.append((tool, path, priority))
+        return found
+
+    def refresh(self, force=False):
+        """目录有变化（或 force）时重新扫描
+
+        Returns:
+            bool: 是否重新扫描
+        """
+        with self._lock:
+            watched = self._watched_dirs()
+            snapshot = self._stat_dirs(watched)
+            if not force and snapshot == self._snapshot:
+                return False
+            tools, changed = {}, False
+            for tool, path, priority in self._candidates():
+                try:
+                    version, sha256, size, mtime, computed = self._describe_file(path)
+                except OSError as e:
+                    logger.debug(f"无法读取 {path}: {e}")
+                    continue
+                changed |= computed
+                tools.setdefault(tool, []).append((ToolJar(tool, path, version, sha256, size, mtime), priority))
+            self._tools = {
+                tool: [jar for jar, _ in sorted(jars, key=lambda item: (item[0].version_key(), -item[1]),
+                                                reverse=True)]
+                for tool, jars in tools.items()
+            }
+            # 扫描期间目录可能变化，以扫描前的状态为准，下次调用时再检查
+            self._snapshot = snapshot
+            hashes = self._load_hashes()
+            for path in [path for path in hashes if not os.path.exists(path)]:
+                del hashes[path]
+                changed = True
+            if changed:
+                self._save_hashes()
+            return True
+
+    def tools(self, name=None):
+        """已找到的 jar
+
+        Args:
+            name: 工具名，None表示全部
+
+        Returns:
+            list: ToolJar 列表，同一工具中最适合的在前
+        """
+        self.refresh()
+        with self._lock:
+            if name is not None:
+                return list(self._tools.get(name, ()))
+            return [jar for jars in self._tools.values() for jar in jars]
+
+    def find(self, name):
+        """最适合的 jar，没有时返回None"""
+        jars = self.tools(name)
+        return jars[0] if jars else None
+
+    def apkeditor_jar(self):
+        """APKEditor jar 路径，没有找到时返回默认路径 ./lib/APKEditor.jar"""
+        jar = self.find("apkeditor")
+        return jar.path if jar else os.path.abspath(os.path.join(".", "lib", "APKEditor.jar"))
+
+    def apksigner_jar(self):
+        """apksigner.jar 路径，没有找到时返回None"""
+        jar = self.find("apksigner")
+        return jar.path if jar else None
+
+    def sha256(self, path):
+        """任意文件的 SHA-256（按大小和修改时间缓存）"""
+        path = os.path.abspath(path)
+        with self._lock:
+            _, sha256, _, _, computed = self._describe_file(path)
+            if computed:
+                self._save_hashes()
+            return sha256
+
+
+_default_registry = None
+
+
+def default_registry():
+    """进程内共用的工具注册表"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ToolRegistry()
+    return _default_registry
+
+
+__all__ = ['ToolJar', 'ToolRegistry', 'REGISTRY_PATH', 'TOOL_PATTERNS', 'parse_version', 'file_sha256',
+           'default_registry']
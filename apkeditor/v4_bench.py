@@ -0,0 +1,149 @@
+# v4_bench.py
+"""V4签名的基准测试（python -m apkeditor.v4_bench）
+
+默认只比较 Merkle 树在不同线程数下的耗时（输入为随机数据，不需要Java）。
+指定 --apk 和密钥参数时，再比较完整的签名流程：
+    apksigner  apksigner 同时生成 v1-v4 签名（单线程构建Merkle树）
+    builtin    apksigner 只做 v1-v3，之后由内置后端生成 .idsig
+"""
+
+import os
+import sys
+import mmap
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from dataclasses import replace
+
+from .constants import find_apksigner_jar
+from .command_model import CommandOptions, build_args
+from .v4_signer import merkle_tree, java_signer, write_idsig
+
+
+def _thread_counts():
+    """1、2、4…直到CPU核心数"""
+    cpus = os.cpu_count() or 1
+    counts, count = [], 1
+    while count < cpus:
+        counts.append(count)
+        count *= 2
+    return counts + [cpus]
+
+
+def bench_tree(path, repeat=3):
+    """各线程数下构建Merkle树的最短耗时
+
+    Returns:
+        dict: 线程数 -> 秒
+    """
+    results = {}
+    roots = set()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for threads in _thread_counts():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                root, _ = merkle_tree(mm, len(mm), threads=threads)
+                timings.append(time.perf_counter() - start)
+            roots.add(root)
+            results[threads] = min(timings)
+    if len(roots) != 1:
+        raise RuntimeError("不同线程数得到的根哈希不一致")
+    return results
+
+
+def bench_sign(apk, options, java="java", repeat=1, temp_dir=None):
+    """比较 apksigner 生成V4 与 内置后端生成V4 的完整签名耗时
+
+    Returns:
+        dict: 后端 -> 秒
+    """
+    apksigner_jar = find_apksigner_jar()
+    if not apksigner_jar:
+        raise RuntimeError("找不到 apksigner.jar")
+    work = os.path.join(temp_dir, "work.apk")
+    results = {}
+    for backend in ("apksigner", "builtin"):
+        backend_options = replace(options, op="sign", v4=True, v4_backend=backend, input_path=work)
+        args = build_args(backend_options, apksigner_jar)
+        timings = []
+        for _ in range(repeat):
+            shutil.copyfile(apk, work)
+            start = time.perf_counter()
+            result = subprocess.run([java] + args, capture_output=True, text=True, errors='replace')
+            if result.returncode != 0:
+                raise RuntimeError(f"apksigner 失败: {result.stderr.strip()}")
+            if backend == "builtin":
+                write_idsig(work, java_signer(backend_options, java), log=lambda line: None)
+            timings.append(time.perf_counter() - start)
+        results[backend] = min(timings)
+    return results
+
+
+def run(size_mb=512, repeat=3, apk=None, options=None, java="java", keep=None):
+    """运行基准测试并打印结果"""
+    temp_dir = keep or tempfile.mkdtemp(prefix="apkeditor-bench-")
+    try:
+        sample = apk
+        if sample is None:
+            sample = os.path.join(temp_dir, f"random_{size_mb}.bin")
+            if not os.path.exists(sample):
+                print(f"生成 {size_mb} MB 随机数据 ...")
+                with open(sample, 'wb') as f:
+                    for _ in range(size_mb):
+                        f.write(os.urandom(1024 * 1024))
+        size = os.path.getsize(sample)
+        print(f"输入: {size / 1024 / 1024:.1f} MB")
+
+        print("Merkle 树:")
+        tree = bench_tree(sample, repeat)
+        base = tree[1]
+        for threads, seconds in tree.items():
+            print(f"  {threads:>3} 线程 {seconds:8.3f} 秒  {size / seconds / 1024 / 1024:8.1f} MB/s  {base / seconds:5.1f}x")
+
+        if apk and options is not None:
+            print("完整签名 (v1-v4):")
+            sign = bench_sign(apk, options, java, max(1, repeat // 3), temp_dir)
+            for backend, seconds in sign.items():
+                print(f"  {backend:<10} {seconds:8.3f} 秒  {sign['apksigner'] / seconds:5.1f}x")
+        return tree
+    finally:
+        if keep is None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m apkeditor.v4_bench", description="V4签名基准测试")
+    parser.add_argument("--size", type=int, default=512, help="随机输入的大小（MB），默认512")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时，默认3")
+    parser.add_argument("--apk", help="使用该APK代替随机数据；同时指定密钥时比较完整签名")
+    parser.add_argument("--java", default="java", help="java可执行文件")
+    parser.add_argument("--ks", help="密钥库文件")
+    parser.add_argument("--ks-alias", help="密钥别名")
+    parser.add_argument("--ks-pass", help="密钥密码（也可通过环境变量 APKEDITOR_KS_PASS 提供）")
+    parser.add_argument("--key", help="私钥文件 (PKCS#8)")
+    parser.add_argument("--cert", help="公钥证书 (X.509)")
+    parser.add_argument("--keep", metavar="DIR", help="在该目录保留随机输入，便于重复运行")
+    args = parser.parse_args(argv)
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+
+    options = None
+    if args.ks or args.key:
+        options = CommandOptions(
+            op="sign",
+            use_keystore=not args.key,
+            keystore_path=args.ks or "",
+            keystore_alias=args.ks_alias or "",
+            keystore_password=args.ks_pass or os.environ.get("APKEDITOR_KS_PASS", ""),
+            private_key_path=args.key or "",
+            public_key_path=args.cert or "",
+        )
+    run(args.size, args.repeat, args.apk, options, args.java, args.keep)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
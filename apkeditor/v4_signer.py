@@ -0,0 +1,246 @@
+# v4_signer.py
+"""内置的 V4 签名（.idsig）生成
+
+apksigner 单线程构建 fs-verity Merkle 树，1~2GB 的APK要花很长时间。这里逐层构建：
+每层按4KB块计算SHA-256，按段分给线程池并行（hashlib 计算时释放GIL）。
+签名所需的证书、公钥和APK摘要直接从已完成 v2/v3 签名的APK中读取，
+只有对签名数据的签名需要私钥，交给 lib/SignService.java 完成（密码通过标准输入传递）。
+
+作为签名操作的另一种 V4 后端：apksigner 只做 v1/v2/v3 签名（--v4-signing-enabled false），
+成功后由 write_idsig 在APK旁写出标准的 <apk>.idsig。
+"""
+
+import os
+import mmap
+import base64
+import struct
+import hashlib
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from .apk_certs import CertError, parse_public_key, verify_signature
+from .apk_verify import VerifyError, read_scheme_signers, SIGNATURE_ALGORITHMS, VERITY_ALGORITHMS
+from .zip_rewrite import ZipRewriteError
+
+logger = logging.getLogger(__name__)
+
+IDSIG_VERSION = 2
+HASH_ALGORITHM_SHA256 = 1
+LOG2_BLOCK_SIZE = 12
+BLOCK_SIZE = 1 << LOG2_BLOCK_SIZE
+DIGEST_SIZE = 32
+# 每个并行任务处理的块数（1MB）
+SEGMENT_BLOCKS = 256
+
+# V4 后端
+BACKENDS = ("apksigner", "builtin")
+
+# 签名算法ID -> Java 签名算法名（V4 沿用APK的 v3/v2 签名算法）
+JAVA_ALGORITHMS = {
+    0x0103: "SHA256withRSA",
+    0x0104: "SHA512withRSA",
+    0x0201: "SHA256withECDSA",
+    0x0202: "SHA512withECDSA",
+    0x0301: "SHA256withDSA",
+}
+
+# 作为 apkDigest 的内容摘要优先级：CHUNKED_SHA512 > VERITY_CHUNKED_SHA256 > CHUNKED_SHA256
+_SHA512_ALGORITHMS = (0x0102, 0x0104, 0x0202)
+
+# 隐藏Windows下的命令行窗口
+if os.name == 'nt':
+    PLATFORM_ARGS = {'creationflags': subprocess.CREATE_NO_WINDOW}
+else:
+    PLATFORM_ARGS = {}
+
+
+class V4SignError(Exception):
+    """V4签名失败"""
+
+
+def _hash_blocks(data, start, end):
+    """[start, end) 中每个4KB块的SHA-256（最后一块补0）"""
+    sha256 = hashlib.sha256
+    digests = []
+    for pos in range(start, end, BLOCK_SIZE):
+        block = data[pos:min(pos + BLOCK_SIZE, end)]
+        if len(block) < BLOCK_SIZE:
+            block = bytes(block) + bytes(BLOCK_SIZE - len(block))
+        digests.append(sha256(block).digest())
+    return b''.join(digests)
+
+
+def _hash_level(data, size, pool):
+    """计算一层：按段并行，结果补0到4KB的整数倍"""
+    segment = SEGMENT_BLOCKS * BLOCK_SIZE
+    parts = pool.map(lambda start: _hash_blocks(data, start, min(start + segment, size)), range(0, size, segment))
+    level = b''.join(parts)
+    return level + bytes(-len(level) % BLOCK_SIZE)
+
+
+def merkle_tree(data, size=None, pool=None, threads=None):
+    """构建 fs-verity Merkle 树（SHA-256，4KB块，无盐）
+
+    Args:
+        data: 支持切片的数据（bytes 或 mmap）
+        size: 数据长度，默认 len(data)
+        pool: 线程池，默认按 threads 新建
+        threads: 线程数，默认CPU核心数
+
+    Returns:
+        tuple: (根哈希, 树的字节：顶层在前、叶子层在后)
+    """
+    size = len(data) if size is None else size
+    own_pool = pool is None
+    if own_pool:
+        pool = ThreadPoolExecutor(max_workers=threads or os.cpu_count() or 1)
+    try:
+        levels = []
+        current, current_size = data, size
+        while True:
+            level = _hash_level(current, current_size, pool)
+            levels.append(level)
+            digests_size = (current_size + BLOCK_SIZE - 1) // BLOCK_SIZE * DIGEST_SIZE
+            if digests_size <= BLOCK_SIZE:
+                break
+            current, current_size = level, len(level)
+    finally:
+        if own_pool:
+            pool.shutdown()
+    tree = b''.join(reversed(levels))
+    return hashlib.sha256(tree[:BLOCK_SIZE]).digest(), tree
+
+
+def _lp(data):
+    """int32 长度前缀（小端）"""
+    return struct.pack('<I', len(data)) + data
+
+
+def select_signer(apk_path):
+    """从已签名的APK中选出 V4 使用的签名者（v3 优先于 v2）
+
+    Returns:
+        tuple: (SchemeSigner, 签名算法ID, apkDigest)
+    """
+    try:
+        signers = read_scheme_signers(apk_path)
+    except (OSError, ValueError, VerifyError, ZipRewriteError) as e:
+        raise V4SignError(f"无法读取签名块: {e}")
+    signers = [s for s in signers if s.scheme == "v3"] or [s for s in signers if s.scheme == "v2"]
+    if not signers:
+        raise V4SignError("V4签名需要先完成 v2 或 v3 签名")
+    signer = signers[0]
+    algorithm = next((alg for alg, _ in signer.signatures if alg in JAVA_ALGORITHMS), None)
+    if algorithm is None:
+        raise V4SignError("签名算法不支持内置V4签名（例如 RSA-PSS），请使用 apksigner 后端")
+
+    def rank(alg):
+        if alg in _SHA512_ALGORITHMS:
+            return 0
+        return 1 if alg in VERITY_ALGORITHMS else 2
+
+    candidates = [alg for alg in signer.digests if alg in SIGNATURE_ALGORITHMS or alg in VERITY_ALGORITHMS]
+    if not candidates:
+        raise V4SignError("签名块中没有可用的内容摘要")
+    return signer, algorithm, signer.digests[min(candidates, key=rank)]
+
+
+def build_signed_data(file_size, root_hash, apk_digest, certificate, additional_data=b''):
+    """V4签名覆盖的数据（与 apksigner 的 V4Signature.getSignedData 一致）"""
+    body = (struct.pack('<qiB', file_size, HASH_ALGORITHM_SHA256, LOG2_BLOCK_SIZE)
+            + _lp(b'') + _lp(root_hash) + _lp(apk_digest) + _lp(certificate) + _lp(additional_data))
+    return struct.pack('<i', 4 + len(body)) + body
+
+
+def build_idsig(root_hash, tree, apk_digest, certificate, public_key, algorithm, signature, additional_data=b''):
+    """组装 .idsig 文件内容"""
+    hashing_info = struct.pack('<iB', HASH_ALGORITHM_SHA256, LOG2_BLOCK_SIZE) + _lp(b'') + _lp(root_hash)
+    signing_info = (_lp(apk_digest) + _lp(certificate) + _lp(additional_data) + _lp(public_key)
+                    + struct.pack('<i', algorithm) + _lp(signature))
+    return struct.pack('<i', IDSIG_VERSION) + _lp(hashing_info) + _lp(signing_info) + _lp(tree)
+
+
+def java_signer(options, java="java"):
+    """用 lib/SignService.java 的 data 模式和签名参数中的密钥签名（每次签名启动一次JVM）
+
+    Args:
+        options: CommandOptions（密钥库或私钥参数）
+        java: java可执行文件
+
+    Returns:
+        callable: 接收 (数据, 签名算法ID) 返回签名字节
+    """
+    from .jvm_worker import java_source_command
+    from .sign_session import SIGN_SERVICE_SOURCE, key_params
+
+    def encode(value):
+        return base64.b64encode(value if isinstance(value, bytes) else value.encode('utf-8')).decode('ascii')
+
+    def sign(data, algorithm):
+        command = java_source_command(java, SIGN_SERVICE_SOURCE, 'signservice')
+        if command is None:
+            raise V4SignError(f"找不到 {SIGN_SERVICE_SOURCE}")
+        # 密钥参数块之前追加算法和数据
+        request = (f"algorithm={encode(JAVA_ALGORITHMS[algorithm])}\ndata={encode(data)}\n"
+                   + key_params(options))
+        try:
+            result = subprocess.run(command + ['data'], input=request, capture_output=True, text=True,
+                                    encoding='utf-8', errors='replace', **PLATFORM_ARGS)
+        except OSError as e:
+            raise V4SignError(f"无法启动 java 进程: {e}")
+        if result.returncode != 0:
+            raise V4SignError(result.stderr.strip() or f"SignService 退出码 {result.returncode}")
+        return base64.b64decode(result.stdout.strip())
+
+    return sign
+
+
+def write_idsig(apk_path, sign, output_path=None, threads=None, log=None):
+    """为已完成 v2/v3 签名的APK生成 .idsig
+
+    Args:
+        apk_path: 已签名的APK
+        sign: 签名函数，接收 (数据, 签名算法ID) 返回签名，见 java_signer
+        output_path: 输出路径，默认 <apk>.idsig（与 apksigner 相同）
+        threads: 构建Merkle树的线程数，默认CPU核心数
+        log: 输出日志行的回调，默认写入logging
+
+    Returns:
+        str: .idsig 路径
+
+    Raises:
+        V4SignError: 签名失败
+    """
+    log = log or logger.info
+    output_path = output_path or apk_path + ".idsig"
+    signer, algorithm, apk_digest = select_signer(apk_path)
+    certificate = signer.certificates[0]
+
+    with open(apk_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            root_hash, tree = merkle_tree(mm, file_size, threads=threads)
+    log(f"V4: Merkle 树 {len(tree) // 1024} KB，根哈希 {root_hash.hex()}")
+
+    signed_data = build_signed_data(file_size, root_hash, apk_digest, certificate)
+    signature = sign(signed_data, algorithm)
+    try:
+        valid = verify_signature(parse_public_key(signer.public_key), signed_data, signature,
+                                 SIGNATURE_ALGORITHMS[algorithm][0])
+    except CertError as e:
+        raise V4SignError(f"无法解析签名者公钥: {e}")
+    if not valid:
+        raise V4SignError("V4签名与APK的签名者不匹配，请检查密钥")
+
+    data = build_idsig(root_hash, tree, apk_digest, certificate, signer.public_key, algorithm, signature)
+    temp_path = output_path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, output_path)
+    log(f"V4: 已写出 {output_path}")
+    return output_path
+
+
+__all__ = ['V4SignError', 'BACKENDS', 'merkle_tree', 'select_signer', 'build_signed_data', 'build_idsig',
+           'java_signer', 'write_idsig']
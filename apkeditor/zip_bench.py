@@ -0,0 +1,154 @@
+# zip_bench.py
+"""zip重写的微基准测试（python -m apkeditor.zip_bench）
+
+生成一个结构接近真实APK的合成zip（dex、so、资源表、大量小资源文件），
+比较三种“复制全部条目并替换一个条目”的做法：
+    extract   zipfile 解压到临时目录后重新打包（当前重新打包的方式）
+    zipfile   zipfile 在内存中逐个读取并重新压缩
+    raw       ZipRewriter 按原始压缩字节复制
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import zipfile
+import argparse
+import tempfile
+
+from .zip_rewrite import ZipSource, ZipRewriter
+
+_REPLACED = "assets/config.json"
+
+
+def make_sample_apk(path, size_mb=64, seed=1):
+    """生成合成APK
+
+    Args:
+        path: 输出路径
+        size_mb: 大致的未压缩大小（MB）
+        seed: 随机种子
+    """
+    rng = random.Random(seed)
+    mb = 1024 * 1024
+    words = [bytes(rng.choice(b"abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 10)))
+             for _ in range(2000)]
+
+    def text(size):
+        # 可压缩的数据（dex、xml 与之类似）
+        parts, total = [], 0
+        while total < size:
+            word = rng.choice(words)
+            parts.append(word)
+            total += len(word) + 1
+        return b" ".join(parts)[:size]
+
+    budget = size_mb * mb
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("AndroidManifest.xml", text(8 * 1024))
+        zf.writestr(zipfile.ZipInfo("resources.arsc"), text(budget // 16))
+        for index in range(2):
+            zf.writestr(f"classes{index + 1 if index else ''}.dex", text(budget // 4))
+        for abi in ("arm64-v8a", "armeabi-v7a"):
+            # so 文件：一半可压缩、一半随机
+            half = budget // 16
+            zf.writestr(f"lib/{abi}/libnative.so", text(half) + rng.randbytes(half))
+        zf.writestr(_REPLACED, b"{}")
+        remaining = budget // 4
+        index = 0
+        while remaining > 0:
+            size = rng.randint(512, 32 * 1024)
+            data = rng.randbytes(size) if index % 3 == 0 else text(size)
+            zf.writestr(f"res/drawable-{index % 7}/img_{index}.png", data)
+            remaining -= size
+            index += 1
+
+
+def bench_extract(src, dst, replacement):
+    """解压到临时目录后重新打包"""
+    with tempfile.TemporaryDirectory(prefix="apkeditor-bench-") as temp_dir:
+        with zipfile.ZipFile(src) as zf:
+            infos = zf.infolist()
+            zf.extractall(temp_dir)
+        with open(os.path.join(temp_dir, _REPLACED), 'wb') as f:
+            f.write(replacement)
+        with zipfile.ZipFile(dst, 'w') as out:
+            for info in infos:
+                out.write(os.path.join(temp_dir, info.filename), info.filename, compress_type=info.compress_type)
+
+
+def bench_zipfile(src, dst, replacement):
+    """zipfile 读取后重新压缩"""
+    with zipfile.ZipFile(src) as zf, zipfile.ZipFile(dst, 'w') as out:
+        for info in zf.infolist():
+            data = replacement if info.filename == _REPLACED else zf.read(info)
+            out.writestr(info, data, compress_type=info.compress_type)
+
+
+def bench_raw(src, dst, replacement):
+    """ZipRewriter 原始字节复制"""
+    with ZipSource(src) as source, ZipRewriter(dst) as out:
+        out.rewrite(source, replace={_REPLACED: replacement})
+
+
+BENCHMARKS = [
+    ("extract", bench_extract),
+    ("zipfile", bench_zipfile),
+    ("raw", bench_raw),
+]
+
+
+def run(size_mb=64, repeat=3, keep=None):
+    """运行基准测试并打印结果
+
+    Returns:
+        dict: 名称 -> 最短耗时（秒）
+    """
+    temp_dir = keep or tempfile.mkdtemp(prefix="apkeditor-bench-")
+    try:
+        sample = os.path.join(temp_dir, "sample.apk")
+        if not os.path.exists(sample):
+            print(f"生成 {size_mb} MB 合成APK ...")
+            make_sample_apk(sample, size_mb)
+        with zipfile.ZipFile(sample) as zf:
+            count = len(zf.infolist())
+        print(f"输入: {os.path.getsize(sample) / 1024 / 1024:.1f} MB, {count} 个条目")
+
+        results = {}
+        replacement = b'{"patched": true}'
+        for name, func in BENCHMARKS:
+            output = os.path.join(temp_dir, f"out_{name}.apk")
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func(sample, output, replacement)
+                timings.append(time.perf_counter() - start)
+            with zipfile.ZipFile(output) as zf:
+                if zf.testzip() is not None or zf.read(_REPLACED) != replacement:
+                    raise RuntimeError(f"{name} 的输出不正确")
+            results[name] = min(timings)
+
+        base = results["extract"]
+        for name, seconds in results.items():
+            print(f"  {name:<8} {seconds:8.3f} 秒  {base / seconds:6.1f}x")
+        return results
+    finally:
+        if keep is None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m apkeditor.zip_bench", description="zip重写微基准测试")
+    parser.add_argument("--size", type=int, default=64, help="合成APK的未压缩大小（MB），默认64")
+    parser.add_argument("--repeat", type=int, default=3, help="每种做法重复次数，取最短耗时，默认3")
+    parser.add_argument("--keep", metavar="DIR", help="在该目录保留合成APK和输出，便于重复运行")
+    args = parser.parse_args(argv)
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+    run(args.size, args.repeat, args.keep)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,518 @@
+# zip_rewrite.py
+"""按原始字节重写zip（不依赖Qt）
+
+ZipSource 只读取中央目录，条目数据按原始压缩字节读取；ZipRewriter 顺序写出新的zip：
+原样复制本地文件头（含扩展字段）、压缩数据、CRC 和数据描述符，不解压也不重新压缩，
+调用方可以插入、替换或删除条目，最后一次性写出中央目录。
+拆分包合并、补丁等所有重新打包的路径都基于这里，避免“全部解压再重新打包”。
+"""
+
+import os
+import zlib
+import time
+import struct
+import zipfile
+
+_COPY_CHUNK = 1024 * 1024
+
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+_EOCD = struct.Struct('<IHHHHIIH')
+_ZIP64_EOCD = struct.Struct('<IQHHIIQQQQ')
+_ZIP64_LOCATOR = struct.Struct('<IIQI')
+
+_LOCAL_SIG = 0x04034b50
+_CENTRAL_SIG = 0x02014b50
+_DESCRIPTOR_SIG = 0x08074b50
+_EOCD_SIG = 0x06054b50
+_ZIP64_EOCD_SIG = 0x06064b50
+_ZIP64_LOCATOR_SIG = 0x07064b50
+_ZIP64_EXTRA_ID = 0x0001
+# apksigner/zipalign 使用的对齐扩展字段：2字节对齐值 + 填充的0
+_ALIGNMENT_EXTRA_ID = 0xD935
+_ZIP64_LIMIT = 0xFFFFFFFF
+
+DATA_DESCRIPTOR_FLAG = 0x08
+UTF8_FLAG = 0x800
+
+STORED = zipfile.ZIP_STORED
+DEFLATED = zipfile.ZIP_DEFLATED
+
+
+class ZipRewriteError(Exception):
+    """zip 数据无法读取或写出"""
+
+
+class FileWindow:
+    """文件中一段连续区域的只读视图，例如外层zip中未压缩存储的内部APK"""
+
+    def __init__(self, f, start, size):
+        self._f = f
+        self._start = start
+        self._size = size
+        self._pos = 0
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self._size
+        self._pos = max(0, min(offset, self._size))
+        return self._pos
+
+    def read(self, n=-1):
+        if n is None or n < 0 or self._pos + n > self._size:
+            n = self._size - self._pos
+        self._f.seek(self._start + self._pos)
+        data = self._f.read(n)
+        self._pos += len(data)
+        return data
+
+
+class ZipEntry:
+    """中央目录中的一个条目"""
+
+    __slots__ = ("name", "version_made", "version_needed", "flags", "method", "time", "date", "crc",
+                 "csize", "usize", "offset", "int_attr", "ext_attr", "extra", "comment", "_local")
+
+    def __init__(self, name, flags, method, time, date, crc, csize, usize, offset,
+                 version_made=20, version_needed=20, int_attr=0, ext_attr=0, extra=b'', comment=b''):
+        self.name = name
+        self.version_made = version_made
+        self.version_needed = version_needed
+        self.flags = flags
+        self.method = method
+        self.time = time
+        self.date = date
+        self.crc = crc
+        self.csize = csize
+        self.usize = usize
+        self.offset = offset
+        self.int_attr = int_attr
+        self.ext_attr = ext_attr
+        self.extra = extra  # 中央目录扩展字段（不含zip64字段，写出时重新生成）
+        self.comment = comment
+        self._local = None  # (本地文件头字段, 文件名字节, 本地扩展字段, 数据起始偏移)
+
+    @property
+    def is_dir(self):
+        return self.name.endswith('/')
+
+    @property
+    def has_descriptor(self):
+        return bool(self.flags & DATA_DESCRIPTOR_FLAG)
+
+
+def dos_time(timestamp=None):
+    """时间转换为zip的 (time, date) 字段；None 表示 1980-01-01，便于得到可复现的输出"""
+    if timestamp is None:
+        return 0, (0 << 9) | (1 << 5) | 1
+    t = time.localtime(timestamp)
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((max(t.tm_year, 1980) - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+def is_signature_file(name):
+    """是否为JAR签名文件（META-INF/ 下的清单、签名和证书），重新打包后全部失效"""
+    upper = name.upper()
+    if not upper.startswith("META-INF/") or upper.count('/') != 1:
+        return name == "stamp-cert-sha256"
+    base = upper[len("META-INF/"):]
+    return base == "MANIFEST.MF" or base.startswith("SIG-") or base.endswith((".SF", ".RSA", ".DSA", ".EC"))
+
+
+def _split_extra(extra, drop_ids):
+    """去掉扩展字段中指定ID的块"""
+    result = []
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack_from('<HH', extra, pos)
+        if header_id not in drop_ids:
+            result.append(extra[pos:pos + 4 + size])
+        pos += 4 + size
+    return b''.join(result)
+
+
+def _parse_zip64_extra(extra, usize, csize, offset):
+    """从zip64扩展字段读取超过4GB的大小和偏移"""
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack_from('<HH', extra, pos)
+        if header_id == _ZIP64_EXTRA_ID:
+            values = iter(struct.unpack_from(f'<{size // 8}Q', extra, pos + 4))
+            if usize == _ZIP64_LIMIT:
+                usize = next(values)
+            if csize == _ZIP64_LIMIT:
+                csize = next(values)
+            if offset == _ZIP64_LIMIT:
+                offset = next(values)
+            break
+        pos += 4 + size
+    return usize, csize, offset
+
+
+class ZipSource:
+    """只读取中央目录的zip源
+
+    Args:
+        source: 文件路径或可 seek 的二进制文件对象（如 FileWindow）
+
+    Attributes:
+        cd_offset / cd_size: 中央目录的位置和大小
+        eocd_offset: 目录结束记录的位置
+    """
+
+    def __init__(self, source):
+        if isinstance(source, (str, os.PathLike)):
+            self.path = os.fspath(source)
+            self._f = open(source, 'rb')
+            self._owns = True
+        else:
+            self.path = getattr(source, 'name', None)
+            self._f = source
+            self._owns = False
+        try:
+            self.entries = self._read_central_directory()
+        except BaseException:
+            self.close()
+            raise
+        self._by_name = {entry.name: entry for entry in self.entries}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._owns:
+            self._f.close()
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def get(self, name):
+        """按名称查找条目，不存在时返回None"""
+        return self._by_name.get(name)
+
+    def names(self):
+        return [entry.name for entry in self.entries]
+
+    def _read_exact(self, offset, size):
+        self._f.seek(offset)
+        data = self._f.read(size)
+        if len(data) != size:
+            raise ZipRewriteError("zip 文件被截断")
+        return data
+
+    def _read_central_directory(self):
+        size = self._f.seek(0, 2)
+        tail_size = min(size, 65536 + _EOCD.size)
+        tail = self._read_exact(size - tail_size, tail_size)
+        pos = tail.rfind(struct.pack('<I', _EOCD_SIG))
+        if pos < 0:
+            raise ZipRewriteError("找不到zip中央目录")
+        _, _, _, _, count, cd_size, cd_offset, _ = _EOCD.unpack_from(tail, pos)
+        eocd_offset = size - tail_size + pos
+        self.eocd_offset = eocd_offset
+        if _ZIP64_LIMIT in (cd_size, cd_offset) or count == 0xFFFF:
+            if eocd_offset >= _ZIP64_LOCATOR.size:
+                locator = self._read_exact(eocd_offset - _ZIP64_LOCATOR.size, _ZIP64_LOCATOR.size)
+                sig, _, zip64_offset, _ = _ZIP64_LOCATOR.unpack(locator)
+                if sig == _ZIP64_LOCATOR_SIG:
+                    record = self._read_exact(zip64_offset, _ZIP64_EOCD.size)
+                    _, _, _, _, _, _, _, count, cd_size, cd_offset = _ZIP64_EOCD.unpack(record)
+
+        self.cd_offset = cd_offset
+        self.cd_size = cd_size
+        data = self._read_exact(cd_offset, cd_size)
+        entries = []
+        pos = 0
+        for _ in range(count):
+            (sig, version_made, version_needed, flags, method, mtime, mdate, crc, csize, usize,
+             name_len, extra_len, comment_len, _, int_attr, ext_attr, offset) = _CENTRAL_HEADER.unpack_from(data, pos)
+            if sig != _CENTRAL_SIG:
+                raise ZipRewriteError("中央目录损坏")
+            pos += _CENTRAL_HEADER.size
+            name = data[pos:pos + name_len].decode('utf-8' if flags & UTF8_FLAG else 'cp437')
+            extra = data[pos + name_len:pos + name_len + extra_len]
+            comment = data[pos + name_len + extra_len:pos + name_len + extra_len + comment_len]
+            pos += name_len + extra_len + comment_len
+            if _ZIP64_LIMIT in (csize, usize, offset):
+                usize, csize, offset = _parse_zip64_extra(extra, usize, csize, offset)
+            entries.append(ZipEntry(
+                name, flags, method, mtime, mdate, crc, csize, usize, offset,
+                version_made, version_needed, int_attr, ext_attr,
+                _split_extra(extra, (_ZIP64_EXTRA_ID,)), comment))
+        return entries
+
+    def local_header(self, entry):
+        """读取条目的本地文件头
+
+        Returns:
+            tuple: (本地文件头字段, 文件名字节, 本地扩展字段, 数据起始偏移)
+        """
+        if entry._local is None:
+            fields = _LOCAL_HEADER.unpack(self._read_exact(entry.offset, _LOCAL_HEADER.size))
+            if fields[0] != _LOCAL_SIG:
+                raise ZipRewriteError(f"本地文件头损坏: {entry.name}")
+            name_len, extra_len = fields[9], fields[10]
+            tail = self._read_exact(entry.offset + _LOCAL_HEADER.size, name_len + extra_len)
+            data_offset = entry.offset + _LOCAL_HEADER.size + name_len + extra_len
+            entry._local = (fields, tail[:name_len], tail[name_len:], data_offset)
+        return entry._local
+
+    def data_offset(self, entry):
+        """条目压缩数据在文件中的起始位置"""
+        return self.local_header(entry)[3]
+
+    def descriptor(self, entry):
+        """读取条目压缩数据之后的数据描述符原始字节（没有时返回 b''）"""
+        if not entry.has_descriptor:
+            return b''
+        end = self.data_offset(entry) + entry.csize
+        zip64 = entry.csize >= _ZIP64_LIMIT or entry.usize >= _ZIP64_LIMIT
+        size = 20 if zip64 else 12
+        head = self._read_exact(end, 4)
+        if struct.unpack('<I', head)[0] == _DESCRIPTOR_SIG:
+            size += 4
+        return self._read_exact(end, size)
+
+    def window(self, entry):
+        """未压缩存储条目的数据区域视图（例如直接读取拆分包中的内部APK）"""
+        if entry.method != STORED:
+            raise ZipRewriteError(f"条目不是未压缩存储: {entry.name}")
+        return FileWindow(self._f, self.data_offset(entry), entry.csize)
+
+    def iter_raw(self, entry, chunk_size=_COPY_CHUNK):
+        """按块产生条目的原始压缩数据"""
+        self._f.seek(self.data_offset(entry))
+        remaining = entry.csize
+        while remaining:
+            chunk = self._f.read(min(chunk_size, remaining))
+            if not chunk:
+                raise ZipRewriteError(f"条目数据被截断: {entry.name}")
+            remaining -= len(chunk)
+            yield chunk
+
+    def read(self, name_or_entry):
+        """解压读取一个条目"""
+        entry = name_or_entry if isinstance(name_or_entry, ZipEntry) else self._by_name[name_or_entry]
+        raw = b''.join(self.iter_raw(entry))
+        if entry.method == STORED:
+            data = raw
+        elif entry.method == DEFLATED:
+            data = zlib.decompress(raw, -15)
+        else:
+            raise ZipRewriteError(f"不支持的压缩方式 {entry.method}: {entry.name}")
+        if zlib.crc32(data) != entry.crc:
+            raise ZipRewriteError(f"CRC 校验失败: {entry.name}")
+        return data
+
+
+class ZipRewriter:
+    """顺序写出zip，最后一次写出中央目录
+
+    Args:
+        path: 输出路径
+        align: 对齐规则，接收 (条目名, 压缩方式) 返回数据起始位置的对齐字节数（0表示不对齐）；
+            只对未压缩存储的条目生效，通过本地文件头的扩展字段填充
+    """
+
+    def __init__(self, path, align=None):
+        self.path = path
+        self.align = align
+        self._f = open(path, 'wb')
+        self._records = []
+        self._names = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __len__(self):
+        return len(self._records)
+
+    def _aligned_extra(self, name, method, offset, name_len, extra):
+        """按对齐规则调整本地扩展字段，使条目数据从对齐的位置开始"""
+        alignment = self.align(name, method) if self.align is not None and method == STORED else 0
+        if not alignment:
+            return extra
+        data_offset = offset + _LOCAL_HEADER.size + name_len
+        if (data_offset + len(extra)) % alignment == 0:
+            return extra
+        # 去掉原有的对齐字段和旧版 zipalign 的0填充，再追加新的对齐字段
+        extra = _split_extra(extra, (_ALIGNMENT_EXTRA_ID, 0))
+        padding = -(data_offset + len(extra) + 6) % alignment
+        return extra + struct.pack('<HHH', _ALIGNMENT_EXTRA_ID, 2 + padding, alignment) + bytes(padding)
+
+    def _add_record(self, entry, offset, name_bytes):
+        self._names.add(entry.name)
+        self._records.append((entry, offset, name_bytes))
+
+    def copy(self, source, entry, name=None):
+        """按原始字节复制一个条目（本地文件头、压缩数据和数据描述符）
+
+        Args:
+            source: ZipSource
+            entry: 源中的ZipEntry
+            name: 新的条目名，默认不变
+        """
+        fields, name_bytes, local_extra, _ = source.local_header(entry)
+        flags = entry.flags
+        if name is not None and name != entry.name:
+            name_bytes = name.encode('utf-8')
+            fields = fields[:2] + (fields[2] | UTF8_FLAG,) + fields[3:]
+            flags |= UTF8_FLAG
+        offset = self._f.tell()
+        local_extra = self._aligned_extra(name or entry.name, entry.method, offset, len(name_bytes), local_extra)
+        self._f.write(_LOCAL_HEADER.pack(*fields[:9], len(name_bytes), len(local_extra)))
+        self._f.write(name_bytes)
+        self._f.write(local_extra)
+        for chunk in source.iter_raw(entry):
+            self._f.write(chunk)
+        self._f.write(source.descriptor(entry))
+
+        copied = ZipEntry(name or entry.name, flags, entry.method,
+                          entry.time, entry.date, entry.crc, entry.csize, entry.usize, offset,
+                          entry.version_made, entry.version_needed, entry.int_attr, entry.ext_attr,
+                          entry.extra, entry.comment)
+        self._add_record(copied, offset, name_bytes)
+        return copied
+
+    def write(self, name, data, compress=True, timestamp=None, level=6):
+        """写入新的条目
+
+        Args:
+            name: 条目名
+            data: 未压缩的数据
+            compress: 是否使用deflate压缩
+            timestamp: 修改时间，None 表示 1980-01-01
+            level: 压缩级别
+        """
+        crc = zlib.crc32(data)
+        if compress:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+            payload = compressor.compress(data) + compressor.flush()
+            method = DEFLATED
+        else:
+            payload = data
+            method = STORED
+        mtime, mdate = dos_time(timestamp)
+        entry = ZipEntry(name, UTF8_FLAG, method, mtime, mdate, crc, len(payload), len(data), 0)
+        name_bytes = name.encode('utf-8')
+        extra = b''
+        csize, usize = entry.csize, entry.usize
+        if csize >= _ZIP64_LIMIT or usize >= _ZIP64_LIMIT:
+            extra = struct.pack('<HHQQ', _ZIP64_EXTRA_ID, 16, usize, csize)
+            csize = usize = _ZIP64_LIMIT
+            entry.version_needed = 45
+        entry.offset = self._f.tell()
+        extra = self._aligned_extra(name, method, entry.offset, len(name_bytes), extra)
+        self._f.write(_LOCAL_HEADER.pack(_LOCAL_SIG, entry.version_needed, entry.flags, method, mtime, mdate,
+                                         crc, csize, usize, len(name_bytes), len(extra)))
+        self._f.write(name_bytes)
+        self._f.write(extra)
+        self._f.write(payload)
+        self._add_record(entry, entry.offset, name_bytes)
+        return entry
+
+    def write_file(self, name, path, compress=True, level=6):
+        """写入本地文件作为新条目（保留修改时间）"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        return self.write(name, data, compress, os.path.getmtime(path), level)
+
+    def rewrite(self, source, replace=None, drop=(), inject=None, compress=None):
+        """复制源中的全部条目，同时替换、删除和插入条目
+
+        Args:
+            source: ZipSource
+            replace: {条目名: 新数据}，在原位置写入（沿用原压缩方式，除非指定compress）
+            drop: 要删除的条目名集合，或接收条目名返回bool的函数
+            inject: {条目名: 数据}，追加到末尾的新条目
+            compress: 替换/插入条目是否压缩，None 表示替换沿用原方式、插入时压缩
+        """
+        replace = dict(replace or {})
+        should_drop = drop if callable(drop) else set(drop).__contains__
+        for entry in source:
+            if entry.name in self or should_drop(entry.name):
+                continue
+            if entry.name in replace:
+                keep_method = entry.method != STORED if compress is None else compress
+                self.write(entry.name, replace.pop(entry.name), keep_method)
+            else:
+                self.copy(source, entry)
+        for name, data in list(replace.items()) + list((inject or {}).items()):
+            if name not in self:
+                self.write(name, data, True if compress is None else compress)
+
+    def close(self):
+        """一次顺序写出中央目录和目录结束记录"""
+        f = self._f
+        cd_offset = f.tell()
+        parts = []
+        for entry, offset, name_bytes in self._records:
+            csize, usize = entry.csize, entry.usize
+            zip64 = []
+            if usize >= _ZIP64_LIMIT:
+                zip64.append(usize)
+                usize = _ZIP64_LIMIT
+            if csize >= _ZIP64_LIMIT:
+                zip64.append(csize)
+                csize = _ZIP64_LIMIT
+            if offset >= _ZIP64_LIMIT:
+                zip64.append(offset)
+                offset = _ZIP64_LIMIT
+            extra = entry.extra
+            version_needed = entry.version_needed
+            if zip64:
+                extra = struct.pack(f'<HH{len(zip64)}Q', _ZIP64_EXTRA_ID, 8 * len(zip64), *zip64) + extra
+                version_needed = max(version_needed, 45)
+            parts.append(_CENTRAL_HEADER.pack(
+                _CENTRAL_SIG, entry.version_made, version_needed, entry.flags, entry.method,
+                entry.time, entry.date, entry.crc, csize, usize, len(name_bytes), len(extra),
+                len(entry.comment), 0, entry.int_attr, entry.ext_attr, offset))
+            parts.append(name_bytes)
+            parts.append(extra)
+            parts.append(entry.comment)
+        f.write(b''.join(parts))
+        cd_size = f.tell() - cd_offset
+        count = len(self._records)
+        if count >= 0xFFFF or cd_offset >= _ZIP64_LIMIT or cd_size >= _ZIP64_LIMIT:
+            zip64_offset = f.tell()
+            f.write(_ZIP64_EOCD.pack(_ZIP64_EOCD_SIG, _ZIP64_EOCD.size - 12, 45, 45, 0, 0,
+                                     count, count, cd_size, cd_offset))
+            f.write(_ZIP64_LOCATOR.pack(_ZIP64_LOCATOR_SIG, 0, zip64_offset, 1))
+            f.write(_EOCD.pack(_EOCD_SIG, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+                               min(cd_size, _ZIP64_LIMIT), min(cd_offset, _ZIP64_LIMIT), 0))
+        else:
+            f.write(_EOCD.pack(_EOCD_SIG, 0, 0, count, count, cd_size, cd_offset, 0))
+        f.close()
+
+    def abort(self):
+        """放弃写出并删除不完整的输出文件"""
+        self._f.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+__all__ = ['ZipRewriteError', 'FileWindow', 'ZipEntry', 'ZipSource', 'ZipRewriter', 'dos_time', 'is_signature_file',
+           'STORED', 'DEFLATED', 'DATA_DESCRIPTOR_FLAG']
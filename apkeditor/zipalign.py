@@ -0,0 +1,163 @@
+# zipalign.py
+"""纯Python的 zipalign（不依赖Qt和SDK）
+
+未压缩存储的条目按4字节对齐（资源表等可以直接 mmap），未压缩的 .so 按内存页对齐
+（默认16KB，同时满足4KB页的设备），使系统可以直接从APK中加载原生库。
+对齐通过本地文件头扩展字段中的 0xD935 对齐记录填充，条目数据按原始字节复制，不重新压缩。
+
+流式合并和补丁在写出时已经按这里的规则对齐；签名前用 ensure_aligned 检查，
+只在输入未对齐时才重写一遍，不需要单独运行 SDK 的 zipalign。
+"""
+
+import os
+import logging
+import tempfile
+
+from .zip_rewrite import ZipSource, ZipRewriter, ZipRewriteError, STORED
+
+logger = logging.getLogger(__name__)
+
+# 未压缩条目的对齐字节数
+STORED_ALIGNMENT = 4
+# 可选的原生库页大小
+PAGE_SIZES = (4096, 16384)
+DEFAULT_PAGE_SIZE = 16384
+
+
+class ZipAlignError(Exception):
+    """对齐失败"""
+
+
+def alignment_for(name, method, page_size=DEFAULT_PAGE_SIZE):
+    """条目数据起始位置需要的对齐字节数
+
+    Returns:
+        int: 对齐字节数，压缩存储的条目返回0
+    """
+    if method != STORED:
+        return 0
+    if name.endswith('.so'):
+        return page_size
+    return STORED_ALIGNMENT
+
+
+def aligner(page_size=DEFAULT_PAGE_SIZE):
+    """ZipRewriter 使用的对齐规则"""
+    if page_size not in PAGE_SIZES:
+        raise ZipAlignError(f"不支持的页大小: {page_size}，可选 {', '.join(map(str, PAGE_SIZES))}")
+    return lambda name, method: alignment_for(name, method, page_size)
+
+
+def check_alignment(path, page_size=DEFAULT_PAGE_SIZE):
+    """只检查对齐，不写出
+
+    读取中央目录，以及未压缩条目的本地文件头（数据起始位置取决于本地扩展字段的长度，
+    中央目录中没有这个值）；压缩条目的数据不读取。
+
+    Returns:
+        list: 未对齐的条目 (条目名, 数据偏移, 需要的对齐字节数)
+
+    Raises:
+        ZipAlignError: 无法读取输入
+    """
+    problems = []
+    try:
+        with ZipSource(path) as source:
+            for entry in source:
+                alignment = alignment_for(entry.name, entry.method, page_size)
+                if not alignment:
+                    continue
+                offset = source.data_offset(entry)
+                if offset % alignment:
+                    problems.append((entry.name, offset, alignment))
+    except (OSError, ZipRewriteError) as e:
+        raise ZipAlignError(f"无法读取 {path}: {e}")
+    return problems
+
+
+def align_apk(input_path, output_path, page_size=DEFAULT_PAGE_SIZE):
+    """写出对齐后的APK（条目按原始字节复制）
+
+    注意：重写会去掉APK签名分块，已签名的APK对齐后需要重新签名。
+
+    Returns:
+        int: 写出的条目数
+    """
+    if os.path.abspath(input_path) == os.path.abspath(output_path):
+        raise ZipAlignError("输出路径不能与输入相同，原地对齐请使用 ensure_aligned")
+    try:
+        with ZipSource(input_path) as source, ZipRewriter(output_path, align=aligner(page_size)) as out:
+            for entry in source:
+                if entry.name not in out:
+                    out.copy(source, entry)
+            return len(out)
+    except (OSError, ZipRewriteError) as e:
+        raise ZipAlignError(str(e))
+
+
+def _align_to(path, target, page_size):
+    """对齐 path 并写到 target（先写入同目录的临时文件再替换，失败时不留下半个文件）"""
+    fd, temp_path = tempfile.mkstemp(prefix=".align-", suffix=".apk", dir=os.path.dirname(os.path.abspath(target)))
+    os.close(fd)
+    try:
+        align_apk(path, temp_path, page_size)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def ensure_aligned(path, page_size=DEFAULT_PAGE_SIZE, log=None):
+    """签名前的对齐阶段：已对齐时不做任何写入，否则原地重写一次
+
+    Returns:
+        bool: 是否重写了文件
+
+    Raises:
+        ZipAlignError: 无法读取或无法写回（例如目录只读、文件被占用）
+    """
+    log = log or logger.info
+    problems = check_alignment(path, page_size)
+    if not problems:
+        return False
+    log(f"对齐: {len(problems)} 个未压缩条目未对齐，重写 {os.path.basename(path)}")
+    try:
+        _align_to(path, path, page_size)
+    except OSError as e:
+        raise ZipAlignError(f"无法重写 {path}: {e}")
+    return True
+
+
+def align_for_signing(input_path, output_path=None, page_size=DEFAULT_PAGE_SIZE, log=None):
+    """签名前对齐，不修改签名输出以外的文件
+
+    签名输出与输入相同（原地签名）时按 ensure_aligned 原地重写；输出是另一个文件时，
+    未对齐的输入对齐后写到输出路径，由调用方改为原地签名该文件，输入保持不变。
+
+    Args:
+        input_path: 待签名的APK
+        output_path: 签名输出的APK，None表示原地签名
+
+    Returns:
+        str: 应交给签名工具的输入路径
+
+    Raises:
+        ZipAlignError: 无法读取或写出
+    """
+    log = log or logger.info
+    if not output_path or os.path.abspath(output_path) == os.path.abspath(input_path):
+        ensure_aligned(input_path, page_size, log)
+        return input_path
+    problems = check_alignment(input_path, page_size)
+    if not problems:
+        return input_path
+    log(f"对齐: {len(problems)} 个未压缩条目未对齐，对齐后写到 {output_path}")
+    try:
+        _align_to(input_path, output_path, page_size)
+    except OSError as e:
+        raise ZipAlignError(f"无法写出 {output_path}: {e}")
+    return output_path
+
+
+__all__ = ['ZipAlignError', 'alignment_for', 'aligner', 'check_alignment', 'align_apk', 'ensure_aligned',
+           'align_for_signing', 'STORED_ALIGNMENT', 'PAGE_SIZES', 'DEFAULT_PAGE_SIZE']
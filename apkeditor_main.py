@@ -25,16 +25,36 @@ def get_app_root():
 # 添加当前目录到Python路径，确保可以导入apkeditor包
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+def _start_profiler():
+    """处理 --profile-startup[=结果.json] 参数，开启启动耗时分析
+    
+    Returns:
+        tuple: (StartupProfiler实例或None, JSON输出路径或None)
+    """
+    arg = next((a for a in sys.argv[1:] if a.split('=')[0] == '--profile-startup'), None)
+    if arg is None:
+        return None, None
+    sys.argv.remove(arg)
+    from apkeditor.startup_profile import StartupProfiler
+    profiler = StartupProfiler()
+    profiler.install()
+    return profiler, (arg.split('=', 1)[1] if '=' in arg else None)
+
 def main():
     """主函数"""
+    profiler, profile_json = _start_profiler()
     try:
         # 尝试导入PyQt5
         from PyQt5.QtWidgets import QApplication
-        from PyQt5.QtCore import Qt
+        from PyQt5.QtCore import Qt, QTimer
         from PyQt5.QtGui import QIcon
+        if profiler:
+            profiler.mark("pyqt5_imported")
         
         # 设置应用程序信息
         app = QApplication(sys.argv)
+        if profiler:
+            profiler.mark("qapplication_created")
         app.setApplicationName("APKEditor")
         app.setApplicationVersion("1.4.5")
         
@@ -68,7 +88,18 @@ def main():
         # 尝试导入并初始化主窗口
         try:
             from apkeditor.gui import APKEditorGUI
+            if profiler:
+                profiler.mark("gui_imported")
             window = APKEditorGUI()
+            if profiler:
+                profiler.mark("window_created")
+                
+                # 首次绘制后输出报告并退出，便于在脚本中跟踪冷启动耗时
+                def on_first_paint():
+                    profiler.uninstall()
+                    profiler.report(json_path=profile_json)
+                    QTimer.singleShot(0, app.quit)
+                profiler.watch_first_paint(window, on_first_paint)
             window.show()
             
             # 记录启动成功
@@ -0,0 +1,115 @@
+// JvmWorker.java
+// 常驻JVM工作进程：只加载一次 APKEditor / apksigner jar，循环执行 Python 端发来的任务
+//
+// 协议（标准输入，每行一个命令，UTF-8）：
+//   RUN\t<任务ID>\t<base64(jar路径)>\t<base64(参数1)>\t<base64(参数2)>...
+//   EXIT
+// 输出（标准输出，stderr 已合并）：
+//   任务输出逐行原样写出，任务结束时写出 "\0APKEDITOR-WORKER-END\t<任务ID>\t<退出码>"
+//   启动完成时写出 "\0APKEDITOR-WORKER-READY"
+
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.lang.reflect.Modifier;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.util.Base64;
+import java.util.HashMap;
+import java.util.Map;
+import java.util.jar.JarFile;
+
+public class JvmWorker {
+    static final String READY = "\u0000APKEDITOR-WORKER-READY";
+    static final String END = "\u0000APKEDITOR-WORKER-END";
+
+    // jar路径 -> 入口方法（优先 int execute(String[])，否则 main(String[])）
+    private static final Map<String, Method> ENTRIES = new HashMap<>();
+
+    public static void main(String[] args) throws Exception {
+        PrintStream out = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        System.setOut(out);
+        System.setErr(out);
+
+        // 预加载启动参数中给出的jar
+        for (String jar : args) {
+            try {
+                entry(jar);
+            } catch (Throwable t) {
+                out.println("[worker] 预加载失败: " + jar + " - " + t);
+            }
+        }
+        out.println(READY);
+
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        String line;
+        while ((line = in.readLine()) != null) {
+            if (line.equals("EXIT")) {
+                break;
+            }
+            if (!line.startsWith("RUN\t")) {
+                continue;
+            }
+            String[] parts = line.split("\t", -1);
+            String jobId = parts[1];
+            String jar = decode(parts[2]);
+            String[] argv = new String[parts.length - 3];
+            for (int i = 0; i < argv.length; i++) {
+                argv[i] = decode(parts[i + 3]);
+            }
+            int code = run(jar, argv, out);
+            out.flush();
+            out.println(END + "\t" + jobId + "\t" + code);
+        }
+    }
+
+    private static String decode(String value) {
+        return new String(Base64.getDecoder().decode(value), StandardCharsets.UTF_8);
+    }
+
+    private static int run(String jar, String[] argv, PrintStream out) {
+        try {
+            Object result = entry(jar).invoke(null, (Object) argv);
+            return result instanceof Integer ? (Integer) result : 0;
+        } catch (InvocationTargetException e) {
+            e.getCause().printStackTrace(out);
+            return 1;
+        } catch (Throwable t) {
+            t.printStackTrace(out);
+            return 1;
+        }
+    }
+
+    private static synchronized Method entry(String jar) throws Exception {
+        Method method = ENTRIES.get(jar);
+        if (method != null) {
+            return method;
+        }
+        String mainClass;
+        try (JarFile jarFile = new JarFile(jar)) {
+            mainClass = jarFile.getManifest().getMainAttributes().getValue("Main-Class");
+        }
+        URLClassLoader loader = new URLClassLoader(
+                new URL[]{new File(jar).toURI().toURL()}, JvmWorker.class.getClassLoader());
+        Class<?> cls = Class.forName(mainClass, true, loader);
+        try {
+            method = cls.getMethod("execute", String[].class);
+            if (!Modifier.isStatic(method.getModifiers()) || method.getReturnType() != int.class) {
+                method = null;
+            }
+        } catch (NoSuchMethodException e) {
+            method = null;
+        }
+        if (method == null) {
+            method = cls.getMethod("main", String[].class);
+        }
+        ENTRIES.put(jar, method);
+        return method;
+    }
+}
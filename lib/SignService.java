@@ -0,0 +1,280 @@
+// SignService.java
+// 签名服务：只加载并解锁一次密钥，之后并发签名 Python 端发来的APK
+//
+// 启动参数：
+//   java SignService <apksigner.jar> [线程数]   会话模式
+//   java SignService data                       一次性签名一段数据（内置 V4 签名等使用）
+// 密钥参数从标准输入读取（避免密码出现在命令行中），每行 "名称=base64值"，以空行结束：
+//   keystore / alias / ks_pass / key_pass     密钥库方式（key_pass 省略时与 ks_pass 相同）
+//   key / key_pass / cert                     PKCS#8 私钥 + X.509 证书方式
+//   algorithm / data                          data 模式：Java 签名算法名和待签名数据
+// 会话协议（标准输入，每行一个命令，字段为base64）：
+//   SIGN\t<任务ID>\t<输入APK>\t<输出APK>\t<签名版本，例如 v1,v2,v3>
+//   DATA\t<任务ID>\t<签名算法>\t<数据>
+//   EXIT
+// 输出（标准输出）：
+//   "\0APKEDITOR-SIGN-READY\t<证书主题>" 密钥解锁成功；"\0APKEDITOR-SIGN-FAILED\t<错误>" 后退出
+//   "\0APKEDITOR-SIGN-END\t<任务ID>\t<退出码>\t<错误信息或签名>"
+
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.FileDescriptor;
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.InputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.StandardCopyOption;
+import java.security.KeyFactory;
+import java.security.KeyStore;
+import java.security.PrivateKey;
+import java.security.Signature;
+import java.security.cert.Certificate;
+import java.security.cert.CertificateFactory;
+import java.security.cert.X509Certificate;
+import java.security.spec.PKCS8EncodedKeySpec;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.Base64;
+import java.util.Collections;
+import java.util.HashMap;
+import java.util.List;
+import java.util.Map;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.TimeUnit;
+import javax.crypto.Cipher;
+import javax.crypto.EncryptedPrivateKeyInfo;
+import javax.crypto.SecretKeyFactory;
+import javax.crypto.spec.PBEKeySpec;
+
+public class SignService {
+    static final String READY = "\u0000APKEDITOR-SIGN-READY";
+    static final String FAILED = "\u0000APKEDITOR-SIGN-FAILED";
+    static final String END = "\u0000APKEDITOR-SIGN-END";
+
+    private static PrintStream out;
+    private static PrivateKey privateKey;
+    private static List<X509Certificate> certificates;
+    private static String signerName;
+    private static ClassLoader apksig;
+
+    public static void main(String[] args) throws Exception {
+        out = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        if (args.length > 0 && args[0].equals("data")) {
+            signDataOnce(in);
+            return;
+        }
+
+        try {
+            loadKey(readParams(in));
+            apksig = new URLClassLoader(new URL[]{new File(args[0]).toURI().toURL()},
+                    SignService.class.getClassLoader());
+            Class.forName("com.android.apksig.ApkSigner", true, apksig);
+        } catch (Throwable t) {
+            out.println(FAILED + "\t" + encode(message(t)));
+            System.exit(1);
+        }
+        out.println(READY + "\t" + encode(certificates.get(0).getSubjectX500Principal().getName()));
+
+        int threads = args.length > 1 ? Integer.parseInt(args[1]) : Runtime.getRuntime().availableProcessors();
+        ExecutorService pool = Executors.newFixedThreadPool(Math.max(1, threads));
+        String line;
+        while ((line = in.readLine()) != null) {
+            if (line.equals("EXIT")) {
+                break;
+            }
+            String[] parts = line.split("\t", -1);
+            if (parts.length < 2) {
+                continue;
+            }
+            if (parts[0].equals("SIGN") && parts.length >= 5) {
+                pool.execute(() -> finish(parts[1], () -> {
+                    signApk(decodeText(parts[2]), decodeText(parts[3]), decodeText(parts[4]));
+                    return "";
+                }));
+            } else if (parts[0].equals("DATA") && parts.length >= 4) {
+                pool.execute(() -> finish(parts[1], () -> Base64.getEncoder().encodeToString(
+                        sign(decodeText(parts[2]), Base64.getDecoder().decode(parts[3])))));
+            }
+        }
+        pool.shutdown();
+        pool.awaitTermination(1, TimeUnit.HOURS);
+    }
+
+    interface Task {
+        String run() throws Exception;
+    }
+
+    private static void finish(String jobId, Task task) {
+        String line;
+        try {
+            line = END + "\t" + jobId + "\t0\t" + encode(task.run());
+        } catch (Throwable t) {
+            line = END + "\t" + jobId + "\t1\t" + encode(message(t));
+        }
+        synchronized (out) {
+            out.println(line);
+        }
+    }
+
+    private static void signDataOnce(BufferedReader in) {
+        try {
+            Map<String, byte[]> params = readParams(in);
+            loadKey(params);
+            out.println(Base64.getEncoder().encodeToString(sign(text(params, "algorithm"), require(params, "data"))));
+        } catch (Throwable t) {
+            System.err.println("签名失败: " + message(t));
+            System.exit(1);
+        }
+    }
+
+    private static byte[] sign(String algorithm, byte[] data) throws Exception {
+        Signature signature = Signature.getInstance(algorithm);
+        signature.initSign(privateKey);
+        signature.update(data);
+        return signature.sign();
+    }
+
+    private static void signApk(String input, String output, String schemes) throws Exception {
+        List<String> enabled = Arrays.asList(schemes.split(","));
+        Class<?> configBuilderClass = Class.forName("com.android.apksig.ApkSigner$SignerConfig$Builder", true, apksig);
+        Object configBuilder = configBuilderClass.getConstructor(String.class, PrivateKey.class, List.class)
+                .newInstance(signerName, privateKey, certificates);
+        Object config = configBuilderClass.getMethod("build").invoke(configBuilder);
+
+        // 原地签名时先写到临时文件，成功后替换
+        File outputFile = new File(output);
+        File temp = new File(output + ".signing");
+        Class<?> builderClass = Class.forName("com.android.apksig.ApkSigner$Builder", true, apksig);
+        Object builder = builderClass.getConstructor(List.class).newInstance(Collections.singletonList(config));
+        builderClass.getMethod("setInputApk", File.class).invoke(builder, new File(input));
+        builderClass.getMethod("setOutputApk", File.class).invoke(builder, temp);
+        for (int version = 1; version <= 4; version++) {
+            builderClass.getMethod("setV" + version + "SigningEnabled", boolean.class)
+                    .invoke(builder, enabled.contains("v" + version));
+        }
+        File idsig = new File(output + ".idsig");
+        if (enabled.contains("v4")) {
+            builderClass.getMethod("setV4SignatureOutputFile", File.class).invoke(builder, idsig);
+        }
+        Object signer = builderClass.getMethod("build").invoke(builder);
+        try {
+            signer.getClass().getMethod("sign").invoke(signer);
+            Files.move(temp.toPath(), outputFile.toPath(), StandardCopyOption.REPLACE_EXISTING);
+        } finally {
+            temp.delete();
+        }
+    }
+
+    private static String message(Throwable t) {
+        while (t instanceof InvocationTargetException && t.getCause() != null) {
+            t = t.getCause();
+        }
+        return t.toString();
+    }
+
+    private static String encode(String value) {
+        return Base64.getEncoder().encodeToString(value.getBytes(StandardCharsets.UTF_8));
+    }
+
+    private static String decodeText(String value) {
+        return new String(Base64.getDecoder().decode(value), StandardCharsets.UTF_8);
+    }
+
+    private static Map<String, byte[]> readParams(BufferedReader reader) throws Exception {
+        Map<String, byte[]> params = new HashMap<>();
+        String line;
+        while ((line = reader.readLine()) != null && !line.isEmpty()) {
+            int eq = line.indexOf('=');
+            if (eq > 0) {
+                params.put(line.substring(0, eq), Base64.getDecoder().decode(line.substring(eq + 1)));
+            }
+        }
+        return params;
+    }
+
+    private static byte[] require(Map<String, byte[]> params, String name) {
+        byte[] value = params.get(name);
+        if (value == null) {
+            throw new IllegalArgumentException("缺少参数: " + name);
+        }
+        return value;
+    }
+
+    private static String text(Map<String, byte[]> params, String name) {
+        return new String(require(params, name), StandardCharsets.UTF_8);
+    }
+
+    private static void loadKey(Map<String, byte[]> params) throws Exception {
+        String name;
+        if (params.containsKey("keystore")) {
+            char[] password = text(params, "ks_pass").toCharArray();
+            char[] keyPassword = params.containsKey("key_pass") ? text(params, "key_pass").toCharArray() : password;
+            // Java 9+ 自动识别 JKS / PKCS12
+            KeyStore store = KeyStore.getInstance(new File(text(params, "keystore")), password);
+            String alias = params.containsKey("alias") ? text(params, "alias") : store.aliases().nextElement();
+            privateKey = (PrivateKey) store.getKey(alias, keyPassword);
+            if (privateKey == null) {
+                throw new IllegalArgumentException("密钥库中没有别名: " + alias);
+            }
+            certificates = new ArrayList<>();
+            for (Certificate certificate : store.getCertificateChain(alias)) {
+                certificates.add((X509Certificate) certificate);
+            }
+            Arrays.fill(password, '\0');
+            Arrays.fill(keyPassword, '\0');
+            name = alias;
+        } else {
+            File keyFile = new File(text(params, "key"));
+            privateKey = loadPkcs8(keyFile, params.get("key_pass"));
+            certificates = new ArrayList<>();
+            if (params.containsKey("cert")) {
+                try (InputStream stream = new FileInputStream(text(params, "cert"))) {
+                    for (Certificate certificate : CertificateFactory.getInstance("X.509").generateCertificates(stream)) {
+                        certificates.add((X509Certificate) certificate);
+                    }
+                }
+            }
+            name = keyFile.getName().replaceFirst("\\.[^.]*$", "");
+        }
+        signerName = v1SignerName(name);
+    }
+
+    // 与 apksigner 相同：大写，非法字符替换为下划线，最多8个字符
+    private static String v1SignerName(String name) {
+        String result = name.toUpperCase().replaceAll("[^A-Z0-9_-]", "_");
+        if (result.isEmpty()) {
+            result = "CERT";
+        }
+        return result.length() > 8 ? result.substring(0, 8) : result;
+    }
+
+    private static PrivateKey loadPkcs8(File file, byte[] password) throws Exception {
+        byte[] encoded = Files.readAllBytes(file.toPath());
+        if (password != null && password.length > 0) {
+            EncryptedPrivateKeyInfo info = new EncryptedPrivateKeyInfo(encoded);
+            SecretKeyFactory factory = SecretKeyFactory.getInstance(info.getAlgName());
+            PBEKeySpec spec = new PBEKeySpec(new String(password, StandardCharsets.UTF_8).toCharArray());
+            Cipher cipher = Cipher.getInstance(info.getAlgName());
+            cipher.init(Cipher.DECRYPT_MODE, factory.generateSecret(spec), info.getAlgParameters());
+            encoded = info.getKeySpec(cipher).getEncoded();
+            spec.clearPassword();
+        }
+        PKCS8EncodedKeySpec spec = new PKCS8EncodedKeySpec(encoded);
+        for (String algorithm : new String[] {"RSA", "EC", "DSA"}) {
+            try {
+                return KeyFactory.getInstance(algorithm).generatePrivate(spec);
+            } catch (Exception ignored) {
+                // 尝试下一种算法
+            }
+        }
+        throw new IllegalArgumentException("无法识别的私钥格式");
+    }
+}